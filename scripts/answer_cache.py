@@ -0,0 +1,515 @@
+"""
+Semantic Answer Cache for Groww Mutual Fund RAG System
+
+In-memory cache of final answers keyed by the query embedding. A new query
+whose embedding has cosine similarity >= threshold with a cached query gets
+the cached answer, skipping retrieval, reranking and generation
+("expense ratio of HDFC ELSS" / "HDFC tax saver TER").
+
+Safety rules:
+    - Scheme guard: an entry only matches queries naming the same scheme(s)
+      and plan (Direct / Regular). Questions about different schemes embed
+      very close together, so similarity alone is not enough
+      (architecture.md §10.1).
+    - Freshness: ingestion_summary.json is re-checked (one stat() at most
+      every CHECK_INTERVAL seconds). When processed_at changes, entries whose
+      source documents changed checksum or disappeared are dropped, and so
+      are entries recorded without sources.
+    - Eviction: least recently used entry when full; entries older than the
+      TTL are dropped on access.
+
+cached_answer() puts the cache in front of a Retriever and an answer
+generator: the query is encoded once, a hit skips search and generation, and
+a fresh answer is stored with the source files of the chunks it was built on.
+QueryPipeline (query_pipeline.py) does the same between its encode and
+search stages.
+
+Usage:
+    python scripts/answer_cache.py queries.txt                  # Replay queries, report hit rate
+    python scripts/answer_cache.py queries.txt --thresholds 0.9 0.95
+    python scripts/answer_cache.py --test                       # Built-in test cases (synthetic store)
+"""
+
+import os
+import sys
+import json
+import time
+import tempfile
+import argparse
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Any, Callable, Optional, Tuple
+
+import faiss
+import numpy as np
+
+# Local imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from scripts.retriever import (
+    Retriever, Filters, load_ingestion_summary, SUMMARY_PATH, DEFAULT_EMBEDDING_MODEL, DEFAULT_TOP_K
+)
+from scripts.metadata_store import write_chunk_store, CHUNK_STORE_DIR_NAME
+from scripts.schemes import detect_schemes, normalize_text
+from scripts.query_expansion import prepare_query
+
+# Configuration
+DEFAULT_THRESHOLD = 0.95  # Cosine similarity for a cache hit
+DEFAULT_MAX_ENTRIES = 10_000  # ~40 MB of float32 1024-d query vectors
+DEFAULT_TTL_SECONDS = 24 * 3600  # NAV-dependent answers go stale daily
+CHECK_INTERVAL = 1.0  # Seconds between ingestion summary stat() checks
+INITIAL_CAPACITY = 256
+
+
+def guard_key(query: str) -> Tuple[Tuple[str, ...], Optional[str]]:
+    """Schemes and plan a query is about; only entries with the same key can match."""
+    text = f" {normalize_text(query)} "
+    plan = "direct" if " direct " in text else "regular" if " regular " in text else None
+    return tuple(detect_schemes(query)), plan
+
+
+class AnswerCache:
+    """
+    Embedding-keyed answer cache with LRU / TTL eviction and source-based invalidation.
+
+    Args:
+        dim: Query embedding dimension
+        threshold: Minimum cosine similarity for a hit (embeddings must be normalised)
+        max_entries: Entries kept before LRU eviction
+        ttl_seconds: Maximum entry age (None: no expiry)
+        summary_path: ingestion_summary.json to watch (None: no invalidation)
+        clock: Time source, injectable for replay / benchmarks
+    """
+
+    def __init__(
+        self,
+        dim: int = 1024,
+        threshold: float = DEFAULT_THRESHOLD,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        ttl_seconds: Optional[float] = DEFAULT_TTL_SECONDS,
+        summary_path: Optional[Path] = SUMMARY_PATH,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.dim = dim
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.summary_path = Path(summary_path) if summary_path is not None else None
+        self.clock = clock
+
+        capacity = min(INITIAL_CAPACITY, max_entries)
+        self._vectors = np.zeros((capacity, dim), dtype=np.float32)
+        self._guards = np.full(capacity, -1, dtype=np.int32)  # -1 = free slot
+        self._guard_codes: Dict[Tuple, int] = {}
+        self._entries: "OrderedDict[int, Dict[str, Any]]" = OrderedDict()  # slot -> entry, LRU first
+        self._free: List[int] = list(range(capacity - 1, -1, -1))
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        self.latency_saved_ms = 0.0
+
+        self._summary_signature = None
+        self._processed_at = None
+        self._checksums: Dict[str, str] = {}
+        self._next_check = 0.0
+        self._check_summary()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    # ------------------------------------------------------------------ #
+    # Freshness
+    # ------------------------------------------------------------------ #
+
+    def _check_summary(self) -> None:
+        """Reload the ingestion summary if it changed and drop stale entries."""
+        if self.summary_path is None:
+            return
+        now = self.clock()
+        if now < self._next_check:
+            return
+        self._next_check = now + CHECK_INTERVAL
+
+        try:
+            stat = os.stat(self.summary_path)
+            signature = (stat.st_size, stat.st_mtime_ns)
+        except FileNotFoundError:
+            signature = None
+        if signature == self._summary_signature:
+            return
+        self._summary_signature = signature
+
+        summary = load_ingestion_summary(self.summary_path)
+        processed_at = summary.get("processed_at")
+        checksums = summary.get("source_checksums", {})
+        if processed_at != self._processed_at:
+            stale = [
+                slot for slot, entry in self._entries.items()
+                if not entry["sources"] or any(
+                    checksums.get(source) != checksum for source, checksum in entry["sources"].items()
+                )
+            ]
+            for slot in stale:
+                self._remove(slot)
+            self.invalidations += len(stale)
+        self._processed_at = processed_at
+        self._checksums = checksums
+
+    def invalidate(self, sources: Optional[List[str]] = None) -> int:
+        """
+        Drop entries citing any of the given source files (all entries if None).
+
+        Returns:
+            Number of entries dropped
+        """
+        if sources is None:
+            stale = list(self._entries)
+        else:
+            sources = set(sources)
+            stale = [slot for slot, entry in self._entries.items() if sources & entry["sources"].keys()]
+        for slot in stale:
+            self._remove(slot)
+        self.invalidations += len(stale)
+        return len(stale)
+
+    # ------------------------------------------------------------------ #
+    # Storage
+    # ------------------------------------------------------------------ #
+
+    def _remove(self, slot: int) -> None:
+        del self._entries[slot]
+        self._guards[slot] = -1
+        self._free.append(slot)
+
+    def _allocate(self) -> int:
+        if not self._free and len(self._vectors) < self.max_entries:
+            old = len(self._vectors)
+            capacity = min(old * 2, self.max_entries)
+            self._vectors = np.concatenate([self._vectors, np.zeros((capacity - old, self.dim), np.float32)])
+            self._guards = np.concatenate([self._guards, np.full(capacity - old, -1, np.int32)])
+            self._free.extend(range(capacity - 1, old - 1, -1))
+        if not self._free:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+        return self._free.pop()
+
+    def _match(self, embedding: np.ndarray, guard: Tuple) -> Tuple[Optional[int], float]:
+        """Best slot with the same guard key, and its similarity."""
+        code = self._guard_codes.get(guard)
+        if code is None:
+            return None, 0.0
+        slots = np.flatnonzero(self._guards == code)
+        if len(slots) == 0:
+            return None, 0.0
+        scores = self._vectors[slots] @ embedding
+        best = int(np.argmax(scores))
+        return int(slots[best]), float(scores[best])
+
+    # ------------------------------------------------------------------ #
+    # Lookups
+    # ------------------------------------------------------------------ #
+
+    def get(self, query: str, embedding: np.ndarray) -> Optional[Dict[str, Any]]:
+        """
+        Cached answer for a query, or None.
+
+        Args:
+            query: User query (for the scheme / plan guard)
+            embedding: Normalised query embedding
+        """
+        self._check_summary()
+        embedding = np.asarray(embedding, dtype=np.float32).reshape(-1)
+        slot, score = self._match(embedding, guard_key(query))
+
+        if slot is not None and score >= self.threshold:
+            entry = self._entries[slot]
+            if self.ttl_seconds is not None and self.clock() - entry["created_at"] > self.ttl_seconds:
+                self._remove(slot)
+                self.expirations += 1
+            else:
+                self._entries.move_to_end(slot)
+                self.hits += 1
+                self.latency_saved_ms += entry["answer"].get("latency_ms", 0) or 0
+                return {**entry["answer"], "cache_similarity": score, "cached_query": entry["query"]}
+
+        self.misses += 1
+        return None
+
+    def put(
+        self,
+        query: str,
+        embedding: np.ndarray,
+        answer: Dict[str, Any],
+        sources: Optional[List[str]] = None
+    ) -> None:
+        """
+        Cache an answer.
+
+        Args:
+            query: User query
+            embedding: Normalised query embedding
+            answer: Response to return on later hits (e.g. the §9.1 record's final_response)
+            sources: Source files the answer was grounded on; their current
+                checksums decide when the entry goes stale
+        """
+        self._check_summary()
+        embedding = np.asarray(embedding, dtype=np.float32).reshape(-1)
+        guard = guard_key(query)
+        code = self._guard_codes.setdefault(guard, len(self._guard_codes))
+
+        # A near-duplicate is replaced rather than stored twice
+        slot, score = self._match(embedding, guard)
+        if slot is not None and score >= self.threshold:
+            self._remove(slot)
+        slot = self._allocate()
+
+        self._vectors[slot] = embedding
+        self._guards[slot] = code
+        self._entries[slot] = {
+            "query": query,
+            "answer": answer,
+            "sources": {source: self._checksums.get(source) for source in (sources or [])},
+            "created_at": self.clock(),
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        """Return cache usage and hit-rate statistics."""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "threshold": self.threshold,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+            "latency_saved_ms": self.latency_saved_ms,
+        }
+
+
+def cached_answer(
+    query: str,
+    retriever: Retriever,
+    generate: Callable[[str, List[Dict[str, Any]]], str],
+    cache: AnswerCache,
+    k: int = DEFAULT_TOP_K,
+    filters: Optional[Filters] = None
+) -> Dict[str, Any]:
+    """
+    Answer a query, from the cache when a near-duplicate was answered before.
+
+    Args:
+        query: User query
+        retriever: Retriever used to encode the query and, on a miss, search
+        generate: Answer generation, generate(query, chunks) -> response text
+        cache: Answer cache (dim must match the retriever's encoder)
+        k: Chunks retrieved on a miss
+        filters: Metadata filters for the search
+
+    Returns:
+        Answer dict ("final_response", "sources", "latency_ms") plus
+        "cache_hit", and on a hit "cache_similarity" and "cached_query"
+    """
+    start = time.perf_counter()
+    vector = retriever.encode_queries([query])
+    cached = cache.get(query, vector[0])
+    if cached is not None:
+        return {**cached, "cache_hit": True}
+
+    chunks = retriever.search_vectors(vector, k, filters)[0]
+    sources = sorted({chunk["source_file"] for chunk in chunks if chunk.get("source_file")})
+    answer = {
+        "final_response": generate(query, chunks),
+        "sources": sources,
+        "latency_ms": round((time.perf_counter() - start) * 1000, 3),
+    }
+    cache.put(query, vector[0], answer, sources)
+    return {**answer, "cache_hit": False}
+
+
+class _LookupEncoder:
+    """Test encoder returning a fixed unit vector per query, keyed on the text QueryEncoder passes in."""
+
+    def __init__(self, vectors: Dict[str, np.ndarray]):
+        self.vectors = {prepare_query(query): vector for query, vector in vectors.items()}
+
+    def encode(self, queries: List[str], **kwargs) -> np.ndarray:
+        return np.stack([self.vectors[query] for query in queries])
+
+
+def run_tests():
+    """Run built-in test cases against a synthetic vector store (no encoder needed)."""
+    print("=" * 70)
+    print("Semantic Answer Cache - Test Suite")
+    print("=" * 70)
+
+    passed = 0
+    failed = 0
+
+    def check(name: str, ok: bool) -> None:
+        nonlocal passed, failed
+        print(f"[{'PASS' if ok else 'FAIL'}] {name}")
+        if ok:
+            passed += 1
+        else:
+            failed += 1
+
+    rng = np.random.default_rng(0)
+    dim = 64
+
+    def unit(v: np.ndarray) -> np.ndarray:
+        return (v / np.linalg.norm(v)).astype(np.float32)
+
+    def near(v: np.ndarray, similarity: float) -> np.ndarray:
+        """A unit vector with the given cosine similarity to v."""
+        other = rng.standard_normal(dim)
+        other = unit(other - (other @ v) * v)
+        return unit(similarity * v + np.sqrt(1 - similarity ** 2) * other)
+
+    # Two documents per scheme; every query about a scheme embeds close to its chunks
+    schemes = {"HDFC Liquid Fund": "Liquid", "HDFC Flexi Cap Fund": "FlexiCap"}
+    centres = {scheme: unit(rng.standard_normal(dim)) for scheme in schemes}
+    chunks, vectors = [], []
+    for scheme, prefix in schemes.items():
+        for document in ("KIM", "SID"):
+            for i in range(5):
+                chunks.append({
+                    "chunk_id": f"{prefix}_{document}_{i}",
+                    "text": f"{scheme} {document} chunk {i}",
+                    "scheme_name": scheme,
+                    "source_file": f"{prefix}_{document}.pdf",
+                })
+                vectors.append(near(centres[scheme], 0.9))
+
+    liquid = "What is the exit load of HDFC Liquid Fund?"
+    queries = {
+        liquid: centres["HDFC Liquid Fund"],
+        "HDFC Liquid Fund exit load": near(centres["HDFC Liquid Fund"], 0.97),
+        "HDFC Liquid Fund exit load charges": near(centres["HDFC Liquid Fund"], 0.80),
+        # Near-identical embedding, different scheme or plan: the guard must force a miss
+        "What is the exit load of HDFC Flexi Cap Fund?": near(centres["HDFC Liquid Fund"], 0.99),
+        "What is the exit load of HDFC Liquid Fund direct plan?": near(centres["HDFC Liquid Fund"], 0.99),
+    }
+    now = [0.0]
+    generated = []
+
+    def generate(query: str, context: List[Dict[str, Any]]) -> str:
+        generated.append(query)
+        return f"answer {len(generated)} from {context[0]['source_file']}"
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store_dir = Path(tmp)
+        summary_path = store_dir / "ingestion_summary.json"
+        write_chunk_store(chunks, store_dir / CHUNK_STORE_DIR_NAME)
+        index = faiss.IndexFlatIP(dim)
+        index.add(np.stack(vectors))
+        faiss.write_index(index, str(store_dir / "faiss_index.bin"))
+
+        def write_summary(processed_at: str, liquid_kim_checksum: str) -> None:
+            checksums = {"Liquid_KIM.pdf": liquid_kim_checksum, "Liquid_SID.pdf": "sid1",
+                         "FlexiCap_KIM.pdf": "fkim1", "FlexiCap_SID.pdf": "fsid1"}
+            with open(summary_path, "w", encoding="utf-8") as f:
+                json.dump({"processed_at": processed_at, "source_checksums": checksums}, f)
+            now[0] += CHECK_INTERVAL + 1
+            os.utime(summary_path, (now[0], now[0]))  # Distinct mtime even within one filesystem tick
+
+        write_summary("2026-01-01", "kim1")
+        retriever = Retriever(store_dir, summary_path=summary_path, model=_LookupEncoder(queries), warmup=False)
+        cache = AnswerCache(dim=dim, threshold=0.95, ttl_seconds=3600, summary_path=summary_path,
+                            clock=lambda: now[0])
+
+        def ask(query: str) -> Dict[str, Any]:
+            return cached_answer(query, retriever, generate, cache, k=4, filters={"scheme_name": "HDFC Liquid Fund"})
+
+        first = ask(liquid)
+        check("first query misses and is generated", not first["cache_hit"] and generated == [liquid])
+        check("answer is cached with its source files", first["sources"] == ["Liquid_KIM.pdf", "Liquid_SID.pdf"])
+        repeat = ask(liquid)
+        check("repeated query hits without regenerating",
+              repeat["cache_hit"] and repeat["final_response"] == first["final_response"] and len(generated) == 1)
+        check("near-duplicate (0.97) hits", ask("HDFC Liquid Fund exit load")["cache_hit"])
+        check("dissimilar (0.80) misses", not ask("HDFC Liquid Fund exit load charges")["cache_hit"])
+        check("other scheme misses (guard)", not ask("What is the exit load of HDFC Flexi Cap Fund?")["cache_hit"])
+        check("other plan misses (guard)",
+              not ask("What is the exit load of HDFC Liquid Fund direct plan?")["cache_hit"])
+        check("hits and misses counted", cache.stats()["hits"] == 2 and cache.stats()["misses"] == 4)
+
+        write_summary("2026-01-02", "kim1")
+        check("re-ingest with unchanged sources keeps the answer", ask(liquid)["cache_hit"])
+        before = len(generated)
+        write_summary("2026-01-03", "kim2")
+        check("re-ingest with a changed source forces a miss",
+              not ask(liquid)["cache_hit"] and len(generated) == before + 1 and cache.invalidations >= 1)
+        check("regenerated answer hits again", ask(liquid)["cache_hit"])
+        unsourced = "HDFC Liquid Fund NAV"
+        cache.put(unsourced, queries[liquid] * -1, {"final_response": "x"})
+        write_summary("2026-01-04", "kim2")
+        check("new processed_at drops answers cached without sources",
+              cache.get(unsourced, queries[liquid] * -1) is None and ask(liquid)["cache_hit"])
+
+        now[0] += 3601
+        check("entry expires after TTL", not ask(liquid)["cache_hit"] and cache.expirations == 1)
+        check("invalidate(sources) drops entries", cache.invalidate(["Liquid_KIM.pdf"]) >= 1
+              and not ask(liquid)["cache_hit"])
+        retriever.close()
+
+    small = AnswerCache(dim=dim, max_entries=2, summary_path=None)
+    lru_vectors = [unit(rng.standard_normal(dim)) for _ in range(3)]
+    for i, vector in enumerate(lru_vectors):
+        small.put(liquid, vector, {"final_response": str(i)})
+    check("LRU eviction when full",
+          len(small) == 2 and small.evictions == 1 and small.get(liquid, lru_vectors[0]) is None)
+
+    print("-" * 70)
+    print(f"Results: {passed} passed, {failed} failed")
+    print("=" * 70)
+
+    return failed == 0
+
+
+def main():
+    """Replay a query log through the cache and report hit rates per threshold."""
+    parser = argparse.ArgumentParser(description="Replay queries through the semantic answer cache")
+    parser.add_argument("queries", type=Path, nargs="?", help="Text file, one query per line")
+    parser.add_argument("--thresholds", type=float, nargs="+", default=[DEFAULT_THRESHOLD])
+    parser.add_argument("--model", default=None, help="Query encoder (default: from ingestion summary)")
+    parser.add_argument("--test", action="store_true", help="Run the built-in test cases and exit")
+    args = parser.parse_args()
+
+    if args.test:
+        return 0 if run_tests() else 1
+    if args.queries is None:
+        parser.error("a query file or --test is required")
+    if not args.queries.exists():
+        print(f"[ERROR] Query file not found: {args.queries}")
+        return 1
+    with open(args.queries, "r", encoding="utf-8") as f:
+        queries = [line.strip() for line in f if line.strip()]
+
+    from sentence_transformers import SentenceTransformer
+    model_name = args.model or load_ingestion_summary().get("embedding_model", DEFAULT_EMBEDDING_MODEL)
+    model = SentenceTransformer(model_name)
+    embeddings = np.asarray(model.encode(queries, normalize_embeddings=True, show_progress_bar=False), dtype=np.float32)
+
+    print("=" * 70)
+    print(f"Replaying {len(queries)} queries ({model_name})")
+    print("=" * 70)
+    for threshold in args.thresholds:
+        cache = AnswerCache(dim=embeddings.shape[1], threshold=threshold, summary_path=None)
+        start = time.perf_counter()
+        for query, embedding in zip(queries, embeddings):
+            if cache.get(query, embedding) is None:
+                cache.put(query, embedding, {"final_response": query})
+        elapsed_us = (time.perf_counter() - start) / len(queries) * 1e6
+        stats = cache.stats()
+        print(f"threshold {threshold:.3f} | hit rate {stats['hit_rate']:6.1%} | "
+              f"entries {stats['entries']:,} | {elapsed_us:.0f} us/query")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
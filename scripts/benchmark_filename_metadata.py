@@ -0,0 +1,264 @@
+"""
+Filename Metadata Benchmark for Groww Mutual Fund RAG System
+
+Micro-benchmark of filename_metadata.py against the previous implementation
+(one re.compile per document type per call, un-memoised dates, glob-based
+directory scan), kept below as the reference:
+
+    - parse: N synthetic archive filenames, parsed by both; results must match
+    - scan: a temporary archive tree (one folder per scheme and year, PDFs
+      and other files mixed) scanned by the reference (per folder), by the
+      os.scandir walk and by the threaded walk
+
+Usage:
+    python scripts/benchmark_filename_metadata.py
+    python scripts/benchmark_filename_metadata.py --files 50000 --workers 8
+    python scripts/benchmark_filename_metadata.py --output data/processed/filename_benchmark.json
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+from pathlib import Path
+from typing import Dict, List, Any, Optional
+
+# Local imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from scripts.filename_metadata import (
+    DOCUMENT_TYPES, SCAN_WORKERS, normalize_date, parse_filename, scan_directory
+)
+
+# Configuration
+DEFAULT_FILES = 20_000
+DEFAULT_REPEATS = 3  # Best of N timings
+FILES_PER_FOLDER = 200  # Scan tree: files per scheme/year folder
+NON_PDF_FRACTION = 0.2  # Scan tree: share of other files (xlsx, html, ...)
+
+SCHEME_NAMES = [
+    "HDFC_LargeCapFund", "HDFC_Flexi_Cap_Fund", "HDFC_ELSS_Tax_Saver", "HDFC_BalancedAdvantage",
+    "HDFC_Liquid", "HDFC_MidCap_Opportunities", "HDFC_Small_Cap_Fund", "HDFC_Corporate_Bond_Fund",
+]
+MONTHS = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec", "January", "November"]
+
+
+# ---------------------------------------------------------------------- #
+# Reference: the previous implementation
+# ---------------------------------------------------------------------- #
+
+def reference_normalize_date(date_str: str) -> Optional[str]:
+    return normalize_date.__wrapped__(date_str)
+
+
+def reference_parse_filename(filename: str) -> Dict[str, Optional[str]]:
+    """parse_filename as it was: a fresh pattern per document type per call."""
+    result = {"scheme_name": None, "document_type": None, "document_date": None, "raw_date": None}
+    basename = Path(filename).stem
+    if not basename:
+        return result
+
+    doc_type_found = None
+    doc_type_pos = -1
+    for doc_type in DOCUMENT_TYPES:
+        pattern = re.compile(re.escape(doc_type), re.IGNORECASE)
+        match = pattern.search(basename)
+        if match and match.start() > doc_type_pos:
+            doc_type_found = doc_type
+            doc_type_pos = match.start()
+
+    if doc_type_found is None:
+        result["scheme_name"] = basename
+        return result
+
+    scheme_name = basename[:doc_type_pos].rstrip("_")
+    result["scheme_name"] = scheme_name if scheme_name else None
+    result["document_type"] = doc_type_found
+    after_doc_type = basename[doc_type_pos + len(doc_type_found):].lstrip("_")
+    if after_doc_type:
+        result["raw_date"] = after_doc_type
+        result["document_date"] = reference_normalize_date(after_doc_type)
+    return result
+
+
+def reference_scan_directory(directory: str) -> List[Dict[str, Optional[str]]]:
+    """scan_directory as it was: two globs of one folder, quadratic .PDF de-duplication."""
+    results = []
+    dir_path = Path(directory)
+    if not dir_path.is_dir():
+        return results
+    for pdf_file in dir_path.glob("*.pdf"):
+        metadata = reference_parse_filename(pdf_file.name)
+        metadata["filename"] = pdf_file.name
+        metadata["filepath"] = str(pdf_file)
+        results.append(metadata)
+    for pdf_file in dir_path.glob("*.PDF"):
+        if pdf_file.name not in [r["filename"] for r in results]:
+            metadata = reference_parse_filename(pdf_file.name)
+            metadata["filename"] = pdf_file.name
+            metadata["filepath"] = str(pdf_file)
+            results.append(metadata)
+    return results
+
+
+# ---------------------------------------------------------------------- #
+# Benchmark
+# ---------------------------------------------------------------------- #
+
+def synthetic_filenames(n: int, seed: int = 0) -> List[str]:
+    """Archive-like filenames: scheme, document type, mostly dated, mixed extension case."""
+    rng = random.Random(seed)
+    names = []
+    for i in range(n):
+        scheme = rng.choice(SCHEME_NAMES)
+        doc_type = rng.choice(DOCUMENT_TYPES)
+        year = rng.randint(2010, 2026)
+        shape = rng.random()
+        if shape < 0.45:
+            date = f"_{rng.randint(1, 28)}_{rng.choice(MONTHS)}_{year}"
+        elif shape < 0.9:
+            date = f"_{rng.choice(MONTHS)}_{year}"
+        else:
+            date = ""
+        extension = ".PDF" if rng.random() < 0.2 else ".pdf"
+        names.append(f"{scheme}_{doc_type}{date}{extension}")
+    return names
+
+
+def best_of(repeats: int, func, *args) -> float:
+    """Fastest of `repeats` runs, in seconds."""
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def benchmark_parse(names: List[str], repeats: int) -> Dict[str, Any]:
+    """Time both parsers over the same names and check they agree."""
+    mismatches = sum(1 for name in names if parse_filename(name) != reference_parse_filename(name))
+
+    def run(parser):
+        for name in names:
+            parser(name)
+
+    reference = best_of(repeats, run, reference_parse_filename)
+    normalize_date.cache_clear()
+    current = best_of(repeats, run, parse_filename)
+    return {
+        "files": len(names),
+        "reference_s": reference,
+        "current_s": current,
+        "reference_us_per_file": reference / len(names) * 1e6,
+        "current_us_per_file": current / len(names) * 1e6,
+        "speedup": reference / current if current else None,
+        "mismatches": mismatches,
+        "date_cache": normalize_date.cache_info()._asdict(),
+    }
+
+
+def build_archive(root: Path, names: List[str], seed: int = 0) -> int:
+    """Lay names out as scheme/year folders of empty files, plus non-PDF files. Returns folder count."""
+    rng = random.Random(seed)
+    folders = set()
+    for i, name in enumerate(names):
+        folder = root / f"amc_{i // (FILES_PER_FOLDER * 50)}" / name.split("_")[1] / str(i // FILES_PER_FOLDER)
+        if folder not in folders:
+            folder.mkdir(parents=True, exist_ok=True)
+            folders.add(folder)
+        (folder / name).touch()
+        if rng.random() < NON_PDF_FRACTION:
+            (folder / f"{Path(name).stem}.xlsx").touch()
+    return len(folders)
+
+
+def benchmark_scan(names: List[str], repeats: int, workers: int) -> Dict[str, Any]:
+    """Time a recursive archive scan: reference per folder, serial scandir walk, threaded walk."""
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        folders = build_archive(root, names)
+
+        def reference():
+            # The previous scan_directory is not recursive: walk and scan each folder
+            return [r for dirpath, _, _ in os.walk(root) for r in reference_scan_directory(dirpath)]
+
+        found = {
+            "reference": len(reference()),
+            "serial": sum(1 for _ in scan_directory(str(root), recursive=True)),
+            "threaded": sum(1 for _ in scan_directory(str(root), recursive=True, workers=workers)),
+        }
+        timings = {
+            "reference_s": best_of(repeats, reference),
+            "serial_s": best_of(repeats, lambda: sum(1 for _ in scan_directory(str(root), recursive=True))),
+            "threaded_s": best_of(repeats, lambda: sum(
+                1 for _ in scan_directory(str(root), recursive=True, workers=workers)
+            )),
+        }
+
+        # Time to the first result: what a streaming consumer waits before it can start
+        start = time.perf_counter()
+        next(iter(scan_directory(str(root), recursive=True, workers=workers)))
+        first_result_ms = (time.perf_counter() - start) * 1000
+
+    return {
+        "files": len(names),
+        "folders": folders,
+        "workers": workers,
+        "pdfs_found": found,
+        **timings,
+        "speedup_serial": timings["reference_s"] / timings["serial_s"],
+        "speedup_threaded": timings["reference_s"] / timings["threaded_s"],
+        "threaded_first_result_ms": first_result_ms,
+    }
+
+
+def main():
+    """Run the parse and scan micro-benchmarks."""
+    parser = argparse.ArgumentParser(description="Benchmark filename metadata parsing and directory scans")
+    parser.add_argument("--files", type=int, default=DEFAULT_FILES, help="Synthetic filenames")
+    parser.add_argument("--repeats", type=int, default=DEFAULT_REPEATS, help="Best of N timings")
+    parser.add_argument("--workers", type=int, default=SCAN_WORKERS, help="Threads for the threaded scan")
+    parser.add_argument("--skip-scan", action="store_true", help="Only benchmark parsing")
+    parser.add_argument("--output", type=Path, help="Write results as JSON")
+    args = parser.parse_args()
+
+    names = synthetic_filenames(args.files)
+    print("=" * 70)
+    print(f"Filename Metadata Benchmark ({args.files:,} files, best of {args.repeats})")
+    print("=" * 70)
+
+    parse = benchmark_parse(names, args.repeats)
+    print(f"\nparse_filename: reference {parse['reference_us_per_file']:.2f} us/file | "
+          f"current {parse['current_us_per_file']:.2f} us/file | {parse['speedup']:.1f}x")
+    print(f"  Date cache: {parse['date_cache']['hits']:,} hits, {parse['date_cache']['currsize']:,} entries")
+    print(f"  [{'OK' if not parse['mismatches'] else 'ERROR'}] {parse['mismatches']} results differ from the reference")
+    results = {"parse": parse}
+
+    if not args.skip_scan:
+        scan = benchmark_scan(names, args.repeats, args.workers)
+        print(f"\nRecursive scan of {scan['folders']} folders:")
+        print(f"  reference (os.walk + glob per folder): {scan['reference_s'] * 1000:.1f} ms")
+        print(f"  scandir walk:                          {scan['serial_s'] * 1000:.1f} ms "
+              f"({scan['speedup_serial']:.1f}x)")
+        print(f"  scandir walk, {scan['workers']} threads:              {scan['threaded_s'] * 1000:.1f} ms "
+              f"({scan['speedup_threaded']:.1f}x, first result after {scan['threaded_first_result_ms']:.1f} ms)")
+        counts = scan["pdfs_found"]
+        ok = len(set(counts.values())) == 1
+        print(f"  [{'OK' if ok else 'ERROR'}] PDFs found: {counts}")
+        results["scan"] = scan
+
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"\n[OK] Results written to {args.output}")
+
+    return 0 if not parse["mismatches"] else 1
+
+
+if __name__ == "__main__":
+    exit(main())
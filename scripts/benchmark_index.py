@@ -0,0 +1,303 @@
+"""
+Index Benchmark for Groww Mutual Fund RAG System
+
+Compares FAISS index types (see index_factory.py) on the corpus vectors:
+recall@k against exact flat search, single-query p50/p99 latency, batch
+throughput, build time and serialized index size. Query-time knobs
+(HNSW efSearch, IVF nprobe) are swept so the recall/latency trade-off of
+each type is visible.
+
+With --quantizations, each index type is also built with fp16 / int8 /
+binary codes, and recall is reported both raw and after exact re-scoring
+of DEFAULT_RESCORE_FACTOR * k candidates, next to the memory saved
+relative to float32. --truncate-dims does the same for indexes that keep
+only the leading dimensions (Matryoshka-style), re-ranked at full dimension.
+
+Queries are perturbed copies of stored chunk vectors (no encoder needed).
+With --synthetic N, a clustered random corpus of N vectors is used instead,
+to see how the index types behave beyond the ~1k real chunks.
+
+Usage:
+    python scripts/benchmark_index.py
+    python scripts/benchmark_index.py --synthetic 100000 --types flat hnsw ivf_flat
+    python scripts/benchmark_index.py --types flat hnsw --quantizations none fp16 int8 binary
+    python scripts/benchmark_index.py --types flat hnsw --truncate-dims 1024 512 256 128
+    python scripts/benchmark_index.py --k 20 --output data/processed/index_benchmark.json
+"""
+
+import sys
+import json
+import time
+import argparse
+from pathlib import Path
+from typing import Dict, List, Any, Optional
+
+import faiss
+import numpy as np
+
+# Local imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from scripts.index_factory import (
+    build_index, resolve_index_params, apply_search_params, load_vectors, read_index,
+    index_size_bytes, rescore_exact, INDEX_TYPES, QUANTIZATIONS, QUANTIZATION_INDEX_TYPES,
+    DEFAULT_RESCORE_FACTOR
+)
+from scripts.store_versions import current_store_dir
+
+# Configuration
+BASE_DIR = Path(__file__).parent.parent
+VECTOR_STORE_DIR = BASE_DIR / "data" / "vector_store"
+
+DEFAULT_K = 20
+DEFAULT_QUERIES = 200
+QUERY_NOISE = 0.4  # Norm of the noise added to sampled chunk vectors (unit length)
+CLUSTER_SPREAD = 1.5  # Norm of the within-topic noise of synthetic vectors
+LATENCY_QUERIES = 100  # Single-query searches timed per configuration
+
+# Query-time values swept per index type
+SWEEPS = {
+    "flat": ("", [None]),
+    "hnsw": ("ef_search", [16, 32, 64, 128, 256]),
+    "ivf_flat": ("nprobe", [1, 4, 8, 16, 32]),
+    "ivf_pq": ("nprobe", [1, 4, 8, 16, 32]),
+}
+
+
+def normalize(x: np.ndarray) -> np.ndarray:
+    return x / np.linalg.norm(x, axis=1, keepdims=True).clip(min=1e-12)
+
+
+def load_store_vectors(vector_store_dir: Path) -> np.ndarray:
+    """Vectors of an existing vector store (vectors.npy or the flat index)."""
+    vector_store_dir = current_store_dir(vector_store_dir)
+    index = read_index(vector_store_dir / "faiss_index.bin")
+    vectors = load_vectors(vector_store_dir, index)
+    if vectors is None:
+        raise FileNotFoundError(f"No vectors.npy in {vector_store_dir} and the index is not flat")
+    return np.ascontiguousarray(vectors, dtype=np.float32)
+
+
+def synthetic_vectors(n: int, dim: int, seed: int = 0) -> np.ndarray:
+    """Clustered random unit vectors (a few hundred topics), roughly like embeddings."""
+    rng = np.random.default_rng(seed)
+    n_clusters = max(1, min(n // 50, 1000))
+    centers = normalize(rng.standard_normal((n_clusters, dim)).astype(np.float32))
+    out = np.empty((n, dim), dtype=np.float32)
+    for start in range(0, n, 65536):
+        end = min(n, start + 65536)
+        assign = rng.integers(0, n_clusters, end - start)
+        noise = rng.standard_normal((end - start, dim)).astype(np.float32) * CLUSTER_SPREAD / np.sqrt(dim)
+        out[start:end] = normalize(centers[assign] + noise)
+    return out
+
+
+def make_queries(vectors: np.ndarray, n_queries: int, seed: int = 1) -> np.ndarray:
+    """Perturbed copies of randomly chosen stored vectors."""
+    rng = np.random.default_rng(seed)
+    rows = rng.choice(len(vectors), size=min(n_queries, len(vectors)), replace=False)
+    noise = rng.standard_normal((len(rows), vectors.shape[1])).astype(np.float32)
+    return np.ascontiguousarray(normalize(vectors[rows] + noise * QUERY_NOISE / np.sqrt(vectors.shape[1])))
+
+
+def recall_at_k(ids: np.ndarray, truth: np.ndarray) -> float:
+    """Mean fraction of the exact top-k found by the index."""
+    hits = sum(len(np.intersect1d(row[row >= 0], t)) for row, t in zip(ids, truth))
+    return hits / truth.size
+
+
+def time_searches(index: Any, queries: np.ndarray, k: int) -> Dict[str, float]:
+    """Single-query latency percentiles and batch throughput."""
+    latencies = []
+    for q in queries[:LATENCY_QUERIES]:
+        start = time.perf_counter()
+        index.search(q[None, :], k)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    index.search(queries, k)
+    batch_s = time.perf_counter() - start
+
+    return {
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p99_ms": float(np.percentile(latencies, 99)),
+        "batch_qps": len(queries) / batch_s if batch_s > 0 else float("inf"),
+    }
+
+
+def benchmark_index_type(
+    index_type: str,
+    vectors: np.ndarray,
+    queries: np.ndarray,
+    truth: np.ndarray,
+    k: int,
+    overrides: Optional[Dict[str, Any]] = None,
+    quantization: str = "none",
+    truncate_dim: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    """Build one index type and evaluate it across its query-time sweep."""
+    params = resolve_index_params(index_type, len(vectors), overrides)
+    if truncate_dim == vectors.shape[1]:
+        truncate_dim = None
+
+    start = time.perf_counter()
+    index = build_index(vectors, index_type, params, quantization, truncate_dim)
+    build_s = time.perf_counter() - start
+    size_bytes = index_size_bytes(index)
+
+    knob, values = SWEEPS[index_type]
+    candidates = min(len(vectors), k * DEFAULT_RESCORE_FACTOR)
+    rows = []
+    for value in values:
+        if knob:
+            apply_search_params(index, {knob: value})
+        _, ids = index.search(queries, k)
+        _, candidate_ids = index.search(queries, candidates)
+        _, rescored_ids = rescore_exact(queries, candidate_ids, vectors, k)
+        rows.append({
+            "index_type": index_type,
+            "quantization": quantization,
+            "dim": truncate_dim or vectors.shape[1],
+            "params": {**params, **({knob: value} if knob else {})},
+            "build_s": build_s,
+            "size_mb": size_bytes / 1e6,
+            "bytes_per_vector": size_bytes / len(vectors),
+            f"recall@{k}": recall_at_k(ids, truth),
+            f"recall@{k}_rescored": recall_at_k(rescored_ids, truth),
+            **time_searches(index, queries, k),
+        })
+    return rows
+
+
+def print_results(results: List[Dict[str, Any]], k: int) -> None:
+    print(f"\n{'Index':<10} {'Quant':<7} {'Dim':>5} {'Knob':<16} {'Recall@' + str(k):>9} {'p50 ms':>8} "
+          f"{'p99 ms':>8} {'QPS':>9} {'Build s':>8} {'Size MB':>8}")
+    print("-" * 96)
+    for r in results:
+        knob = SWEEPS[r["index_type"]][0]
+        knob_text = f"{knob}={r['params'][knob]}" if knob else "-"
+        print(f"{r['index_type']:<10} {r['quantization']:<7} {r['dim']:>5} {knob_text:<16} {r[f'recall@{k}']:>9.3f} "
+              f"{r['p50_ms']:>8.3f} {r['p99_ms']:>8.3f} {r['batch_qps']:>9.0f} {r['build_s']:>8.2f} "
+              f"{r['size_mb']:>8.1f}")
+
+
+def memory_report(results: List[Dict[str, Any]], k: int) -> List[Dict[str, Any]]:
+    """
+    Memory saved vs recall lost per (index type, quantization, dim), relative
+    to the full-dimension float32 build of the same index type, each at its
+    best-recall setting.
+    """
+    best: Dict[tuple, Dict[str, Any]] = {}
+    full_dim = max((r["dim"] for r in results), default=0)
+    for r in results:
+        key = (r["index_type"], r["quantization"], r["dim"])
+        if key not in best or r[f"recall@{k}"] > best[key][f"recall@{k}"]:
+            best[key] = r
+
+    report = []
+    for (index_type, quantization, dim), r in best.items():
+        baseline = best.get((index_type, "none", full_dim))
+        if baseline is None:
+            continue
+        report.append({
+            "index_type": index_type,
+            "quantization": quantization,
+            "dim": dim,
+            "bytes_per_vector": r["bytes_per_vector"],
+            "memory_saved": 1 - r["size_mb"] / baseline["size_mb"],
+            "p50_speedup": baseline["p50_ms"] / r["p50_ms"] if r["p50_ms"] > 0 else float("inf"),
+            "recall_lost": baseline[f"recall@{k}"] - r[f"recall@{k}"],
+            "recall_lost_rescored": baseline[f"recall@{k}"] - r[f"recall@{k}_rescored"],
+        })
+    return report
+
+
+def print_memory_report(report: List[Dict[str, Any]]) -> None:
+    print(f"\n{'Index':<10} {'Quant':<7} {'Dim':>5} {'Bytes/vec':>10} {'Mem saved':>10} {'p50 speedup':>12} "
+          f"{'Recall lost':>12} {'Lost (rescored)':>16}")
+    print("-" * 90)
+    for r in report:
+        print(f"{r['index_type']:<10} {r['quantization']:<7} {r['dim']:>5} {r['bytes_per_vector']:>10.0f} "
+              f"{r['memory_saved']:>10.1%} {r['p50_speedup']:>11.2f}x {r['recall_lost']:>12.3f} "
+              f"{r['recall_lost_rescored']:>16.3f}")
+
+
+def main():
+    """Run the index benchmark."""
+    parser = argparse.ArgumentParser(description="Benchmark FAISS index types on the corpus vectors")
+    parser.add_argument("--vector-store", type=Path, default=VECTOR_STORE_DIR, help="Vector store directory")
+    parser.add_argument("--synthetic", type=int, help="Use N synthetic vectors instead of the vector store")
+    parser.add_argument("--dim", type=int, default=1024, help="Dimension of synthetic vectors")
+    parser.add_argument("--types", nargs="+", choices=INDEX_TYPES, default=list(INDEX_TYPES))
+    parser.add_argument("--quantizations", nargs="+", choices=QUANTIZATIONS, default=["none"])
+    parser.add_argument("--truncate-dims", nargs="+", type=int, help="Leading dimensions to index (default: full)")
+    parser.add_argument("--k", type=int, default=DEFAULT_K, help="Neighbours per query")
+    parser.add_argument("--queries", type=int, default=DEFAULT_QUERIES, help="Number of queries")
+    parser.add_argument("--output", type=Path, help="Write results as JSON")
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("Groww Mutual Fund RAG - Index Benchmark")
+    print("=" * 70)
+
+    if args.synthetic:
+        vectors = synthetic_vectors(args.synthetic, args.dim)
+        source = f"synthetic ({args.synthetic} x {args.dim})"
+    else:
+        vectors = load_store_vectors(args.vector_store)
+        source = str(args.vector_store)
+    print(f"Vectors: {vectors.shape[0]} x {vectors.shape[1]} from {source}")
+
+    queries = make_queries(vectors, args.queries)
+    k = min(args.k, len(vectors))
+
+    # Ground truth from exact search
+    exact = faiss.IndexFlatIP(vectors.shape[1])
+    exact.add(vectors)
+    _, truth = exact.search(queries, k)
+
+    dims = args.truncate_dims or [vectors.shape[1]]
+    if vectors.shape[1] not in dims:
+        dims = [vectors.shape[1]] + dims  # Full-dimension baseline for the report
+
+    results = []
+    for index_type in args.types:
+        for quantization in args.quantizations:
+            if index_type not in QUANTIZATION_INDEX_TYPES[quantization]:
+                continue
+            for dim in dims:
+                print(f"  Building {index_type} ({quantization}, dim {dim})...")
+                try:
+                    results.extend(benchmark_index_type(
+                        index_type, vectors, queries, truth, k,
+                        quantization=quantization, truncate_dim=dim
+                    ))
+                except (RuntimeError, ValueError) as e:
+                    print(f"  [WARN] {index_type} ({quantization}, dim {dim}) skipped: {e}")
+
+    print_results(results, k)
+
+    report = memory_report(results, k)
+    if len(args.quantizations) > 1 or len(dims) > 1:
+        print_memory_report(report)
+
+    if args.output:
+        report = {
+            "source": source,
+            "num_vectors": int(vectors.shape[0]),
+            "dim": int(vectors.shape[1]),
+            "num_queries": int(len(queries)),
+            "k": k,
+            "rescore_factor": DEFAULT_RESCORE_FACTOR,
+            "results": results,
+            "memory_report": report,
+        }
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n[OK] Results saved to {args.output}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
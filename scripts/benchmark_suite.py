@@ -0,0 +1,664 @@
+"""
+End-to-End Benchmark Suite for Groww Mutual Fund RAG System
+
+Runs the ingestion and query path on one corpus at a time and records how it
+scales:
+
+    parse        parse_pdf_to_markdown (real corpus only)
+    synthesize   markdown generation (synthetic corpora only)
+    chunk        chunk_document
+    embed        create_embeddings with HashingEncoder, a deterministic
+                 offline stand-in for BGE-M3 (signed feature hashing of the
+                 sparse-index tokens into 1024-d unit vectors)
+    store        columnar chunk store and index layout
+    index_build  create_faiss_index
+    retrieval    Retriever over the benchmark store: query encode, search,
+                 scheme-filtered search and batch QPS
+
+Corpora are the PDFs in data/raw/schemes ("real") and synthetic fund
+documents generated from templates until they chunk into exactly N chunks
+(default 10k and 100k; add 1M with --scales). The synthetic corpora are
+reproducible from --seed and do not need the PDFs.
+
+Each corpus runs in a fresh process, so its peak RSS is its own. Throughput
+is per stage (documents/s for parse, chunks/s otherwise); latencies are
+p50/p95/p99 per document and per query. Embed throughput measures the
+pipeline around the model, not BGE-M3 itself.
+
+Results are written as JSON (one file per run under data/processed/benchmarks
+by default); --compare prints the change of every throughput, latency
+percentile and peak RSS against an earlier results file.
+
+The 1M-chunk corpus is opt-in (--scales 10000 100000 1000000): it needs
+roughly 10 GB of memory and several GB of temporary disk (--work-dir) for
+a flat index.
+
+Usage:
+    python scripts/benchmark_suite.py                                  # real + 10k/100k
+    python scripts/benchmark_suite.py --scales 10000 100000 1000000    # real + 10k/100k/1M
+    python scripts/benchmark_suite.py --scales 10000 --skip-real
+    python scripts/benchmark_suite.py --max-pdfs 10 --scales 10000 100000 --index-type hnsw
+    python scripts/benchmark_suite.py --compare data/processed/benchmarks/suite-20260201-101500.json
+"""
+
+import os
+import sys
+import json
+import time
+import zlib
+import random
+import platform
+import argparse
+import tempfile
+import subprocess
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Tuple, Iterator
+
+import faiss
+import numpy as np
+
+try:
+    import resource
+except ImportError:  # Windows: peak RSS is not reported
+    resource = None
+
+# Local imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from scripts.ingest_documents import (
+    parse_pdf_timed, chunk_document, create_embeddings, create_faiss_index, collect_scheme_pdfs,
+    get_scheme_name_from_folder, get_amfi_code, SCHEMES_DIR, EMBEDDING_DIM, EMBEDDING_PREFIX
+)
+from scripts.filename_metadata import parse_filename
+from scripts.metadata_store import ChunkStoreWriter, CHUNK_STORE_DIR_NAME
+from scripts.index_layout import write_index_layout, DOCUMENT_TYPE_PRECEDENCE
+from scripts.index_factory import (
+    resolve_index_params, stores_exact_vectors, write_index, write_vectors, INDEX_TYPES, VECTORS_FILE_NAME
+)
+from scripts.query_expansion import QueryEncoder
+from scripts.sparse_index import tokenize
+from scripts.tracing import (
+    Trace, utc_timestamp, PERCENTILES, STAGE_PARSE, STAGE_CHUNK, STAGE_EMBED, STAGE_INDEX_BUILD,
+    STAGE_QUERY_ENCODE, STAGE_SEARCH
+)
+
+# Configuration
+BASE_DIR = Path(__file__).parent.parent
+BENCHMARK_DIR = BASE_DIR / "data" / "processed" / "benchmarks"
+
+DEFAULT_SCALES = [10_000, 100_000]  # 1_000_000 is opt-in via --scales (~10 GB RAM)
+DEFAULT_QUERIES = 200
+DEFAULT_K = 20  # Stage 1 candidates (architecture.md §4.2.5)
+EMBED_BATCH_SIZE = 10_000  # Chunks per create_embeddings call
+STANDIN_MODEL_NAME = "hashing-standin-1024"
+
+STAGE_SYNTHESIZE = "synthesize"
+STAGE_STORE = "store"
+STAGE_SEARCH_FILTERED = "search_filtered"
+
+# Synthetic corpus shape
+SYNTHETIC_CHUNKS_PER_SCHEME = 2_000
+SYNTHETIC_SECTIONS_PER_DOCUMENT = 60
+SYNTHETIC_CHUNKS_PER_DOCUMENT = 15  # Lower bound for 60 sections (~17), so a corpus always reaches N chunks
+SYNTHETIC_DOCUMENT_TYPES = DOCUMENT_TYPE_PRECEDENCE[:5]
+SYNTHETIC_CATEGORIES = [
+    "Large Cap", "Flexi Cap", "Mid Cap", "Small Cap", "ELSS Tax Saver", "Balanced Advantage",
+    "Liquid", "Corporate Bond", "Multi Asset", "Index", "Short Duration", "Value",
+]
+SYNTHETIC_INDICES = ["NIFTY 100", "NIFTY 500", "NIFTY Midcap 150", "BSE 500", "CRISIL Liquid Debt A-I"]
+SYNTHETIC_MANAGERS = ["Rahul Baijal", "Roshi Jain", "Chirag Setalvad", "Anil Bamboli", "Gopal Agrawal"]
+SYNTHETIC_COMPANIES = [
+    "HDFC Bank", "ICICI Bank", "Reliance Industries", "Infosys", "Larsen & Toubro", "ITC", "Axis Bank"
+]
+
+# (section heading, fact sentence); the headings double as query facets
+SYNTHETIC_FACETS = [
+    ("Exit Load", "An exit load of {pct}% is payable if units of {scheme} are redeemed within {days} days "
+                  "from the date of allotment."),
+    ("Expense Ratio", "The total expense ratio (TER) of the {plan} Plan of {scheme} is {pct}% per annum as on {date}."),
+    ("Minimum Investment", "The minimum application amount for {scheme} is Rs. {amount} and in multiples of "
+                           "Re. 1 thereafter; SIP instalments start at Rs. {sip}."),
+    ("Benchmark", "{scheme} is benchmarked against the {index} Total Return Index."),
+    ("Fund Manager", "{manager} has managed {scheme} since {date} and has over {years} years of experience."),
+    ("Riskometer", "The riskometer of {scheme} is at {risk} risk as on {date}."),
+    ("Lock-in Period", "Investments in {scheme} are subject to a lock-in period of {years} years from allotment."),
+    ("Asset Allocation", "{scheme} invests {pct_hi}% to 100% of net assets in {asset} and up to {pct_lo}% in "
+                         "debt and money market instruments."),
+    ("Portfolio", "The top holdings of {scheme} include {company}, {company2} and {company3}, together "
+                  "{pct_hi}% of net assets."),
+    ("Taxation", "Long term capital gains above Rs. {amount} in a financial year are taxed at {pct}%."),
+]
+SYNTHETIC_FILLER = [
+    "Past performance may or may not be sustained in future.",
+    "Mutual fund investments are subject to market risks, read all scheme related documents carefully.",
+    "The NAV of the {plan} Plan is declared on every business day.",
+    "Units are allotted at the applicable NAV of the day on which funds are realised.",
+    "Statements of account are sent to unitholders within {days} days of the transaction.",
+    "The Trustee may change the load structure prospectively in accordance with SEBI regulations.",
+]
+SYNTHETIC_QUERIES = ["What is the {facet} of {scheme}?", "{scheme} {facet}", "Tell me the {facet} for {scheme}"]
+
+
+def peak_rss_mb() -> Optional[float]:
+    """High-water resident set size of this process in MB (None where unavailable)."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024  # bytes on macOS, KB on Linux
+
+
+def latency_summary(values_ms: List[float]) -> Dict[str, float]:
+    """Count, mean, p50/p95/p99 and max of a list of latencies (ms)."""
+    if not values_ms:
+        return {"count": 0}
+    values = np.array(values_ms, dtype=np.float64)
+    return {
+        "count": int(len(values)),
+        "mean": float(values.mean()),
+        **{f"p{p}": float(np.percentile(values, p)) for p in PERCENTILES},
+        "max": float(values.max()),
+    }
+
+
+class HashingEncoder:
+    """
+    Deterministic offline stand-in for the BGE-M3 encoder.
+
+    Each sparse-index token adds +-1 to one of `dim` dimensions chosen by its
+    CRC-32, so texts sharing terms get similar vectors, identical texts get
+    identical vectors in every process, and no model has to be downloaded.
+    The retrieval instruction prefix is dropped so it does not dominate every
+    document vector. Has the SentenceTransformer encode() signature.
+    """
+
+    def __init__(self, dim: int = EMBEDDING_DIM):
+        self.dim = dim
+        self._features: Dict[str, Tuple[int, float]] = {}
+
+    def _feature(self, token: str) -> Tuple[int, float]:
+        feature = self._features.get(token)
+        if feature is None:
+            h = zlib.crc32(token.encode("utf-8"))
+            feature = self._features[token] = (h % self.dim, 1.0 if h & 0x80000000 else -1.0)
+        return feature
+
+    def encode(
+        self,
+        sentences: List[str],
+        batch_size: int = 32,
+        show_progress_bar: bool = False,
+        normalize_embeddings: bool = True,
+        **kwargs: Any
+    ) -> np.ndarray:
+        cells: List[int] = []
+        signs: List[float] = []
+        for row, text in enumerate(sentences):
+            if text.startswith(EMBEDDING_PREFIX):
+                text = text[len(EMBEDDING_PREFIX):]
+            offset = row * self.dim
+            for token in tokenize(text):
+                column, sign = self._feature(token)
+                cells.append(offset + column)
+                signs.append(sign)
+        out = np.bincount(
+            np.array(cells, dtype=np.int64), weights=np.array(signs, dtype=np.float64),
+            minlength=len(sentences) * self.dim
+        ).astype(np.float32).reshape(len(sentences), self.dim)
+        if normalize_embeddings:
+            out /= np.linalg.norm(out, axis=1, keepdims=True).clip(min=1e-12)
+        return out
+
+
+def document_metadata(scheme_name: str, scheme_code: str, document_type: str, source_file: str,
+                      document_date: Optional[str] = None) -> Dict[str, Any]:
+    """Chunk metadata of one document, as build_document_chunks sets it (no checksum)."""
+    return {
+        "amc_name": "HDFC Asset Management Company",
+        "scheme_name": scheme_name,
+        "scheme_code": scheme_code,
+        "plan_type": "Direct",
+        "document_type": document_type,
+        "document_date": document_date,
+        "source_file": source_file,
+        "extraction_date": utc_timestamp(),
+        "checksum": "",
+    }
+
+
+def iter_real_documents(schemes_dir: Path, trace: Trace, parse_ms: List[float],
+                        max_pdfs: Optional[int] = None) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """Parse the scheme PDFs one at a time, yielding (markdown, metadata)."""
+    pdfs = [
+        (pdf_path, get_scheme_name_from_folder(folder.name))
+        for folder, pdf_paths in collect_scheme_pdfs(schemes_dir).items()
+        for pdf_path in pdf_paths
+    ][:max_pdfs]
+    for pdf_path, scheme_name in pdfs:
+        md_text, ms = parse_pdf_timed(pdf_path)
+        trace.add(STAGE_PARSE, ms)
+        parse_ms.append(ms)
+        file_meta = parse_filename(pdf_path.name)
+        yield md_text, document_metadata(
+            scheme_name, get_amfi_code(scheme_name), file_meta.get("document_type") or "Unknown",
+            pdf_path.name, file_meta.get("document_date")
+        )
+
+
+def synthetic_scheme_name(i: int) -> str:
+    return f"HDFC Synthetic {SYNTHETIC_CATEGORIES[i % len(SYNTHETIC_CATEGORIES)]} Fund {i:04d}"
+
+
+def synthetic_schemes(n_chunks: int) -> List[str]:
+    return [synthetic_scheme_name(i) for i in range(max(1, -(-n_chunks // SYNTHETIC_CHUNKS_PER_SCHEME)))]
+
+
+def synthetic_section(rng: random.Random, scheme: str) -> str:
+    """One markdown section: a heading, a fact sentence and filler, sometimes a table."""
+    heading, fact = SYNTHETIC_FACETS[rng.randrange(len(SYNTHETIC_FACETS))]
+    values = {
+        "scheme": scheme,
+        "pct": f"{rng.randint(1, 250) / 100:.2f}",
+        "pct_hi": rng.randint(60, 95),
+        "pct_lo": rng.randint(5, 40),
+        "days": rng.choice([7, 15, 30, 90, 365]),
+        "plan": rng.choice(["Direct", "Regular"]),
+        "date": f"{rng.randint(1, 28):02d}-{rng.randint(1, 12):02d}-{rng.randint(2015, 2026)}",
+        "amount": rng.choice([100, 500, 1000, 5000, 100000]),
+        "sip": rng.choice([100, 500, 1000]),
+        "index": rng.choice(SYNTHETIC_INDICES),
+        "manager": rng.choice(SYNTHETIC_MANAGERS),
+        "years": rng.randint(3, 25),
+        "risk": rng.choice(["Low", "Moderate", "Moderately High", "High", "Very High"]),
+        "asset": rng.choice(["equity and equity related instruments", "large cap companies", "debt instruments"]),
+        "company": rng.choice(SYNTHETIC_COMPANIES),
+        "company2": rng.choice(SYNTHETIC_COMPANIES),
+        "company3": rng.choice(SYNTHETIC_COMPANIES),
+    }
+    lines = [f"## {heading}", "", fact.format(**values)]
+    lines += [rng.choice(SYNTHETIC_FILLER).format(**values) for _ in range(rng.randint(3, 6))]
+    if rng.random() < 0.2:
+        lines += ["", "| Plan | Value |", "|---|---|",
+                  f"| Direct | {values['pct']}% |", f"| Regular | {values['pct_hi'] / 40:.2f}% |"]
+    return "\n".join(lines) + "\n\n"
+
+
+def iter_synthetic_documents(n_chunks: int, trace: Trace, seed: int = 0) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """
+    Generate synthetic fund documents, scheme by scheme, in index layout
+    order; the consumer stops once it has n_chunks chunks.
+    """
+    rng = random.Random(seed)
+    per_type = -(-SYNTHETIC_CHUNKS_PER_SCHEME // (len(SYNTHETIC_DOCUMENT_TYPES) * SYNTHETIC_CHUNKS_PER_DOCUMENT))
+    for i, scheme in enumerate(synthetic_schemes(n_chunks)):
+        for document_type in SYNTHETIC_DOCUMENT_TYPES:
+            for d in range(per_type):
+                start = time.perf_counter()
+                md_text = f"# {scheme} - {document_type}\n\n" + "".join(
+                    synthetic_section(rng, scheme) for _ in range(SYNTHETIC_SECTIONS_PER_DOCUMENT)
+                )
+                trace.add(STAGE_SYNTHESIZE, (time.perf_counter() - start) * 1000)
+                yield md_text, document_metadata(
+                    scheme, f"SYN{i:05d}", document_type, f"{scheme.replace(' ', '_')}_{document_type}_{d:03d}.pdf"
+                )
+
+
+def synthetic_queries(schemes: List[str], n: int, seed: int = 1) -> List[Tuple[str, str]]:
+    """(query, scheme) pairs asking for a random facet of a random scheme."""
+    rng = random.Random(seed)
+    return [
+        (rng.choice(SYNTHETIC_QUERIES).format(facet=rng.choice(SYNTHETIC_FACETS)[0].lower(), scheme=scheme), scheme)
+        for scheme in (rng.choice(schemes) for _ in range(n))
+    ]
+
+
+def ingest_corpus(
+    documents: Iterator[Tuple[str, Dict[str, Any]]],
+    store_dir: Path,
+    encoder: HashingEncoder,
+    trace: Trace,
+    index_type: str = "flat",
+    max_chunks: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    Chunk, embed and store documents, then build and write the index.
+
+    Returns:
+        Corpus statistics, the indexed scheme names, per-document chunk
+        latencies, index facts and the peak RSS after ingestion and after
+        the index build
+    """
+    writer = ChunkStoreWriter(store_dir / CHUNK_STORE_DIR_NAME)
+    blocks: List[np.ndarray] = []
+    pending: List[Dict[str, Any]] = []
+    chunk_ms: List[float] = []
+    stats = {"documents": 0, "chunks": 0, "text_mb": 0.0}
+    schemes = set()
+
+    def embed_pending() -> None:
+        with trace.stage(STAGE_EMBED):
+            blocks.append(create_embeddings(pending, model=encoder))
+        with trace.stage(STAGE_STORE):
+            for chunk in pending:
+                writer.add(chunk)
+        pending.clear()
+
+    for md_text, metadata in documents:
+        start = time.perf_counter()
+        chunks = chunk_document(md_text, metadata)
+        ms = (time.perf_counter() - start) * 1000
+        trace.add(STAGE_CHUNK, ms)
+        chunk_ms.append(ms)
+        if max_chunks is not None:
+            chunks = chunks[:max_chunks - stats["chunks"]]
+        if chunks:
+            schemes.add(metadata["scheme_name"])
+        stats["documents"] += 1
+        stats["chunks"] += len(chunks)
+        stats["text_mb"] += sum(len(chunk["text"]) for chunk in chunks) / 1e6
+        pending.extend(chunks)
+        if len(pending) >= EMBED_BATCH_SIZE:
+            embed_pending()
+        if max_chunks is not None and stats["chunks"] >= max_chunks:
+            break
+    if pending:
+        embed_pending()
+    with trace.stage(STAGE_STORE):
+        writer.close()
+        write_index_layout(store_dir)
+    rss_ingest = peak_rss_mb()
+
+    embeddings = np.concatenate(blocks) if blocks else np.zeros((0, EMBEDDING_DIM), dtype=np.float32)
+    blocks.clear()
+    params = resolve_index_params(index_type, len(embeddings))
+    with trace.stage(STAGE_INDEX_BUILD):
+        index = create_faiss_index(embeddings, index_type, params)
+    index_path = store_dir / "faiss_index.bin"
+    write_index(index, index_path)
+    if not stores_exact_vectors(index_type):
+        write_vectors(store_dir / VECTORS_FILE_NAME, [embeddings], len(embeddings), EMBEDDING_DIM)
+    del index, embeddings
+
+    summary = {"embedding_model": STANDIN_MODEL_NAME, "index_type": index_type, "index_params": params}
+    with open(store_dir / "ingestion_summary.json", "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=2)
+
+    return {
+        **stats,
+        "schemes": sorted(schemes),
+        "per_document_ms": {STAGE_CHUNK: latency_summary(chunk_ms)},
+        "index": {"type": index_type, "params": params, "size_mb": index_path.stat().st_size / 1e6},
+        "peak_rss_mb": {"ingest": rss_ingest, STAGE_INDEX_BUILD: peak_rss_mb()},
+    }
+
+
+def benchmark_retrieval(
+    store_dir: Path,
+    encoder: HashingEncoder,
+    queries: List[Tuple[str, str]],
+    k: int = DEFAULT_K
+) -> Dict[str, Any]:
+    """
+    Single-query latency (encode, search, scheme-filtered search) and batch
+    QPS through the Retriever. The query embedding cache is disabled so
+    every query is encoded.
+    """
+    from scripts.retriever import Retriever
+
+    start = time.perf_counter()
+    retriever = Retriever(
+        vector_store_dir=store_dir, summary_path=store_dir / "ingestion_summary.json", model=encoder,
+        warmup=False, encoder=QueryEncoder(encoder, cache_size=0)
+    )
+    load_s = time.perf_counter() - start
+    retriever.search("warmup", k=1)
+
+    latencies: Dict[str, List[float]] = {
+        STAGE_QUERY_ENCODE: [], STAGE_SEARCH: [], STAGE_SEARCH_FILTERED: [], "total": []
+    }
+    scheme_hits = 0
+    for query, scheme in queries:
+        t0 = time.perf_counter()
+        vectors = retriever.encode_queries([query])
+        t1 = time.perf_counter()
+        results = retriever.search_vectors(vectors, k)[0]
+        t2 = time.perf_counter()
+        retriever.search_vectors(vectors, k, {"scheme_name": scheme})
+        t3 = time.perf_counter()
+        latencies[STAGE_QUERY_ENCODE].append((t1 - t0) * 1000)
+        latencies[STAGE_SEARCH].append((t2 - t1) * 1000)
+        latencies[STAGE_SEARCH_FILTERED].append((t3 - t2) * 1000)
+        latencies["total"].append((t2 - t0) * 1000)
+        scheme_hits += bool(results) and results[0]["scheme_name"] == scheme
+
+    start = time.perf_counter()
+    retriever.search_many([query for query, _ in queries], k)
+    batch_s = time.perf_counter() - start
+    retriever.close()
+
+    return {
+        "queries": len(queries),
+        "k": k,
+        "load_s": load_s,
+        "batch_qps": len(queries) / batch_s if batch_s > 0 else float("inf"),
+        "scheme_hit_rate": scheme_hits / len(queries) if queries else 0.0,
+        "latency_ms": {stage: latency_summary(values) for stage, values in latencies.items()},
+    }
+
+
+def stage_throughput(trace: Trace, result: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """Seconds and items/s per stage (documents for parse / synthesize, chunks otherwise)."""
+    stages = {}
+    for stage, ms in trace.stages.items():
+        unit = "documents" if stage in (STAGE_PARSE, STAGE_SYNTHESIZE) else "chunks"
+        seconds = ms / 1000
+        stages[stage] = {
+            "seconds": seconds,
+            "throughput": result[unit] / seconds if seconds > 0 else None,
+            "unit": f"{unit}/s",
+        }
+    return stages
+
+
+def run_corpus(
+    corpus: str,
+    work_dir: Optional[Path] = None,
+    index_type: str = "flat",
+    n_queries: int = DEFAULT_QUERIES,
+    k: int = DEFAULT_K,
+    max_pdfs: Optional[int] = None,
+    seed: int = 0
+) -> Dict[str, Any]:
+    """
+    Benchmark one corpus end to end ("real" or a synthetic chunk count).
+    Meant to run in its own process, so peak RSS covers this corpus only.
+    """
+    rss_start = peak_rss_mb()
+    started = time.perf_counter()
+    trace = Trace()
+    encoder = HashingEncoder()
+
+    parse_ms: List[float] = []
+    if corpus == "real":
+        documents = iter_real_documents(SCHEMES_DIR, trace, parse_ms, max_pdfs)
+        max_chunks = None
+    else:
+        max_chunks = int(corpus)
+        documents = iter_synthetic_documents(max_chunks, trace, seed)
+
+    with tempfile.TemporaryDirectory(prefix="benchmark-suite-", dir=work_dir) as tmp:
+        store_dir = Path(tmp)
+        result = ingest_corpus(documents, store_dir, encoder, trace, index_type, max_chunks)
+        if result["chunks"] == 0:
+            return {"corpus": corpus, "error": "no chunks"}
+        schemes = result.pop("schemes")
+        result["schemes"] = len(schemes)
+        result["retrieval"] = benchmark_retrieval(
+            store_dir, encoder, synthetic_queries(schemes, n_queries, seed + 1), min(k, result["chunks"])
+        )
+
+    if parse_ms:
+        result["per_document_ms"][STAGE_PARSE] = latency_summary(parse_ms)
+    result["peak_rss_mb"] = {"start": rss_start, **result["peak_rss_mb"], "retrieval": peak_rss_mb()}
+    return {
+        "corpus": corpus,
+        **result,
+        "stages": stage_throughput(trace, result),
+        "wall_s": time.perf_counter() - started,
+    }
+
+
+def run_isolated(corpus: str, options: Dict[str, Any]) -> Dict[str, Any]:
+    """run_corpus in a freshly spawned process (its own RSS high-water mark)."""
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+        try:
+            return pool.submit(run_corpus, corpus, **options).result()
+        except BrokenProcessPool as e:
+            # Most likely killed for running out of memory
+            return {"corpus": corpus, "error": f"worker died: {e}"}
+
+
+def environment() -> Dict[str, Any]:
+    """Machine and code version, so results files can be told apart."""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BASE_DIR, capture_output=True, text=True, timeout=10
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        "git_commit": commit,
+        "platform": platform.platform(),
+        "python": platform.python_version(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+        "faiss": getattr(faiss, "__version__", None),
+    }
+
+
+def flatten_metrics(result: Dict[str, Any], prefix: str = "") -> Dict[str, float]:
+    """Comparable numbers of a corpus result: throughputs, latency percentiles, QPS and peak RSS."""
+    metrics = {}
+    for key, value in result.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            metrics.update(flatten_metrics(value, f"{name}."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool) and (
+            key in ("throughput", "batch_qps") or key in {f"p{p}" for p in PERCENTILES}
+            or prefix.startswith("peak_rss_mb")
+        ):
+            metrics[name] = float(value)
+    return metrics
+
+
+def print_results(results: Dict[str, Any]) -> None:
+    for corpus, r in results["corpora"].items():
+        print("\n" + "=" * 70)
+        print(f"Corpus: {corpus}")
+        print("=" * 70)
+        if "error" in r:
+            print(f"  [ERROR] {r['error']}")
+            continue
+        print(f"  {r['documents']} documents, {r['schemes']} schemes, {r['chunks']} chunks, "
+              f"{r['text_mb']:.1f} MB text, index {r['index']['type']} {r['index']['size_mb']:.1f} MB, "
+              f"{r['wall_s']:.1f} s")
+        print(f"\n  {'Stage':<16} {'Seconds':>10} {'Throughput':>22}")
+        for stage, s in r["stages"].items():
+            throughput = f"{s['throughput']:,.1f} {s['unit']}" if s["throughput"] is not None else "-"
+            print(f"  {stage:<16} {s['seconds']:>10.2f} {throughput:>22}")
+
+        retrieval = r["retrieval"]
+        print(f"\n  {'Query stage':<16} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10}")
+        for stage, s in retrieval["latency_ms"].items():
+            print(f"  {stage:<16} {s['p50']:>10.3f} {s['p95']:>10.3f} {s['p99']:>10.3f}")
+        print(f"  Batch: {retrieval['batch_qps']:.0f} QPS | top-1 scheme hit rate {retrieval['scheme_hit_rate']:.1%}")
+        rss = " | ".join(f"{stage} {mb:.0f} MB" for stage, mb in r["peak_rss_mb"].items() if mb is not None)
+        print(f"  Peak RSS: {rss or 'n/a'}")
+
+
+def print_comparison(results: Dict[str, Any], previous: Dict[str, Any]) -> None:
+    """Change of every comparable metric present in both runs."""
+    print("\n" + "=" * 70)
+    print(f"Compared with {previous.get('timestamp')} ({previous.get('environment', {}).get('git_commit')})")
+    print("=" * 70)
+    for corpus, r in results["corpora"].items():
+        before = previous.get("corpora", {}).get(corpus)
+        if before is None or "error" in r or "error" in before:
+            continue
+        old, new = flatten_metrics(before), flatten_metrics(r)
+        print(f"\n  {corpus}")
+        print(f"  {'Metric':<40} {'Before':>12} {'After':>12} {'Change':>9}")
+        for name in sorted(set(old) & set(new)):
+            change = f"{new[name] / old[name] - 1:>+9.1%}" if old[name] else f"{'-':>9}"
+            print(f"  {name:<40} {old[name]:>12.2f} {new[name]:>12.2f} {change}")
+
+
+def main():
+    """Run the end-to-end benchmark suite."""
+    parser = argparse.ArgumentParser(description="End-to-end ingestion and retrieval benchmark")
+    parser.add_argument("--scales", nargs="*", type=int, default=DEFAULT_SCALES,
+                        help="Synthetic corpus sizes in chunks (none: real corpus only)")
+    parser.add_argument("--skip-real", action="store_true", help="Do not benchmark data/raw/schemes")
+    parser.add_argument("--max-pdfs", type=int, help="Parse only the first N PDFs of the real corpus")
+    parser.add_argument("--index-type", choices=INDEX_TYPES, default="flat")
+    parser.add_argument("--queries", type=int, default=DEFAULT_QUERIES, help="Queries per corpus")
+    parser.add_argument("--k", type=int, default=DEFAULT_K, help="Chunks retrieved per query")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the synthetic corpora and queries")
+    parser.add_argument("--work-dir", type=Path, help="Where the temporary vector stores are written")
+    parser.add_argument("--output", type=Path,
+                        help="Results file (default: data/processed/benchmarks/suite-<time>.json)")
+    parser.add_argument("--compare", type=Path, help="Earlier results file to compare with")
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("Groww Mutual Fund RAG - End-to-End Benchmark")
+    print("=" * 70)
+
+    corpora = ([] if args.skip_real else ["real"]) + [str(n) for n in args.scales]
+    if not corpora:
+        parser.error("nothing to run: --skip-real without --scales")
+    if "real" in corpora and not (SCHEMES_DIR.exists() and any(collect_scheme_pdfs(SCHEMES_DIR).values())):
+        print(f"[WARN] No PDFs in {SCHEMES_DIR} - real corpus skipped")
+        corpora = [c for c in corpora if c != "real"]
+
+    options = {
+        "work_dir": args.work_dir, "index_type": args.index_type, "n_queries": args.queries,
+        "k": args.k, "max_pdfs": args.max_pdfs, "seed": args.seed,
+    }
+    results = {
+        "timestamp": utc_timestamp(),
+        "environment": environment(),
+        "encoder": STANDIN_MODEL_NAME,
+        "options": {**options, "work_dir": str(args.work_dir) if args.work_dir else None},
+        "corpora": {},
+    }
+    for corpus in corpora:
+        name = "real" if corpus == "real" else f"synthetic_{corpus}"
+        print(f"\n  Running {name}...")
+        results["corpora"][name] = run_isolated(corpus, options)
+        r = results["corpora"][name]
+        if "error" in r:
+            print(f"  [ERROR] {name}: {r['error']}")
+        else:
+            print(f"  [OK] {name}: {r['chunks']} chunks in {r['wall_s']:.1f} s")
+
+    print_results(results)
+
+    output = args.output or BENCHMARK_DIR / f"suite-{datetime.now(timezone.utc):%Y%m%d-%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"\n[OK] Results saved to {output}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            print_comparison(results, json.load(f))
+
+    failed = sum("error" in r for r in results["corpora"].values())
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    exit(main())
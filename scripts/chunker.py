@@ -0,0 +1,454 @@
+"""
+Structure-Aware Chunker for Groww Mutual Fund RAG System
+
+Splits the markdown produced by pymupdf4llm into chunks measured in
+embedding-model tokens, following the atomic-unit rules of
+architecture.md §4.2.1 / §4.2.2:
+
+    - Tables are never cut mid-row. A table up to TABLE_MAX_TOKENS is one
+      chunk (it may exceed the 512-token chunk size); a bigger one is split
+      into row groups with the header row repeated, tagged is_partial with
+      a shared parent_chunk_id.
+    - Numbered / bulleted lists stay together up to LIST_MAX_TOKENS.
+    - A heading is never the last thing in a chunk, and a new section
+      starts a new chunk once the current one has some substance.
+    - Paragraphs are packed up to CHUNK_SIZE tokens; longer ones are split
+      at sentence boundaries. CHUNK_OVERLAP tokens of trailing sentences are
+      repeated when a section continues in the next chunk.
+
+Every chunk carries section_title (nearest heading), is_table and
+table_type (architecture.md §4.2.3).
+
+Tokens are counted with the embedding model's tokenizer (transformers
+AutoTokenizer) or, offline, with ApproxTokenCounter.
+
+Usage:
+    python scripts/chunker.py path/to/document.pdf
+    python scripts/chunker.py path/to/document.md --tokenizer approx --show 5
+"""
+
+import re
+import uuid
+import hashlib
+import argparse
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Tuple
+
+# Configuration
+CHUNK_SIZE = 512  # tokens (architecture.md §4.2.2)
+CHUNK_OVERLAP = 64  # tokens of trailing sentences repeated in a continuation chunk
+TABLE_MAX_TOKENS = 2048  # Tables up to this size are one chunk
+LIST_MAX_TOKENS = 1024  # Lists up to this size are one chunk
+MIN_SECTION_TOKENS = CHUNK_SIZE // 4  # A heading starts a new chunk once the current one has this many
+DEFAULT_TOKENIZER = "BAAI/bge-m3"
+
+HEADING_PATTERN = re.compile(r"^(#{1,6})\s+(.*\S)\s*$")
+BOLD_LINE_PATTERN = re.compile(r"^\*\*(.+)\*\*$")
+LIST_ITEM_PATTERN = re.compile(r"^\s*(?:[-*+•]|\d{1,3}[.)]|\(?[ivx]{1,4}\)|\(?[a-z]\))\s+")
+TABLE_SEPARATOR_PATTERN = re.compile(r"^\|?\s*:?-{3,}")
+MARKUP_PATTERN = re.compile(r"</?(?:u|mark|b|i|em|strong)>|<br\s*/?>|\*\*|__|`")
+SENTENCE_PATTERN = re.compile(r"(?<=[.!?;])\s+(?=[\"'(\[]?[A-Z0-9])")
+# Page numbers and page footers: "**12**", "Page 3", "~~P~~ age 2", "1/2"
+PAGE_NUMBER_PATTERN = re.compile(
+    r"^(?:\**\d{1,4}\**|(?:~~)?p(?:~~)?\s*age\s*\d{1,4}|\d{1,3}\s*/\s*\d{1,3})$", re.IGNORECASE
+)
+
+# Table type (architecture.md §4.2.3) by the first matching keyword
+TABLE_TYPE_KEYWORDS: List[Tuple[str, Tuple[str, ...]]] = [
+    ("expense_ratio", ("expense ratio", "ter ", "total expense")),
+    ("exit_load", ("exit load",)),
+    ("risk_meter", ("riskometer", "risk-o-meter", "risk level", "potential risk class")),
+    ("nav_history", ("nav history", "nav as on", "nav per unit", "nav (", "nav date", "historical nav")),
+]
+
+
+class ApproxTokenCounter:
+    """
+    Offline stand-in for a subword tokenizer.
+
+    Words cost one token per 8 letters, digit runs one per 3 digits and
+    every punctuation mark one token; close to (slightly above) what
+    XLM-R / BGE-M3 produces for English fund documents.
+    """
+
+    name = "approx"
+    PIECES = re.compile(r"[^\W\d_]+|\d+|[^\w\s]")
+
+    def count(self, text: str) -> int:
+        total = 0
+        for piece in self.PIECES.findall(text):
+            if piece[0].isdigit():
+                total += (len(piece) + 2) // 3
+            elif piece[0].isalpha():
+                total += 1 + (len(piece) - 1) // 8
+            else:
+                total += 1
+        return total
+
+    def count_many(self, texts: List[str]) -> List[int]:
+        return [self.count(text) for text in texts]
+
+
+class ModelTokenCounter:
+    """Token counts from a Hugging Face tokenizer (no special tokens)."""
+
+    def __init__(self, tokenizer: Any, name: str):
+        self.tokenizer = tokenizer
+        self.tokenizer.model_max_length = 10 ** 9  # Counting only: no truncation warnings
+        self.name = name
+
+    def count(self, text: str) -> int:
+        return self.count_many([text])[0]
+
+    def count_many(self, texts: List[str]) -> List[int]:
+        if not texts:
+            return []
+        encoded = self.tokenizer(texts, add_special_tokens=False)["input_ids"]
+        return [len(ids) for ids in encoded]
+
+
+@lru_cache(maxsize=4)
+def load_token_counter(name: str = DEFAULT_TOKENIZER) -> Any:
+    """Tokenizer of an embedding model by name or local path ("approx": offline stand-in)."""
+    if name == "approx":
+        return ApproxTokenCounter()
+    try:
+        from transformers import AutoTokenizer
+        return ModelTokenCounter(AutoTokenizer.from_pretrained(name), name)
+    except Exception as e:
+        print(f"    [WARN] Could not load tokenizer {name} ({e}) - counting tokens with the approximate stand-in")
+        return ApproxTokenCounter()
+
+
+def clean_heading(text: str) -> str:
+    """'### **<mark>5. Investment Objective</mark>**' -> '5. Investment Objective'."""
+    return " ".join(MARKUP_PATTERN.sub("", text).split())
+
+
+def make_chunk_id(metadata: Dict[str, Any], chunk_index: Any, text: str) -> str:
+    """
+    Deterministic chunk id (UUID-formatted): a hash of the document (scheme,
+    checksum), the chunk's position and its text, so an unchanged document
+    gets the same ids in every build.
+    """
+    key = "\x1f".join([
+        str(metadata.get("scheme_name") or ""),
+        str(metadata.get("checksum") or metadata.get("source_file") or ""),
+        str(chunk_index),
+        text,
+    ])
+    return str(uuid.UUID(bytes=hashlib.sha256(key.encode("utf-8")).digest()[:16]))
+
+
+def classify_table(text: str) -> Optional[str]:
+    """table_type of a table chunk, or None."""
+    lowered = f" {text.lower()} "
+    for table_type, keywords in TABLE_TYPE_KEYWORDS:
+        if any(keyword in lowered for keyword in keywords):
+            return table_type
+    return None
+
+
+def parse_blocks(text: str) -> List[Dict[str, Any]]:
+    """
+    Split markdown into blocks: heading, table, list and paragraph.
+
+    Returns:
+        {"kind", "text", "section_title"} in document order; headings also
+        carry "title"
+    """
+    blocks: List[Dict[str, Any]] = []
+    section_title: Optional[str] = None
+    current: Optional[Dict[str, Any]] = None
+
+    def close():
+        nonlocal current
+        if current is not None:
+            current["text"] = "\n".join(current.pop("lines")).strip()
+            if current["text"]:
+                blocks.append(current)
+        current = None
+
+    for line in text.splitlines():
+        stripped = line.strip()
+        if not stripped:
+            # Lists and tables survive single blank lines between their items
+            if current is not None and current["kind"] == "paragraph":
+                close()
+            continue
+        if PAGE_NUMBER_PATTERN.match(stripped):
+            continue
+
+        heading = HEADING_PATTERN.match(stripped)
+        bold = BOLD_LINE_PATTERN.match(stripped)
+        if heading or (bold and len(stripped) <= 120):
+            title = clean_heading(heading.group(2) if heading else bold.group(1))
+            close()
+            if title:
+                section_title = title
+                blocks.append({"kind": "heading", "text": stripped, "title": title,
+                               "section_title": section_title})
+            continue
+
+        if stripped.startswith("|"):
+            kind = "table"
+        elif LIST_ITEM_PATTERN.match(line):
+            kind = "list"
+        elif current is not None and current["kind"] == "list" and line[:1].isspace():
+            kind = "list"  # Indented continuation of a list item
+        else:
+            kind = "paragraph"
+
+        if current is None or current["kind"] != kind:
+            close()
+            current = {"kind": kind, "lines": [], "section_title": section_title}
+        current["lines"].append(stripped if kind != "list" else line.rstrip())
+    close()
+    return blocks
+
+
+def split_sentences(text: str) -> List[str]:
+    """Split prose at sentence ends (also at ';', common in offer documents)."""
+    return [s for s in SENTENCE_PATTERN.split(text) if s.strip()]
+
+
+class StructuredChunker:
+    """
+    Token-budgeted, structure-aware chunker.
+
+    Args:
+        token_counter: Object with count(text) / count_many(texts)
+        chunk_size: Target tokens per chunk
+        chunk_overlap: Tokens of trailing sentences repeated in a continuation chunk
+        table_max_tokens: Largest table kept as a single chunk
+        list_max_tokens: Largest list kept as a single chunk
+    """
+
+    def __init__(
+        self,
+        token_counter: Optional[Any] = None,
+        chunk_size: int = CHUNK_SIZE,
+        chunk_overlap: int = CHUNK_OVERLAP,
+        table_max_tokens: int = TABLE_MAX_TOKENS,
+        list_max_tokens: int = LIST_MAX_TOKENS
+    ):
+        self.counter = token_counter or load_token_counter()
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.table_max_tokens = table_max_tokens
+        self.list_max_tokens = list_max_tokens
+
+    @property
+    def name(self) -> str:
+        return f"structured:{self.counter.name}"
+
+    # ------------------------------------------------------------------ #
+    # Oversized blocks
+    # ------------------------------------------------------------------ #
+
+    def _pack(self, pieces: List[str], budget: int, header: str = "", sep: str = "\n") -> List[str]:
+        """Greedily join pieces into groups of at most `budget` tokens (plus header)."""
+        header_tokens = self.counter.count(header) if header else 0
+        groups, current, tokens = [], [], header_tokens
+        for piece, piece_tokens in zip(pieces, self.counter.count_many(pieces)):
+            if current and tokens + piece_tokens > budget:
+                groups.append(current)
+                current, tokens = [], header_tokens
+            current.append(piece)
+            tokens += piece_tokens
+        if current:
+            groups.append(current)
+        prefix = header + sep if header else ""
+        return [prefix + sep.join(group) for group in groups]
+
+    def _split_prose(self, text: str, budget: int) -> List[str]:
+        pieces = []
+        for sentence in split_sentences(text):
+            if self.counter.count(sentence) > budget:
+                pieces.extend(self._pack(sentence.split(), budget, sep=" "))
+            else:
+                pieces.append(sentence)
+        return self._pack(pieces, budget, sep=" ")
+
+    def _split_table(self, text: str) -> List[str]:
+        """Row groups of a table, each starting with the header (and separator) rows."""
+        rows = text.split("\n")
+        header_end = 1
+        if len(rows) > 1 and TABLE_SEPARATOR_PATTERN.match(rows[1]):
+            header_end = 2
+        header = "\n".join(rows[:header_end])
+        return self._pack(rows[header_end:], self.table_max_tokens, header=header)
+
+    def _split_list(self, text: str) -> List[str]:
+        """Groups of whole list items (an item keeps its indented continuation lines)."""
+        items: List[str] = []
+        for line in text.split("\n"):
+            if LIST_ITEM_PATTERN.match(line) or not items:
+                items.append(line)
+            else:
+                items[-1] += "\n" + line
+        return self._pack(items, self.list_max_tokens)
+
+    # ------------------------------------------------------------------ #
+    # Packing
+    # ------------------------------------------------------------------ #
+
+    def _units(self, blocks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Blocks with token counts; oversized blocks become partial units."""
+        for block, tokens in zip(blocks, self.counter.count_many([b["text"] for b in blocks])):
+            block["tokens"] = tokens
+
+        units = []
+        parents: List[str] = []
+        for block in blocks:
+            kind, tokens = block["kind"], block["tokens"]
+            limit = {"table": self.table_max_tokens, "list": self.list_max_tokens}.get(kind, self.chunk_size)
+            if tokens <= limit or kind == "heading":
+                units.append(block)
+                continue
+            if kind == "table":
+                pieces = self._split_table(block["text"])
+            elif kind == "list":
+                pieces = self._split_list(block["text"])
+            else:
+                pieces = self._split_prose(block["text"], self.chunk_size)
+            # Local id, made document-scoped in chunk()
+            parent_id = f"parent-{len(parents)}" if kind in ("table", "list") else None
+            if parent_id:
+                parents.append(parent_id)
+            for piece, piece_tokens in zip(pieces, self.counter.count_many(pieces)):
+                units.append({**block, "text": piece, "tokens": piece_tokens, "parent_chunk_id": parent_id})
+        return units
+
+    def split(self, text: str) -> List[Dict[str, Any]]:
+        """
+        Split markdown into chunk dicts (text, section_title, is_table, ...), without ids.
+        """
+        chunks: List[Dict[str, Any]] = []
+        current: List[Dict[str, Any]] = []
+        tokens = 0
+        overlap: Optional[Tuple[str, int, Optional[str]]] = None  # (text, tokens, section)
+
+        def flush():
+            nonlocal current, tokens, overlap
+            content = [u for u in current if u["kind"] != "heading"]
+            if content:
+                tables = [u for u in content if u["kind"] == "table"]
+                partial = [u for u in content if u.get("parent_chunk_id")]
+                chunks.append({
+                    "text": "\n\n".join(u["text"] for u in current),
+                    "section_title": current[0]["section_title"] or (content[0]["section_title"]),
+                    "is_table": bool(tables),
+                    "table_type": classify_table(
+                        "\n".join([str(tables[0]["section_title"])] + [u["text"] for u in tables])
+                    ) if tables else None,
+                    "is_partial": bool(partial),
+                    "parent_chunk_id": partial[0]["parent_chunk_id"] if partial else None,
+                    "token_count": tokens,
+                })
+                overlap = self._tail(content[-1])
+                current, tokens = [], 0
+            # Headings alone are carried into the next chunk
+
+        for unit in self._units(parse_blocks(text)):
+            is_heading = unit["kind"] == "heading"
+            has_content = any(u["kind"] != "heading" for u in current)
+
+            if is_heading:
+                if has_content and tokens >= MIN_SECTION_TOKENS:
+                    flush()
+            elif unit.get("parent_chunk_id") or unit["tokens"] > self.chunk_size:
+                # Big atoms and partial tables / lists get a chunk of their own,
+                # together with any heading that introduces them
+                if has_content:
+                    flush()
+            elif tokens + unit["tokens"] > self.chunk_size:
+                flush()
+
+            if not is_heading and not current and overlap and unit["kind"] == "paragraph" \
+                    and overlap[2] == unit["section_title"] and unit["tokens"] + overlap[1] <= self.chunk_size:
+                current.append({"kind": "paragraph", "text": overlap[0], "tokens": overlap[1],
+                                "section_title": unit["section_title"]})
+                tokens += overlap[1]
+            overlap = None if not is_heading else overlap
+
+            current.append(unit)
+            tokens += unit["tokens"]
+            if not is_heading and (unit.get("parent_chunk_id") or unit["tokens"] > self.chunk_size):
+                flush()
+        flush()
+        return chunks
+
+    def _tail(self, unit: Dict[str, Any]) -> Optional[Tuple[str, int, Optional[str]]]:
+        """Trailing sentences of a prose unit, up to chunk_overlap tokens."""
+        if unit["kind"] != "paragraph" or self.chunk_overlap <= 0:
+            return None
+        sentences = split_sentences(unit["text"])[1:]  # Never the whole paragraph
+        tail, tokens = [], 0
+        for sentence, sentence_tokens in zip(reversed(sentences), reversed(self.counter.count_many(sentences))):
+            if tokens + sentence_tokens > self.chunk_overlap:
+                break
+            tail.insert(0, sentence)
+            tokens += sentence_tokens
+        return (" ".join(tail), tokens, unit["section_title"]) if tail else None
+
+    def chunk(self, text: str, metadata: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Split document text into chunks with ids and document metadata (like chunk_document)."""
+        splits = self.split(text)
+        return [
+            {
+                "chunk_id": make_chunk_id(metadata, i, split["text"]),
+                "text": split["text"],
+                "chunk_index": i,
+                "total_chunks": len(splits),
+                "section_title": split["section_title"],
+                "is_table": split["is_table"],
+                "table_type": split["table_type"],
+                "is_partial": split["is_partial"],
+                "parent_chunk_id": make_chunk_id(metadata, split["parent_chunk_id"], "")
+                if split["parent_chunk_id"] else None,
+                **metadata,
+            }
+            for i, split in enumerate(splits)
+        ]
+
+
+def main():
+    """Chunk one PDF or markdown file and print chunk statistics."""
+    parser = argparse.ArgumentParser(description="Structure-aware chunking of a PDF or markdown file")
+    parser.add_argument("path", type=Path, help="PDF or markdown file")
+    parser.add_argument("--tokenizer", default=DEFAULT_TOKENIZER, help="Tokenizer name or path ('approx': stand-in)")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--show", type=int, default=0, help="Print the first N chunks")
+    args = parser.parse_args()
+
+    if not args.path.exists():
+        print(f"[ERROR] File not found: {args.path}")
+        return 1
+    if args.path.suffix.lower() == ".pdf":
+        import pymupdf4llm
+        text = pymupdf4llm.to_markdown(str(args.path))
+    else:
+        text = args.path.read_text(encoding="utf-8")
+
+    chunker = StructuredChunker(load_token_counter(args.tokenizer), chunk_size=args.chunk_size)
+    chunks = chunker.split(text)
+    sizes = sorted(c["token_count"] for c in chunks)
+    if not chunks:
+        print("[WARN] No chunks")
+        return 1
+
+    print(f"{len(chunks)} chunks ({chunker.name}) | tokens min {sizes[0]}, "
+          f"median {sizes[len(sizes) // 2]}, max {sizes[-1]} | "
+          f"tables {sum(c['is_table'] for c in chunks)}, partial {sum(c['is_partial'] for c in chunks)}")
+    for i, chunk in enumerate(chunks[:args.show]):
+        print("-" * 70)
+        print(f"[{i}] {chunk['token_count']} tokens | section: {chunk['section_title']} | "
+              f"table: {chunk['table_type'] if chunk['is_table'] else '-'}")
+        print(chunk["text"][:600])
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,376 @@
+"""
+Near-Duplicate Chunk Deduplication for Groww Mutual Fund RAG System
+
+The same boilerplate (riskometer text, disclaimers, investment objective)
+appears in the SID, KIM, scheme summary, leaflet and presentation of every
+scheme. Ingestion passes each chunk through NearDuplicateFilter before it is
+embedded: a chunk whose MinHash signature matches an already indexed chunk
+of the same scheme (estimated Jaccard similarity of word shingles at least
+DEDUP_THRESHOLD, and exactly the same numbers) is not embedded. It becomes a
+provenance record of the indexed chunk instead, kept in provenance.json.
+
+Citation precedence (index_layout.DOCUMENT_TYPE_PRECEDENCE, then the newer
+document date) decides which copy is indexed: documents are ingested in that
+order, and a chunk only collapses into a copy from an equally or more
+authoritative document. (An incremental run that adds a more authoritative
+document than the indexed copy keeps both until the next full ingestion.)
+
+Chunks of the documents fact_extraction reads (FACT_DOCUMENT_TYPES) are
+never collapsed, so the per-document fact table and historical_facts see
+every chunk; other documents' copies can still collapse into them.
+
+Provenance file (provenance.json):
+    {
+      "threshold": 0.8,
+      "duplicates": [
+        {"chunk_id": "<indexed chunk>", "canonical_source_file": "..._SID_....pdf",
+         "source_file": "..._KIM_....pdf", "document_type": "KIM", "document_date": "2025-11-21",
+         "chunk_index": 12, "section_title": "...", "checksum": "...", "similarity": 0.97},
+        ...
+      ]
+    }
+
+Usage:
+    python scripts/dedup.py                    # Near-duplicate report for the current vector store
+    python scripts/dedup.py --threshold 0.9 [vector_store_dir]
+    python scripts/dedup.py --test             # Built-in test cases
+"""
+
+import re
+import sys
+import os
+import json
+import hashlib
+import argparse
+import subprocess
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Tuple, Iterable
+
+import numpy as np
+
+# Local imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from scripts.index_layout import document_type_rank
+from scripts.metadata_store import ChunkStore, CHUNK_STORE_DIR_NAME
+from scripts.store_versions import current_store_dir
+from scripts.fact_extraction import FACT_DOCUMENT_TYPES
+
+# Configuration
+BASE_DIR = Path(__file__).parent.parent
+VECTOR_STORE_DIR = BASE_DIR / "data" / "vector_store"
+PROVENANCE_FILE_NAME = "provenance.json"
+DEDUP_THRESHOLD = 0.8  # Estimated Jaccard similarity of word shingles
+SHINGLE_SIZE = 3  # Words per shingle
+NUM_PERM = 64  # MinHash permutations
+LSH_BANDS = 16  # 16 bands x 4 rows: candidate pairs from ~0.5 similarity up
+
+WORD_PATTERN = re.compile(r"[a-z0-9]+(?:[.,][0-9]+)*")
+NUMBER_PATTERN = re.compile(r"\d+(?:[.,]\d+)*")
+MARKUP_PATTERN = re.compile(r"</?\w+[^>]*>|\*\*|__")
+
+RECORD_FIELDS = ["source_file", "document_type", "document_date", "chunk_index", "section_title", "checksum"]
+
+
+def precedence_key(chunk: Dict[str, Any]) -> Tuple[int, str]:
+    """Sort key of a chunk's document in citation precedence (smaller: cite first)."""
+    date = chunk.get("document_date") or ""
+    # Newer dates first: invert the digits of the ISO date
+    inverted = date.translate(str.maketrans("0123456789", "9876543210"))
+    return document_type_rank(chunk.get("document_type")), inverted or "~"
+
+
+class NearDuplicateFilter:
+    """
+    MinHash / LSH near-duplicate filter over the chunks of one ingestion run.
+
+    Signatures live only in memory, so the filter is seeded with the chunks
+    that are already indexed before new documents are filtered. Shingles
+    are hashed with 64-bit BLAKE2b rather than Python's per-process string
+    hash, so the same chunks collapse in every run.
+
+    Args:
+        threshold: Minimum estimated Jaccard similarity of a duplicate
+        num_perm: MinHash permutations
+        bands: LSH bands (num_perm must be a multiple)
+        keep_document_types: Document types whose chunks are always kept
+    """
+
+    def __init__(
+        self,
+        threshold: float = DEDUP_THRESHOLD,
+        num_perm: int = NUM_PERM,
+        bands: int = LSH_BANDS,
+        keep_document_types: Iterable[str] = FACT_DOCUMENT_TYPES
+    ):
+        if num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) must be a multiple of bands ({bands})")
+        rng = np.random.default_rng(0)
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.keep_document_types = set(keep_document_types)
+        self._mul = rng.integers(1, 2 ** 63, size=num_perm, dtype=np.uint64) | np.uint64(1)
+        self._add = rng.integers(0, 2 ** 63, size=num_perm, dtype=np.uint64)
+        self._buckets: Dict[Tuple[Any, int, bytes], List[str]] = {}
+        self._indexed: Dict[str, Dict[str, Any]] = {}
+        self._pending: List[Dict[str, Any]] = []
+
+        self.chunks_seen = 0
+        self.duplicates = 0
+        self.duplicates_by_type: Counter = Counter()
+
+    def signature(self, text: str) -> Tuple[np.ndarray, Tuple[str, ...]]:
+        """MinHash signature of a text's word shingles, and the numbers it contains."""
+        lowered = MARKUP_PATTERN.sub(" ", text.lower())
+        words = WORD_PATTERN.findall(lowered)
+        shingles = {
+            " ".join(words[i:i + SHINGLE_SIZE])
+            for i in range(max(1, len(words) - SHINGLE_SIZE + 1))
+        }
+        hashes = np.frombuffer(
+            b"".join(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest() for s in shingles), dtype=np.uint64
+        )
+        # (a * x + b) mod 2^64 per permutation; uint64 arithmetic wraps
+        with np.errstate(over="ignore"):
+            permuted = hashes[:, None] * self._mul[None, :] + self._add[None, :]
+        return permuted.min(axis=0), tuple(sorted(NUMBER_PATTERN.findall(lowered)))
+
+    def _band_keys(self, scheme: Any, signature: np.ndarray) -> List[Tuple[Any, int, bytes]]:
+        return [
+            (scheme, band, signature[band * self.rows:(band + 1) * self.rows].tobytes())
+            for band in range(self.bands)
+        ]
+
+    def _register(self, chunk: Dict[str, Any], signature: np.ndarray, numbers: Tuple[str, ...]) -> None:
+        self._indexed[chunk["chunk_id"]] = {
+            "signature": signature,
+            "numbers": numbers,
+            "precedence": precedence_key(chunk),
+            "source_file": chunk.get("source_file"),
+        }
+        for key in self._band_keys(chunk.get("scheme_name"), signature):
+            self._buckets.setdefault(key, []).append(chunk["chunk_id"])
+
+    def add(self, chunks: Iterable[Dict[str, Any]]) -> None:
+        """Register chunks that are (already) indexed."""
+        for chunk in chunks:
+            self._register(chunk, *self.signature(chunk["text"]))
+
+    def match(self, chunk: Dict[str, Any]) -> Tuple[Optional[str], float, np.ndarray, Tuple[str, ...]]:
+        """
+        Best indexed chunk this chunk can collapse into.
+
+        Returns:
+            (chunk_id or None, similarity, signature, numbers)
+        """
+        signature, numbers = self.signature(chunk["text"])
+        precedence = precedence_key(chunk)
+        candidates = {
+            chunk_id
+            for key in self._band_keys(chunk.get("scheme_name"), signature)
+            for chunk_id in self._buckets.get(key, ())
+        }
+        best_id, best_similarity = None, 0.0
+        for chunk_id in candidates:
+            indexed = self._indexed[chunk_id]
+            if indexed["numbers"] != numbers or indexed["precedence"] > precedence:
+                continue
+            similarity = float(np.mean(indexed["signature"] == signature))
+            if similarity >= self.threshold and similarity > best_similarity:
+                best_id, best_similarity = chunk_id, similarity
+        return best_id, best_similarity, signature, numbers
+
+    def filter(self, chunks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Drop near-duplicates of indexed chunks and register the rest as indexed.
+
+        Chunks of keep_document_types are always kept (and registered).
+
+        Returns:
+            The chunks to embed; dropped ones are queued as provenance records (drain())
+        """
+        kept = []
+        for chunk in chunks:
+            self.chunks_seen += 1
+            if chunk.get("document_type") in self.keep_document_types:
+                self._register(chunk, *self.signature(chunk["text"]))
+                kept.append(chunk)
+                continue
+            chunk_id, similarity, signature, numbers = self.match(chunk)
+            if chunk_id is None:
+                self._register(chunk, signature, numbers)
+                kept.append(chunk)
+                continue
+            self.duplicates += 1
+            self.duplicates_by_type[chunk.get("document_type")] += 1
+            self._pending.append({
+                "chunk_id": chunk_id,
+                "canonical_source_file": self._indexed[chunk_id]["source_file"],
+                **{name: chunk.get(name) for name in RECORD_FIELDS},
+                "similarity": round(similarity, 3),
+            })
+        return kept
+
+    def drain(self) -> List[Dict[str, Any]]:
+        """Provenance records queued since the last call."""
+        records, self._pending = self._pending, []
+        return records
+
+    def stats(self) -> Dict[str, Any]:
+        """Chunks seen by filter(), and how many were collapsed."""
+        return {
+            "threshold": self.threshold,
+            "chunks_seen": self.chunks_seen,
+            "duplicates_removed": self.duplicates,
+            "reduction": self.duplicates / self.chunks_seen if self.chunks_seen else 0.0,
+            "duplicates_by_document_type": dict(self.duplicates_by_type.most_common()),
+        }
+
+
+def write_provenance(vector_store_dir: Path, records: List[Dict[str, Any]], threshold: Optional[float]) -> None:
+    """Write provenance.json (sorted by indexed chunk, then citation precedence)."""
+    records = sorted(records, key=lambda r: (r["chunk_id"], precedence_key(r), r["source_file"] or ""))
+    with open(Path(vector_store_dir) / PROVENANCE_FILE_NAME, "w", encoding="utf-8") as f:
+        json.dump({"threshold": threshold, "duplicates": records}, f, indent=2, ensure_ascii=False)
+
+
+def load_provenance_records(vector_store_dir: Path) -> List[Dict[str, Any]]:
+    """Provenance records of a vector store ([] if it was built without deduplication)."""
+    path = Path(vector_store_dir) / PROVENANCE_FILE_NAME
+    if not path.exists():
+        return []
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)["duplicates"]
+
+
+def load_provenance(vector_store_dir: Path) -> Dict[str, List[Dict[str, Any]]]:
+    """Indexed chunk_id -> provenance records of the duplicates collapsed into it."""
+    provenance: Dict[str, List[Dict[str, Any]]] = {}
+    for record in load_provenance_records(vector_store_dir):
+        provenance.setdefault(record["chunk_id"], []).append(record)
+    return provenance
+
+
+def _filter_corpus(num_docs: int = 40) -> List[str]:
+    """chunk_ids kept by a fresh filter over a fixed synthetic corpus (determinism test)."""
+    clauses = [
+        "the scheme invests in large cap companies", "investors understand that their principal will be at",
+        "very high risk as per the riskometer", "past performance may or may not be sustained in future",
+        "mutual fund investments are subject to market risks", "read all scheme related documents carefully",
+        "units are allotted at the applicable nav", "redemption proceeds are paid within working days",
+    ]
+    chunks = []
+    for doc in range(num_docs):
+        for i in range(len(clauses)):
+            # Rotating clause order and one swapped word give a spread of similarities
+            words = " ".join(clauses[i:] + clauses[:i]).split()
+            words[(doc * 7 + i) % len(words)] = f"word{doc % 5}"
+            chunks.append({
+                "chunk_id": f"d{doc}-c{i}", "text": " ".join(words), "scheme_name": f"Scheme {doc % 3}",
+                "document_type": "SID", "document_date": f"2025-{doc % 12 + 1:02d}-01", "source_file": f"d{doc}.pdf",
+            })
+    return [chunk["chunk_id"] for chunk in NearDuplicateFilter().filter(chunks)]
+
+
+def run_tests():
+    """Run built-in test cases for NearDuplicateFilter (no vector store needed)."""
+    print("=" * 70)
+    print("Near-Duplicate Filter - Test Suite")
+    print("=" * 70)
+
+    passed = 0
+    failed = 0
+
+    def check(name: str, ok: bool) -> None:
+        nonlocal passed, failed
+        print(f"[{'PASS' if ok else 'FAIL'}] {name}")
+        if ok:
+            passed += 1
+        else:
+            failed += 1
+
+    boilerplate = ("Mutual fund investments are subject to market risks, read all scheme related documents "
+                   "carefully. The riskometer of the scheme is very high and investors should consult "
+                   "their advisers if in doubt about whether the product is suitable for them. ")
+    fee = boilerplate + "Exit load of 1% if redeemed within 1 year from the date of allotment."
+
+    def chunk(chunk_id: str, text: str, document_type: str, date: str = "2025-11-21") -> Dict[str, Any]:
+        return {"chunk_id": chunk_id, "text": text, "scheme_name": "HDFC Large Cap Fund",
+                "document_type": document_type, "document_date": date, "source_file": f"{chunk_id}.pdf"}
+
+    dedup = NearDuplicateFilter()
+    kept = dedup.filter([chunk("sid", fee, "SID"), chunk("leaflet", fee + " ", "Leaflet")])
+    records = dedup.drain()
+    check("near-duplicate collapses into the indexed copy",
+          [c["chunk_id"] for c in kept] == ["sid"] and records[0]["chunk_id"] == "sid"
+          and records[0]["source_file"] == "leaflet.pdf")
+
+    changed = fee.replace("1%", "0.5%")
+    kept = dedup.filter([chunk("leaflet2", changed, "Leaflet")])
+    check("chunk with different numbers is kept", [c["chunk_id"] for c in kept] == ["leaflet2"])
+
+    kept = dedup.filter([chunk("kim", fee, "KIM"), chunk("facts", fee, "Fund_Facts", "2025-12-31")])
+    check("fact-source chunks are never collapsed", [c["chunk_id"] for c in kept] == ["kim", "facts"])
+    check("stats count collapsed chunks", dedup.stats()["duplicates_removed"] == 1 and dedup.chunks_seen == 5)
+
+    first, second = _filter_corpus(), _filter_corpus()
+    check("same corpus, same kept chunks within a process", first == second and 0 < len(first) < 320)
+
+    # Separate interpreters with different string hash seeds must agree
+    code = "import json; from scripts.dedup import _filter_corpus; print(json.dumps(_filter_corpus()))"
+    outputs = []
+    for seed in ("1", "2"):
+        result = subprocess.run(
+            [sys.executable, "-c", code], cwd=BASE_DIR, capture_output=True, text=True,
+            env={**os.environ, "PYTHONHASHSEED": seed}
+        )
+        outputs.append(json.loads(result.stdout) if result.returncode == 0 else None)
+    check("same corpus, same kept chunks in two interpreters", outputs[0] is not None and outputs[0] == outputs[1])
+    check("interpreters agree with this process", outputs[0] == first)
+
+    print("-" * 70)
+    print(f"Results: {passed} passed, {failed} failed")
+    return failed == 0
+
+
+def main():
+    """Report near-duplicates in an existing vector store."""
+    parser = argparse.ArgumentParser(description="Near-duplicate report for a vector store")
+    parser.add_argument("vector_store_dir", nargs="?", type=Path, default=VECTOR_STORE_DIR)
+    parser.add_argument("--threshold", type=float, default=DEDUP_THRESHOLD, help="Minimum estimated Jaccard similarity")
+    parser.add_argument("--test", action="store_true", help="Run the built-in test cases and exit")
+    args = parser.parse_args()
+
+    if args.test:
+        return 0 if run_tests() else 1
+
+    store_dir = current_store_dir(args.vector_store_dir) / CHUNK_STORE_DIR_NAME
+    if not (store_dir / "columns.json").exists():
+        print(f"[ERROR] No chunk store in {store_dir.parent}")
+        return 1
+
+    store = ChunkStore(store_dir)
+    try:
+        # Same order as ingestion: citation precedence within each scheme
+        chunks = sorted(store.iter_chunks(), key=lambda c: (c.get("scheme_name") or "", precedence_key(c)))
+    finally:
+        store.close()
+
+    dedup = NearDuplicateFilter(args.threshold)
+    dedup.filter(chunks)
+    stats = dedup.stats()
+    existing = len(load_provenance_records(current_store_dir(args.vector_store_dir)))
+
+    print(f"Chunks: {stats['chunks_seen']} | near-duplicates: {stats['duplicates_removed']} "
+          f"({stats['reduction']:.1%} of the index) at threshold {args.threshold}")
+    if existing:
+        print(f"Already collapsed at ingestion: {existing}")
+    print("-" * 70)
+    for document_type, count in stats["duplicates_by_document_type"].items():
+        print(f"  {document_type or 'Unknown':<28} {count:>6}")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -2,19 +2,33 @@
 Data Acquisition Script for Groww Mutual Fund RAG System
 Milestone 1: Download and verify all corpus documents
 
+Documents are fetched by a thread pool with at most PER_HOST_CONCURRENCY
+requests per host, one keep-alive session per worker, and bodies streamed
+to disk. Requests are conditional on the ETag / Last-Modified recorded in
+corpus_manifest.json, so an unchanged document costs one 304.
+
 Usage:
-    python scripts/download_corpus.py
+    python scripts/download_corpus.py              # Conditional download of all documents
+    python scripts/download_corpus.py --force      # Re-download everything
+    python scripts/download_corpus.py --test       # Self-test against a local HTTP server
 """
 
 import os
 import sys
 import json
+import time
+import shutil
 import hashlib
+import argparse
+import tempfile
+import threading
 import requests
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from pathlib import Path
 from urllib.parse import urlparse
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional, Tuple
 
 # Configuration
 BASE_DIR = Path(__file__).parent.parent
@@ -23,6 +37,9 @@ MANIFEST_PATH = RAW_DATA_DIR / "corpus_manifest.json"
 
 # Request settings
 TIMEOUT = 30
+DOWNLOAD_WORKERS = 8
+PER_HOST_CONCURRENCY = 4  # Be polite to hdfcfund.com / amfiindia.com / sebi.gov.in
+STREAM_BLOCK_SIZE = 256 * 1024
 HEADERS = {
     "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
     "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,application/pdf,*/*;q=0.8",
@@ -95,9 +112,24 @@ def calculate_checksum(content: bytes) -> str:
     return hashlib.sha256(content).hexdigest()
 
 
-def download_document(doc: Dict[str, Any]) -> Dict[str, Any]:
-    """Download a single document and return metadata."""
-    result = {
+def calculate_file_checksum(file_path: Path, block_size: int = 1024 * 1024) -> str:
+    """Calculate SHA-256 checksum of a file on disk, reading it in blocks."""
+    sha256 = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            sha256.update(block)
+    return sha256.hexdigest()
+
+
+def file_signature(file_path: Path) -> Tuple[int, int]:
+    """(st_mtime_ns, st_size) of a file: take it before hashing, so a later write shows up as a mismatch."""
+    stat = os.stat(file_path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def make_result(doc: Dict[str, Any]) -> Dict[str, Any]:
+    """Empty manifest entry for a corpus document."""
+    return {
         "id": doc["id"],
         "name": doc["name"],
         "url": doc["url"],
@@ -105,70 +137,232 @@ def download_document(doc: Dict[str, Any]) -> Dict[str, Any]:
         "scheme": doc["scheme"],
         "status": "pending",
         "http_status": None,
+        "not_modified": False,
         "file_path": None,
         "file_size_bytes": 0,
         "checksum": None,
         "content_type": None,
+        "etag": None,
+        "last_modified": None,
         "download_timestamp": None,
         "error": None,
         "warning": None,
     }
+
+
+def resolve_manifest_path(file_path: str) -> Path:
+    """Manifest file paths are relative to BASE_DIR (and may use Windows separators)."""
+    path = Path(file_path.replace("\\", "/"))
+    return path if path.is_absolute() else BASE_DIR / path
+
+
+def manifest_file_path(filepath: Path) -> str:
+    """Path stored in the manifest: relative to BASE_DIR when possible."""
+    try:
+        return str(filepath.relative_to(BASE_DIR))
+    except ValueError:
+        return str(filepath)
+
+
+def conditional_headers(previous: Optional[Dict[str, Any]]) -> Dict[str, str]:
+    """
+    If-None-Match / If-Modified-Since from the previous manifest entry.
+    
+    Only sent when the previously downloaded file is still on disk with the
+    recorded size, so a 304 always leaves a usable file behind.
+    """
+    if not previous or previous.get("status") != "success" or not previous.get("file_path"):
+        return {}
+    filepath = resolve_manifest_path(previous["file_path"])
+    if not filepath.exists() or filepath.stat().st_size != previous.get("file_size_bytes"):
+        return {}
+    
+    headers = {}
+    if previous.get("etag"):
+        headers["If-None-Match"] = previous["etag"]
+    if previous.get("last_modified"):
+        headers["If-Modified-Since"] = previous["last_modified"]
+    return headers
+
+
+class HostLimiter:
+    """Bounds the number of concurrent requests per host."""
+    
+    def __init__(self, per_host: int = PER_HOST_CONCURRENCY):
+        self.per_host = per_host
+        self._lock = threading.Lock()
+        self._semaphores: Dict[str, threading.BoundedSemaphore] = {}
+    
+    def for_url(self, url: str) -> threading.BoundedSemaphore:
+        host = urlparse(url).netloc
+        with self._lock:
+            if host not in self._semaphores:
+                self._semaphores[host] = threading.BoundedSemaphore(self.per_host)
+            return self._semaphores[host]
+
+
+_thread_local = threading.local()
+
+
+def get_session() -> requests.Session:
+    """One Session per worker thread, so connections are kept alive and reused."""
+    session = getattr(_thread_local, "session", None)
+    if session is None:
+        session = requests.Session()
+        session.headers.update(HEADERS)
+        _thread_local.session = session
+    return session
+
+
+def download_document(
+    doc: Dict[str, Any],
+    previous: Optional[Dict[str, Any]] = None,
+    output_dir: Path = RAW_DATA_DIR,
+    limiter: Optional[HostLimiter] = None
+) -> Dict[str, Any]:
+    """
+    Download a single document and return metadata.
+    
+    The body is streamed to a temporary file (hashed on the way) and moved
+    into place when complete. With a previous manifest entry the request is
+    conditional: a 304 keeps the existing file and its metadata.
+    
+    Args:
+        doc: Corpus entry
+        previous: This document's entry from the previous manifest
+        output_dir: Directory to save the file in
+        limiter: Per-host concurrency limit shared by all workers
+    """
+    result = make_result(doc)
+    headers = conditional_headers(previous)
+    semaphore = limiter.for_url(doc["url"]) if limiter else None
     
     try:
-        print(f"  [{doc['id']:02d}] Downloading: {doc['name']}...")
-        response = requests.get(doc["url"], headers=HEADERS, timeout=TIMEOUT, allow_redirects=True)
+        if semaphore:
+            semaphore.acquire()
+        try:
+            response = get_session().get(
+                doc["url"], headers=headers, timeout=TIMEOUT, allow_redirects=True, stream=True
+            )
+            with response:
+                result["http_status"] = response.status_code
+                result["content_type"] = response.headers.get("Content-Type", "unknown")
+                result["download_timestamp"] = datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+                
+                if response.status_code == 304:
+                    for key in ("file_path", "file_size_bytes", "checksum", "content_type", "warning"):
+                        result[key] = previous[key]
+                    result["etag"] = response.headers.get("ETag", previous.get("etag"))
+                    result["last_modified"] = response.headers.get("Last-Modified", previous.get("last_modified"))
+                    result["download_timestamp"] = previous.get("download_timestamp")
+                    result["not_modified"] = True
+                    result["status"] = "success"
+                    print(f"  [{doc['id']:02d}] [OK] Not modified: {doc['name']}")
+                    return result
+                
+                if response.status_code != 200:
+                    result["status"] = "failed"
+                    result["error"] = f"HTTP {response.status_code}: {response.reason}"
+                    print(f"  [{doc['id']:02d}] [FAIL] HTTP {response.status_code}: {doc['name']}")
+                    return result
+                
+                # Determine file extension
+                ext = get_file_extension(result["content_type"], doc["url"], doc.get("type", "html"))
+                filename = f"{doc['name']}{ext}"
+                filepath = output_dir / filename
+                tmp_path = output_dir / f"{filename}.part"
+                
+                # Stream to disk, hashing as we go
+                sha256 = hashlib.sha256()
+                size = 0
+                try:
+                    with open(tmp_path, "wb") as f:
+                        for block in response.iter_content(chunk_size=STREAM_BLOCK_SIZE):
+                            f.write(block)
+                            sha256.update(block)
+                            size += len(block)
+                    os.replace(tmp_path, filepath)
+                except BaseException:
+                    tmp_path.unlink(missing_ok=True)
+                    raise
+                
+                result["file_path"] = manifest_file_path(filepath)
+                result["file_size_bytes"] = size
+                result["checksum"] = sha256.hexdigest()
+                result["etag"] = response.headers.get("ETag")
+                result["last_modified"] = response.headers.get("Last-Modified")
+                result["status"] = "success"
+        finally:
+            if semaphore:
+                semaphore.release()
         
-        result["http_status"] = response.status_code
-        result["content_type"] = response.headers.get("Content-Type", "unknown")
-        result["download_timestamp"] = datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+        # Warn if file is suspiciously small
+        if ext == ".pdf" and size < 10240:  # < 10KB
+            result["warning"] = f"PDF file is only {size} bytes - may be corrupted or failed download"
+        elif ext == ".html" and size < 1024:  # < 1KB
+            result["warning"] = f"HTML file is only {size} bytes - may be empty or error page"
+        
+        print(f"  [{doc['id']:02d}] [OK] Downloaded: {filename} ({size:,} bytes)")
         
-        if response.status_code == 200:
-            # Determine file extension
-            ext = get_file_extension(result["content_type"], doc["url"], doc.get("type", "html"))
-            filename = f"{doc['name']}{ext}"
-            filepath = RAW_DATA_DIR / filename
-            
-            # Save content
-            content = response.content
-            with open(filepath, "wb") as f:
-                f.write(content)
-            
-            result["file_path"] = str(filepath.relative_to(BASE_DIR))
-            result["file_size_bytes"] = len(content)
-            result["checksum"] = calculate_checksum(content)
-            result["status"] = "success"
-            
-            # Warn if file is suspiciously small
-            if ext == ".pdf" and len(content) < 10240:  # < 10KB
-                result["warning"] = f"PDF file is only {len(content)} bytes - may be corrupted or failed download"
-            elif ext == ".html" and len(content) < 1024:  # < 1KB
-                result["warning"] = f"HTML file is only {len(content)} bytes - may be empty or error page"
-            
-            print(f"       [OK] Success: {filename} ({len(content):,} bytes)")
-            
-        else:
-            result["status"] = "failed"
-            result["error"] = f"HTTP {response.status_code}: {response.reason}"
-            print(f"       [FAIL] HTTP {response.status_code}")
-            
     except requests.exceptions.Timeout:
         result["status"] = "failed"
         result["error"] = "Request timeout"
-        print(f"       [FAIL] Timeout")
+        print(f"  [{doc['id']:02d}] [FAIL] Timeout: {doc['name']}")
         
     except requests.exceptions.ConnectionError as e:
         result["status"] = "failed"
         result["error"] = f"Connection error: {str(e)}"
-        print(f"       [FAIL] Connection error")
+        print(f"  [{doc['id']:02d}] [FAIL] Connection error: {doc['name']}")
         
     except Exception as e:
         result["status"] = "failed"
         result["error"] = f"Unexpected error: {str(e)}"
-        print(f"       [FAIL] {str(e)}")
+        print(f"  [{doc['id']:02d}] [FAIL] {doc['name']}: {str(e)}")
     
     return result
 
 
+def download_corpus(
+    corpus: List[Dict[str, Any]],
+    previous_manifest: Optional[Dict[str, Any]] = None,
+    output_dir: Path = RAW_DATA_DIR,
+    workers: int = DOWNLOAD_WORKERS,
+    per_host: int = PER_HOST_CONCURRENCY
+) -> List[Dict[str, Any]]:
+    """
+    Download documents concurrently.
+    
+    Args:
+        corpus: Corpus entries to fetch
+        previous_manifest: Previous manifest, for conditional requests (None: fetch everything)
+        output_dir: Directory to save files in
+        workers: Worker threads
+        per_host: Maximum concurrent requests to one host
+        
+    Returns:
+        Manifest entries in corpus order
+    """
+    previous = {}
+    if previous_manifest:
+        previous = {d["url"]: d for d in previous_manifest.get("documents", [])}
+    
+    limiter = HostLimiter(per_host)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(download_document, doc, previous.get(doc["url"]), output_dir, limiter)
+            for doc in corpus
+        ]
+        return [future.result() for future in futures]
+
+
+def load_manifest(manifest_path: Path = MANIFEST_PATH) -> Optional[Dict[str, Any]]:
+    """Load the previous corpus manifest, or None if there is none."""
+    if not manifest_path.exists():
+        return None
+    with open(manifest_path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
 def validate_corpus(manifest: Dict[str, Any]) -> Dict[str, Any]:
     """Validate the downloaded corpus and generate summary."""
     documents = manifest["documents"]
@@ -176,18 +370,171 @@ def validate_corpus(manifest: Dict[str, Any]) -> Dict[str, Any]:
     validation = {
         "total_documents": len(documents),
         "successful_downloads": sum(1 for d in documents if d["status"] == "success"),
+        "not_modified": sum(1 for d in documents if d.get("not_modified")),
         "failed_downloads": sum(1 for d in documents if d["status"] == "failed"),
         "total_size_bytes": sum(d["file_size_bytes"] for d in documents),
         "warnings": [d for d in documents if d.get("warning")],
         "errors": [d for d in documents if d.get("error")],
-        "all_200_ok": all(d["http_status"] == 200 for d in documents if d["http_status"]),
+        "all_200_ok": all(d["http_status"] in (200, 304) for d in documents if d["http_status"]),
     }
     
     return validation
 
 
-def main():
+class _StandInHandler(BaseHTTPRequestHandler):
+    """Local HTTP server for run_tests: serves server.files with ETag / Last-Modified."""
+    
+    protocol_version = "HTTP/1.1"  # Keep-alive, so connection reuse is observable
+    
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+            server.connections.add(self.client_address)
+            server.requests.append((self.path, self.headers.get("If-None-Match")))
+        try:
+            time.sleep(server.delay)
+            body = server.files.get(self.path)
+            if body is None:
+                self._send(404, b"")
+                return
+            etag = '"' + hashlib.sha256(body).hexdigest()[:16] + '"'
+            if self.headers.get("If-None-Match") == etag:
+                self._send(304, b"", etag)
+                return
+            with server.lock:
+                server.bytes_sent += len(body)
+            self._send(200, body, etag)
+        finally:
+            with server.lock:
+                server.in_flight -= 1
+    
+    def _send(self, status: int, body: bytes, etag: Optional[str] = None):
+        self.send_response(status)
+        if status == 200:
+            self.send_header("Content-Type", "application/pdf" if self.path.endswith(".pdf") else "text/html")
+            self.send_header("Last-Modified", "Wed, 05 Feb 2026 10:00:00 GMT")
+        if etag:
+            self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def log_message(self, format, *args):
+        pass
+
+
+def run_tests():
+    """Run built-in test cases against a local HTTP stand-in server."""
+    import io
+    import contextlib
+    
+    print("=" * 70)
+    print("Corpus Downloader - Test Suite")
+    print("=" * 70)
+    
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StandInHandler)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.delay = 0.05
+    server.files = {f"/doc{i}.pdf": os.urandom(300_000 + i) for i in range(6)}
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    
+    corpus = [
+        {"id": i + 1, "name": f"Doc{i}", "url": f"{base_url}/doc{i}.pdf", "type": "pdf",
+         "category": "KIM", "scheme": "Test"}
+        for i in range(6)
+    ] + [{"id": 7, "name": "Missing", "url": f"{base_url}/missing.pdf", "type": "pdf",
+          "category": "KIM", "scheme": "Test"}]
+    output_dir = Path(tempfile.mkdtemp(prefix="corpus_test_"))
+    
+    def reset_counters():
+        server.requests, server.connections = [], set()
+        server.in_flight = server.max_in_flight = server.bytes_sent = 0
+    
+    def run(previous=None):
+        reset_counters()
+        with contextlib.redirect_stdout(io.StringIO()):
+            results = download_corpus(corpus, previous, output_dir, workers=4, per_host=2)
+        return results, {"documents": results}
+    
+    checks = []
+    
+    # 1. Full download: streamed to disk with correct checksums
+    results, manifest = run()
+    ok = all(
+        r["status"] == "success" and r["http_status"] == 200
+        and r["checksum"] == hashlib.sha256(server.files[f"/doc{i}.pdf"]).hexdigest()
+        and (output_dir / f"Doc{i}.pdf").read_bytes() == server.files[f"/doc{i}.pdf"]
+        and r["etag"] and r["last_modified"]
+        for i, r in enumerate(results[:6])
+    )
+    checks.append(("Full download writes files with matching checksums and validators", ok))
+    checks.append(("Missing document fails with HTTP 404",
+                   results[6]["status"] == "failed" and results[6]["http_status"] == 404))
+    checks.append(("No partial files left behind", not list(output_dir.glob("*.part"))))
+    checks.append((f"Per-host concurrency bounded (max in flight {server.max_in_flight} <= 2)",
+                   server.max_in_flight <= 2))
+    checks.append((f"Connections reused ({len(server.connections)} connections for {len(server.requests)} requests)",
+                   len(server.connections) < len(server.requests)))
+    
+    # 2. Re-run with the manifest: conditional requests, all 304
+    results, manifest = run(manifest)
+    ok = all(r["http_status"] == 304 and r["not_modified"] and r["status"] == "success" for r in results[:6])
+    checks.append(("Unchanged documents answered with 304", ok and server.bytes_sent == 0))
+    
+    # 3. Changed document is downloaded again
+    server.files["/doc2.pdf"] = os.urandom(123_456)
+    results, manifest = run(manifest)
+    ok = results[2]["http_status"] == 200 and results[2]["file_size_bytes"] == 123_456 \
+        and all(r["http_status"] == 304 for i, r in enumerate(results[:6]) if i != 2)
+    checks.append(("Changed document re-downloaded, others 304", ok))
+    
+    # 4. Deleted local file: unconditional request
+    (output_dir / "Doc4.pdf").unlink()
+    results, manifest = run(manifest)
+    sent = dict(server.requests)
+    ok = results[4]["http_status"] == 200 and sent["/doc4.pdf"] is None and (output_dir / "Doc4.pdf").exists()
+    checks.append(("Missing local file fetched unconditionally", ok))
+    
+    server.shutdown()
+    server.server_close()
+    shutil.rmtree(output_dir, ignore_errors=True)
+    
+    passed = 0
+    failed = 0
+    for name, ok in checks:
+        print(f"[{'PASS' if ok else 'FAIL'}] {name}")
+        if ok:
+            passed += 1
+        else:
+            failed += 1
+    
+    print("-" * 70)
+    print(f"Results: {passed} passed, {failed} failed")
+    print("=" * 70)
+    
+    return failed == 0
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Download the corpus documents")
+    parser.add_argument("--workers", type=int, default=DOWNLOAD_WORKERS, help="Download threads")
+    parser.add_argument("--per-host", type=int, default=PER_HOST_CONCURRENCY,
+                        help="Maximum concurrent requests per host")
+    parser.add_argument("--force", action="store_true", help="Ignore stored ETag / Last-Modified and re-download")
+    parser.add_argument("--test", action="store_true", help="Run the self-test against a local HTTP server")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None):
     """Main entry point for corpus download."""
+    args = parse_args(argv)
+    if args.test:
+        return 0 if run_tests() else 1
+    
     print("=" * 70)
     print("Groww Mutual Fund RAG - Corpus Download Script")
     print("=" * 70)
@@ -198,11 +545,11 @@ def main():
     # Ensure output directory exists
     RAW_DATA_DIR.mkdir(parents=True, exist_ok=True)
     
-    # Download all documents
-    results = []
-    for doc in CORPUS:
-        result = download_document(doc)
-        results.append(result)
+    # Download all documents (conditionally, against the previous manifest)
+    previous_manifest = None if args.force else load_manifest(MANIFEST_PATH)
+    start = time.perf_counter()
+    results = download_corpus(CORPUS, previous_manifest, RAW_DATA_DIR, args.workers, args.per_host)
+    elapsed = time.perf_counter() - start
     
     # Create manifest
     manifest = {
@@ -226,10 +573,11 @@ def main():
     print("DOWNLOAD SUMMARY")
     print("=" * 70)
     print(f"Total documents:      {v['total_documents']}")
-    print(f"Successful downloads: {v['successful_downloads']}")
+    print(f"Successful downloads: {v['successful_downloads']} ({v['not_modified']} not modified)")
     print(f"Failed downloads:     {v['failed_downloads']}")
     print(f"Total size:           {v['total_size_bytes']:,} bytes ({v['total_size_bytes'] / 1024 / 1024:.2f} MB)")
-    print(f"All 200 OK:           {'[YES]' if v['all_200_ok'] else '[NO]'}")
+    print(f"All 200/304 OK:       {'[YES]' if v['all_200_ok'] else '[NO]'}")
+    print(f"Elapsed:              {elapsed:.1f}s")
     
     if v["warnings"]:
         print(f"\n[WARN] WARNINGS ({len(v['warnings'])}):")
@@ -0,0 +1,385 @@
+"""
+Embedding Cache for Groww Mutual Fund RAG System
+
+Persistent, content-addressed cache of chunk embeddings so that re-ingestion
+only runs BGE-M3 on texts it has never embedded before.
+
+Entries are keyed by SHA-256(model name, instruction prefix, chunk text),
+truncated to 16 bytes. The cache directory holds:
+    vectors.f32       float32 matrix (capacity x dim), memory-mapped
+    keys.npy          (capacity, 16) uint8 key digests
+    last_used.npy     int64 access tick per slot (0 = empty slot)
+    cache_meta.json   dim, capacity, max_entries and current tick
+
+When the cache is full, the least recently used entries are evicted. A
+cache reopened with a smaller max_entries is shrunk to it right away.
+
+Usage:
+    python scripts/embedding_cache.py [cache_dir]    # Print cache statistics
+    python scripts/embedding_cache.py --test         # Run the built-in test cases
+"""
+
+import os
+import sys
+import json
+import hashlib
+import tempfile
+from pathlib import Path
+from typing import Dict, List, Tuple, Any
+
+import numpy as np
+
+# Configuration
+BASE_DIR = Path(__file__).parent.parent
+DEFAULT_CACHE_DIR = BASE_DIR / "data" / "cache" / "embeddings"
+
+KEY_BYTES = 16
+DEFAULT_MAX_ENTRIES = 100_000  # ~400 MB of float32 1024-d vectors
+INITIAL_CAPACITY = 1024
+EVICT_FRACTION = 0.1  # Evict in bulk so eviction cost is amortised
+
+
+def make_cache_key(model_name: str, prefix: str, text: str) -> bytes:
+    """Build the content-addressed key for one (model, prefix, text) triple."""
+    digest = hashlib.sha256()
+    for part in (model_name, prefix, text):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.digest()[:KEY_BYTES]
+
+
+class EmbeddingCache:
+    """
+    On-disk embedding cache backed by a memory-mapped float32 store.
+
+    Only the compact key index (24 bytes per entry) is held in RAM; vectors
+    stay in the page cache and are read on demand.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Path = DEFAULT_CACHE_DIR,
+        dim: int = 1024,
+        max_entries: int = DEFAULT_MAX_ENTRIES
+    ):
+        self.cache_dir = Path(cache_dir)
+        self.dim = dim
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self._vectors_path = self.cache_dir / "vectors.f32"
+        self._keys_path = self.cache_dir / "keys.npy"
+        self._last_used_path = self.cache_dir / "last_used.npy"
+        self._meta_path = self.cache_dir / "cache_meta.json"
+
+        self._open()
+
+    # ------------------------------------------------------------------ #
+    # Storage management
+    # ------------------------------------------------------------------ #
+
+    def _open(self) -> None:
+        """Open an existing cache, or initialise an empty one."""
+        meta = None
+        if self._meta_path.exists() and self._keys_path.exists() and self._vectors_path.exists():
+            with open(self._meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            if meta.get("dim") != self.dim:
+                print(f"    [WARN] Embedding cache dim {meta.get('dim')} != {self.dim}; resetting cache")
+                meta = None
+
+        if meta is None:
+            self._tick = 0
+            self._resize(min(INITIAL_CAPACITY, self.max_entries), fresh=True)
+            return
+
+        self._tick = meta["tick"]
+        self._keys = np.load(self._keys_path)
+        self._last_used = np.load(self._last_used_path)
+        self._vectors = np.memmap(
+            self._vectors_path, dtype=np.float32, mode="r+", shape=(meta["capacity"], self.dim)
+        )
+        self._rebuild_lookup()
+        if meta["capacity"] > self.max_entries:
+            self._shrink(self.max_entries)
+
+    def _rebuild_lookup(self) -> None:
+        """Rebuild the in-memory key -> slot dictionary and free list."""
+        occupied = np.flatnonzero(self._last_used > 0)
+        self._slots: Dict[bytes, int] = {
+            self._keys[slot].tobytes(): int(slot) for slot in occupied
+        }
+        self._free: List[int] = np.flatnonzero(self._last_used == 0)[::-1].tolist()
+
+    def _resize(self, capacity: int, fresh: bool = False) -> None:
+        """Grow (or create) the backing files to hold `capacity` vectors."""
+        old_capacity = 0 if fresh else len(self._keys)
+        if not fresh:
+            self._vectors.flush()
+            del self._vectors
+
+        with open(self._vectors_path, "wb" if fresh else "r+b") as f:
+            f.truncate(capacity * self.dim * 4)
+        self._vectors = np.memmap(
+            self._vectors_path, dtype=np.float32, mode="r+", shape=(capacity, self.dim)
+        )
+
+        keys = np.zeros((capacity, KEY_BYTES), dtype=np.uint8)
+        last_used = np.zeros(capacity, dtype=np.int64)
+        if not fresh:
+            keys[:old_capacity] = self._keys
+            last_used[:old_capacity] = self._last_used
+        self._keys = keys
+        self._last_used = last_used
+
+        if fresh:
+            self._rebuild_lookup()
+        else:
+            # New slots are handed out lowest first
+            self._free = list(range(capacity - 1, old_capacity - 1, -1)) + self._free
+        self._save_index()
+
+    def _shrink(self, capacity: int) -> None:
+        """Keep the `capacity` most recently used entries and cut the backing files to `capacity` slots."""
+        occupied = np.flatnonzero(self._last_used > 0)
+        order = np.argsort(-self._last_used[occupied], kind="stable")[:capacity]
+        keep = np.sort(occupied[order])
+        keys = np.zeros((capacity, KEY_BYTES), dtype=np.uint8)
+        last_used = np.zeros(capacity, dtype=np.int64)
+        keys[:len(keep)] = self._keys[keep]
+        last_used[:len(keep)] = self._last_used[keep]
+        self.evictions += len(occupied) - len(keep)
+
+        # Mark every slot empty on disk before vectors move, so a crash leaves
+        # an empty cache rather than keys pointing at the wrong vectors.
+        self._last_used[:] = 0
+        self._save_index()
+
+        # Ascending slots: each vector moves down (or stays), never onto an unread one
+        for row, slot in enumerate(keep):
+            if slot != row:
+                self._vectors[row] = self._vectors[slot]
+        self._vectors.flush()
+        del self._vectors
+        with open(self._vectors_path, "r+b") as f:
+            f.truncate(capacity * self.dim * 4)
+        self._vectors = np.memmap(
+            self._vectors_path, dtype=np.float32, mode="r+", shape=(capacity, self.dim)
+        )
+
+        self._keys = keys
+        self._last_used = last_used
+        self._rebuild_lookup()
+        self._save_index()
+
+    def _evict(self, needed: int) -> None:
+        """Evict least recently used entries until `needed` slots are free."""
+        occupied = np.flatnonzero(self._last_used > 0)
+        n_evict = min(len(occupied), max(needed, int(self.max_entries * EVICT_FRACTION)))
+        if n_evict <= 0:
+            return
+
+        order = np.argpartition(self._last_used[occupied], n_evict - 1)[:n_evict]
+        victims = occupied[order]
+        for slot in victims:
+            del self._slots[self._keys[slot].tobytes()]
+        self._keys[victims] = 0
+        self._last_used[victims] = 0
+        self._free.extend(int(slot) for slot in victims)
+        self.evictions += len(victims)
+
+        # Persist the eviction before the slots are overwritten, so a crash
+        # can never leave an old key pointing at a new vector.
+        self._save_index()
+
+    def _reserve(self, needed: int) -> List[int]:
+        """Reserve `needed` free slots, growing or evicting as required."""
+        if needed > self.max_entries:
+            raise ValueError(f"Cannot cache {needed} vectors in a cache of {self.max_entries} entries")
+
+        if len(self._free) < needed:
+            capacity = len(self._keys)
+            while capacity - len(self._slots) < needed and capacity < self.max_entries:
+                capacity = min(capacity * 2, self.max_entries)
+            if capacity > len(self._keys):
+                self._resize(capacity)
+
+        if len(self._free) < needed:
+            self._evict(needed - len(self._free))
+
+        return [self._free.pop() for _ in range(needed)]
+
+    def _save_index(self) -> None:
+        """Write the key index and metadata to disk."""
+        np.save(self._keys_path, self._keys)
+        np.save(self._last_used_path, self._last_used)
+        meta = {
+            "dim": self.dim,
+            "capacity": len(self._keys),
+            "max_entries": self.max_entries,
+            "entries": len(self._slots),
+            "tick": self._tick,
+        }
+        tmp_path = self._meta_path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(meta, f, indent=2)
+        os.replace(tmp_path, self._meta_path)
+
+    # ------------------------------------------------------------------ #
+    # Public API
+    # ------------------------------------------------------------------ #
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def get_many(self, keys: List[bytes]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Look up many keys at once.
+
+        Returns:
+            (vectors, hit_mask): a (len(keys), dim) float32 array with cached
+            rows filled in (zeros elsewhere) and a boolean mask of hits
+        """
+        self._tick += 1
+        slots = np.array([self._slots.get(key, -1) for key in keys], dtype=np.int64)
+        hit_mask = slots >= 0
+
+        vectors = np.zeros((len(keys), self.dim), dtype=np.float32)
+        if hit_mask.any():
+            hit_slots = slots[hit_mask]
+            vectors[hit_mask] = self._vectors[hit_slots]
+            self._last_used[hit_slots] = self._tick
+
+        self.hits += int(hit_mask.sum())
+        self.misses += int((~hit_mask).sum())
+        return vectors, hit_mask
+
+    def put_many(self, keys: List[bytes], vectors: np.ndarray) -> None:
+        """Insert (or refresh) many vectors at once."""
+        if len(keys) != len(vectors):
+            raise ValueError("keys and vectors must have the same length")
+
+        self._tick += 1
+        new_keys = {}
+        for key, vector in zip(keys, vectors):
+            if key in self._slots:
+                self._vectors[self._slots[key]] = vector
+                self._last_used[self._slots[key]] = self._tick
+            else:
+                new_keys[key] = vector
+
+        if not new_keys:
+            return
+
+        # Keep the most recent entries if the batch alone overflows the cache
+        items = list(new_keys.items())[-self.max_entries:]
+        slots = self._reserve(len(items))
+        for slot, (key, vector) in zip(slots, items):
+            self._vectors[slot] = vector
+            self._keys[slot] = np.frombuffer(key, dtype=np.uint8)
+            self._last_used[slot] = self._tick
+            self._slots[key] = slot
+
+    def flush(self) -> None:
+        """Flush vectors, then the key index, to disk."""
+        self._vectors.flush()
+        self._save_index()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return cache usage statistics."""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._slots),
+            "capacity": len(self._keys),
+            "max_entries": self.max_entries,
+            "disk_bytes": len(self._keys) * (self.dim * 4 + KEY_BYTES + 8),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+def run_tests():
+    """Run built-in test cases on random vectors in a temporary directory."""
+    print("=" * 70)
+    print("Embedding Cache - Test Suite")
+    print("=" * 70)
+
+    passed = 0
+    failed = 0
+
+    def check(name: str, ok: bool) -> None:
+        nonlocal passed, failed
+        print(f"[{'PASS' if ok else 'FAIL'}] {name}")
+        if ok:
+            passed += 1
+        else:
+            failed += 1
+
+    rng = np.random.default_rng(0)
+    dim = 8
+    keys = [make_cache_key("model", "prefix: ", f"chunk {i}") for i in range(40)]
+    vectors = rng.standard_normal((len(keys), dim)).astype(np.float32)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = EmbeddingCache(Path(tmp), dim=dim, max_entries=40)
+        cache.put_many(keys[:30], vectors[:30])
+        found, hits = cache.get_many(keys[:35])
+        check("cached keys hit, others miss", hits.sum() == 30 and not hits[30:].any())
+        check("cached vectors are returned unchanged", np.array_equal(found[:30], vectors[:30]))
+        cache.get_many(keys[20:30])  # Most recently used: 20-29
+        cache.flush()
+
+        reopened = EmbeddingCache(Path(tmp), dim=dim, max_entries=40)
+        found, hits = reopened.get_many(keys[:30])
+        check("entries persist across reopen", hits.all() and np.array_equal(found, vectors[:30]))
+        reopened.get_many(keys[20:30])
+        reopened.flush()
+
+        shrunk = EmbeddingCache(Path(tmp), dim=dim, max_entries=10)
+        stats = shrunk.stats()
+        check("reopen with smaller max_entries evicts at once", stats["entries"] == 10 and stats["capacity"] == 10)
+        check("backing file is cut to the new capacity",
+              (Path(tmp) / "vectors.f32").stat().st_size == 10 * dim * 4)
+        found, hits = shrunk.get_many(keys[20:30])
+        check("most recently used entries survive the shrink", hits.all() and np.array_equal(found, vectors[20:30]))
+
+        shrunk.put_many(keys[30:35], vectors[30:35])
+        check("new bound holds on insert", len(shrunk) <= 10)
+
+    print("-" * 70)
+    print(f"Results: {passed} passed, {failed} failed")
+    print("=" * 70)
+
+    return failed == 0
+
+
+def main():
+    """Print statistics for an embedding cache directory."""
+    if len(sys.argv) > 1 and sys.argv[1] == "--test":
+        return 0 if run_tests() else 1
+    cache_dir = Path(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_CACHE_DIR
+    meta_path = cache_dir / "cache_meta.json"
+
+    if not meta_path.exists():
+        print(f"[ERROR] No embedding cache found at {cache_dir}")
+        return 1
+
+    with open(meta_path, "r", encoding="utf-8") as f:
+        meta = json.load(f)
+
+    cache = EmbeddingCache(cache_dir, dim=meta["dim"], max_entries=meta["max_entries"])
+    stats = cache.stats()
+    print(f"Cache directory:  {cache_dir}")
+    print(f"Entries:          {stats['entries']:,} / {stats['max_entries']:,}")
+    print(f"Allocated slots:  {stats['capacity']:,}")
+    print(f"Disk usage:       {stats['disk_bytes'] / 1024 / 1024:.1f} MB")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
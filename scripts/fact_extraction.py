@@ -0,0 +1,428 @@
+"""
+Scheme Fact Extraction for Groww Mutual Fund RAG System
+
+Pulls the scalar facts most FAQ questions ask for (architecture.md §14.1)
+out of the ingested KIM / Fund_Facts / SCHEME_SUMMARY_DOCUMENT chunks into a
+per-scheme fact table, so those questions are answered without retrieval or
+the LLM. Every fact keeps the chunk it came from for the citation.
+
+Fact types (names from the fact_type enum, architecture.md §4.2.2):
+    expense_ratio       Stated maximum TER, Regular and Direct plans
+    exit_load           Exit load structure
+    sip_minimum         Minimum monthly SIP instalment
+    lock_in_period      Lock-in (ELSS: 3 years, otherwise none)
+    benchmark           Tier 1 benchmark index
+    risk_category       Riskometer level
+    fund_manager        Fund manager names
+
+Sources, most reliable first:
+    SCHEME_SUMMARY_DOCUMENT   Numbered field table ("|21|Annual Expense (Stated maximum)|Regular 1.57, Direct 0.95|")
+    KIM                       Section prose ("**13.** **Benchmark Index**" ...)
+    Fund_Facts                Factsheet prose
+
+Output (data/processed/scheme_facts.json):
+    {
+      "generated_at": "...",
+      "schemes": {
+        "HDFC Large Cap Fund": {
+          "expense_ratio": {"value": "Regular 1.57%, Direct 0.95%", "regular": 1.57, "direct": 0.95,
+                            "text": "...", "chunk_id": "...", "document_type": "SCHEME_SUMMARY_DOCUMENT", ...},
+          ...
+        }
+      }
+    }
+
+Usage:
+    python scripts/fact_extraction.py                                   # (Re)build from the vector store
+    python scripts/fact_extraction.py --query "exit load of HDFC Large Cap"
+"""
+
+import re
+import sys
+import json
+import argparse
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Any, Iterable, Optional, Tuple
+
+# Local imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from scripts.metadata_store import ChunkStore, CHUNK_STORE_DIR_NAME
+from scripts.store_versions import current_store_dir
+from scripts.schemes import detect_scheme, normalize_text
+
+# Configuration
+BASE_DIR = Path(__file__).parent.parent
+VECTOR_STORE_DIR = BASE_DIR / "data" / "vector_store"
+PROCESSED_DIR = BASE_DIR / "data" / "processed"
+SCHEME_FACTS_FILE_NAME = "scheme_facts.json"
+SCHEME_FACTS_PATH = PROCESSED_DIR / SCHEME_FACTS_FILE_NAME
+
+# Document types searched for facts, most reliable first
+FACT_DOCUMENT_TYPES = ["SCHEME_SUMMARY_DOCUMENT", "KIM", "Fund_Facts"]
+
+FACT_TYPES = [
+    "expense_ratio",
+    "exit_load",
+    "sip_minimum",
+    "lock_in_period",
+    "benchmark",
+    "risk_category",
+    "fund_manager",
+]
+
+# Scheme summary table: numbered rows "|16|Benchmark (Tier 1)|[Benchmark (Tier 1)|]NIFTY 100 (TRI)|"
+TABLE_ROW = re.compile(r"^\|\s*\d{1,2}\s*\|(.+)\|\s*$", re.MULTILINE)
+
+# Row label (normalised) -> fact type
+SUMMARY_ROW_FACTS: List[Tuple[re.Pattern, str]] = [
+    (re.compile(r"^annual expense"), "expense_ratio"),
+    (re.compile(r"^exit load"), "exit_load"),
+    (re.compile(r"^sip swp stp details minimum amount"), "sip_minimum"),
+    (re.compile(r"^fund type"), "lock_in_period"),
+    (re.compile(r"^benchmark tier 1"), "benchmark"),
+    (re.compile(r"^riskometer as on date"), "risk_category"),
+    (re.compile(r"^fund manager name"), "fund_manager"),
+]
+
+# KIM / Fund Facts prose: fact type -> patterns with a "value" group
+PROSE_FACTS: Dict[str, List[re.Pattern]] = {
+    "exit_load": [
+        re.compile(r"\*\*Exit Load:\*\*\s*(?P<value>Nil)\b", re.IGNORECASE),
+        re.compile(
+            r"(?P<value>Exit load of [\d.]+% is payable if Units are\s+redeemed.{0,40}?within \d+ (?:year|month|day)s?)",
+            re.IGNORECASE | re.DOTALL
+        ),
+    ],
+    "lock_in_period": [
+        re.compile(r"(?P<value>lock[\s-]*in(?: period)? of \d+ years?)", re.IGNORECASE),
+    ],
+    "benchmark": [
+        re.compile(r"Benchmark Index\**\s*\n+\s*(?P<value>[^\n|*]{3,200})"),
+    ],
+}
+
+# Question wording (normalised) -> fact type, checked in order
+FACT_QUERY_KEYWORDS: List[Tuple[str, List[str]]] = [
+    ("exit_load", ["exit load", "exit charge", "redemption charge", "redemption fee"]),
+    ("expense_ratio", ["expense ratio", "ter", "total expense", "annual expense", "expense"]),
+    ("sip_minimum", ["minimum sip", "min sip", "sip minimum", "sip amount", "minimum monthly sip"]),
+    ("lock_in_period", ["lock in", "lockin"]),
+    ("benchmark", ["benchmark"]),
+    ("risk_category", ["riskometer", "risk o meter", "risk category", "risk level", "risk grade"]),
+    ("fund_manager", ["fund manager", "managed by", "who manages"]),
+]
+
+MARKUP = re.compile(r"<br\s*/?>|\*\*")
+WHITESPACE = re.compile(r"\s+")
+
+
+def clean_text(text: str) -> str:
+    """Strip table markup and collapse whitespace."""
+    return WHITESPACE.sub(" ", MARKUP.sub(" ", text)).strip()
+
+
+def parse_expense_ratio(text: str) -> Optional[Dict[str, Any]]:
+    """'Regular 1.57, Direct 0.95' -> per-plan TER in %."""
+    plans = {plan.lower(): float(value) for plan, value in re.findall(r"(Regular|Direct)\D{0,10}?(\d+\.\d+)", text, re.I)}
+    if not plans:
+        return None
+    value = ", ".join(f"{plan.title()} {ter:.2f}%" for plan, ter in plans.items())
+    return {"value": value, **plans}
+
+
+def parse_exit_load(text: str) -> Optional[Dict[str, Any]]:
+    """Summarise an exit load clause: nil, flat (with free units) or graded by day."""
+    if re.match(r"^\s*nil\b", text, re.I):
+        return {"value": "Nil", "percent": 0.0}
+
+    graded = re.findall(r"Day (\d+)\s*-\s*([\d.]+)%", text)
+    if graded:
+        nil_from = re.search(r"Day (\d+) onwards\s*-\s*Nil", text, re.I)
+        value = f"{graded[0][1]}% on day {graded[0][0]}, falling to {graded[-1][1]}% on day {graded[-1][0]}"
+        if nil_from:
+            value += f"; nil from day {nil_from.group(1)} onwards"
+        return {"value": value, "percent": float(graded[0][1]), "graded": True}
+
+    flat = re.search(r"exit load of ([\d.]+)%.*?within (\d+ (?:year|month|day)s?)", text, re.I | re.S)
+    if not flat:
+        return None
+    percent, period = flat.groups()
+    value = f"{percent}% if redeemed within {period} of allotment, nil after that"
+    free = re.search(r"upto (\d+)% of the units may be redeemed without any exit load", text, re.I)
+    if free:
+        value = f"Nil on up to {free.group(1)}% of units; {value.replace(', nil after that', '')} on the rest"
+    return {"value": value, "percent": float(percent), "period": period}
+
+
+def parse_sip_minimum(text: str) -> Optional[Dict[str, Any]]:
+    """Minimum monthly SIP instalment ('... MSIP - Rs. 100 ...')."""
+    match = re.search(r"MSIP\s*-\s*Rs\.?\s*([\d,]+)", text) or re.search(r"SIP\D{0,40}?Rs\.?\s*([\d,]+)", text)
+    if not match:
+        return None
+    amount = int(match.group(1).replace(",", ""))
+    return {"value": f"₹{amount:,}", "amount": amount}
+
+
+def parse_lock_in(text: str) -> Optional[Dict[str, Any]]:
+    """'... statutory lock in of 3 years ...' -> 3 years; an open-ended fund type without one -> none."""
+    match = re.search(r"lock[\s-]*in(?: period)? of (\d+) years?", text, re.I)
+    if match:
+        years = int(match.group(1))
+        return {"value": f"{years} years", "years": years}
+    if re.search(r"open[\s-]*ended", text, re.I):
+        return {"value": "None", "years": 0}
+    return None
+
+
+def parse_fund_manager(text: str) -> Optional[Dict[str, Any]]:
+    """'FM 1 - Mr. Chirag Setalvad , FM 2 - Mr. Dhruv Muchhal' -> names."""
+    names = [n.strip(" ,") for n in re.split(r"FM\s*\d+\s*[-–]\s*", text) if n.strip(" ,")]
+    if not names:
+        return None
+    return {"value": ", ".join(names), "names": names}
+
+
+def parse_plain(text: str) -> Optional[Dict[str, Any]]:
+    return {"value": text} if text else None
+
+
+FACT_PARSERS = {
+    "expense_ratio": parse_expense_ratio,
+    "exit_load": parse_exit_load,
+    "sip_minimum": parse_sip_minimum,
+    "lock_in_period": parse_lock_in,
+    "benchmark": parse_plain,
+    "risk_category": parse_plain,
+    "fund_manager": parse_fund_manager,
+}
+
+
+def extract_summary_rows(text: str) -> Iterable[Tuple[str, str]]:
+    """(fact_type, raw value) for every recognised scheme summary table row."""
+    for match in TABLE_ROW.finditer(text):
+        cells = [clean_text(c) for c in match.group(1).split("|")]
+        cells = [c for c in cells if c]
+        if len(cells) < 2:
+            continue
+        label = normalize_text(cells[0])
+        for pattern, fact_type in SUMMARY_ROW_FACTS:
+            if pattern.match(label):
+                yield fact_type, cells[-1]
+                break
+
+
+def extract_prose(text: str) -> Iterable[Tuple[str, str]]:
+    """(fact_type, raw value) for every prose pattern match."""
+    for fact_type, patterns in PROSE_FACTS.items():
+        for pattern in patterns:
+            match = pattern.search(text)
+            if match:
+                yield fact_type, clean_text(match.group("value"))
+                break
+
+
+def extract_chunk_facts(chunk: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """
+    Facts found in one chunk, with the chunk's citation fields attached.
+
+    Returns:
+        fact_type -> fact record
+    """
+    if chunk.get("document_type") == "SCHEME_SUMMARY_DOCUMENT":
+        raw = extract_summary_rows(chunk["text"])
+    else:
+        raw = extract_prose(chunk["text"])
+
+    facts = {}
+    for fact_type, text in raw:
+        if fact_type in facts:
+            continue
+        parsed = FACT_PARSERS[fact_type](text)
+        if parsed is None:
+            continue
+        facts[fact_type] = {
+            **parsed,
+            "text": text,
+            "chunk_id": chunk.get("chunk_id"),
+            "document_type": chunk.get("document_type"),
+            "source_file": chunk.get("source_file"),
+            "document_date": chunk.get("document_date"),
+        }
+    return facts
+
+
+def extract_scheme_facts(chunks: Iterable[Dict[str, Any]]) -> Dict[str, Dict[str, Dict[str, Any]]]:
+    """
+    Build the per-scheme fact table.
+
+    For each (scheme, fact type) the fact from the most reliable document
+    type wins (FACT_DOCUMENT_TYPES order), then the earliest chunk.
+    """
+    best: Dict[Tuple[str, str], Tuple[Tuple[int, int], Dict[str, Any]]] = {}
+    for chunk in chunks:
+        document_type = chunk.get("document_type")
+        if document_type not in FACT_DOCUMENT_TYPES or not chunk.get("scheme_name"):
+            continue
+        rank = (FACT_DOCUMENT_TYPES.index(document_type), chunk.get("chunk_index") or 0)
+        for fact_type, fact in extract_chunk_facts(chunk).items():
+            key = (chunk["scheme_name"], fact_type)
+            if key not in best or rank < best[key][0]:
+                best[key] = (rank, fact)
+
+    schemes: Dict[str, Dict[str, Dict[str, Any]]] = {}
+    for (scheme, fact_type), (_, fact) in sorted(best.items()):
+        schemes.setdefault(scheme, {})[fact_type] = fact
+    for scheme in schemes:
+        schemes[scheme] = {t: schemes[scheme][t] for t in FACT_TYPES if t in schemes[scheme]}
+    return schemes
+
+
+def write_scheme_facts(vector_store_dir: Path, output_path: Path = SCHEME_FACTS_PATH) -> Dict[str, Any]:
+    """Extract facts from the vector store's chunk store and write the fact table."""
+    store = ChunkStore(Path(vector_store_dir) / CHUNK_STORE_DIR_NAME)
+    rows = store.mask("document_type", FACT_DOCUMENT_TYPES).nonzero()[0]
+    schemes = extract_scheme_facts(store.get_chunks(int(row) for row in rows))
+    store.close()
+
+    table = {
+        "generated_at": datetime.now(timezone.utc).isoformat().replace("+00:00", "Z"),
+        "fact_types": FACT_TYPES,
+        "schemes": schemes,
+    }
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = output_path.with_name(output_path.name + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(table, f, indent=2, ensure_ascii=False)
+    tmp_path.replace(output_path)
+    return table
+
+
+def detect_fact_type(query: str) -> Optional[str]:
+    """The fact type a question asks for, or None."""
+    text = f" {normalize_text(query)} "
+    for fact_type, keywords in FACT_QUERY_KEYWORDS:
+        if any(f" {keyword} " in text for keyword in keywords):
+            return fact_type
+    return None
+
+
+def fact_sentence(scheme: str, fact_type: str, fact: Dict[str, Any], plan_type: Optional[str] = None) -> str:
+    """One-sentence answer for a fact (architecture.md §7.4 number formatting)."""
+    if fact_type == "expense_ratio":
+        plan = (plan_type or "").lower()
+        if plan in fact:
+            return f"The Total Expense Ratio (TER) for {scheme} - {plan.title()} Plan is {fact[plan]:.2f}%."
+        return f"The Total Expense Ratio (TER) for {scheme} is {fact['value']}."
+    if fact_type == "exit_load":
+        return f"The exit load for {scheme} is: {fact['value']}."
+    if fact_type == "sip_minimum":
+        return f"The minimum monthly SIP investment in {scheme} is {fact['value']}."
+    if fact_type == "lock_in_period":
+        if fact.get("years"):
+            return f"{scheme} has a mandatory lock-in period of {fact['value']}."
+        return f"{scheme} has no lock-in period."
+    if fact_type == "benchmark":
+        return f"{scheme} is benchmarked against the {fact['value']}."
+    if fact_type == "risk_category":
+        return f"{scheme} is rated {fact['value']} on the SEBI riskometer."
+    if fact_type == "fund_manager":
+        return f"{scheme} is managed by {fact['value']}."
+    return f"{scheme}: {fact['value']}"
+
+
+class FactTable:
+    """Per-scheme fact lookups over scheme_facts.json."""
+
+    def __init__(self, table: Dict[str, Any]):
+        self.generated_at = table.get("generated_at")
+        self.schemes: Dict[str, Dict[str, Dict[str, Any]]] = table["schemes"]
+
+    @classmethod
+    def load(cls, path: Path = SCHEME_FACTS_PATH) -> Optional["FactTable"]:
+        path = Path(path)
+        if not path.exists():
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def get(self, scheme: str, fact_type: str) -> Optional[Dict[str, Any]]:
+        return self.schemes.get(scheme, {}).get(fact_type)
+
+    def answer(self, query: str, scheme: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Answer a factual question from the table, if it names one scheme and one known fact.
+
+        Args:
+            query: User question
+            scheme: Scheme to use instead of detecting it from the query
+
+        Returns:
+            Dict with answer, scheme_name, fact_type and the fact's citation fields, or None
+        """
+        scheme = scheme or detect_scheme(query)
+        fact_type = detect_fact_type(query)
+        if scheme is None or fact_type is None:
+            return None
+        fact = self.get(scheme, fact_type)
+        if fact is None:
+            return None
+
+        text = f" {normalize_text(query)} "
+        plan_type = "direct" if " direct " in text else "regular" if " regular " in text else None
+        return {
+            "answer": fact_sentence(scheme, fact_type, fact, plan_type),
+            "scheme_name": scheme,
+            "fact_type": fact_type,
+            "chunk_id": fact["chunk_id"],
+            "document_type": fact["document_type"],
+            "source_file": fact["source_file"],
+            "document_date": fact["document_date"],
+        }
+
+
+def main():
+    """Rebuild the fact table, or answer a question from it."""
+    parser = argparse.ArgumentParser(description="Extract or query per-scheme facts")
+    parser.add_argument("vector_store_dir", nargs="?", type=Path, default=VECTOR_STORE_DIR)
+    parser.add_argument("--output", type=Path, default=SCHEME_FACTS_PATH, help="Fact table path")
+    parser.add_argument("--query", help="Answer a question instead of rebuilding")
+    args = parser.parse_args()
+    args.vector_store_dir = current_store_dir(args.vector_store_dir)
+
+    if args.query:
+        table = FactTable.load(args.output)
+        if table is None:
+            print(f"[ERROR] No fact table found at {args.output}")
+            return 1
+        result = table.answer(args.query)
+        if result is None:
+            print("[WARN] No fact matches this question - needs retrieval")
+            return 1
+        print(result["answer"])
+        print(f"[Source: {result['source_file']} ({result['document_type']}), chunk {result['chunk_id']}]")
+        return 0
+
+    if not (args.vector_store_dir / CHUNK_STORE_DIR_NAME / "columns.json").exists():
+        print(f"[ERROR] No chunk store found in {args.vector_store_dir}")
+        return 1
+
+    table = write_scheme_facts(args.vector_store_dir, args.output)
+    print("=" * 70)
+    for scheme, facts in table["schemes"].items():
+        print(f"\n{scheme}")
+        for fact_type in FACT_TYPES:
+            fact = facts.get(fact_type)
+            if fact is None:
+                print(f"  [WARN] {fact_type:15s} not found")
+            else:
+                print(f"  {fact_type:15s} {fact['value'][:70]}  ({fact['document_type']})")
+    print("\n" + "=" * 70)
+    total = sum(len(facts) for facts in table["schemes"].values())
+    print(f"[OK] {total} facts for {len(table['schemes'])} schemes saved to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
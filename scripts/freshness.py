@@ -0,0 +1,254 @@
+"""
+Freshness Index for Groww Mutual Fund RAG System
+
+Staleness thresholds (architecture.md §10.2) and the freshness index
+(architecture.md §10.3): for every (scheme, document type) in the vector
+store, when it was last extracted, the date of the document itself and when
+it is next due for a refresh. Downloaded corpus sources (product pages, NAV
+file, landing pages) are tracked the same way from corpus_manifest.json.
+
+Written at the end of every ingestion and by the refresh scheduler.
+
+Usage:
+    python scripts/freshness.py                     # Rebuild data/processed/freshness_index.json
+    python scripts/freshness.py --as-of 2026-03-01  # Evaluate staleness on another date
+"""
+
+import sys
+import json
+import argparse
+from datetime import datetime, date, timedelta, timezone
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Tuple
+
+import numpy as np
+
+# Local imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from scripts.metadata_store import ChunkStore, CHUNK_STORE_DIR_NAME
+from scripts.store_versions import current_store_dir
+
+# Configuration
+BASE_DIR = Path(__file__).parent.parent
+VECTOR_STORE_DIR = BASE_DIR / "data" / "vector_store"
+FRESHNESS_INDEX_FILE_NAME = "freshness_index.json"
+FRESHNESS_INDEX_PATH = BASE_DIR / "data" / "processed" / FRESHNESS_INDEX_FILE_NAME
+
+# Days after which a source is stale, keyed by chunk document_type or
+# manifest category (None: never stale)
+STALENESS_DAYS: Dict[str, Optional[int]] = {
+    # architecture.md §10.2
+    "AMFI NAV": 1,
+    "Factsheet": 45,
+    "Fund_Facts": 45,
+    "KIM": 365,
+    "SID": 365,
+    "SEBI Circular": None,
+    # Not listed in §10.2: the closest publication cycle
+    "Product Page": 7,
+    "AMFI Data": 30,
+    "Leaflet": 45,
+    "Presentation": 45,
+    "Scheme Summary": 365,
+    "SCHEME_SUMMARY_DOCUMENT": 365,
+    "SAI": 365,
+}
+DEFAULT_STALENESS_DAYS = 30
+
+SOURCE_COLUMNS = [
+    "scheme_name", "document_type", "document_date", "extraction_date",
+    "checksum", "source_mtime_ns", "source_size"
+]
+
+
+def staleness_days(kind: Optional[str]) -> Optional[int]:
+    """Staleness threshold of a document type or manifest category."""
+    return STALENESS_DAYS.get(kind, DEFAULT_STALENESS_DAYS)
+
+
+def parse_date(value: Optional[str]) -> Optional[date]:
+    """'2026-02-11' or '2026-02-11T03:39:50Z' -> date (None if missing or unparseable)."""
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(value[:10])
+    except ValueError:
+        return None
+
+
+def next_refresh(last: Optional[date], kind: Optional[str]) -> Optional[date]:
+    """Date a source reaches its staleness threshold (None: never, or unknown)."""
+    days = staleness_days(kind)
+    if last is None or days is None:
+        return None
+    return last + timedelta(days=days)
+
+
+def load_indexed_sources(vector_store_dir: Path = VECTOR_STORE_DIR) -> Dict[str, Dict[str, Any]]:
+    """
+    Per-source-file metadata of the vector store, read from one row per file.
+
+    Returns:
+        source_file -> scheme_name, document_type, document_date,
+        extraction_date, checksum, source_mtime_ns and source_size
+        (None where the store has no such column)
+    """
+    store_dir = current_store_dir(vector_store_dir) / CHUNK_STORE_DIR_NAME
+    if not (store_dir / "columns.json").exists():
+        return {}
+
+    store = ChunkStore(store_dir)
+    try:
+        source_files = store.dictionary("source_file")
+        codes, rows = np.unique(store.codes("source_file"), return_index=True)
+        sources = {
+            source_files[code]: {name: store.get_value(name, int(row)) for name in SOURCE_COLUMNS}
+            for code, row in zip(codes, rows)
+        }
+    finally:
+        store.close()
+    return sources
+
+
+def build_document_entries(
+    sources: Dict[str, Dict[str, Any]],
+    today: date
+) -> List[Dict[str, Any]]:
+    """
+    One §10.3 entry per (scheme, document type), from the newest document of that type.
+
+    Args:
+        sources: Output of load_indexed_sources
+        today: Reference date for is_stale
+    """
+    groups: Dict[Tuple[str, str], List[str]] = {}
+    for source_file, meta in sources.items():
+        groups.setdefault((meta["scheme_name"], meta["document_type"]), []).append(source_file)
+
+    entries = []
+    for (scheme, document_type), files in sorted(groups.items(), key=lambda item: (str(item[0][0]), str(item[0][1]))):
+        document_dates = [parse_date(sources[f]["document_date"]) for f in files]
+        extraction_dates = [parse_date(sources[f]["extraction_date"]) for f in files]
+        last_document = max((d for d in document_dates if d), default=None)
+        last_extraction = max((d for d in extraction_dates if d), default=None)
+
+        # Undated documents (scheme summaries) age from their extraction
+        refresh = next_refresh(last_document or last_extraction, document_type)
+        entries.append({
+            "scheme_name": scheme,
+            "document_type": document_type,
+            "source_files": sorted(files),
+            "last_extraction_date": last_extraction.isoformat() if last_extraction else None,
+            "last_document_date": last_document.isoformat() if last_document else None,
+            "staleness_days": staleness_days(document_type),
+            "next_scheduled_refresh": refresh.isoformat() if refresh else None,
+            "is_stale": refresh is not None and today >= refresh,
+        })
+    return entries
+
+
+def build_source_entries(manifest: Optional[Dict[str, Any]], today: date) -> List[Dict[str, Any]]:
+    """Freshness of the downloaded corpus sources, from the manifest's download timestamps."""
+    entries = []
+    for doc in (manifest or {}).get("documents", []):
+        last_download = parse_date(doc.get("download_timestamp")) if doc.get("status") == "success" else None
+        refresh = next_refresh(last_download, doc["category"])
+        entries.append({
+            "name": doc["name"],
+            "category": doc["category"],
+            "scheme_name": doc["scheme"],
+            "url": doc["url"],
+            "status": doc["status"],
+            "last_download_date": last_download.isoformat() if last_download else None,
+            "staleness_days": staleness_days(doc["category"]),
+            "next_scheduled_refresh": refresh.isoformat() if refresh else None,
+            # Never fetched successfully: due regardless of the threshold
+            "is_stale": last_download is None or (refresh is not None and today >= refresh),
+        })
+    return entries
+
+
+def build_freshness_index(
+    sources: Dict[str, Dict[str, Any]],
+    manifest: Optional[Dict[str, Any]],
+    today: date
+) -> Dict[str, Any]:
+    """Assemble the freshness index document."""
+    documents = build_document_entries(sources, today)
+    downloads = build_source_entries(manifest, today)
+    return {
+        "generated_at": datetime.now(timezone.utc).isoformat().replace("+00:00", "Z"),
+        "as_of": today.isoformat(),
+        "stale_documents": sum(1 for e in documents if e["is_stale"]),
+        "stale_sources": sum(1 for e in downloads if e["is_stale"]),
+        "documents": documents,
+        "sources": downloads,
+    }
+
+
+def write_freshness_index(
+    vector_store_dir: Path = VECTOR_STORE_DIR,
+    output_path: Path = FRESHNESS_INDEX_PATH,
+    manifest: Optional[Dict[str, Any]] = None,
+    today: Optional[date] = None
+) -> Dict[str, Any]:
+    """
+    Build the freshness index from the chunk store (and manifest) and write it.
+
+    Args:
+        vector_store_dir: Vector store directory containing the chunk store
+        output_path: JSON file to write
+        manifest: Corpus manifest (None: read corpus_manifest.json)
+        today: Reference date (default: today, UTC)
+
+    Returns:
+        The written index
+    """
+    if manifest is None:
+        from scripts.download_corpus import load_manifest
+        manifest = load_manifest()
+    today = today or datetime.now(timezone.utc).date()
+
+    index = build_freshness_index(load_indexed_sources(vector_store_dir), manifest, today)
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = output_path.with_name(output_path.name + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(index, f, indent=2, ensure_ascii=False)
+    tmp_path.replace(output_path)
+    return index
+
+
+def load_freshness_index(path: Path = FRESHNESS_INDEX_PATH) -> Optional[Dict[str, Any]]:
+    """Load the freshness index, or None if it has not been written yet."""
+    path = Path(path)
+    if not path.exists():
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def main():
+    """Rebuild the freshness index and list stale entries."""
+    parser = argparse.ArgumentParser(description="Rebuild freshness_index.json")
+    parser.add_argument("--as-of", type=date.fromisoformat, default=None, help="Reference date (YYYY-MM-DD)")
+    parser.add_argument("--output", type=Path, default=FRESHNESS_INDEX_PATH, help="Output JSON file")
+    args = parser.parse_args()
+
+    index = write_freshness_index(VECTOR_STORE_DIR, args.output, today=args.as_of)
+    print(f"[OK] Wrote {len(index['documents'])} document and {len(index['sources'])} source entries to {args.output}")
+    print(f"Stale as of {index['as_of']}: {index['stale_documents']} documents, {index['stale_sources']} sources")
+    print("-" * 70)
+    for entry in index["documents"]:
+        if entry["is_stale"]:
+            print(f"[WARN] {entry['scheme_name']} | {entry['document_type']} | "
+                  f"document {entry['last_document_date']} | due {entry['next_scheduled_refresh']}")
+    for entry in index["sources"]:
+        if entry["is_stale"]:
+            print(f"[WARN] {entry['name']} ({entry['category']}) | "
+                  f"downloaded {entry['last_download_date']} | due {entry['next_scheduled_refresh']}")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
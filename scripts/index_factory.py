@@ -0,0 +1,614 @@
+"""
+FAISS Index Factory for Groww Mutual Fund RAG System
+
+Builds the vector index used by ingestion and the retriever. All index types
+use inner product on normalised vectors (cosine similarity).
+
+Index types:
+    flat        Exact search (IndexFlatIP). O(N*d) per query; fine for ~1k chunks.
+    hnsw        Graph-based ANN (IndexHNSWFlat). No training; supports add().
+    ivf_flat    Inverted lists over k-means cells (IndexIVFFlat). Needs training.
+    ivf_pq      IVF with product-quantized codes (IndexIVFPQ). Needs training;
+                smallest memory footprint, approximate scores.
+
+Parameters not given explicitly are derived from the number of vectors
+(see resolve_index_params).
+
+Quantization (stored vector codes, per vector at 1024 dims):
+    none        float32, 4096 bytes
+    fp16        float16 (IndexScalarQuantizer QT_fp16), 2048 bytes
+    int8        8-bit scalar quantization (QT_8bit, trained min/max), 1024 bytes
+    binary      sign bits in an IndexBinary (Hamming distance), 128 bytes
+
+Binary codes are wrapped in BinaryIndex so callers keep passing float
+vectors; use read_index / write_index instead of the faiss functions.
+
+Truncated dimensions (Matryoshka-style, truncate_dim=D): the index keeps
+only the first D components of each vector, re-normalised. This is an
+IndexPreTransform (RemapDimensions + L2 normalisation), so callers still
+pass full-dimension vectors and the truncation is stored with the index.
+
+Approximate and quantized indexes do not expose exact vectors, so the
+ingest script also stores the full-precision vectors in vectors.npy next to
+faiss_index.bin. It is memory-mapped (paged in on demand, not loaded into
+RAM) and used to re-score the top candidates exactly (rescore_exact).
+
+Usage:
+    python scripts/index_factory.py --test      # Built-in test cases
+"""
+
+import sys
+import math
+import tempfile
+from pathlib import Path
+from typing import Dict, Any, Optional, Callable, Iterator, Iterable, Tuple, Union
+
+import faiss
+import numpy as np
+
+INDEX_TYPES = ("flat", "hnsw", "ivf_flat", "ivf_pq")
+
+# Index types that cannot be built incrementally before they are trained
+TRAINED_INDEX_TYPES = ("ivf_flat", "ivf_pq")
+
+QUANTIZATIONS = ("none", "fp16", "int8", "binary")
+SCALAR_QUANTIZERS = {
+    "fp16": faiss.ScalarQuantizer.QT_fp16,
+    "int8": faiss.ScalarQuantizer.QT_8bit,
+}
+# Index types each quantization can be combined with
+QUANTIZATION_INDEX_TYPES = {
+    "none": INDEX_TYPES,
+    "fp16": ("flat", "hnsw", "ivf_flat"),
+    "int8": ("flat", "hnsw", "ivf_flat"),
+    "binary": ("flat", "hnsw"),
+}
+
+DEFAULT_INDEX_PARAMS = {
+    "flat": {},
+    "hnsw": {"M": 32, "ef_construction": 200, "ef_search": 64},
+    "ivf_flat": {"nlist": None, "nprobe": 8},
+    "ivf_pq": {"nlist": None, "nprobe": 16, "pq_m": 64, "pq_nbits": None},
+}
+
+# FAISS wants at least 39 training points per centroid
+MIN_POINTS_PER_CENTROID = 39
+MAX_TRAINING_POINTS_PER_CENTROID = 256
+ADD_BATCH_SIZE = 8192
+SQ_TRAINING_POINTS = 65536  # int8 only needs per-dimension min/max
+
+VECTORS_FILE_NAME = "vectors.npy"
+
+# Candidates fetched per result when re-scoring with exact vectors
+DEFAULT_RESCORE_FACTOR = 4
+
+
+class BinaryIndex:
+    """
+    Sign-bit binary index behind the float index interface.
+
+    Vectors are binarised (bit = component > 0) on add and search. Hamming
+    distance h is mapped to a similarity of 1 - 2h/d, which is monotonic in
+    the angle between the sign patterns; use rescore_exact for true cosine.
+    """
+
+    def __init__(self, index: faiss.IndexBinary):
+        self.binary = index
+
+    # Vectors longer than the binary index dimension are truncated to it, so
+    # a truncate_dim binary index needs no extra metadata.
+
+    @property
+    def d(self) -> int:
+        return self.binary.d
+
+    @property
+    def ntotal(self) -> int:
+        return self.binary.ntotal
+
+    @property
+    def is_trained(self) -> bool:
+        return True
+
+    @property
+    def hnsw(self):
+        return self.binary.hnsw
+
+    def train(self, x: np.ndarray) -> None:
+        pass
+
+    def add(self, x: np.ndarray) -> None:
+        self.binary.add(binarize(x[:, :self.d]))
+
+    def search(self, x: np.ndarray, k: int, params: Optional[faiss.SearchParameters] = None):
+        distances, ids = self.binary.search(binarize(x[:, :self.d]), k, params=params)
+        return 1.0 - 2.0 * distances.astype(np.float32) / self.d, ids
+
+
+AnyIndex = Union[faiss.Index, BinaryIndex]
+
+
+def binarize(x: np.ndarray) -> np.ndarray:
+    """Pack the sign bits of float vectors into uint8 codes (d / 8 bytes each)."""
+    return np.packbits(np.asarray(x) > 0, axis=1)
+
+
+def requires_training(index_type: str, quantization: str = "none") -> bool:
+    """True if the index must be trained before vectors can be added."""
+    return index_type in TRAINED_INDEX_TYPES or quantization == "int8"
+
+
+def stores_exact_vectors(
+    index_type: str,
+    quantization: str = "none",
+    truncate_dim: Optional[int] = None
+) -> bool:
+    """True if the index itself holds the exact float32 vectors (no vectors.npy needed)."""
+    return index_type == "flat" and quantization == "none" and truncate_dim is None
+
+
+def truncate_vectors(x: np.ndarray, truncate_dim: int) -> np.ndarray:
+    """First truncate_dim components of each vector, re-normalised to unit length."""
+    head = np.asarray(x[:, :truncate_dim], dtype=np.float32)
+    return head / np.linalg.norm(head, axis=1, keepdims=True).clip(min=1e-12)
+
+
+def resolve_index_params(
+    index_type: str,
+    n_vectors: int,
+    overrides: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """
+    Fill in defaults (and size-dependent values) for an index type.
+
+    Args:
+        index_type: One of INDEX_TYPES
+        n_vectors: Number of vectors the index will hold
+        overrides: Explicit parameter values, taking precedence over defaults
+    """
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"Unknown index type '{index_type}' (expected one of {', '.join(INDEX_TYPES)})")
+
+    params = dict(DEFAULT_INDEX_PARAMS[index_type])
+    params.update({k: v for k, v in (overrides or {}).items() if v is not None})
+
+    if index_type in TRAINED_INDEX_TYPES and params.get("nlist") is None:
+        # ~4 * sqrt(N) cells, but never fewer training points than FAISS needs
+        params["nlist"] = max(1, min(int(4 * math.sqrt(n_vectors)), n_vectors // MIN_POINTS_PER_CENTROID))
+
+    if index_type == "ivf_pq" and params.get("pq_nbits") is None:
+        # 2^nbits codebook entries per sub-quantizer need enough training points
+        params["pq_nbits"] = int(min(8, max(4, math.log2(max(n_vectors // MIN_POINTS_PER_CENTROID, 16)))))
+
+    return params
+
+
+def create_empty_index(
+    dim: int,
+    index_type: str,
+    params: Dict[str, Any],
+    quantization: str = "none",
+    truncate_dim: Optional[int] = None
+) -> AnyIndex:
+    """
+    Construct an (untrained, empty) index of the given type and quantization.
+
+    With truncate_dim, the index still takes `dim`-dimensional vectors but
+    only stores and compares their first truncate_dim components.
+    """
+    if truncate_dim is None or truncate_dim == dim:
+        return _create_base_index(dim, index_type, params, quantization)
+    if not 0 < truncate_dim < dim:
+        raise ValueError(f"truncate_dim must be between 1 and {dim}, got {truncate_dim}")
+
+    base = _create_base_index(truncate_dim, index_type, params, quantization)
+    if isinstance(base, BinaryIndex):
+        return base
+    index = faiss.IndexPreTransform(base)
+    index.prepend_transform(faiss.NormalizationTransform(truncate_dim, 2.0))
+    index.prepend_transform(faiss.RemapDimensionsTransform(dim, truncate_dim, False))
+    return index
+
+
+def _create_base_index(
+    dim: int,
+    index_type: str,
+    params: Dict[str, Any],
+    quantization: str
+) -> AnyIndex:
+    metric = faiss.METRIC_INNER_PRODUCT
+    if quantization not in QUANTIZATIONS:
+        raise ValueError(f"Unknown quantization '{quantization}' (expected one of {', '.join(QUANTIZATIONS)})")
+    if index_type not in QUANTIZATION_INDEX_TYPES[quantization]:
+        raise ValueError(f"Quantization '{quantization}' is not supported with index type '{index_type}'")
+    sq_type = SCALAR_QUANTIZERS.get(quantization)
+
+    if quantization == "binary":
+        if dim % 8 != 0:
+            raise ValueError(f"Binary codes need a dimension divisible by 8, got {dim}")
+        if index_type == "hnsw":
+            index = faiss.IndexBinaryHNSW(dim, params["M"])
+            index.hnsw.efConstruction = params["ef_construction"]
+            index.hnsw.efSearch = params["ef_search"]
+            return BinaryIndex(index)
+        return BinaryIndex(faiss.IndexBinaryFlat(dim))
+
+    if index_type == "flat":
+        if sq_type is not None:
+            return faiss.IndexScalarQuantizer(dim, sq_type, metric)
+        return faiss.IndexFlatIP(dim)
+
+    if index_type == "hnsw":
+        if sq_type is not None:
+            index = faiss.IndexHNSWSQ(dim, sq_type, params["M"], metric)
+        else:
+            index = faiss.IndexHNSWFlat(dim, params["M"], metric)
+        index.hnsw.efConstruction = params["ef_construction"]
+        index.hnsw.efSearch = params["ef_search"]
+        return index
+
+    quantizer = faiss.IndexFlatIP(dim)
+    if index_type == "ivf_flat" and sq_type is not None:
+        index = faiss.IndexIVFScalarQuantizer(quantizer, dim, params["nlist"], sq_type, metric)
+    elif index_type == "ivf_flat":
+        index = faiss.IndexIVFFlat(quantizer, dim, params["nlist"], metric)
+    elif index_type == "ivf_pq":
+        if dim % params["pq_m"] != 0:
+            raise ValueError(f"pq_m={params['pq_m']} must divide the embedding dim {dim}")
+        index = faiss.IndexIVFPQ(quantizer, dim, params["nlist"], params["pq_m"], params["pq_nbits"], metric)
+    else:
+        raise ValueError(f"Unknown index type '{index_type}'")
+
+    index.nprobe = params["nprobe"]
+    return index
+
+
+def training_sample_size(index_type: str, params: Dict[str, Any], quantization: str = "none") -> int:
+    """Number of vectors to train on (0 for indexes without training)."""
+    if not requires_training(index_type, quantization):
+        return 0
+    if index_type not in TRAINED_INDEX_TYPES:
+        return SQ_TRAINING_POINTS
+    centroids = params["nlist"]
+    if index_type == "ivf_pq":
+        centroids = max(centroids, 2 ** params["pq_nbits"])
+    return max(centroids * MAX_TRAINING_POINTS_PER_CENTROID, SQ_TRAINING_POINTS if quantization == "int8" else 0)
+
+
+def build_index(
+    embeddings: np.ndarray,
+    index_type: str = "flat",
+    params: Optional[Dict[str, Any]] = None,
+    quantization: str = "none",
+    truncate_dim: Optional[int] = None
+) -> AnyIndex:
+    """
+    Build and populate an index from an in-memory (or memory-mapped) matrix.
+
+    Args:
+        embeddings: (N, dim) float32 normalised vectors
+        index_type: One of INDEX_TYPES
+        params: Index parameters (resolved with resolve_index_params if partial)
+        quantization: One of QUANTIZATIONS
+        truncate_dim: Keep only this many leading dimensions (None = all)
+    """
+    n, dim = embeddings.shape
+    params = resolve_index_params(index_type, n, params)
+    index = create_empty_index(dim, index_type, params, quantization, truncate_dim)
+
+    if requires_training(index_type, quantization):
+        sample = training_sample_size(index_type, params, quantization)
+        stride = max(1, math.ceil(n / sample))
+        index.train(np.ascontiguousarray(embeddings[::stride], dtype=np.float32))
+
+    for start in range(0, n, ADD_BATCH_SIZE):
+        index.add(np.ascontiguousarray(embeddings[start:start + ADD_BATCH_SIZE], dtype=np.float32))
+    return index
+
+
+def build_index_from_blocks(
+    blocks: Callable[[], Iterator[np.ndarray]],
+    n_vectors: int,
+    dim: int,
+    index_type: str = "flat",
+    params: Optional[Dict[str, Any]] = None,
+    quantization: str = "none",
+    truncate_dim: Optional[int] = None
+) -> AnyIndex:
+    """
+    Build an index from vectors streamed in blocks (e.g. checkpoint shards).
+
+    Trained index types make one extra pass to draw an evenly strided
+    training sample across all blocks, so the sample is not biased towards
+    the first schemes in layout order.
+
+    Args:
+        blocks: Callable returning a fresh iterator over (n_i, dim) blocks
+        n_vectors: Total number of vectors across all blocks
+        dim: Vector dimension
+    """
+    params = resolve_index_params(index_type, n_vectors, params)
+    index = create_empty_index(dim, index_type, params, quantization, truncate_dim)
+
+    if requires_training(index_type, quantization):
+        stride = max(1, math.ceil(n_vectors / training_sample_size(index_type, params, quantization)))
+        sample, offset = [], 0
+        for block in blocks():
+            first = (-offset) % stride
+            sample.append(block[first::stride])
+            offset += len(block)
+        index.train(np.ascontiguousarray(np.concatenate(sample), dtype=np.float32))
+
+    for block in blocks():
+        if len(block) > 0:
+            index.add(np.ascontiguousarray(block, dtype=np.float32))
+    return index
+
+
+def base_index(index: AnyIndex) -> AnyIndex:
+    """The index behind a truncation pre-transform (or the index itself)."""
+    if isinstance(index, faiss.IndexPreTransform):
+        return faiss.downcast_index(index.index)
+    return index
+
+
+def index_dim(index: AnyIndex) -> int:
+    """Dimension the index actually stores and compares (truncate_dim if truncated)."""
+    return base_index(index).d
+
+
+def detect_index_type(index: AnyIndex) -> str:
+    """Map a loaded FAISS index back to its index type name."""
+    index = base_index(index)
+    if isinstance(index, BinaryIndex):
+        return "hnsw" if isinstance(index.binary, faiss.IndexBinaryHNSW) else "flat"
+    if isinstance(index, faiss.IndexHNSW):
+        return "hnsw"
+    if isinstance(index, faiss.IndexIVFPQ):
+        return "ivf_pq"
+    if isinstance(index, faiss.IndexIVF):
+        return "ivf_flat"
+    return "flat"
+
+
+def detect_quantization(index: AnyIndex) -> str:
+    """Map a loaded index back to its quantization name."""
+    index = base_index(index)
+    if isinstance(index, BinaryIndex):
+        return "binary"
+    if isinstance(index, faiss.IndexHNSW):
+        index = faiss.downcast_index(index.storage)
+    if isinstance(index, (faiss.IndexScalarQuantizer, faiss.IndexIVFScalarQuantizer)):
+        for name, sq_type in SCALAR_QUANTIZERS.items():
+            if index.sq.qtype == sq_type:
+                return name
+    return "none"
+
+
+def read_index(path: Path) -> AnyIndex:
+    """Read a float or binary index written by write_index."""
+    try:
+        return faiss.read_index(str(path))
+    except RuntimeError:
+        return BinaryIndex(faiss.read_index_binary(str(path)))
+
+
+def write_index(index: AnyIndex, path: Path) -> None:
+    if isinstance(index, BinaryIndex):
+        faiss.write_index_binary(index.binary, str(path))
+    else:
+        faiss.write_index(index, str(path))
+
+
+def index_size_bytes(index: AnyIndex) -> int:
+    """Serialized size of an index (approximately its memory footprint)."""
+    if isinstance(index, BinaryIndex):
+        return faiss.serialize_index_binary(index.binary).nbytes
+    return faiss.serialize_index(index).nbytes
+
+
+def rescore_exact(
+    queries: np.ndarray,
+    ids: np.ndarray,
+    vectors: np.ndarray,
+    k: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Re-rank candidate ids by exact inner product with the full-precision vectors.
+
+    Args:
+        queries: (Q, dim) float32 query vectors
+        ids: (Q, C) candidate ids from the index (-1 = no candidate)
+        vectors: (N, dim) exact vectors, typically memory-mapped vectors.npy
+        k: Results to keep per query (<= C)
+
+    Returns:
+        (scores, ids), each (Q, k), best first
+    """
+    valid = ids >= 0
+    rows = np.where(valid, ids, 0)
+    candidates = np.asarray(vectors[rows.ravel()], dtype=np.float32).reshape(*ids.shape, -1)
+    scores = np.einsum("qd,qcd->qc", queries, candidates)
+    scores[~valid] = -np.inf
+    order = np.argsort(-scores, axis=1, kind="stable")[:, :k]
+    return np.take_along_axis(scores, order, axis=1), np.take_along_axis(ids, order, axis=1)
+
+
+def apply_search_params(index: AnyIndex, params: Dict[str, Any]) -> None:
+    """Set query-time knobs (efSearch / nprobe) on a loaded index."""
+    index = base_index(index)
+    index_type = detect_index_type(index)
+    if index_type == "hnsw" and params.get("ef_search"):
+        index.hnsw.efSearch = params["ef_search"]
+    elif index_type in TRAINED_INDEX_TYPES and params.get("nprobe"):
+        index.nprobe = params["nprobe"]
+
+
+def search_parameters(
+    index: AnyIndex,
+    selector: Optional[faiss.IDSelector] = None
+) -> faiss.SearchParameters:
+    """SearchParameters carrying an id selector plus the index's own knobs."""
+    index = base_index(index)
+    index_type = detect_index_type(index)
+    if index_type == "hnsw":
+        return faiss.SearchParametersHNSW(sel=selector, efSearch=index.hnsw.efSearch)
+    if index_type in TRAINED_INDEX_TYPES:
+        return faiss.SearchParametersIVF(sel=selector, nprobe=index.nprobe)
+    return faiss.SearchParameters(sel=selector)
+
+
+def write_vectors(path: Path, blocks: Iterable[np.ndarray], n_vectors: int, dim: int) -> None:
+    """Stream (n_i, dim) blocks into a float32 .npy file without holding them all in memory."""
+    tmp_path = Path(path).with_suffix(".tmp.npy")
+    out = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=np.float32, shape=(n_vectors, dim))
+    offset = 0
+    for block in blocks:
+        out[offset:offset + len(block)] = block
+        offset += len(block)
+    if offset != n_vectors:
+        raise ValueError(f"Expected {n_vectors} vectors, got {offset}")
+    out.flush()
+    del out
+    tmp_path.replace(path)
+
+
+def load_vectors(vector_store_dir: Path, index: Optional[AnyIndex] = None) -> Optional[np.ndarray]:
+    """
+    Full-precision vectors of a saved vector store, in index id order.
+
+    Uses vectors.npy (memory-mapped) if present, else reconstructs them from
+    an exact float32 flat index. Returns None if neither is possible.
+    """
+    path = Path(vector_store_dir) / VECTORS_FILE_NAME
+    if path.exists():
+        return np.load(path, mmap_mode="r")
+    if index is not None and not isinstance(index, faiss.IndexPreTransform) \
+            and stores_exact_vectors(detect_index_type(index), detect_quantization(index)):
+        return index.reconstruct_n(0, index.ntotal)
+    return None
+
+
+def run_tests():
+    """Run built-in test cases: ANN, quantized and truncated recall against the flat index."""
+    print("=" * 70)
+    print("FAISS Index Factory - Test Suite")
+    print("=" * 70)
+
+    passed = 0
+    failed = 0
+
+    def check(name: str, ok: bool) -> None:
+        nonlocal passed, failed
+        print(f"[{'PASS' if ok else 'FAIL'}] {name}")
+        if ok:
+            passed += 1
+        else:
+            failed += 1
+
+    def recall_at_k(truth: np.ndarray, ids: np.ndarray) -> float:
+        return sum(len(np.intersect1d(row, t)) for row, t in zip(ids, truth)) / truth.size
+
+    rng = np.random.default_rng(0)
+    n, dim, k = 4000, 128, 10
+    centres = rng.standard_normal((40, dim)).astype(np.float32)
+    vectors = centres[rng.integers(0, len(centres), n)] + 0.5 * rng.standard_normal((n, dim)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    queries = vectors[rng.choice(n, 100, replace=False)] + 0.1 * rng.standard_normal((100, dim)).astype(np.float32)
+    queries = (queries / np.linalg.norm(queries, axis=1, keepdims=True)).astype(np.float32)
+
+    flat = build_index(vectors, "flat")
+    _, exact_ids = flat.search(queries, k)
+    exact_order = np.argsort(-(queries @ vectors.T), axis=1)[:, :k]
+    check("flat index is exact", recall_at_k(exact_order, exact_ids) == 1.0)
+
+    min_recall = {"hnsw": 0.95, "ivf_flat": 0.9, "ivf_pq": 0.45}
+    for index_type, threshold in min_recall.items():
+        index = build_index(vectors, index_type, {"pq_m": 16})
+        _, ids = index.search(queries, k)
+        recall = recall_at_k(exact_ids, ids)
+        check(f"{index_type} recall@{k} {recall:.3f} >= {threshold}", recall >= threshold)
+        check(f"{index_type} detected from the built index", detect_index_type(index) == index_type)
+
+    # Quantized codes: raw recall against float32 flat, then parity after exact re-scoring.
+    # 128 sign bits are far coarser than the 1024 of real embeddings, so binary
+    # re-scores a wider candidate pool here.
+    min_raw_recall = {"fp16": 0.99, "int8": 0.9, "binary": 0.3}
+    rescore_factor = {"fp16": DEFAULT_RESCORE_FACTOR, "int8": DEFAULT_RESCORE_FACTOR, "binary": 20}
+    for quantization, threshold in min_raw_recall.items():
+        index = build_index(vectors, "flat", quantization=quantization)
+        _, ids = index.search(queries, k * rescore_factor[quantization])
+        recall = recall_at_k(exact_ids, ids[:, :k])
+        check(f"{quantization} raw recall@{k} {recall:.3f} >= {threshold}", recall >= threshold)
+        _, rescored = rescore_exact(queries, ids, vectors, k)
+        recall = recall_at_k(exact_ids, rescored)
+        check(f"{quantization} rescored recall@{k} {recall:.3f} >= 0.99", recall >= 0.99)
+        check(f"{quantization} detected from the built index", detect_quantization(index) == quantization)
+        with tempfile.TemporaryDirectory() as tmp:
+            write_index(index, Path(tmp) / "faiss_index.bin")
+            reloaded = read_index(Path(tmp) / "faiss_index.bin")
+            check(f"{quantization} index round-trips through write/read_index",
+                  np.array_equal(reloaded.search(queries, k)[1], index.search(queries, k)[1]))
+    check("int8 codes are a quarter of float32",
+          index_size_bytes(build_index(vectors, "flat", quantization="int8")) < index_size_bytes(flat) / 3)
+
+    # Truncated dimensions: same ids as a flat index over the truncated vectors,
+    # and parity with the full-dimension index after the full-dimension re-rank
+    truncate_dim = dim // 2
+    truncated = build_index(vectors, "flat", truncate_dim=truncate_dim)
+    reference = build_index(truncate_vectors(vectors, truncate_dim), "flat")
+    _, ids = truncated.search(queries, k * DEFAULT_RESCORE_FACTOR)
+    check("truncated index matches flat search over truncated vectors",
+          np.array_equal(ids, reference.search(truncate_vectors(queries, truncate_dim), k * DEFAULT_RESCORE_FACTOR)[1]))
+    check("truncated index reports its stored dimension", index_dim(truncated) == truncate_dim and truncated.d == dim)
+    raw_recall = recall_at_k(exact_ids, ids[:, :k])
+    _, rescored = rescore_exact(queries, ids, vectors, k)
+    recall = recall_at_k(exact_ids, rescored)
+    # Random vectors are not Matryoshka-trained, so only the re-rank is held to a bar
+    check(f"truncated recall@{k} {raw_recall:.3f} -> {recall:.3f} after full-dim re-rank (>= 0.85)",
+          recall >= 0.85 and recall > raw_recall)
+    check("truncate_dim equal to dim builds the plain index",
+          np.array_equal(build_index(vectors, "flat", truncate_dim=dim).search(queries, k)[1], exact_ids))
+    for index_type, quantization in (("hnsw", "none"), ("flat", "int8")):
+        index = build_index(vectors, index_type, quantization=quantization, truncate_dim=truncate_dim)
+        with tempfile.TemporaryDirectory() as tmp:
+            write_index(index, Path(tmp) / "faiss_index.bin")
+            reloaded = read_index(Path(tmp) / "faiss_index.bin")
+        check(f"truncated {index_type}/{quantization} keeps its type and dimension on reload",
+              detect_index_type(reloaded) == index_type and detect_quantization(reloaded) == quantization
+              and index_dim(reloaded) == truncate_dim)
+    check("truncated stores need vectors.npy", not stores_exact_vectors("flat", "none", truncate_dim))
+
+    params = resolve_index_params("ivf_flat", n)
+    check("nlist keeps enough training points per centroid", params["nlist"] * MIN_POINTS_PER_CENTROID <= n)
+
+    blocks = lambda: (vectors[start:start + 700] for start in range(0, n, 700))
+    for index_type in ("flat", "ivf_flat"):
+        whole = build_index(vectors, index_type)
+        streamed = build_index_from_blocks(blocks, n, dim, index_type)
+        check(f"{index_type} built from blocks matches the in-memory build",
+              np.array_equal(whole.search(queries, k)[1], streamed.search(queries, k)[1]))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        write_vectors(Path(tmp) / VECTORS_FILE_NAME, blocks(), n, dim)
+        check("vectors.npy round-trips", np.array_equal(load_vectors(Path(tmp)), vectors))
+    with tempfile.TemporaryDirectory() as tmp:
+        check("flat vectors reconstruct without vectors.npy", np.array_equal(load_vectors(Path(tmp), flat), vectors))
+
+    print("-" * 70)
+    print(f"Results: {passed} passed, {failed} failed")
+    print("=" * 70)
+
+    return failed == 0
+
+
+def main():
+    """Run the built-in test cases."""
+    if len(sys.argv) > 1 and sys.argv[1] == "--test":
+        return 0 if run_tests() else 1
+    print(__doc__)
+    return 1
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,176 @@
+"""
+Index Layout for Groww Mutual Fund RAG System
+
+Chunks are written to the FAISS index grouped by scheme and document type,
+so every (scheme_name, document_type) group occupies a contiguous range of
+vector ids. index_layout.json records those ranges; the retriever turns a
+scheme / document-type filter into id ranges and ranks only that subset
+(architecture.md §10.1: mandatory scheme filter before similarity ranking).
+
+Layout file (index_layout.json):
+    {
+      "num_rows": 995,
+      "group_by": ["scheme_name", "document_type"],
+      "groups": [
+        {"scheme_name": "HDFC Flexi Cap Fund", "document_type": "SID", "ranges": [[0, 133]]},
+        ...
+      ]
+    }
+
+Usage:
+    python scripts/index_layout.py [vector_store_dir]    # (Re)build layout from the chunk store
+"""
+
+import sys
+import json
+from pathlib import Path
+from typing import Dict, List, Any, Tuple, Optional
+
+import numpy as np
+
+# Local imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from scripts.metadata_store import ChunkStore, CHUNK_STORE_DIR_NAME
+from scripts.store_versions import current_store_dir
+
+# Configuration
+BASE_DIR = Path(__file__).parent.parent
+VECTOR_STORE_DIR = BASE_DIR / "data" / "vector_store"
+LAYOUT_FILE_NAME = "index_layout.json"
+GROUP_BY = ["scheme_name", "document_type"]
+
+# Citation precedence - most authoritative first. Also the order of document
+# types within a scheme's id range.
+DOCUMENT_TYPE_PRECEDENCE = [
+    "SID",
+    "KIM",
+    "SCHEME_SUMMARY_DOCUMENT",
+    "Fund_Facts",
+    "Factsheet",
+    "SAI",
+    "Leaflet",
+    "Presentation",
+]
+
+
+def document_type_rank(document_type: Optional[str]) -> int:
+    """Position of a document type in the citation precedence (unknown types last)."""
+    try:
+        return DOCUMENT_TYPE_PRECEDENCE.index(document_type)
+    except ValueError:
+        return len(DOCUMENT_TYPE_PRECEDENCE)
+
+
+def layout_sort_key(chunk: Dict[str, Any]) -> Tuple:
+    """Sort key that places chunks in index layout order."""
+    return (
+        chunk.get("scheme_name") or "",
+        document_type_rank(chunk.get("document_type")),
+        chunk.get("source_file") or "",
+        chunk.get("chunk_index") or 0,
+    )
+
+
+def build_index_layout(store: ChunkStore) -> Dict[str, Any]:
+    """
+    Compute the id ranges of every (scheme_name, document_type) group.
+
+    Groups that are not contiguous (e.g. a store written in another order)
+    simply get several ranges, so the layout is always correct.
+    """
+    n = len(store)
+    codes = np.stack([store.codes(column) for column in GROUP_BY], axis=1)
+    dictionaries = [store.dictionary(column) for column in GROUP_BY]
+
+    groups: Dict[Tuple[int, ...], List[List[int]]] = {}
+    if n > 0:
+        # Start of every run of identical group codes
+        changes = np.flatnonzero(np.any(codes[1:] != codes[:-1], axis=1)) + 1
+        starts = np.concatenate([[0], changes])
+        ends = np.concatenate([changes, [n]])
+        for start, end in zip(starts, ends):
+            key = tuple(int(c) for c in codes[start])
+            groups.setdefault(key, []).append([int(start), int(end)])
+
+    return {
+        "num_rows": n,
+        "group_by": GROUP_BY,
+        "groups": [
+            {
+                **{column: dictionaries[i][code] for i, (column, code) in enumerate(zip(GROUP_BY, key))},
+                "ranges": ranges,
+            }
+            for key, ranges in groups.items()
+        ],
+    }
+
+
+def write_index_layout(vector_store_dir: Path) -> Dict[str, Any]:
+    """Build the layout from the chunk store and write index_layout.json."""
+    store = ChunkStore(Path(vector_store_dir) / CHUNK_STORE_DIR_NAME)
+    layout = build_index_layout(store)
+    store.close()
+
+    with open(Path(vector_store_dir) / LAYOUT_FILE_NAME, "w", encoding="utf-8") as f:
+        json.dump(layout, f, indent=2, ensure_ascii=False)
+    return layout
+
+
+class IndexLayout:
+    """Resolves scheme / document-type filters to vector id ranges."""
+
+    def __init__(self, layout: Dict[str, Any]):
+        self.num_rows = layout["num_rows"]
+        self.group_by = layout["group_by"]
+        self.groups = layout["groups"]
+
+    @classmethod
+    def load(cls, vector_store_dir: Path) -> Optional["IndexLayout"]:
+        path = Path(vector_store_dir) / LAYOUT_FILE_NAME
+        if not path.exists():
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def supports(self, filters: Dict[str, List[Any]]) -> bool:
+        """True if every filtered column is part of the layout grouping."""
+        return all(column in self.group_by for column in filters)
+
+    def ranges_for(self, filters: Dict[str, List[Any]]) -> List[Tuple[int, int]]:
+        """
+        Id ranges of all groups matching the filters, sorted and merged.
+
+        Args:
+            filters: Column -> list of allowed values (columns must be supported)
+        """
+        ranges = sorted(
+            (start, end)
+            for group in self.groups
+            if all(group[column] in values for column, values in filters.items())
+            for start, end in group["ranges"]
+        )
+        merged: List[Tuple[int, int]] = []
+        for start, end in ranges:
+            if merged and start <= merged[-1][1]:
+                merged[-1] = (merged[-1][0], max(end, merged[-1][1]))
+            else:
+                merged.append((start, end))
+        return merged
+
+
+def main():
+    """Rebuild index_layout.json for an existing vector store."""
+    vector_store_dir = current_store_dir(Path(sys.argv[1]) if len(sys.argv) > 1 else VECTOR_STORE_DIR)
+    if not (vector_store_dir / CHUNK_STORE_DIR_NAME / "columns.json").exists():
+        print(f"[ERROR] No chunk store found in {vector_store_dir}")
+        return 1
+
+    layout = write_index_layout(vector_store_dir)
+    contiguous = sum(1 for g in layout["groups"] if len(g["ranges"]) == 1)
+    print(f"[OK] {len(layout['groups'])} groups ({contiguous} contiguous) over {layout['num_rows']} chunks")
+    print(f"     Saved to {vector_store_dir / LAYOUT_FILE_NAME}")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
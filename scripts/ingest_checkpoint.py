@@ -0,0 +1,198 @@
+"""
+Ingestion Checkpoint for Groww Mutual Fund RAG System
+
+Durable progress record for the streaming ingestion pipeline. Every batch
+that is embedded and added to the index is committed here, so a crashed run
+can be resumed without re-parsing or re-embedding finished documents.
+
+Checkpoint directory layout:
+    state.json                      Progress (done files, shard count, byte offsets)
+    chunks.jsonl                    Chunk metadata, one JSON object per line
+    duplicates.jsonl                Provenance records of near-duplicates not embedded (dedup.py)
+    shards/embeddings_00000.npy     float32 embeddings of each committed batch
+
+A batch is only considered committed once state.json has been replaced, so
+partially written chunk lines or shards from a crash are discarded on load.
+"""
+
+import os
+import json
+import shutil
+import hashlib
+from pathlib import Path
+from typing import Dict, List, Any, Iterator, Optional
+
+import numpy as np
+
+
+def fingerprint_chunk_ids(chunk_ids: List[str]) -> str:
+    """Fingerprint the chunks a checkpoint was built on top of."""
+    digest = hashlib.sha256()
+    for chunk_id in chunk_ids:
+        digest.update(chunk_id.encode("utf-8"))
+        digest.update(b"\n")
+    return digest.hexdigest()
+
+
+class IngestCheckpoint:
+    """Append-only checkpoint of streamed chunks and their embeddings."""
+
+    def __init__(self, checkpoint_dir: Path):
+        self.checkpoint_dir = Path(checkpoint_dir)
+        self._state_path = self.checkpoint_dir / "state.json"
+        self._chunks_path = self.checkpoint_dir / "chunks.jsonl"
+        self._duplicates_path = self.checkpoint_dir / "duplicates.jsonl"
+        self._shards_dir = self.checkpoint_dir / "shards"
+        self.state: Dict[str, Any] = {}
+
+    def _shard_path(self, seq: int) -> Path:
+        return self._shards_dir / f"embeddings_{seq:05d}.npy"
+
+    def _write_state(self) -> None:
+        tmp_path = self._state_path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.state, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self._state_path)
+
+    def exists(self) -> bool:
+        return self._state_path.exists()
+
+    def reset(self, base_fingerprint: str) -> None:
+        """Discard any previous progress and start an empty checkpoint."""
+        self.clear()
+        self._shards_dir.mkdir(parents=True, exist_ok=True)
+        self._chunks_path.touch()
+        self._duplicates_path.touch()
+        self.state = {
+            "base_fingerprint": base_fingerprint,
+            "done_files": {},
+            "num_shards": 0,
+            "num_chunks": 0,
+            "chunks_bytes": 0,
+            "duplicates_bytes": 0,
+        }
+        self._write_state()
+
+    def load(self, base_fingerprint: str, checksums: Dict[str, str]) -> bool:
+        """
+        Load a previous checkpoint for resuming.
+
+        Args:
+            base_fingerprint: Fingerprint of the chunks the run starts from
+            checksums: Current SHA-256 of every source PDF
+
+        Returns:
+            True if the checkpoint is usable, False if it is missing or stale
+        """
+        if not self.exists():
+            return False
+
+        with open(self._state_path, "r", encoding="utf-8") as f:
+            self.state = json.load(f)
+
+        if self.state.get("base_fingerprint") != base_fingerprint:
+            print("    [WARN] Checkpoint was built on a different vector store - ignoring it")
+            return False
+
+        changed = [
+            name for name, checksum in self.state["done_files"].items()
+            if checksums.get(name) != checksum
+        ]
+        if changed:
+            print(f"    [WARN] {len(changed)} checkpointed PDFs changed since the crash - ignoring checkpoint")
+            return False
+
+        # Drop anything written after the last committed batch
+        with open(self._chunks_path, "r+b") as f:
+            f.truncate(self.state["chunks_bytes"])
+        if self._duplicates_path.exists():
+            with open(self._duplicates_path, "r+b") as f:
+                f.truncate(self.state.get("duplicates_bytes", 0))
+        for shard in self._shards_dir.glob("embeddings_*.npy"):
+            if int(shard.stem.split("_")[1]) >= self.state["num_shards"]:
+                shard.unlink()
+
+        return True
+
+    def commit(
+        self,
+        chunks: List[Dict[str, Any]],
+        embeddings: np.ndarray,
+        done_files: Dict[str, str],
+        duplicates: Optional[List[Dict[str, Any]]] = None
+    ) -> None:
+        """
+        Durably record one batch.
+
+        Args:
+            chunks: Chunk metadata of the batch, aligned with `embeddings`
+            embeddings: float32 embeddings already added to the index
+            done_files: Source files completed by this batch -> checksum
+            duplicates: Provenance records of the batch's near-duplicate chunks
+        """
+        if duplicates:
+            with open(self._duplicates_path, "ab") as f:
+                for record in duplicates:
+                    f.write(json.dumps(record, ensure_ascii=False).encode("utf-8"))
+                    f.write(b"\n")
+                f.flush()
+                os.fsync(f.fileno())
+                self.state["duplicates_bytes"] = f.tell()
+
+        if chunks:
+            with open(self._chunks_path, "ab") as f:
+                for chunk in chunks:
+                    f.write(json.dumps(chunk, ensure_ascii=False).encode("utf-8"))
+                    f.write(b"\n")
+                f.flush()
+                os.fsync(f.fileno())
+                chunks_bytes = f.tell()
+
+            shard_path = self._shard_path(self.state["num_shards"])
+            with open(shard_path, "wb") as f:
+                np.save(f, np.ascontiguousarray(embeddings, dtype=np.float32))
+                f.flush()
+                os.fsync(f.fileno())
+
+            self.state["num_shards"] += 1
+            self.state["num_chunks"] += len(chunks)
+            self.state["chunks_bytes"] = chunks_bytes
+
+        self.state["done_files"].update(done_files)
+        self._write_state()
+
+    @property
+    def done_files(self) -> Dict[str, str]:
+        return self.state.get("done_files", {})
+
+    @property
+    def num_chunks(self) -> int:
+        return self.state.get("num_chunks", 0)
+
+    def iter_shards(self) -> Iterator[np.ndarray]:
+        """Yield committed embedding batches in commit order."""
+        for seq in range(self.state.get("num_shards", 0)):
+            yield np.load(self._shard_path(seq))
+
+    def iter_chunks(self) -> Iterator[Dict[str, Any]]:
+        """Yield committed chunk metadata in commit order."""
+        with open(self._chunks_path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+    def iter_duplicates(self) -> Iterator[Dict[str, Any]]:
+        """Yield committed provenance records in commit order."""
+        if not self._duplicates_path.exists():
+            return
+        with open(self._duplicates_path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+    def clear(self) -> None:
+        """Delete the checkpoint directory."""
+        if self.checkpoint_dir.exists():
+            shutil.rmtree(self.checkpoint_dir)
@@ -3,17 +3,28 @@ Document Ingestion Script for Groww Mutual Fund RAG System
 Milestone 2: Parse PDFs, chunk, embed, and store in FAISS
 
 Usage:
-    python scripts/ingest_documents.py
+    python scripts/ingest_documents.py                  # Full rebuild
+    python scripts/ingest_documents.py --incremental    # Re-embed changed PDFs only
+    python scripts/ingest_documents.py --index-type hnsw --ef-search 128
+    python scripts/ingest_documents.py --quantization int8 --rescore
+    python scripts/ingest_documents.py --truncate-dim 256 --rescore    # 256-d first pass, 1024-d re-rank
+    python scripts/ingest_documents.py --tokenizer approx              # Offline token counting
+    python scripts/ingest_documents.py --test           # Built-in test cases
 """
 
 import os
 import sys
-import uuid
 import json
-import pickle
+import time
+import argparse
+import tempfile
+from collections import Counter, deque
+from functools import lru_cache
+from itertools import islice, chain
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Tuple, Iterator, Iterable
 
 # PDF parsing
 import pymupdf4llm
@@ -31,6 +42,36 @@ import numpy as np
 # Local imports
 sys.path.insert(0, str(Path(__file__).parent.parent))
 from scripts.filename_metadata import parse_filename
+from scripts.download_corpus import calculate_file_checksum, file_signature
+from scripts.embedding_cache import EmbeddingCache, make_cache_key, DEFAULT_MAX_ENTRIES
+from scripts.ingest_checkpoint import IngestCheckpoint, fingerprint_chunk_ids
+from scripts.metadata_store import (
+    ChunkStore, write_chunk_store, load_chunks, export_json,
+    CHUNK_STORE_DIR_NAME, LEGACY_PICKLE_NAME, JSON_EXPORT_NAME
+)
+from scripts.index_layout import (
+    write_index_layout, layout_sort_key, document_type_rank, LAYOUT_FILE_NAME
+)
+from scripts.sparse_index import write_sparse_index, SPARSE_INDEX_DIR_NAME
+from scripts.fact_extraction import write_scheme_facts, SCHEME_FACTS_FILE_NAME
+from scripts.query_router import build_router_model, ROUTER_MODEL_FILE_NAME
+from scripts.query_expansion import write_expansion_vectors, QUERY_VECTORS_FILE_NAME
+from scripts.tracing import (
+    Trace, JsonlLogWriter, iter_log_records, utc_timestamp, LOG_DIR, INGEST_LOG_PREFIX,
+    STAGE_PARSE, STAGE_CHUNK, STAGE_EMBED, STAGE_INDEX_BUILD
+)
+from scripts.freshness import write_freshness_index, FRESHNESS_INDEX_FILE_NAME
+from scripts.chunker import StructuredChunker, load_token_counter, make_chunk_id
+from scripts.dedup import (
+    NearDuplicateFilter, load_provenance_records, write_provenance, DEDUP_THRESHOLD, PROVENANCE_FILE_NAME
+)
+from scripts.store_versions import create_version_dir, current_store_dir, publish_version
+from scripts.index_factory import (
+    build_index, build_index_from_blocks, create_empty_index, resolve_index_params,
+    detect_index_type, detect_quantization, index_dim, requires_training, stores_exact_vectors,
+    read_index, write_index, write_vectors, load_vectors,
+    INDEX_TYPES, QUANTIZATIONS, VECTORS_FILE_NAME
+)
 
 
 # Configuration
@@ -39,14 +80,24 @@ DATA_DIR = BASE_DIR / "data"
 SCHEMES_DIR = DATA_DIR / "raw" / "schemes"
 VECTOR_STORE_DIR = DATA_DIR / "vector_store"
 PROCESSED_DIR = DATA_DIR / "processed"
+EMBEDDING_CACHE_DIR = DATA_DIR / "cache" / "embeddings"
+CHECKPOINT_DIR = VECTOR_STORE_DIR / ".ingest_checkpoint"
 
 # Chunking parameters (from architecture.md)
 CHUNK_SIZE = 512  # tokens (~350-400 words)
 CHUNK_OVERLAP = 64  # 12.5% overlap
+CHUNKERS = ["structured", "recursive"]  # structured: token-counted, table-aware (chunker.py)
 
 # Embedding model
 EMBEDDING_MODEL = "BAAI/bge-m3"
 EMBEDDING_DIM = 1024  # BGE-M3 output dimension
+EMBEDDING_PREFIX = "Represent this financial document for retrieval: "
+
+# PDF parsing worker processes (1 = parse serially in this process)
+PARSE_WORKERS = os.cpu_count() or 1
+
+# Streaming: chunks held in memory before they are embedded and indexed
+STREAM_BATCH_SIZE = 256
 
 
 def parse_pdf_to_markdown(pdf_path: Path) -> str:
@@ -67,6 +118,49 @@ def parse_pdf_to_markdown(pdf_path: Path) -> str:
         return ""
 
 
+def parse_pdf_timed(pdf_path: Path) -> Tuple[str, float]:
+    """parse_pdf_to_markdown plus its duration in ms (measured where it runs, e.g. a worker process)."""
+    start = time.perf_counter()
+    md_text = parse_pdf_to_markdown(pdf_path)
+    return md_text, (time.perf_counter() - start) * 1000
+
+
+def iter_parsed_documents(
+    pending: List[Tuple[Path, str]],
+    workers: int = PARSE_WORKERS
+) -> Iterator[Tuple[Path, str, str, float]]:
+    """
+    Parse PDFs lazily, yielding (pdf_path, scheme_name, markdown, parse ms) in input order.
+    
+    With workers > 1, at most 2 x workers PDFs are parsed ahead of the
+    consumer, so memory stays bounded no matter how many PDFs are pending.
+    The first window is submitted largest file first, so one big SID does
+    not end up as the last task on an otherwise idle pool.
+    """
+    if workers <= 1:
+        for pdf_path, scheme_name in pending:
+            yield (pdf_path, scheme_name, *parse_pdf_timed(pdf_path))
+        return
+    
+    items = iter(pending)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        first = list(islice(items, 2 * workers))
+        largest_first = sorted(
+            range(len(first)), key=lambda i: first[i][0].stat().st_size, reverse=True
+        )
+        futures = {i: executor.submit(parse_pdf_timed, first[i][0]) for i in largest_first}
+        in_flight = deque((item, futures[i]) for i, item in enumerate(first))
+        while in_flight:
+            (pdf_path, scheme_name), future = in_flight.popleft()
+            md_text, parse_ms = future.result()
+            
+            next_item = next(items, None)
+            if next_item is not None:
+                in_flight.append((next_item, executor.submit(parse_pdf_timed, next_item[0])))
+            
+            yield pdf_path, scheme_name, md_text, parse_ms
+
+
 def chunk_document(
     text: str, 
     metadata: Dict[str, Any],
@@ -75,6 +169,9 @@ def chunk_document(
 ) -> List[Dict[str, Any]]:
     """
     Split document text into chunks with metadata.
+    
+    Chunk ids are deterministic (make_chunk_id), so re-ingesting an
+    unchanged document reproduces them.
     """
     # Use RecursiveCharacterTextSplitter for semantic-aware splitting
     splitter = RecursiveCharacterTextSplitter(
@@ -89,7 +186,7 @@ def chunk_document(
     chunks = []
     for i, split_text in enumerate(splits):
         chunk = {
-            "chunk_id": str(uuid.uuid4()),
+            "chunk_id": make_chunk_id(metadata, i, split_text),
             "text": split_text,
             "chunk_index": i,
             "total_chunks": len(splits),
@@ -124,186 +221,1168 @@ def get_amfi_code(scheme_name: str) -> str:
     return mapping.get(scheme_name, "unknown")
 
 
-def process_scheme_folder(
-    folder_path: Path, 
-    scheme_display_name: str
+def build_document_chunks(
+    pdf_path: Path,
+    md_text: str,
+    scheme_display_name: str,
+    checksum: Optional[str] = None,
+    chunker: Optional[StructuredChunker] = None,
+    signature: Optional[Tuple[int, int]] = None
 ) -> List[Dict[str, Any]]:
     """
-    Process all PDF files in a scheme folder.
+    Attach document metadata to parsed markdown and chunk it.
+    
+    Uses the structure-aware `chunker` if given, else chunk_document.
+    `signature` is the (mtime_ns, size) taken before `checksum` was computed;
+    the refresh scheduler skips hashing a file only while both still match.
     """
-    all_chunks = []
-    pdf_files = list(folder_path.glob("*.pdf"))  # Case-insensitive on Windows
+    # Extract metadata from filename
+    file_meta = parse_filename(pdf_path.name)
     
-    print(f"\n  Processing {len(pdf_files)} PDFs in {folder_path.name}...")
+    # Build base metadata
+    base_metadata = {
+        "amc_name": "HDFC Asset Management Company",
+        "scheme_name": scheme_display_name,
+        "scheme_code": get_amfi_code(scheme_display_name),
+        "plan_type": "Direct",
+        "document_type": file_meta.get("document_type") or "Unknown",
+        "document_date": file_meta.get("document_date"),
+        "source_file": pdf_path.name,
+        "extraction_date": datetime.now(timezone.utc).isoformat().replace("+00:00", "Z"),
+    }
+    if checksum is None or signature is None:
+        signature = file_signature(pdf_path)
+        checksum = checksum or calculate_file_checksum(pdf_path)
+    base_metadata["checksum"] = checksum
+    base_metadata["source_mtime_ns"], base_metadata["source_size"] = signature
     
-    for pdf_path in pdf_files:
-        print(f"    - {pdf_path.name}")
-        
-        # Extract metadata from filename
-        file_meta = parse_filename(pdf_path.name)
-        
-        # Parse PDF to markdown
-        md_text = parse_pdf_to_markdown(pdf_path)
-        if not md_text:
-            continue
-        
-        # Build base metadata
-        base_metadata = {
-            "amc_name": "HDFC Asset Management Company",
-            "scheme_name": scheme_display_name,
-            "scheme_code": get_amfi_code(scheme_display_name),
-            "plan_type": "Direct",
-            "document_type": file_meta.get("document_type") or "Unknown",
-            "document_date": file_meta.get("document_date"),
-            "source_file": pdf_path.name,
-            "extraction_date": datetime.now(timezone.utc).isoformat().replace("+00:00", "Z"),
-        }
-        
-        # Chunk the document
-        chunks = chunk_document(md_text, base_metadata)
-        all_chunks.extend(chunks)
-        
-        print(f"      -> {len(chunks)} chunks created")
+    # Chunk the document
+    if chunker is not None:
+        return chunker.chunk(md_text, base_metadata)
+    return chunk_document(md_text, base_metadata)
+
+
+def collect_scheme_pdfs(schemes_dir: Path) -> Dict[Path, List[Path]]:
+    """
+    Find all scheme folders and the PDFs they contain.
     
-    return all_chunks
+    Returns:
+        Mapping of scheme folder -> list of PDF paths, both sorted by name
+        so that chunk order (and therefore the index) is reproducible
+    """
+    scheme_folders = sorted(
+        f for f in schemes_dir.iterdir() 
+        if f.is_dir() and f.name != "Common"
+    )
+    return {folder: sorted(folder.glob("*.pdf")) for folder in scheme_folders}
+
+
+def plan_incremental_update(
+    checksums: Dict[str, str],
+    existing_chunks: List[Dict[str, Any]]
+) -> Dict[str, List[str]]:
+    """
+    Compare current PDF checksums with those recorded on indexed chunks.
+    
+    Args:
+        checksums: SHA-256 checksum of every PDF on disk, keyed by file name
+        existing_chunks: Chunk metadata from the previous ingestion run
+    
+    Returns:
+        Dictionary with file name lists:
+            - new: PDFs that have no chunks in the index yet
+            - changed: PDFs whose checksum differs from the indexed one
+            - unchanged: PDFs that can be kept as-is
+            - deleted: Indexed source files that no longer exist on disk
+    """
+    indexed = {}
+    for chunk in existing_chunks:
+        # Chunks from runs before checksums were recorded carry None and
+        # therefore always count as changed.
+        indexed.setdefault(chunk["source_file"], chunk.get("checksum"))
+    
+    plan = {"new": [], "changed": [], "unchanged": [], "deleted": []}
+    for name, checksum in sorted(checksums.items()):
+        if name not in indexed:
+            plan["new"].append(name)
+        elif indexed[name] != checksum:
+            plan["changed"].append(name)
+        else:
+            plan["unchanged"].append(name)
+    
+    plan["deleted"] = sorted(name for name in indexed if name not in checksums)
+    return plan
+
+
+def remove_documents_from_index(
+    index: faiss.IndexFlatIP,
+    chunks: List[Dict[str, Any]],
+    source_files: List[str]
+) -> List[Dict[str, Any]]:
+    """
+    Remove all vectors belonging to the given source files from the index.
+    
+    IndexFlat compacts its storage on removal while keeping the relative
+    order of the remaining vectors, so the returned chunk list stays aligned
+    with the index positions.
+    
+    Returns:
+        Chunk metadata for the vectors that remain in the index
+    """
+    drop = set(source_files)
+    drop_ids = np.array(
+        [i for i, chunk in enumerate(chunks) if chunk["source_file"] in drop],
+        dtype=np.int64
+    )
+    if len(drop_ids) > 0:
+        index.remove_ids(faiss.IDSelectorBatch(drop_ids))
+    return [chunk for chunk in chunks if chunk["source_file"] not in drop]
+
+
+@lru_cache(maxsize=1)
+def get_embedding_model() -> SentenceTransformer:
+    """Load the embedding model once per process."""
+    print("      Loading embedding model (BGE-M3)...")
+    print("      This may take a few minutes on first run...")
+    model = SentenceTransformer(EMBEDDING_MODEL)
+    print("      [OK] Model loaded")
+    return model
 
 
 def create_embeddings(
     chunks: List[Dict[str, Any]], 
-    model: SentenceTransformer
+    model: Optional[SentenceTransformer] = None,
+    cache: Optional[EmbeddingCache] = None
 ) -> np.ndarray:
     """
     Create embeddings for all chunks.
+    
+    If a cache is given, only texts missing from it are sent to the model,
+    and the model is not loaded at all when every text is a cache hit.
     """
     texts = [chunk["text"] for chunk in chunks]
     
     # Add instruction prefix for retrieval (BGE-M3 recommendation)
-    prefixed_texts = [
-        f"Represent this financial document for retrieval: {text}" 
-        for text in texts
-    ]
+    prefixed_texts = [f"{EMBEDDING_PREFIX}{text}" for text in texts]
     
-    print(f"\n  Embedding {len(texts)} chunks...")
-    embeddings = model.encode(
-        prefixed_texts, 
-        batch_size=32,
-        show_progress_bar=True,
-        normalize_embeddings=True
-    )
+    if cache is None:
+        embeddings = np.zeros((len(texts), EMBEDDING_DIM), dtype=np.float32)
+        missing = np.arange(len(texts))
+    else:
+        keys = [make_cache_key(EMBEDDING_MODEL, EMBEDDING_PREFIX, text) for text in texts]
+        embeddings, hit_mask = cache.get_many(keys)
+        missing = np.flatnonzero(~hit_mask)
+        print(f"\n  Embedding cache: {int(hit_mask.sum())} hits, {len(missing)} misses")
+    
+    if len(missing) > 0:
+        model = model or get_embedding_model()
+        print(f"\n  Embedding {len(missing)} chunks...")
+        encoded = model.encode(
+            [prefixed_texts[i] for i in missing], 
+            batch_size=32,
+            show_progress_bar=True,
+            normalize_embeddings=True
+        )
+        embeddings[missing] = encoded
+        
+        if cache is not None:
+            cache.put_many([keys[i] for i in missing], embeddings[missing])
+            cache.flush()
     
     return embeddings.astype(np.float32)
 
 
-def create_faiss_index(embeddings: np.ndarray) -> faiss.IndexFlatIP:
+def create_faiss_index(
+    embeddings: np.ndarray,
+    index_type: str = "flat",
+    index_params: Optional[Dict[str, Any]] = None,
+    quantization: str = "none",
+    truncate_dim: Optional[int] = None
+) -> faiss.Index:
     """
     Create a FAISS index for inner product (cosine similarity on normalized vectors).
+    
+    See index_factory.py for the available index types, quantizations,
+    dimension truncation and their parameters.
+    """
+    return build_index(embeddings, index_type, index_params, quantization, truncate_dim)
+
+
+def add_to_index(
+    index: Optional[faiss.Index],
+    embeddings: np.ndarray,
+    index_type: Optional[str] = "flat",
+    index_params: Optional[Dict[str, Any]] = None,
+    quantization: str = "none",
+    truncate_dim: Optional[int] = None
+) -> Optional[faiss.Index]:
     """
-    dim = embeddings.shape[1]
-    index = faiss.IndexFlatIP(dim)  # Inner product for cosine similarity
-    index.add(embeddings)
+    Add a batch of embeddings, creating the index on the first batch.
+    
+    With index_type None nothing is indexed; the embeddings only live in the
+    checkpoint and the index is built at the end (see finalize_index).
+    """
+    if index_type is None:
+        return index
+    if index is None:
+        index = create_empty_index(embeddings.shape[1], index_type,
+                                   resolve_index_params(index_type, len(embeddings), index_params),
+                                   quantization, truncate_dim)
+    if len(embeddings) > 0:
+        index.add(embeddings)
+    return index
+
+
+def run_streaming_ingest(
+    pending: List[Tuple[Path, str]],
+    checksums: Dict[str, str],
+    index: Optional[faiss.Index],
+    base_chunks: List[Dict[str, Any]],
+    checkpoint: IngestCheckpoint,
+    cache: Optional[EmbeddingCache] = None,
+    workers: int = PARSE_WORKERS,
+    batch_size: int = STREAM_BATCH_SIZE,
+    resume: bool = False,
+    index_type: Optional[str] = "flat",
+    index_params: Optional[Dict[str, Any]] = None,
+    quantization: str = "none",
+    truncate_dim: Optional[int] = None,
+    chunker: Optional[StructuredChunker] = None,
+    dedup: Optional[NearDuplicateFilter] = None,
+    trace: Optional[Trace] = None,
+    log: Optional[JsonlLogWriter] = None,
+    signatures: Optional[Dict[str, Tuple[int, int]]] = None
+) -> Optional[faiss.Index]:
+    """
+    Stream documents through parse -> chunk -> embed -> index.
+    
+    Only about `batch_size` chunks (plus the document that crossed the
+    threshold) are held in memory before they are embedded and added to the
+    index. Each batch is then committed to the checkpoint, whose chunk
+    metadata follows the base chunks in index order.
+    
+    Args:
+        pending: (pdf_path, scheme_name) of every document to ingest
+        checksums: SHA-256 of every source PDF, keyed by file name
+        index: Index already holding the vectors of `base_chunks`, or None
+        base_chunks: Chunks kept from a previous run (incremental mode)
+        checkpoint: Checkpoint that receives every committed batch
+        cache: Optional embedding cache
+        workers: PDF parsing processes
+        batch_size: Chunks per embedding batch
+        resume: Continue from an existing checkpoint instead of starting over
+        index_type: Index type to build while streaming, or None to only
+            checkpoint the embeddings (trained types, rebuilt indexes)
+        index_params: Index parameter overrides
+        quantization: Vector quantization of the index
+        truncate_dim: Leading dimensions kept by the index (None = all)
+        chunker: Structure-aware chunker (None: chunk_document)
+        dedup: Near-duplicate filter; collapsed chunks are not embedded and
+            their provenance records are committed with the batch
+        trace: Run trace that accumulates the parse / chunk / embed /
+            index_build stage timings
+        log: Optional ingest log; receives one record per document and per batch
+        signatures: (mtime_ns, size) of every source PDF, taken before hashing
+        
+    Returns:
+        The populated index, or None if nothing was indexed (yet)
+    """
+    base_fingerprint = fingerprint_chunk_ids([c["chunk_id"] for c in base_chunks])
+    
+    if resume and checkpoint.load(base_fingerprint, checksums):
+        for embeddings in checkpoint.iter_shards():
+            index = add_to_index(index, embeddings, index_type, index_params, quantization, truncate_dim)
+        print(f"    [OK] Resumed: {len(checkpoint.done_files)} documents, "
+              f"{checkpoint.num_chunks} chunks already indexed")
+    else:
+        checkpoint.reset(base_fingerprint)
+    
+    if dedup is not None:
+        dedup.add(base_chunks)
+        dedup.add(checkpoint.iter_chunks())
+    
+    remaining = [(p, s) for p, s in pending if p.name not in checkpoint.done_files]
+    batch_chunks: List[Dict[str, Any]] = []
+    batch_files: Dict[str, str] = {}
+    trace = trace if trace is not None else Trace()
+    
+    def flush():
+        nonlocal index
+        batch_trace = Trace()
+        embeddings = np.zeros((0, EMBEDDING_DIM), dtype=np.float32)
+        if batch_chunks:
+            with batch_trace.stage(STAGE_EMBED):
+                embeddings = create_embeddings(batch_chunks, cache=cache)
+            with batch_trace.stage(STAGE_INDEX_BUILD):
+                index = add_to_index(index, embeddings, index_type, index_params, quantization, truncate_dim)
+        checkpoint.commit(batch_chunks, embeddings, batch_files, dedup.drain() if dedup is not None else None)
+        trace.merge(batch_trace)
+        if log is not None and batch_chunks:
+            log.write({"type": "ingest_batch", "timestamp": utc_timestamp(), "chunks": len(batch_chunks),
+                       "stages_ms": batch_trace.stages_ms()})
+        batch_chunks.clear()
+        batch_files.clear()
+    
+    for pdf_path, scheme_name, md_text, parse_ms in iter_parsed_documents(remaining, workers):
+        print(f"    - {pdf_path.parent.name}/{pdf_path.name}")
+        document_trace = Trace()
+        document_trace.add(STAGE_PARSE, parse_ms)
+        chunks: List[Dict[str, Any]] = []
+        if md_text:
+            with document_trace.stage(STAGE_CHUNK):
+                chunks = build_document_chunks(
+                    pdf_path, md_text, scheme_name, checksums[pdf_path.name], chunker,
+                    (signatures or {}).get(pdf_path.name)
+                )
+                created = len(chunks)
+                if dedup is not None:
+                    chunks = dedup.filter(chunks)
+            batch_chunks.extend(chunks)
+            collapsed = f", {created - len(chunks)} near-duplicates collapsed" if len(chunks) < created else ""
+            print(f"      -> {created} chunks created{collapsed}")
+        batch_files[pdf_path.name] = checksums[pdf_path.name]
+        trace.merge(document_trace)
+        if log is not None:
+            log.write({"type": "ingest_document", "timestamp": utc_timestamp(), "source_file": pdf_path.name,
+                       "chunks": len(chunks), "stages_ms": document_trace.stages_ms()})
+        
+        if len(batch_chunks) >= batch_size:
+            flush()
+    
+    flush()
     return index
 
 
 def save_vector_store(
-    index: faiss.IndexFlatIP,
-    chunks: List[Dict[str, Any]],
-    output_dir: Path
+    index: faiss.Index,
+    chunks: Iterable[Dict[str, Any]],
+    output_dir: Path,
+    export_json_copy: bool = False,
+    vectors: Optional[Iterable[np.ndarray]] = None
 ) -> None:
     """
     Save FAISS index and chunk metadata to disk.
+    
+    Metadata goes to the columnar chunk store; `chunks` may be any iterable
+    and is consumed once, so it can be streamed from the ingest checkpoint.
+    For approximate, quantized or truncated indexes, `vectors` (blocks in
+    index order) are written to vectors.npy for exact re-scoring at query time.
+    The files derived from these (layout, sparse index, router model) are
+    written by write_search_files.
     """
     output_dir.mkdir(parents=True, exist_ok=True)
     
     # Save FAISS index
     index_path = output_dir / "faiss_index.bin"
-    faiss.write_index(index, str(index_path))
-    print(f"    [OK] Saved FAISS index to {index_path}")
+    write_index(index, index_path)
+    print(f"    [OK] Saved FAISS index ({detect_index_type(index)}, quantization: "
+          f"{detect_quantization(index)}, dim: {index_dim(index)}) to {index_path}")
+    
+    # Full-precision vectors; a flat index already holds them
+    vectors_path = output_dir / VECTORS_FILE_NAME
+    if vectors is not None:
+        write_vectors(vectors_path, vectors, index.ntotal, EMBEDDING_DIM)
+        print(f"    [OK] Saved vectors to {vectors_path}")
+    elif vectors_path.exists():
+        vectors_path.unlink()
     
     # Save chunks metadata (for retrieval)
-    chunks_path = output_dir / "chunks_metadata.pkl"
-    with open(chunks_path, "wb") as f:
-        pickle.dump(chunks, f)
-    print(f"    [OK] Saved chunks metadata to {chunks_path}")
+    store_dir = output_dir / CHUNK_STORE_DIR_NAME
+    rows = write_chunk_store(chunks, store_dir)
+    print(f"    [OK] Saved {rows} chunks to columnar store {store_dir}")
+    
+    # Remove the legacy pickle so no reader picks up stale metadata
+    legacy_path = output_dir / LEGACY_PICKLE_NAME
+    if legacy_path.exists():
+        legacy_path.unlink()
     
-    # Also save as JSON for inspection
-    chunks_json_path = output_dir / "chunks_metadata.json"
-    with open(chunks_json_path, "w", encoding="utf-8") as f:
-        json.dump(chunks, f, indent=2, ensure_ascii=False)
-    print(f"    [OK] Saved chunks JSON to {chunks_json_path}")
+    # Optional JSON export for inspection
+    if export_json_copy:
+        store = ChunkStore(store_dir)
+        chunks_json_path = output_dir / JSON_EXPORT_NAME
+        export_json(store.iter_chunks(), chunks_json_path)
+        store.close()
+        print(f"    [OK] Exported chunks JSON to {chunks_json_path}")
 
 
-def main():
-    """Main entry point for document ingestion."""
+def write_search_files(output_dir: Path) -> None:
+    """Write the search structures derived from a saved index and chunk store."""
+    # Scheme / document-type id ranges for pre-filtered search
+    layout = write_index_layout(output_dir)
+    print(f"    [OK] Saved index layout ({len(layout['groups'])} groups) to {output_dir / LAYOUT_FILE_NAME}")
+    
+    # BM25 keyword index over the same rows, for hybrid search
+    stats = write_sparse_index(output_dir)
+    print(f"    [OK] Saved sparse index ({stats['num_terms']} terms, {stats['num_postings']} postings) "
+          f"to {output_dir / SPARSE_INDEX_DIR_NAME}")
+    
+    # Term / centroid model for routing queries before they are encoded
+    router = build_router_model(output_dir)
+    if router is None:
+        print("    [WARN] No full-precision vectors - router model skipped (off-topic detection disabled)")
+    else:
+        print(f"    [OK] Saved router model ({router['num_terms']} terms, {router['num_groups']} groups) "
+              f"to {output_dir / ROUTER_MODEL_FILE_NAME}")
+
+
+def layout_order(chunks: List[Dict[str, Any]]) -> Optional[List[int]]:
+    """
+    Permutation that puts chunks into index layout order, or None if they already are.
+    
+    Incremental runs append new documents after the kept ones; re-sorting
+    keeps every scheme / document-type group in one contiguous id range.
+    """
+    order = sorted(range(len(chunks)), key=lambda i: layout_sort_key(chunks[i]))
+    return None if order == list(range(len(chunks))) else order
+
+
+def finalize_index(
+    index: Optional[faiss.Index],
+    kept_chunks: List[Dict[str, Any]],
+    kept_vectors: Optional[np.ndarray],
+    checkpoint: IngestCheckpoint,
+    index_type: str,
+    index_params: Optional[Dict[str, Any]],
+    quantization: str = "none",
+    truncate_dim: Optional[int] = None
+) -> Tuple[faiss.Index, Iterable[Dict[str, Any]], Optional[Iterable[np.ndarray]]]:
+    """
+    Produce the final index in layout order.
+    
+    The streamed index is used as-is when it already holds every vector in
+    layout order (full runs of flat / HNSW). Otherwise the index is built
+    from the kept vectors plus the checkpointed shards.
+    
+    Args:
+        index: Index built while streaming (None for trained types, or when
+            the kept vectors are not in it)
+        kept_chunks: Chunks kept from the previous run
+        kept_vectors: Their vectors, if they are not already in `index`
+        
+    Returns:
+        (index, chunks, vector blocks for vectors.npy or None for exact flat indexes)
+    """
+    chunks: Iterable[Dict[str, Any]] = chain(kept_chunks, checkpoint.iter_chunks())
+    order = None
+    if kept_chunks and checkpoint.num_chunks:
+        chunks = list(chunks)
+        order = layout_order(chunks)
+    
+    if order is None and kept_vectors is None:
+        if index is None:
+            # Full run of a trained type: sample and add straight from the shards
+            n = checkpoint.num_chunks
+            index = build_index_from_blocks(
+                checkpoint.iter_shards, n, EMBEDDING_DIM, index_type, index_params, quantization, truncate_dim
+            )
+        exact = stores_exact_vectors(index_type, quantization, truncate_dim)
+        vectors = None if exact else checkpoint.iter_shards()
+        return index, chunks, vectors
+    
+    if index is not None:
+        # Kept and new vectors are all in the streamed (flat) index
+        all_vectors = index.reconstruct_n(0, index.ntotal)
+    else:
+        blocks = [kept_vectors] if kept_vectors is not None else []
+        all_vectors = np.concatenate(blocks + list(checkpoint.iter_shards()))
+    
+    if order is not None:
+        all_vectors = all_vectors[order]
+        chunks = [chunks[i] for i in order]
+    
+    index = create_faiss_index(all_vectors, index_type, index_params, quantization, truncate_dim)
+    exact = stores_exact_vectors(index_type, quantization, truncate_dim)
+    return index, chunks, None if exact else [all_vectors]
+
+
+def load_vector_store(
+    output_dir: Path
+) -> Tuple[Optional[faiss.Index], List[Dict[str, Any]]]:
+    """
+    Load a previously saved FAISS index and chunk metadata.
+    
+    Returns:
+        (index, chunks), or (None, []) if no complete vector store exists
+    """
+    index_path = output_dir / "faiss_index.bin"
+    if not index_path.exists():
+        return None, []
+    
+    chunks = load_chunks(output_dir)
+    if chunks is None:
+        return None, []
+    
+    index = read_index(index_path)
+    if index.ntotal != len(chunks):
+        print(f"    [WARN] Index has {index.ntotal} vectors but metadata has {len(chunks)} chunks")
+        return None, []
+    
+    return index, chunks
+
+
+def summarize_chunk_store(store: ChunkStore) -> Dict[str, Any]:
+    """Derive the summary fields from the columnar store without decoding rows."""
+    source_checksums = {}
+    if "checksum" in store.kinds:
+        source_files = store.dictionary("source_file")
+        checksums = store.dictionary("checksum")
+        pairs = np.unique(
+            np.stack([store.codes("source_file"), store.codes("checksum")], axis=1), axis=0
+        )
+        source_checksums = {source_files[f]: checksums[c] for f, c in pairs}
+    
+    return {
+        "schemes": [v for v in store.dictionary("scheme_name") if v is not None],
+        "document_types": [v for v in store.dictionary("document_type") if v is not None],
+        "source_checksums": source_checksums,
+    }
+
+
+def run_tests():
+    """Run built-in test cases for incremental planning, index maintenance and resume (no model needed)."""
     print("=" * 70)
-    print("Groww Mutual Fund RAG - Document Ingestion Pipeline")
+    print("Document Ingestion - Test Suite")
     print("=" * 70)
     
-    # Ensure directories exist
-    VECTOR_STORE_DIR.mkdir(parents=True, exist_ok=True)
-    PROCESSED_DIR.mkdir(parents=True, exist_ok=True)
+    passed = 0
+    failed = 0
     
-    # Initialize embedding model
-    print("\n[1/4] Loading embedding model (BGE-M3)...")
-    print("      This may take a few minutes on first run...")
-    model = SentenceTransformer(EMBEDDING_MODEL)
-    print("      [OK] Model loaded")
+    def check(name: str, ok: bool) -> None:
+        nonlocal passed, failed
+        print(f"[{'PASS' if ok else 'FAIL'}] {name}")
+        if ok:
+            passed += 1
+        else:
+            failed += 1
     
-    # Process all scheme folders
-    print("\n[2/4] Processing PDF documents...")
-    all_chunks = []
-    
-    scheme_folders = [
-        f for f in SCHEMES_DIR.iterdir() 
-        if f.is_dir() and f.name != "Common"
+    indexed = [
+        {"source_file": "A.pdf", "checksum": "a1"},
+        {"source_file": "A.pdf", "checksum": "a1"},
+        {"source_file": "B.pdf", "checksum": "b1"},
+        {"source_file": "C.pdf", "checksum": "c1"},
+        {"source_file": "D.pdf", "checksum": None},
     ]
+    plan = plan_incremental_update({"A.pdf": "a1", "B.pdf": "b2", "D.pdf": "d1", "E.pdf": "e1"}, indexed)
+    check("unchanged checksum is kept", plan["unchanged"] == ["A.pdf"])
+    check("changed checksum is re-ingested", "B.pdf" in plan["changed"])
+    check("chunk without checksum counts as changed", "D.pdf" in plan["changed"])
+    check("new file is detected", plan["new"] == ["E.pdf"])
+    check("file missing on disk is deleted", plan["deleted"] == ["C.pdf"])
     
-    for folder in scheme_folders:
-        scheme_name = get_scheme_name_from_folder(folder.name)
-        chunks = process_scheme_folder(folder, scheme_name)
-        all_chunks.extend(chunks)
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((len(indexed), 8)).astype(np.float32)
+    index = faiss.IndexFlatIP(8)
+    index.add(vectors)
+    kept = remove_documents_from_index(index, indexed, ["B.pdf", "C.pdf"])
+    remaining = faiss.rev_swig_ptr(index.get_xb(), index.ntotal * 8).reshape(index.ntotal, 8)
+    check("vectors of removed files are dropped", index.ntotal == 3 and len(kept) == 3)
+    check("kept chunks stay aligned with index rows", np.array_equal(remaining, vectors[[0, 1, 4]]))
     
-    print(f"\n  Total chunks created: {len(all_chunks)}")
+    metadata = {"scheme_name": "HDFC Large Cap Fund", "source_file": "A.pdf", "checksum": "a1"}
+    text = "Expense ratio 1.05%.\n\nExit load 1% within one year. " * 40
+    first_ids = [c["chunk_id"] for c in chunk_document(text, metadata, chunk_size=64, chunk_overlap=8)]
+    second_ids = [c["chunk_id"] for c in chunk_document(text, metadata, chunk_size=64, chunk_overlap=8)]
+    changed_ids = [c["chunk_id"] for c in chunk_document(text, {**metadata, "checksum": "a2"}, 64, 8)]
+    check("chunk ids are reproducible for an unchanged document",
+          len(first_ids) > 1 and first_ids == second_ids and len(set(first_ids)) == len(first_ids))
+    check("chunk ids change with the document checksum", not set(first_ids) & set(changed_ids))
     
-    if not all_chunks:
-        print("\n[ERROR] No chunks were created. Check PDF files.")
-        return 1
+    # Resume: a run killed after some committed batches and resumed from its
+    # checkpoint must produce the same store as an uninterrupted run
+    import pymupdf
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        shared = "Exit load of 1% applies if units are redeemed within one year from allotment. " * 6
+        for folder, names in {
+            "HDFC_Large_Cap_Fund": ["HDFC_Large_Cap_Fund_KIM_21_Nov_2025.pdf",
+                                    "HDFC_Large_Cap_Fund_Leaflet_Nov_2025.pdf"],
+            "HDFC_Liquid_Fund": ["HDFC_Liquid_Fund_KIM_21_Nov_2025.pdf",
+                                 "HDFC_Liquid_Fund_Presentation_Oct_2025.pdf"],
+        }.items():
+            (tmp / "schemes" / folder).mkdir(parents=True)
+            for n, name in enumerate(names):
+                doc = pymupdf.open()
+                for page in range(3):
+                    # The last page repeats across the scheme's documents and is collapsed by dedup
+                    body = f"{name} page {page}. " + f"Section {page} of document {n}. " * 30
+                    text = body + "\n\n" + shared if page < 2 else f"{folder} terms. " + shared * 2
+                    doc.new_page().insert_textbox(pymupdf.Rect(36, 36, 576, 806), text)
+                doc.save(tmp / "schemes" / folder / name)
+                doc.close()
+        scheme_pdfs, checksums, signatures = scan_sources(tmp / "schemes")
+        pending = pending_documents(scheme_pdfs, checksums)
+        
+        # Pre-fill the embedding cache with deterministic vectors, so no model is loaded
+        cache = EmbeddingCache(tmp / "cache", EMBEDDING_DIM)
+        for pdf_path, scheme_name in pending:
+            for chunk in build_document_chunks(pdf_path, parse_pdf_to_markdown(pdf_path), scheme_name,
+                                               checksums[pdf_path.name], signature=signatures[pdf_path.name]):
+                key = make_cache_key(EMBEDDING_MODEL, EMBEDDING_PREFIX, chunk["text"])
+                vector = np.random.default_rng(int.from_bytes(key[:8], "little")).standard_normal(EMBEDDING_DIM)
+                cache.put_many([key], (vector / np.linalg.norm(vector)).astype(np.float32)[None, :])
+        cache.flush()
+        
+        def ingest(name: str, interrupt_after: Optional[int] = None) -> Dict[str, Any]:
+            """Ingest all PDFs into tmp/name; optionally stop after the first documents and resume."""
+            checkpoint = IngestCheckpoint(tmp / name / "checkpoint")
+            options = dict(cache=cache, workers=1, batch_size=2, signatures=signatures)
+            if interrupt_after is not None:
+                run_streaming_ingest(pending[:interrupt_after], checksums, None, [], checkpoint,
+                                     dedup=NearDuplicateFilter(DEDUP_THRESHOLD), **options)
+            log = JsonlLogWriter(tmp / name / "logs", INGEST_LOG_PREFIX)
+            index = run_streaming_ingest(pending, checksums, None, [], checkpoint, resume=interrupt_after is not None,
+                                         dedup=NearDuplicateFilter(DEDUP_THRESHOLD), log=log, **options)
+            log.close()
+            duplicates = [r["chunk_id"] for r in checkpoint.iter_duplicates()]
+            index, chunks, vectors = finalize_index(index, [], None, checkpoint, "flat", None)
+            save_vector_store(index, chunks, tmp / name / "store", vectors=vectors)
+            write_search_files(tmp / name / "store")
+            checkpoint.clear()
+            index, chunks = load_vector_store(tmp / name / "store")
+            parsed = [r["source_file"] for r in iter_log_records(tmp / name / "logs", INGEST_LOG_PREFIX)
+                      if r["type"] == "ingest_document"]
+            return {"index": index, "chunks": chunks, "duplicates": duplicates, "parsed": parsed}
+        
+        full = ingest("full")
+        # Stopped between the Liquid Fund KIM and the presentation duplicating it
+        resumed = ingest("resumed", interrupt_after=3)
+        check("resumed run only parses the documents not yet committed",
+              resumed["parsed"] == [pdf_path.name for pdf_path, _ in pending[3:]])
+        check("resumed run produces the same chunks",
+              len(full["chunks"]) > len(pending)
+              and [(c["chunk_id"], c["text"]) for c in full["chunks"]]
+              == [(c["chunk_id"], c["text"]) for c in resumed["chunks"]])
+        check("resumed run produces the same index",
+              np.array_equal(full["index"].reconstruct_n(0, full["index"].ntotal),
+                             resumed["index"].reconstruct_n(0, resumed["index"].ntotal)))
+        check("resumed run collapses the same near-duplicates",
+              len(full["duplicates"]) > 0 and full["duplicates"] == resumed["duplicates"])
+    
+    print("-" * 70)
+    print(f"Results: {passed} passed, {failed} failed")
+    print("=" * 70)
+    
+    return failed == 0
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="Ingest scheme PDFs into the FAISS vector store")
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Only re-embed new or changed PDFs (by SHA-256) and drop vectors of deleted PDFs"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=PARSE_WORKERS,
+        help=f"Worker processes for PDF parsing (default: {PARSE_WORKERS}, 1 = serial)"
+    )
+    parser.add_argument(
+        "--embedding-cache",
+        type=Path,
+        default=EMBEDDING_CACHE_DIR,
+        help="Directory of the persistent embedding cache"
+    )
+    parser.add_argument(
+        "--embedding-cache-size",
+        type=int,
+        default=DEFAULT_MAX_ENTRIES,
+        help=f"Maximum number of cached embeddings (default: {DEFAULT_MAX_ENTRIES:,})"
+    )
+    parser.add_argument(
+        "--no-embedding-cache",
+        action="store_true",
+        help="Always embed with the model and do not read or write the cache"
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=STREAM_BATCH_SIZE,
+        help=f"Chunks embedded and indexed per streaming step (default: {STREAM_BATCH_SIZE})"
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Resume an interrupted run from its checkpoint instead of starting over"
+    )
+    parser.add_argument(
+        "--export-json",
+        action="store_true",
+        help=f"Also export chunk metadata as indented JSON ({JSON_EXPORT_NAME}) for inspection"
+    )
+    parser.add_argument(
+        "--chunker",
+        choices=CHUNKERS,
+        default="structured",
+        help="structured: token-counted, keeps tables, lists and headings together; "
+             "recursive: character-based splitter (~4 chars per token)"
+    )
+    parser.add_argument(
+        "--tokenizer",
+        default=EMBEDDING_MODEL,
+        help="Tokenizer the structured chunker counts tokens with ('approx': offline stand-in)"
+    )
+    parser.add_argument(
+        "--dedup-threshold",
+        type=float,
+        default=DEDUP_THRESHOLD,
+        help=f"Similarity at which a chunk collapses into an indexed near-duplicate of the same scheme "
+             f"(default: {DEDUP_THRESHOLD})"
+    )
+    parser.add_argument(
+        "--no-dedup",
+        action="store_true",
+        help="Embed every chunk, including near-duplicates across documents"
+    )
+    
+    index_group = parser.add_argument_group("index", "FAISS index type and parameters (see index_factory.py)")
+    index_group.add_argument(
+        "--index-type",
+        choices=INDEX_TYPES,
+        help="Index type (default: flat, or the existing store's type with --incremental)"
+    )
+    index_group.add_argument("--hnsw-m", type=int, dest="M", help="HNSW graph degree")
+    index_group.add_argument("--ef-construction", type=int, help="HNSW build-time search depth")
+    index_group.add_argument("--ef-search", type=int, help="HNSW query-time search depth")
+    index_group.add_argument("--nlist", type=int, help="IVF cells (default: ~4*sqrt(N))")
+    index_group.add_argument("--nprobe", type=int, help="IVF cells visited per query")
+    index_group.add_argument("--pq-m", type=int, help="IVF-PQ sub-quantizers (must divide the embedding dim)")
+    index_group.add_argument("--pq-nbits", type=int, help="IVF-PQ bits per code")
+    index_group.add_argument(
+        "--quantization",
+        choices=QUANTIZATIONS,
+        help="Stored vector precision (default: none = float32, or the existing store's with --incremental)"
+    )
+    index_group.add_argument(
+        "--truncate-dim",
+        type=int,
+        help=f"Index only the first N embedding dimensions, re-normalised "
+             f"(Matryoshka-style; {EMBEDDING_DIM} = full, default: full or the existing store's)"
+    )
+    index_group.add_argument(
+        "--rescore",
+        action="store_true",
+        help="Have the retriever re-score the top candidates with the exact full-dimension float32 vectors"
+    )
+    parser.add_argument("--test", action="store_true", help="Run the built-in test cases and exit")
+    return parser.parse_args(argv)
+
+
+def index_overrides(args: argparse.Namespace) -> Dict[str, Any]:
+    """Index parameters given explicitly on the command line."""
+    names = ["M", "ef_construction", "ef_search", "nlist", "nprobe", "pq_m", "pq_nbits"]
+    return {name: getattr(args, name) for name in names if getattr(args, name) is not None}
+
+
+def load_previous_summary(summary_path: Path) -> Dict[str, Any]:
+    """Summary of the previous run, or an empty dict."""
+    if not summary_path.exists():
+        return {}
+    with open(summary_path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def scan_sources(schemes_dir: Path) -> Tuple[Dict[Path, List[Path]], Dict[str, str], Dict[str, Tuple[int, int]]]:
+    """
+    Find and hash all source PDFs.
     
-    # Create embeddings
-    print("\n[3/4] Creating embeddings...")
-    embeddings = create_embeddings(all_chunks, model)
-    print(f"      Embeddings shape: {embeddings.shape}")
+    Returns:
+        (PDFs per scheme folder, SHA-256 checksums and (mtime_ns, size)
+        signatures keyed by file name; each signature is taken before its hash)
+    """
+    scheme_pdfs = collect_scheme_pdfs(schemes_dir)
+    signatures, checksums = {}, {}
+    for pdf_files in scheme_pdfs.values():
+        for pdf_path in pdf_files:
+            signatures[pdf_path.name] = file_signature(pdf_path)
+            checksums[pdf_path.name] = calculate_file_checksum(pdf_path)
+    return scheme_pdfs, checksums, signatures
+
+
+def resolve_settings(
+    args: argparse.Namespace,
+    index: Optional[faiss.Index],
+    previous: Dict[str, Any]
+) -> Dict[str, Any]:
+    """
+    Index and chunking settings of this run.
     
-    # Create and save FAISS index
-    print("\n[4/4] Creating FAISS index and saving...")
-    index = create_faiss_index(embeddings)
-    save_vector_store(index, all_chunks, VECTOR_STORE_DIR)
+    Explicit flags win; incremental runs otherwise keep the existing store's
+    index type, quantization, truncation, parameters and rescore setting.
     
-    # Save processing summary
+    Returns:
+        Dictionary with index_type, quantization, truncate_dim, index_params,
+        rescore, chunker, chunker_name and dedup_threshold, plus the
+        existing_* index settings (None without an existing index)
+    """
+    existing_type = detect_index_type(index) if index is not None else None
+    existing_quantization = detect_quantization(index) if index is not None else None
+    existing_truncate_dim = None
+    if index is not None and index_dim(index) < EMBEDDING_DIM:
+        existing_truncate_dim = index_dim(index)
+    
+    index_type = args.index_type or existing_type or "flat"
+    quantization = args.quantization or existing_quantization or "none"
+    truncate_dim = args.truncate_dim or existing_truncate_dim
+    if truncate_dim == EMBEDDING_DIM:
+        truncate_dim = None
+    index_params = index_overrides(args)
+    if index_type == existing_type and not index_params:
+        index_params = dict(previous.get("index_params") or {})
+    rescore = args.rescore or (index is not None and previous.get("rescore", False))
+    rescore = rescore and not stores_exact_vectors(index_type, quantization, truncate_dim)
+    
+    chunker = None
+    if args.chunker == "structured":
+        chunker = StructuredChunker(load_token_counter(args.tokenizer), CHUNK_SIZE, CHUNK_OVERLAP)
+    
+    return {
+        "index_type": index_type,
+        "quantization": quantization,
+        "truncate_dim": truncate_dim,
+        "index_params": index_params,
+        "rescore": rescore,
+        "chunker": chunker,
+        "chunker_name": chunker.name if chunker is not None else "recursive",
+        "dedup_threshold": None if args.no_dedup else args.dedup_threshold,
+        "existing_type": existing_type,
+        "existing_quantization": existing_quantization,
+        "existing_truncate_dim": existing_truncate_dim,
+    }
+
+
+def plan_documents(
+    checksums: Dict[str, str],
+    index: Optional[faiss.Index],
+    kept_chunks: List[Dict[str, Any]],
+    previous: Dict[str, Any],
+    settings: Dict[str, Any]
+) -> Tuple[Dict[str, List[str]], List[Dict[str, Any]]]:
+    """
+    Decide which PDFs to (re-)ingest, on top of plan_incremental_update.
+    
+    Everything is re-chunked when the chunker or dedup settings changed, and
+    unchanged PDFs are re-chunked when their near-duplicates were collapsed
+    into a changed or deleted one.
+    
+    Returns:
+        (plan as from plan_incremental_update, provenance records that stay valid)
+    """
+    # Documents whose chunks were all collapsed are indexed through their provenance records
+    previous_records = load_provenance_records(current_store_dir(VECTOR_STORE_DIR)) if index is not None else []
+    plan = plan_incremental_update(checksums, kept_chunks + previous_records)
+    chunking = (settings["chunker_name"], settings["dedup_threshold"])
+    previous_chunking = (previous.get("chunker", "recursive"), previous.get("dedup_threshold"))
+    if index is not None and plan["unchanged"] and previous_chunking != chunking:
+        # Chunks of different chunkers (or dedup settings) must not be mixed in one store
+        print(f"      [WARN] Chunking changed (chunker {previous_chunking[0]}, dedup {previous_chunking[1]} -> "
+              f"chunker {chunking[0]}, dedup {chunking[1]}) - re-chunking all documents")
+        plan["changed"] = sorted(plan["changed"] + plan["unchanged"])
+        plan["unchanged"] = []
+    
+    # Near-duplicates collapsed into chunks of a changed or deleted PDF lose
+    # their indexed copy: re-chunk the unchanged PDFs they came from as well
+    dropped = set(plan["changed"] + plan["deleted"])
+    orphaned = sorted(
+        {r["source_file"] for r in previous_records if r["canonical_source_file"] in dropped}
+        & set(plan["unchanged"])
+    )
+    if orphaned:
+        print(f"      {len(orphaned)} unchanged PDFs had duplicates collapsed into changed ones - re-chunking them")
+        plan["changed"] = sorted(plan["changed"] + orphaned)
+        plan["unchanged"] = [name for name in plan["unchanged"] if name not in orphaned]
+    dropped = set(plan["changed"] + plan["deleted"])
+    kept_records = [
+        r for r in previous_records
+        if r["source_file"] not in dropped and r["canonical_source_file"] not in dropped
+    ]
+    return plan, kept_records
+
+
+def drop_superseded(
+    index: faiss.Index,
+    kept_chunks: List[Dict[str, Any]],
+    drop: List[str],
+    settings: Dict[str, Any]
+) -> Optional[Tuple[Optional[faiss.Index], List[Dict[str, Any]], Optional[np.ndarray]]]:
+    """
+    Remove the chunks and vectors of changed or deleted PDFs from the kept store.
+    
+    Exact indexes drop the vectors in place. Approximate ones cannot, so the
+    full-precision vectors of the kept chunks are loaded instead and the
+    index is rebuilt after streaming.
+    
+    Returns:
+        (index or None, kept chunks, kept vectors held outside the index or None),
+        or None if the store has no vectors.npy to rebuild from
+    """
+    if stores_exact_vectors(settings["existing_type"], settings["existing_quantization"],
+                            settings["existing_truncate_dim"]) \
+            and stores_exact_vectors(settings["index_type"], settings["quantization"], settings["truncate_dim"]):
+        return index, remove_documents_from_index(index, kept_chunks, drop), None
+    
+    vectors = load_vectors(current_store_dir(VECTOR_STORE_DIR), index)
+    if vectors is None:
+        return None
+    keep = np.array([c["source_file"] not in set(drop) for c in kept_chunks], dtype=bool)
+    kept_vectors = np.ascontiguousarray(vectors[keep], dtype=np.float32)
+    return None, [c for c, k in zip(kept_chunks, keep) if k], kept_vectors
+
+
+def pending_documents(scheme_pdfs: Dict[Path, List[Path]], to_process: Iterable[str]) -> List[Tuple[Path, str]]:
+    """(pdf_path, scheme_name) of the PDFs to ingest, grouped by scheme and document type (see index_layout.py)."""
+    to_process = set(to_process)
+    pending = [
+        (pdf_path, get_scheme_name_from_folder(folder.name))
+        for folder, pdf_files in scheme_pdfs.items()
+        for pdf_path in pdf_files
+        if pdf_path.name in to_process
+    ]
+    pending.sort(key=lambda item: (
+        item[1],
+        document_type_rank(parse_filename(item[0].name)["document_type"]),
+        item[0].name,
+    ))
+    return pending
+
+
+def write_answer_tables(version_dir: Path, previous_dir: Path) -> None:
+    """Write the tables that answer queries without search: acronym query vectors, facts, freshness."""
+    # Query vectors of the acronym expansions, so short acronym queries skip the encoder
+    expansions = write_expansion_vectors(version_dir, EMBEDDING_MODEL, get_embedding_model, previous_dir)
+    print(f"    [OK] {'Reused' if expansions['reused'] else 'Encoded'} {expansions['queries']} acronym "
+          f"expansion query vectors ({version_dir / QUERY_VECTORS_FILE_NAME})")
+    
+    # Per-scheme fact table (TER, exit load, ...) for retrieval-free answers
+    facts_path = PROCESSED_DIR / SCHEME_FACTS_FILE_NAME
+    facts = write_scheme_facts(version_dir, facts_path)
+    fact_count = sum(len(f) for f in facts["schemes"].values())
+    print(f"    [OK] Extracted {fact_count} facts for {len(facts['schemes'])} schemes to {facts_path}")
+    
+    # Staleness of every (scheme, document type), architecture.md §10.3
+    freshness_path = PROCESSED_DIR / FRESHNESS_INDEX_FILE_NAME
+    freshness = write_freshness_index(version_dir, freshness_path)
+    print(f"    [OK] Freshness index: {freshness['stale_documents']} of {len(freshness['documents'])} "
+          f"document types stale ({freshness_path})")
+
+
+def build_summary(
+    args: argparse.Namespace,
+    settings: Dict[str, Any],
+    version_dir: Path,
+    index: faiss.Index,
+    has_vectors: bool,
+    chunks_embedded: int,
+    duplicates: List[Dict[str, Any]],
+    trace: Trace
+) -> Dict[str, Any]:
+    """Ingestion summary of a saved version (ingestion_summary.json)."""
+    store = ChunkStore(version_dir / CHUNK_STORE_DIR_NAME)
+    total_chunks = len(store)
+    index_type = settings["index_type"]
     summary = {
         "processed_at": datetime.now(timezone.utc).isoformat().replace("+00:00", "Z"),
-        "total_chunks": len(all_chunks),
+        "total_chunks": total_chunks,
         "embedding_model": EMBEDDING_MODEL,
         "embedding_dim": EMBEDDING_DIM,
         "chunk_size": CHUNK_SIZE,
         "chunk_overlap": CHUNK_OVERLAP,
+        "chunker": settings["chunker_name"],
+        "dedup_threshold": settings["dedup_threshold"],
+        "dedup": {
+            "chunks_before_dedup": total_chunks + len(duplicates),
+            "duplicates_collapsed": len(duplicates),
+            "index_reduction": round(len(duplicates) / (total_chunks + len(duplicates)), 4),
+            "duplicates_by_document_type": dict(Counter(r["document_type"] for r in duplicates).most_common()),
+        },
         "vector_store": "FAISS",
-        "schemes": list(set(c["scheme_name"] for c in all_chunks)),
-        "document_types": list(set(c["document_type"] for c in all_chunks)),
+        "vector_store_version": version_dir.name,
+        "index_type": index_type,
+        "index_params": resolve_index_params(index_type, index.ntotal, settings["index_params"]),
+        "quantization": settings["quantization"],
+        "truncate_dim": settings["truncate_dim"],
+        "index_dim": index_dim(index),
+        "rescore": settings["rescore"],
+        "vectors_file": VECTORS_FILE_NAME if has_vectors else None,
+        "metadata_store": CHUNK_STORE_DIR_NAME,
+        "index_layout": LAYOUT_FILE_NAME,
+        "sparse_index": SPARSE_INDEX_DIR_NAME,
+        "query_vectors": QUERY_VECTORS_FILE_NAME,
+        "router_model": ROUTER_MODEL_FILE_NAME if (version_dir / ROUTER_MODEL_FILE_NAME).exists() else None,
+        "scheme_facts": SCHEME_FACTS_FILE_NAME,
+        "freshness_index": FRESHNESS_INDEX_FILE_NAME,
+        "provenance": PROVENANCE_FILE_NAME,
+        "ingestion_mode": "incremental" if args.incremental else "full",
+        "chunks_embedded": chunks_embedded,
+        "stages_ms": trace.stages_ms(),
+        **summarize_chunk_store(store),
     }
+    store.close()
+    return summary
+
+
+def main(argv: Optional[List[str]] = None):
+    """Main entry point for document ingestion."""
+    args = parse_args(argv)
+    if args.test:
+        return 0 if run_tests() else 1
+    
+    print("=" * 70)
+    print("Groww Mutual Fund RAG - Document Ingestion Pipeline")
+    print("=" * 70)
+    
+    # Ensure directories exist
+    VECTOR_STORE_DIR.mkdir(parents=True, exist_ok=True)
+    PROCESSED_DIR.mkdir(parents=True, exist_ok=True)
+    
+    # Hash all source PDFs
+    print("\n[1/4] Checking source documents...")
+    scheme_pdfs, checksums, signatures = scan_sources(SCHEMES_DIR)
+    print(f"      {len(checksums)} PDFs found")
     
     summary_path = PROCESSED_DIR / "ingestion_summary.json"
+    previous = load_previous_summary(summary_path)
+    
+    index, kept_chunks, kept_vectors = None, [], None
+    if args.incremental:
+        index, kept_chunks = load_vector_store(current_store_dir(VECTOR_STORE_DIR))
+        if index is None:
+            print("      [WARN] No usable vector store found - running full ingestion")
+    
+    settings = resolve_settings(args, index, previous)
+    index_type, quantization, truncate_dim = settings["index_type"], settings["quantization"], settings["truncate_dim"]
+    plan, kept_records = plan_documents(checksums, index, kept_chunks, previous, settings)
+    to_process = plan["new"] + plan["changed"]
+    
+    if index is not None:
+        print(f"      New: {len(plan['new'])} | Changed: {len(plan['changed'])} | "
+              f"Unchanged: {len(plan['unchanged'])} | Deleted: {len(plan['deleted'])}")
+        
+        index_unchanged = (
+            index_type == settings["existing_type"] and quantization == settings["existing_quantization"]
+            and truncate_dim == settings["existing_truncate_dim"] and not index_overrides(args)
+            and settings["rescore"] == previous.get("rescore", False)
+        )
+        if not to_process and not plan["deleted"] and index_unchanged:
+            print("\n[OK] Vector store is up to date - nothing to ingest")
+            return 0
+        
+        # Changed documents are re-chunked from scratch, so their old vectors go too
+        kept = drop_superseded(index, kept_chunks, sorted(plan["changed"] + plan["deleted"]), settings)
+        if kept is None:
+            print(f"      [ERROR] {VECTORS_FILE_NAME} is missing - run a full ingestion")
+            return 1
+        index, kept_chunks, kept_vectors = kept
+        print(f"      Kept {len(kept_chunks)} existing chunks")
+    
+    print(f"      Index type: {index_type} (quantization: {quantization}, "
+          f"dim: {truncate_dim or EMBEDDING_DIM})")
+    print(f"      Chunker: {settings['chunker_name']} (dedup threshold: {settings['dedup_threshold']})")
+    
+    # Stream new and changed PDFs through parse -> chunk -> embed -> index
+    print(f"\n[2/4] Processing PDF documents ({args.workers} parse workers, "
+          f"batches of {args.batch_size} chunks)...")
+    pending = pending_documents(scheme_pdfs, to_process)
+    
+    cache = None
+    if not args.no_embedding_cache:
+        cache = EmbeddingCache(args.embedding_cache, EMBEDDING_DIM, args.embedding_cache_size)
+    
+    # Trained types, and kept vectors held outside the index, are only
+    # indexed once every embedding is known (finalize_index)
+    stream_index_type = index_type
+    if requires_training(index_type, quantization) or kept_vectors is not None:
+        stream_index_type = None
+    
+    checkpoint = IngestCheckpoint(CHECKPOINT_DIR)
+    run_trace = Trace()
+    ingest_log = JsonlLogWriter(LOG_DIR, INGEST_LOG_PREFIX)
+    dedup_threshold = settings["dedup_threshold"]
+    index = run_streaming_ingest(
+        pending, checksums, index, kept_chunks, checkpoint,
+        cache=cache, workers=args.workers, batch_size=args.batch_size, resume=args.resume,
+        index_type=stream_index_type, index_params=settings["index_params"],
+        quantization=quantization, truncate_dim=truncate_dim, chunker=settings["chunker"],
+        dedup=NearDuplicateFilter(dedup_threshold) if dedup_threshold is not None else None,
+        trace=run_trace, log=ingest_log, signatures=signatures
+    )
+    
+    total_chunks = len(kept_chunks) + checkpoint.num_chunks
+    print(f"\n  Chunks created: {checkpoint.num_chunks} (total: {total_chunks})")
+    
+    if total_chunks == 0:
+        print("\n[ERROR] No chunks were created. Check PDF files.")
+        ingest_log.close()
+        return 1
+    
+    with run_trace.stage(STAGE_INDEX_BUILD):
+        index, chunks, vectors = finalize_index(
+            index, kept_chunks, kept_vectors, checkpoint, index_type, settings["index_params"],
+            quantization, truncate_dim
+        )
+    if index.ntotal != total_chunks:
+        print(f"\n[ERROR] Index has {index.ntotal} vectors but {total_chunks} chunks")
+        ingest_log.close()
+        return 1
+    
+    # Save FAISS index and metadata (streamed from the checkpoint) into a new,
+    # unpublished version, then drop the checkpoint
+    print("\n[3/4] Saving vector store...")
+    version_dir = create_version_dir(VECTOR_STORE_DIR)
+    with run_trace.stage("save"):
+        save_vector_store(index, chunks, version_dir, export_json_copy=args.export_json, vectors=vectors)
+        write_search_files(version_dir)
+    duplicates = kept_records + list(checkpoint.iter_duplicates())
+    write_provenance(version_dir, duplicates, dedup_threshold)
+    checkpoint.clear()
+    if dedup_threshold is not None:
+        before = total_chunks + len(duplicates)
+        print(f"    [OK] Deduplication: {len(duplicates)} near-duplicate chunks collapsed into their indexed "
+              f"copies - index {len(duplicates) / before:.1%} smaller ({before} -> {total_chunks} vectors)")
+    write_answer_tables(version_dir, current_store_dir(VECTOR_STORE_DIR))
+    
+    # Save processing summary
+    print("\n[4/4] Writing ingestion summary...")
+    summary = build_summary(
+        args, settings, version_dir, index, vectors is not None, total_chunks - len(kept_chunks), duplicates, run_trace
+    )
     with open(summary_path, "w", encoding="utf-8") as f:
         json.dump(summary, f, indent=2, ensure_ascii=False)
     
+    # Publish: atomically switch CURRENT to the new version, archive superseded chunks
+    published = publish_version(VECTOR_STORE_DIR, version_dir, summary_path)
+    print(f"    [OK] Published version {published['version']} (previous: {published['previous'] or 'none'}, "
+          f"{published['archived_chunks']} chunks archived, {len(published['pruned'])} old versions pruned)")
+    if published["removed_flat"]:
+        print(f"    [OK] Removed the pre-versioning flat store from {VECTOR_STORE_DIR} "
+              f"({', '.join(published['removed_flat'])})")
+    
+    ingest_log.write({
+        "type": "ingest_run",
+        "timestamp": utc_timestamp(),
+        "version": published["version"],
+        "ingestion_mode": summary["ingestion_mode"],
+        "chunks_embedded": summary["chunks_embedded"],
+        "stages_ms": summary["stages_ms"],
+        "latency_ms": round(run_trace.elapsed_ms(), 3),
+    })
+    ingest_log.close()
+    
     # Print summary
     print("\n" + "=" * 70)
     print("INGESTION COMPLETE")
     print("=" * 70)
-    print(f"Total chunks:      {len(all_chunks)}")
-    print(f"Embedding dim:     {embeddings.shape[1]}")
-    print(f"Vector store:      {VECTOR_STORE_DIR}")
-    print(f"Index file:        faiss_index.bin")
-    print(f"Metadata file:     chunks_metadata.pkl")
+    print(f"Total chunks:      {summary['total_chunks']}")
+    print(f"Chunks embedded:   {summary['chunks_embedded']}")
+    print(f"Near-duplicates:   {summary['dedup']['duplicates_collapsed']} collapsed "
+          f"({summary['dedup']['index_reduction']:.1%} smaller index)")
+    print(f"Embedding dim:     {EMBEDDING_DIM} (index: {index_dim(index)})")
+    print(f"Vector store:      {version_dir}")
+    print(f"Index file:        faiss_index.bin ({index_type}, quantization: {quantization})")
+    print(f"Metadata store:    {CHUNK_STORE_DIR_NAME}/")
+    print("Stage timings:     " + ", ".join(f"{stage} {ms / 1000:.1f}s" for stage, ms in summary["stages_ms"].items()))
     print(f"Summary saved:     {summary_path}")
     print("=" * 70)
     
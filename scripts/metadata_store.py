@@ -0,0 +1,376 @@
+"""
+Columnar Chunk Metadata Store for Groww Mutual Fund RAG System
+
+Stores chunk metadata column by column instead of as one pickled list of
+dicts, so a retriever can open it in O(1) and only touch the rows it needs.
+
+Store directory layout:
+    columns.json            Row count, column kinds and categorical dictionaries
+    <column>.codes.npy      Categorical columns: int32 codes into the dictionary
+    <column>.blob           String/JSON columns: UTF-8 values concatenated
+    <column>.offsets.npy    String/JSON columns: int64 byte offsets (rows + 1)
+    <column>.nulls.npy      String columns only, if any row is missing: bool null mask
+
+Column kinds:
+    string        Free text per row (chunk text, chunk_id)
+    json          Lists/dicts, stored as JSON text per row
+    categorical   Everything else (scheme_name, document_type, dates, ...),
+                  dictionary-encoded since values repeat across chunks
+
+Usage:
+    python scripts/metadata_store.py convert [vector_store_dir]        # pkl -> columnar
+    python scripts/metadata_store.py export-json [vector_store_dir]    # columnar -> JSON
+    python scripts/metadata_store.py --test                            # Built-in test cases
+"""
+
+import os
+import sys
+import json
+import mmap
+import pickle
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Dict, List, Any, Iterable, Iterator, Optional
+
+import numpy as np
+
+# Configuration
+BASE_DIR = Path(__file__).parent.parent
+VECTOR_STORE_DIR = BASE_DIR / "data" / "vector_store"
+CHUNK_STORE_DIR_NAME = "chunk_store"
+LEGACY_PICKLE_NAME = "chunks_metadata.pkl"
+JSON_EXPORT_NAME = "chunks_metadata.json"
+
+# Columns with (mostly) unique values per chunk
+STRING_COLUMNS = {"chunk_id", "text", "section_title", "parent_chunk_id"}
+STORE_FORMAT_VERSION = 1
+
+
+class ChunkStoreWriter:
+    """
+    Streaming writer for a columnar chunk store.
+
+    Rows are appended one at a time; string columns go straight to disk, so
+    only the int32 codes of categorical columns are held in memory.
+    """
+
+    def __init__(self, store_dir: Path):
+        self.store_dir = Path(store_dir)
+        self._tmp_dir = self.store_dir.with_name(self.store_dir.name + ".tmp")
+        if self._tmp_dir.exists():
+            shutil.rmtree(self._tmp_dir)
+        self._tmp_dir.mkdir(parents=True)
+
+        self.num_rows = 0
+        self._kinds: Dict[str, str] = {}
+        self._codes: Dict[str, List[int]] = {}
+        self._dictionaries: Dict[str, Dict[Any, int]] = {}
+        self._blobs: Dict[str, Any] = {}
+        self._offsets: Dict[str, List[int]] = {}
+        self._nulls: Dict[str, List[int]] = {}
+
+    def _add_column(self, name: str, value: Any) -> None:
+        """Register a column first seen at the current row, backfilling earlier rows."""
+        if name in STRING_COLUMNS:
+            kind = "string"
+        elif isinstance(value, (list, dict)):
+            kind = "json"
+        else:
+            kind = "categorical"
+        self._kinds[name] = kind
+
+        if kind == "categorical":
+            self._dictionaries[name] = {None: 0} if self.num_rows else {}
+            self._codes[name] = [0] * self.num_rows
+        else:
+            self._blobs[name] = open(self._tmp_dir / f"{name}.blob", "wb")
+            empty = b"null" if kind == "json" else b""
+            self._blobs[name].write(empty * self.num_rows)
+            self._offsets[name] = [len(empty) * row for row in range(self.num_rows + 1)]
+            if kind == "string":
+                self._nulls[name] = list(range(self.num_rows))
+
+    def add(self, chunk: Dict[str, Any]) -> None:
+        """Append one chunk (row)."""
+        for name, value in chunk.items():
+            if name not in self._kinds:
+                self._add_column(name, value)
+
+        for name, kind in self._kinds.items():
+            value = chunk.get(name)
+            if kind == "categorical":
+                dictionary = self._dictionaries[name]
+                code = dictionary.get(value)
+                if code is None:
+                    code = dictionary[value] = len(dictionary)
+                self._codes[name].append(code)
+            else:
+                if kind == "json":
+                    data = json.dumps(value, ensure_ascii=False).encode("utf-8")
+                elif value is None:
+                    data = b""
+                    self._nulls[name].append(self.num_rows)
+                else:
+                    data = str(value).encode("utf-8")
+                self._blobs[name].write(data)
+                self._offsets[name].append(self._offsets[name][-1] + len(data))
+
+        self.num_rows += 1
+
+    def close(self) -> None:
+        """Write column files and the schema, then move the store into place."""
+        columns = {}
+        for name, kind in self._kinds.items():
+            if kind == "categorical":
+                np.save(self._tmp_dir / f"{name}.codes.npy", np.array(self._codes[name], dtype=np.int32))
+                values = [None] * len(self._dictionaries[name])
+                for value, code in self._dictionaries[name].items():
+                    values[code] = value
+                columns[name] = {"kind": kind, "values": values}
+            else:
+                self._blobs[name].close()
+                np.save(self._tmp_dir / f"{name}.offsets.npy", np.array(self._offsets[name], dtype=np.int64))
+                columns[name] = {"kind": kind}
+                if self._nulls.get(name):
+                    nulls = np.zeros(self.num_rows, dtype=bool)
+                    nulls[self._nulls[name]] = True
+                    np.save(self._tmp_dir / f"{name}.nulls.npy", nulls)
+
+        schema = {
+            "format_version": STORE_FORMAT_VERSION,
+            "num_rows": self.num_rows,
+            "columns": columns,
+        }
+        with open(self._tmp_dir / "columns.json", "w", encoding="utf-8") as f:
+            json.dump(schema, f, ensure_ascii=False)
+
+        if self.store_dir.exists():
+            shutil.rmtree(self.store_dir)
+        os.replace(self._tmp_dir, self.store_dir)
+
+
+def write_chunk_store(chunks: Iterable[Dict[str, Any]], store_dir: Path) -> int:
+    """
+    Write chunks (any iterable, consumed once) to a columnar store.
+
+    Returns:
+        Number of rows written
+    """
+    writer = ChunkStoreWriter(store_dir)
+    for chunk in chunks:
+        writer.add(chunk)
+    writer.close()
+    return writer.num_rows
+
+
+class ChunkStore:
+    """
+    Read-only columnar chunk store.
+
+    Opening only parses the schema and memory-maps the column files, so the
+    cost is independent of the number of chunks; rows are decoded on demand.
+    """
+
+    def __init__(self, store_dir: Path):
+        self.store_dir = Path(store_dir)
+        with open(self.store_dir / "columns.json", "r", encoding="utf-8") as f:
+            schema = json.load(f)
+
+        self.num_rows: int = schema["num_rows"]
+        self.kinds: Dict[str, str] = {name: c["kind"] for name, c in schema["columns"].items()}
+        self._dictionaries: Dict[str, List[Any]] = {
+            name: c["values"] for name, c in schema["columns"].items() if c["kind"] == "categorical"
+        }
+        self._codes: Dict[str, np.ndarray] = {}
+        self._offsets: Dict[str, np.ndarray] = {}
+        self._blobs: Dict[str, Any] = {}
+        self._nulls: Dict[str, np.ndarray] = {}
+
+        for name, kind in self.kinds.items():
+            if kind == "categorical":
+                self._codes[name] = np.load(self.store_dir / f"{name}.codes.npy", mmap_mode="r")
+            else:
+                self._offsets[name] = np.load(self.store_dir / f"{name}.offsets.npy", mmap_mode="r")
+                self._blobs[name] = self._map_blob(self.store_dir / f"{name}.blob")
+                nulls_path = self.store_dir / f"{name}.nulls.npy"
+                if nulls_path.exists():
+                    self._nulls[name] = np.load(nulls_path, mmap_mode="r")
+
+    @staticmethod
+    def _map_blob(path: Path):
+        """Memory-map a blob file (empty files cannot be mapped)."""
+        if path.stat().st_size == 0:
+            return b""
+        with open(path, "rb") as f:
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def __len__(self) -> int:
+        return self.num_rows
+
+    @property
+    def columns(self) -> List[str]:
+        return list(self.kinds)
+
+    def get_value(self, name: str, row: int) -> Any:
+        """Decode a single cell."""
+        kind = self.kinds.get(name)
+        if kind is None:
+            return None
+        if kind == "categorical":
+            return self._dictionaries[name][int(self._codes[name][row])]
+        if name in self._nulls and self._nulls[name][row]:
+            return None
+
+        offsets = self._offsets[name]
+        data = self._blobs[name][int(offsets[row]):int(offsets[row + 1])]
+        text = bytes(data).decode("utf-8")
+        return json.loads(text) if kind == "json" else text
+
+    def get_text(self, row: int) -> str:
+        return self.get_value("text", row)
+
+    def get_chunk(self, row: int) -> Dict[str, Any]:
+        """Decode one full row as a chunk dict."""
+        if row < 0 or row >= self.num_rows:
+            raise IndexError(f"Row {row} out of range for store with {self.num_rows} rows")
+        return {name: self.get_value(name, row) for name in self.kinds}
+
+    def get_chunks(self, rows: Iterable[int]) -> List[Dict[str, Any]]:
+        return [self.get_chunk(int(row)) for row in rows]
+
+    def iter_chunks(self) -> Iterator[Dict[str, Any]]:
+        for row in range(self.num_rows):
+            yield self.get_chunk(row)
+
+    def codes(self, name: str) -> np.ndarray:
+        """Raw int32 codes of a categorical column (memory-mapped)."""
+        return self._codes[name]
+
+    def dictionary(self, name: str) -> List[Any]:
+        """Distinct values of a categorical column, indexed by code."""
+        return self._dictionaries[name]
+
+    def mask(self, name: str, values: Iterable[Any]) -> np.ndarray:
+        """Boolean row mask for `column in values`, computed on the codes."""
+        wanted = set(values)
+        codes = [code for code, value in enumerate(self._dictionaries[name]) if value in wanted]
+        return np.isin(self._codes[name], codes)
+
+    def close(self) -> None:
+        for blob in self._blobs.values():
+            if isinstance(blob, mmap.mmap):
+                blob.close()
+
+
+def load_chunks(vector_store_dir: Path) -> Optional[List[Dict[str, Any]]]:
+    """
+    Load all chunk dicts from a vector store directory.
+
+    Prefers the columnar store and falls back to the legacy pickle.
+    Returns None if neither exists.
+    """
+    store_dir = Path(vector_store_dir) / CHUNK_STORE_DIR_NAME
+    if (store_dir / "columns.json").exists():
+        store = ChunkStore(store_dir)
+        chunks = list(store.iter_chunks())
+        store.close()
+        return chunks
+
+    pickle_path = Path(vector_store_dir) / LEGACY_PICKLE_NAME
+    if pickle_path.exists():
+        with open(pickle_path, "rb") as f:
+            return pickle.load(f)
+
+    return None
+
+
+def export_json(chunks: Iterable[Dict[str, Any]], json_path: Path) -> None:
+    """Write chunks as an indented JSON array for manual inspection."""
+    with open(json_path, "w", encoding="utf-8") as f:
+        json.dump(list(chunks), f, indent=2, ensure_ascii=False)
+
+
+def run_tests():
+    """Run built-in test cases on a small store in a temporary directory."""
+    print("=" * 70)
+    print("Chunk Metadata Store - Test Suite")
+    print("=" * 70)
+
+    passed = 0
+    failed = 0
+
+    def check(name: str, ok: bool) -> None:
+        nonlocal passed, failed
+        print(f"[{'PASS' if ok else 'FAIL'}] {name}")
+        if ok:
+            passed += 1
+        else:
+            failed += 1
+
+    chunks = [
+        # "text" is first seen on row 1, so row 0 is backfilled as missing
+        {"chunk_id": "a", "scheme_name": "HDFC_ELSS", "tags": ["x"]},
+        {"chunk_id": "b", "text": "", "scheme_name": "HDFC_ELSS", "tags": []},
+        {"chunk_id": "c", "text": None, "scheme_name": "HDFC_Large_Cap", "tags": None},
+        {"chunk_id": "d", "text": "fourth", "scheme_name": None, "tags": ["y"]},
+    ]
+    expected = [{"text": None, **chunk} for chunk in chunks]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store_dir = Path(tmp) / CHUNK_STORE_DIR_NAME
+        rows = write_chunk_store(chunks, store_dir)
+        store = ChunkStore(store_dir)
+        check("row count", rows == 4 and len(store) == 4)
+        check("column kinds", store.kinds == {
+            "chunk_id": "string", "scheme_name": "categorical", "tags": "json", "text": "string",
+        })
+        check("None string round-trips as None", store.get_value("text", 2) is None)
+        check("backfilled string is None", store.get_value("text", 0) is None)
+        check("empty string stays empty string", store.get_value("text", 1) == "")
+        check("rows round-trip", list(store.iter_chunks()) == expected)
+        check("mask on categorical codes",
+              store.mask("scheme_name", ["HDFC_ELSS"]).tolist() == [True, True, False, False])
+        store.close()
+        check("no null mask without missing values", not (store_dir / "chunk_id.nulls.npy").exists())
+
+    print("-" * 70)
+    print(f"Results: {passed} passed, {failed} failed")
+    print("=" * 70)
+
+    return failed == 0
+
+
+def main():
+    """Convert legacy metadata to the columnar store, or export it as JSON."""
+    if len(sys.argv) > 1 and sys.argv[1] == "--test":
+        return 0 if run_tests() else 1
+    if len(sys.argv) < 2 or sys.argv[1] not in ("convert", "export-json"):
+        print(__doc__)
+        return 1
+
+    command = sys.argv[1]
+    vector_store_dir = Path(sys.argv[2]) if len(sys.argv) > 2 else VECTOR_STORE_DIR
+
+    if command == "convert":
+        pickle_path = vector_store_dir / LEGACY_PICKLE_NAME
+        if not pickle_path.exists():
+            print(f"[ERROR] No legacy metadata found at {pickle_path}")
+            return 1
+        with open(pickle_path, "rb") as f:
+            chunks = pickle.load(f)
+        rows = write_chunk_store(chunks, vector_store_dir / CHUNK_STORE_DIR_NAME)
+        print(f"[OK] Wrote {rows} chunks to {vector_store_dir / CHUNK_STORE_DIR_NAME}")
+    else:
+        chunks = load_chunks(vector_store_dir)
+        if chunks is None:
+            print(f"[ERROR] No chunk metadata found in {vector_store_dir}")
+            return 1
+        export_json(chunks, vector_store_dir / JSON_EXPORT_NAME)
+        print(f"[OK] Exported {len(chunks)} chunks to {vector_store_dir / JSON_EXPORT_NAME}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,493 @@
+"""
+NAV Lookup Index for Groww Mutual Fund RAG System
+
+Parses data/raw/AMFI_NAV.txt (AMFI's daily NAV file) into an in-memory
+lookup structure, so NAV questions are answered directly instead of going
+through embedding and vector search.
+
+File format (semicolon-delimited, with section header lines):
+    Scheme Code;ISIN Div Payout/ ISIN Growth;ISIN Div Reinvestment;Scheme Name;Net Asset Value;Date
+    Open Ended Schemes(Debt Scheme - Banking and PSU Fund)      <- category
+    HDFC Mutual Fund                                            <- AMC
+    119091;INF179KB1HP9;-;HDFC Liquid Fund - Growth Option - Direct Plan;5362.2045;05-Feb-2026
+
+Lookups:
+    by scheme code / ISIN       dict, O(1)
+    by normalised name          dict, O(1)
+    name prefix                 bisect over the sorted normalised names
+    fuzzy name                  token -> row postings (typos via a deletion index), rows
+                                sharing the most distinctive tokens, ranked by token overlap
+
+The file is re-parsed only when its size or mtime changes (reload_if_changed),
+so a long-lived process picks up the daily refresh with one stat() per query.
+
+Usage:
+    python scripts/nav_index.py "HDFC Liquid Fund Direct Growth"
+    python scripts/nav_index.py 119091
+    python scripts/nav_index.py "hdfc liq" --prefix
+    python scripts/nav_index.py --test      # Built-in test cases
+"""
+
+import os
+import re
+import time
+import heapq
+import bisect
+import difflib
+import argparse
+import tempfile
+import statistics
+from collections import Counter
+from datetime import datetime
+from functools import lru_cache
+from itertools import islice, takewhile
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Iterator, Tuple
+
+# Configuration
+BASE_DIR = Path(__file__).parent.parent
+NAV_FILE = BASE_DIR / "data" / "raw" / "AMFI_NAV.txt"
+
+HEADER_PREFIX = "Scheme Code;"
+ISIN_PATTERN = re.compile(r"^IN[A-Z0-9]{10}$")
+NAME_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+# Spelling variants that should match each other
+NAME_SYNONYMS = {
+    "dividend": "idcw",
+    "regular": "reg",
+    "option": "",
+    "plan": "",
+}
+
+FUZZY_TOKEN_CUTOFF = 0.8  # Similarity for a misspelt query token to match a name token
+FUZZY_MIN_TOKEN_LENGTH = 4  # Shorter tokens must match exactly
+
+# Tokens too common to select candidate rows (they still count towards overlap)
+COMMON_NAME_TOKENS = {"hdfc", "fund", "direct", "growth", "plan", "option"}
+COMMON_TOKEN_SHARE = 0.1  # Any token in more than this share of rows is common too
+
+
+def normalize_name(name: str) -> str:
+    """Lowercase, unify spelling variants and drop punctuation."""
+    text = name.lower().replace("&", " and ")
+    tokens = [NAME_SYNONYMS.get(t, t) for t in NAME_TOKEN_PATTERN.findall(text)]
+    return " ".join(t for t in tokens if t)
+
+
+@lru_cache(maxsize=64)
+def parse_nav_date(value: str) -> Optional[str]:
+    """'05-Feb-2026' -> '2026-02-05' (None if unparseable). Cached: a file holds only a few dates."""
+    try:
+        return datetime.strptime(value.strip(), "%d-%b-%Y").strftime("%Y-%m-%d")
+    except ValueError:
+        return None
+
+
+def parse_nav_file(path: Path) -> Iterator[Dict[str, Any]]:
+    """
+    Yield one record per scheme line of an AMFI NAV file.
+
+    Section lines set the category ("Open Ended Schemes(...)") and AMC
+    ("... Mutual Fund") of the scheme lines that follow them.
+    """
+    category, amc = None, None
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith(HEADER_PREFIX):
+                continue
+
+            fields = line.split(";")
+            if len(fields) < 6:
+                if "Schemes(" in line:
+                    category = line
+                else:
+                    amc = line
+                continue
+
+            code, isin_growth, isin_reinvest, name, nav, date = (f.strip() for f in fields[:6])
+            try:
+                nav_value = float(nav)
+            except ValueError:
+                nav_value = None  # "N.A."
+
+            yield {
+                "scheme_code": code,
+                "isin_growth": isin_growth if isin_growth not in ("", "-") else None,
+                "isin_reinvestment": isin_reinvest if isin_reinvest not in ("", "-") else None,
+                "scheme_name": name,
+                "nav": nav_value,
+                "nav_date": parse_nav_date(date),
+                "amc": amc,
+                "category": category,
+            }
+
+
+class NavIndex:
+    """Lookup structure over one AMFI NAV file."""
+
+    def __init__(self, path: Path = NAV_FILE):
+        self.path = Path(path)
+        self._signature: Optional[Tuple[int, int]] = None
+        self.reload_if_changed()
+
+    def _stat_signature(self) -> Tuple[int, int]:
+        stat = os.stat(self.path)
+        return stat.st_size, stat.st_mtime_ns
+
+    def reload_if_changed(self) -> bool:
+        """
+        Re-parse the file if its size or mtime changed since the last load.
+
+        Returns:
+            True if the index was (re)built
+        """
+        signature = self._stat_signature()
+        if signature == self._signature:
+            return False
+        self._build(list(parse_nav_file(self.path)))
+        self._signature = signature
+        return True
+
+    def _build(self, records: List[Dict[str, Any]]) -> None:
+        self.records = records
+        self.by_code: Dict[str, int] = {}
+        self.by_isin: Dict[str, int] = {}
+        self.by_name: Dict[str, List[int]] = {}
+        by_token: Dict[str, List[int]] = {}
+        self.names: List[str] = []
+
+        for row, record in enumerate(records):
+            self.by_code[record["scheme_code"]] = row
+            for isin in (record["isin_growth"], record["isin_reinvestment"]):
+                if isin:
+                    self.by_isin[isin] = row
+            name = normalize_name(record["scheme_name"])
+            self.names.append(name)
+            self.by_name.setdefault(name, []).append(row)
+            for token in set(name.split()):
+                by_token.setdefault(token, []).append(row)
+
+        self.sorted_names = sorted(self.by_name)
+        self.by_token: Dict[str, frozenset] = {token: frozenset(rows) for token, rows in by_token.items()}
+        self.token_counts = [len(set(name.split())) for name in self.names]
+        max_rows = COMMON_TOKEN_SHARE * len(records)
+        self.common_tokens = {
+            token for token, rows in self.by_token.items()
+            if token in COMMON_NAME_TOKENS or len(rows) > max_rows
+        }
+
+        # Deletion index: every token and its one-character deletions -> tokens,
+        # so a query token within one edit (incl. transpositions) shares a key
+        self.by_deletion: Dict[str, List[str]] = {}
+        for token in self.by_token:
+            if len(token) >= FUZZY_MIN_TOKEN_LENGTH and not token.isdigit():
+                for key in _deletions(token):
+                    self.by_deletion.setdefault(key, []).append(token)
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def get_by_code(self, scheme_code: str) -> Optional[Dict[str, Any]]:
+        row = self.by_code.get(str(scheme_code).strip())
+        return None if row is None else self.records[row]
+
+    def get_by_isin(self, isin: str) -> Optional[Dict[str, Any]]:
+        row = self.by_isin.get(isin.strip().upper())
+        return None if row is None else self.records[row]
+
+    def get_by_name(self, name: str) -> List[Dict[str, Any]]:
+        """Schemes whose normalised name equals the normalised query."""
+        return [self.records[row] for row in self.by_name.get(normalize_name(name), [])]
+
+    def prefix_search(self, prefix: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """Schemes whose normalised name starts with the normalised prefix."""
+        prefix = normalize_name(prefix)
+        start = bisect.bisect_left(self.sorted_names, prefix)
+        results = []
+        for name in islice(self.sorted_names, start, None):
+            if not name.startswith(prefix) or len(results) >= limit:
+                break
+            results.extend(self.records[row] for row in self.by_name[name])
+        return results[:limit]
+
+    def _match_tokens(self, token: str) -> List[str]:
+        """Index tokens matching a query token exactly, or within one edit."""
+        if token in self.by_token:
+            return [token]
+        if token.isdigit() or len(token) < FUZZY_MIN_TOKEN_LENGTH:
+            return []
+        close = {match for key in _deletions(token) for match in self.by_deletion.get(key, [])}
+        return [
+            match for match in sorted(close)
+            if difflib.SequenceMatcher(None, token, match).ratio() >= FUZZY_TOKEN_CUTOFF
+        ]
+
+    def fuzzy_search(self, query: str, limit: int = 5) -> List[Tuple[float, Dict[str, Any]]]:
+        """
+        Best-matching schemes for a free-form (possibly misspelt) name.
+
+        Candidates are the rows sharing the most of the query's distinctive
+        tokens (common ones like "hdfc" or "fund" select rows only when
+        nothing else matches). They are ranked by the number of query tokens
+        they share, then by token Dice coefficient.
+
+        Returns:
+            (string similarity, record) pairs, best first
+        """
+        normalized = normalize_name(query)
+        matched = {match for token in set(normalized.split()) for match in self._match_tokens(token)}
+        if not matched:
+            return []
+
+        common = [token for token in matched if token in self.common_tokens]
+        rare = [token for token in matched if token not in self.common_tokens]
+        if not rare:
+            rare = [min(common, key=lambda token: len(self.by_token[token]))]
+            common.remove(rare[0])
+
+        # Only rows sharing the most distinctive tokens go on to be scored:
+        # all of them if any row has them all (a set intersection), else the
+        # rows with the highest count
+        pool = frozenset.intersection(*(self.by_token[token] for token in rare))
+        best = len(rare)
+        if not pool:
+            rare_overlap: Counter = Counter()
+            for token in rare:
+                rare_overlap.update(self.by_token[token])
+            best = max(rare_overlap.values())
+            pool = frozenset(row for row, shared in rare_overlap.items() if shared == best)
+        overlap = Counter(dict.fromkeys(pool, best))
+        for token in common:
+            overlap.update(pool & self.by_token[token])
+
+        # Token Dice breaks overlap ties in favour of names without extra tokens;
+        # the (slow, pure-Python) string similarity is computed for returned rows only
+        ranked = overlap.most_common()
+        cutoff = ranked[min(limit, len(ranked)) - 1][1]
+        tier = [row for row, _ in takewhile(lambda item: item[1] >= cutoff, ranked)]
+        best_rows = heapq.nsmallest(limit, tier, key=lambda row: (
+            -(overlap[row] + 2 * overlap[row] / (len(matched) + self.token_counts[row])), row
+        ))
+        matcher = difflib.SequenceMatcher(None, b=normalized)
+        results = []
+        for row in best_rows:
+            matcher.set_seq1(self.names[row])
+            results.append((matcher.ratio(), self.records[row]))
+        return results
+
+    def lookup(self, query: str) -> Optional[Dict[str, Any]]:
+        """
+        Resolve a scheme code, ISIN or scheme name to one NAV record.
+
+        Tries, in order: code, ISIN, exact name, name prefix, fuzzy name.
+        """
+        query = query.strip()
+        if query.isdigit():
+            return self.get_by_code(query)
+        if ISIN_PATTERN.match(query.upper()):
+            return self.get_by_isin(query)
+
+        exact = self.get_by_name(query)
+        if exact:
+            return exact[0]
+        prefix = self.prefix_search(query, limit=1)
+        if prefix:
+            return prefix[0]
+        fuzzy = self.fuzzy_search(query, limit=1)
+        return fuzzy[0][1] if fuzzy else None
+
+
+def _deletions(token: str) -> set:
+    """A token and every variant of it with one character removed."""
+    return {token} | {token[:i] + token[i + 1:] for i in range(len(token))}
+
+
+@lru_cache(maxsize=1)
+def _get_nav_index(path: Path) -> NavIndex:
+    return NavIndex(path)
+
+
+def get_nav_index(path: Path = NAV_FILE) -> NavIndex:
+    """Process-wide NAV index, reloaded when the NAV file changes on disk."""
+    index = _get_nav_index(Path(path))
+    index.reload_if_changed()
+    return index
+
+
+def format_nav(record: Dict[str, Any]) -> str:
+    """One-line NAV answer for a record."""
+    if record["nav"] is None:
+        return f"{record['scheme_name']}: NAV not available (as of {record['nav_date']})"
+    return f"{record['scheme_name']}: NAV Rs. {record['nav']:,.4f} as of {record['nav_date']}"
+
+
+def write_test_nav_file(path: Path, n_amcs: int = 60) -> List[Dict[str, str]]:
+    """
+    Write a synthetic AMFI-format NAV file of AMFI's size (~9k schemes).
+
+    Every AMC offers the same scheme families in six plan/option variants,
+    like the real file, so names share most of their tokens.
+
+    Returns:
+        (scheme_code, scheme_name) of every scheme line, in file order
+    """
+    families = [
+        "Liquid Fund", "Large Cap Fund", "Mid Cap Opportunities Fund", "Small Cap Fund",
+        "ELSS Tax Saver Fund", "Balanced Advantage Fund", "Flexi Cap Fund", "Banking & PSU Debt Fund",
+        "Corporate Bond Fund", "Gilt Fund", "Overnight Fund", "Money Market Fund", "Short Duration Fund",
+        "Dynamic Bond Fund", "Credit Risk Debt Fund", "Multi Asset Allocation Fund", "Arbitrage Fund",
+        "Focused Fund", "Value Fund", "Infrastructure Fund", "Pharma and Healthcare Fund",
+        "Technology Fund", "Nifty 50 Index Fund", "Gold ETF Fund of Fund", "Retirement Savings Fund",
+    ]
+    variants = [
+        "Direct Plan - Growth Option", "Regular Plan - Growth Option", "Direct Plan - IDCW",
+        "Regular Plan - IDCW", "Direct Plan - Monthly IDCW", "Regular Plan - Monthly IDCW",
+    ]
+    syllables = ["ka", "lo", "mi", "ru", "te", "vo", "sa", "ne"]
+    amcs = ["HDFC"] + [
+        (syllables[i % 8] + syllables[(i // 8) % 8] + syllables[(i * 3 + 1) % 8]).title()
+        for i in range(1, n_amcs)
+    ]
+
+    schemes = []
+    header = "ISIN Div Payout/ ISIN Growth;ISIN Div Reinvestment;Scheme Name;Net Asset Value;Date"
+    lines = [HEADER_PREFIX + header]
+    for family_index, family in enumerate(families):
+        lines += ["", f"Open Ended Schemes(Category {family_index})", ""]
+        for amc in amcs:
+            lines += [f"{amc} Mutual Fund", ""]
+            for variant in variants:
+                code = str(100000 + len(schemes))
+                name = f"{amc} {family} - {variant}"
+                lines.append(f"{code};INF{len(schemes):09d};-;{name};{10 + len(schemes) % 997:.4f};04-Feb-2026")
+                schemes.append({"scheme_code": code, "scheme_name": name})
+    Path(path).write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return schemes
+
+
+def run_tests():
+    """Run built-in test cases: lookups and misspelt-name latency on a synthetic AMFI-sized file."""
+    print("=" * 70)
+    print("NAV Lookup Index - Test Suite")
+    print("=" * 70)
+
+    passed = 0
+    failed = 0
+
+    def check(name: str, ok: bool) -> None:
+        nonlocal passed, failed
+        print(f"[{'PASS' if ok else 'FAIL'}] {name}")
+        if ok:
+            passed += 1
+        else:
+            failed += 1
+
+    # (misspelt query, expected scheme name)
+    misspelt_names = [
+        ("HDFC Liqiud Fund Direct Growth", "HDFC Liquid Fund - Direct Plan - Growth Option"),
+        ("hdfc midcap oportunities fund direct growth",
+         "HDFC Mid Cap Opportunities Fund - Direct Plan - Growth Option"),
+        ("HDFC Balanced Advantge Regular IDCW", "HDFC Balanced Advantage Fund - Regular Plan - IDCW"),
+        ("hdfc elss tax saver direct monthly idcw", "HDFC ELSS Tax Saver Fund - Direct Plan - Monthly IDCW"),
+        ("HDFC Flexi Cpa Fund Regular Growth", "HDFC Flexi Cap Fund - Regular Plan - Growth Option"),
+        ("HDFC Infrastructre Fund Direct IDCW", "HDFC Infrastructure Fund - Direct Plan - IDCW"),
+        ("HDFC Banking and PSU Det Fund Direct Growth", "HDFC Banking & PSU Debt Fund - Direct Plan - Growth Option"),
+        ("HDFC Pharma Healthcare Fund Regular Growth",
+         "HDFC Pharma and Healthcare Fund - Regular Plan - Growth Option"),
+    ]
+    max_p50_ms = 2.0
+
+    with tempfile.TemporaryDirectory() as tmp:
+        nav_file = Path(tmp) / "AMFI_NAV.txt"
+        schemes = write_test_nav_file(nav_file)
+        index = NavIndex(nav_file)
+        check(f"all {len(schemes)} scheme lines parsed", len(index) == len(schemes))
+
+        first = schemes[0]
+        check("lookup by scheme code", index.lookup(first["scheme_code"])["scheme_name"] == first["scheme_name"])
+        check("lookup by ISIN", index.lookup("inf000000000")["scheme_code"] == first["scheme_code"])
+        check("lookup by exact name ignores case and punctuation",
+              index.lookup(first["scheme_name"].upper().replace(" - ", " "))["scheme_code"] == first["scheme_code"])
+        prefix = index.prefix_search("hdfc liquid fund direct", limit=10)
+        check("prefix search returns only matching names",
+              len(prefix) == 3 and all(r["scheme_name"].startswith("HDFC Liquid Fund - Direct") for r in prefix))
+
+        for query, expected in misspelt_names:
+            record = index.lookup(query)
+            check(f"misspelt '{query}'", record is not None and record["scheme_name"] == expected)
+        check("unrelated words match nothing", index.fuzzy_search("zzzz qqqq") == [])
+
+        timings = []
+        for _ in range(20):
+            for query, _ in misspelt_names:
+                start = time.perf_counter()
+                index.fuzzy_search(query, limit=5)
+                timings.append((time.perf_counter() - start) * 1000)
+        p50 = statistics.median(timings)
+        check(f"misspelt-name p50 {p50:.2f} ms < {max_p50_ms} ms", p50 < max_p50_ms)
+
+        check("unchanged file is not reloaded", not index.reload_if_changed())
+        nav_file.write_text(nav_file.read_text(encoding="utf-8").replace(";04-Feb-2026", ";05-Feb-2026"),
+                            encoding="utf-8")
+        stat = nav_file.stat()
+        os.utime(nav_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        check("rewritten file is reloaded", index.reload_if_changed()
+              and index.get_by_code(first["scheme_code"])["nav_date"] == "2026-02-05")
+
+    print("-" * 70)
+    print(f"Results: {passed} passed, {failed} failed")
+    print("=" * 70)
+
+    return failed == 0
+
+
+def main():
+    """Look up NAVs from the command line."""
+    parser = argparse.ArgumentParser(description="Look up NAVs from AMFI_NAV.txt")
+    parser.add_argument("query", nargs="?", help="Scheme code, ISIN or scheme name")
+    parser.add_argument("--prefix", action="store_true", help="List schemes whose name starts with the query")
+    parser.add_argument("--fuzzy", action="store_true", help="List the best fuzzy name matches")
+    parser.add_argument("--limit", type=int, default=5, help="Results for --prefix / --fuzzy")
+    parser.add_argument("--nav-file", type=Path, default=NAV_FILE, help="AMFI NAV file")
+    parser.add_argument("--test", action="store_true", help="Run the built-in test cases and exit")
+    args = parser.parse_args()
+
+    if args.test:
+        return 0 if run_tests() else 1
+    if not args.query:
+        parser.error("query is required")
+
+    if not args.nav_file.exists():
+        print(f"[ERROR] NAV file not found: {args.nav_file}")
+        return 1
+
+    start = time.perf_counter()
+    index = NavIndex(args.nav_file)
+    print(f"Loaded {len(index)} schemes in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    start = time.perf_counter()
+    if args.prefix:
+        results = [(None, r) for r in index.prefix_search(args.query, args.limit)]
+    elif args.fuzzy:
+        results = index.fuzzy_search(args.query, args.limit)
+    else:
+        record = index.lookup(args.query)
+        results = [(None, record)] if record else []
+    elapsed_us = (time.perf_counter() - start) * 1e6
+
+    print(f"Query: {args.query}  ({elapsed_us:.0f} us)")
+    print("-" * 70)
+    if not results:
+        print("[WARN] No matching scheme")
+        return 1
+    for score, record in results:
+        prefix = f"{score:.2f} | " if score is not None else ""
+        print(f"{prefix}{record['scheme_code']} | {format_nav(record)}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,288 @@
+"""
+Query Expansion and Query Embedding Cache for Groww Mutual Fund RAG System
+
+Prepares a query for the BGE-M3 encoder and avoids encoding it when the same
+text was encoded before:
+
+    1. Normalise: lowercase, punctuation to spaces ("Lock-in?" -> "lock in"),
+       numbers and percentages kept ("1.05%")
+    2. Expand: one precompiled pattern finds the financial acronyms of
+       architecture.md §4.2.5 and appends their expansion
+       ("elss lock in" -> "elss (equity linked savings scheme) lock in")
+    3. Encode: QueryEncoder looks the expanded text up in
+         - the precomputed expansion vectors (query_vectors.npz, written at
+           ingestion next to the FAISS index): every acronym alone and with
+           the usual short follow-ups (EXPANSION_FACETS), so short queries
+           like "ELSS lock-in" never reach the model
+         - an in-memory LRU cache of earlier query embeddings
+       and sends only the misses to the model, in one batch
+
+QueryEncoder.stats() reports the hit rate and the encode time saved (hits
+times the measured mean encode time per query).
+
+Usage:
+    python scripts/query_expansion.py "What is the ELSS lock-in?"      # Show normalised / expanded text
+    python scripts/query_expansion.py --file queries.txt [--repeat 3]  # Replay queries, report cache stats
+    python scripts/query_expansion.py --build [vector_store_dir]       # (Re)build query_vectors.npz
+"""
+
+import re
+import sys
+import time
+import argparse
+import threading
+import unicodedata
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Any, Optional
+
+import numpy as np
+
+# Local imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from scripts.store_versions import current_store_dir
+
+# Configuration
+BASE_DIR = Path(__file__).parent.parent
+VECTOR_STORE_DIR = BASE_DIR / "data" / "vector_store"
+QUERY_VECTORS_FILE_NAME = "query_vectors.npz"
+QUERY_CACHE_SIZE = 10_000  # Query embeddings kept in the LRU cache
+
+# architecture.md §4.2.5: Financial Acronym Expansion Map
+ACRONYMS = {
+    "elss": "equity linked savings scheme",
+    "nav": "net asset value",
+    "sip": "systematic investment plan",
+    "ter": "total expense ratio",
+    "aum": "assets under management",
+    "sid": "scheme information document",
+    "kim": "key information memorandum",
+    "sai": "statement of additional information",
+    "nfo": "new fund offer",
+    "cagr": "compound annual growth rate",
+    "swp": "systematic withdrawal plan",
+    "stp": "systematic transfer plan",
+}
+
+# Short queries precomputed for every acronym ("{}" is the acronym)
+EXPANSION_FACETS = [
+    "{}", "what is {}", "{} meaning", "{} full form", "{} lock in", "{} lock in period", "{} tax benefit",
+    "{} minimum amount", "{} calculation", "{} date", "{} returns", "{} charges", "how does {} work",
+]
+
+APOSTROPHES = re.compile(r"['\u2019]")
+QUERY_NOISE = re.compile(r"[^\w%.]+|\.(?!\d)")
+ACRONYM_PATTERN = re.compile(r"\b(" + "|".join(ACRONYMS) + r")\b(?! \()")
+
+
+def normalize_query(query: str) -> str:
+    """Lowercase, unify unicode, drop apostrophes and turn other punctuation into single spaces (keeps "1.05%")."""
+    text = APOSTROPHES.sub("", unicodedata.normalize("NFKC", query).lower())
+    return " ".join(QUERY_NOISE.sub(" ", text).split())
+
+
+def expand_query(normalized: str) -> str:
+    """Append the expansion after the first mention of each acronym (§4.2.5 expansion logic)."""
+    seen = set()
+
+    def expand(match: "re.Match") -> str:
+        acronym = match.group(1)
+        if acronym in seen:
+            return acronym
+        seen.add(acronym)
+        return f"{acronym} ({ACRONYMS[acronym]})"
+
+    return ACRONYM_PATTERN.sub(expand, normalized)
+
+
+def prepare_query(query: str) -> str:
+    """Text that is encoded (and cached) for a query: normalised, then expanded."""
+    return expand_query(normalize_query(query))
+
+
+def expansion_queries() -> List[str]:
+    """Prepared texts of all precomputed short queries."""
+    return sorted({prepare_query(facet.format(acronym)) for acronym in ACRONYMS for facet in EXPANSION_FACETS})
+
+
+def encode_texts(model: Any, texts: List[str]) -> np.ndarray:
+    """Encode texts in one batch into normalised float32 vectors."""
+    embeddings = model.encode(
+        texts,
+        batch_size=max(1, len(texts)),
+        show_progress_bar=False,
+        normalize_embeddings=True
+    )
+    return np.ascontiguousarray(embeddings, dtype=np.float32)
+
+
+def write_expansion_vectors(
+    vector_store_dir: Path,
+    model_name: str,
+    get_model: Any,
+    previous_dir: Optional[Path] = None
+) -> Dict[str, Any]:
+    """
+    Write query_vectors.npz: the embeddings of expansion_queries().
+
+    The vectors depend only on the model, so they are copied from the
+    previous version when it has them for the same model and query set;
+    `get_model` (a callable returning the encoder) is only called otherwise.
+
+    Returns:
+        {"queries": count, "reused": bool}
+    """
+    texts = expansion_queries()
+    previous = load_expansion_vectors(previous_dir, model_name) if previous_dir is not None else {}
+    reused = bool(previous) and all(text in previous for text in texts)
+    if reused:
+        vectors = np.stack([previous[text] for text in texts])
+    else:
+        vectors = encode_texts(get_model(), texts)
+    np.savez(
+        Path(vector_store_dir) / QUERY_VECTORS_FILE_NAME,
+        model_name=np.array(model_name),
+        texts=np.array(texts),
+        vectors=vectors,
+    )
+    return {"queries": len(texts), "reused": reused}
+
+
+def load_expansion_vectors(vector_store_dir: Path, model_name: Optional[str] = None) -> Dict[str, np.ndarray]:
+    """Prepared text -> precomputed vector ({} if missing or built with another model)."""
+    path = Path(vector_store_dir) / QUERY_VECTORS_FILE_NAME
+    if not path.exists():
+        return {}
+    with np.load(path) as data:
+        if model_name is not None and str(data["model_name"]) != model_name:
+            return {}
+        return dict(zip(data["texts"].tolist(), data["vectors"]))
+
+
+class QueryEncoder:
+    """
+    Query encoder with acronym expansion, precomputed vectors and an LRU cache.
+
+    Args:
+        model: Preloaded model with a SentenceTransformer-compatible encode()
+        precomputed: Prepared text -> vector, never evicted (load_expansion_vectors)
+        cache_size: Query embeddings kept in the LRU cache
+    """
+
+    def __init__(
+        self,
+        model: Any,
+        precomputed: Optional[Dict[str, np.ndarray]] = None,
+        cache_size: int = QUERY_CACHE_SIZE
+    ):
+        self.model = model
+        self.precomputed = precomputed or {}
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.queries = 0
+        self.precomputed_hits = 0
+        self.cache_hits = 0
+        self.encoded = 0
+        self.encode_seconds = 0.0
+
+    def encode(self, queries: List[str]) -> np.ndarray:
+        """Normalised float32 vectors of queries (expanded), encoding only cache misses."""
+        texts = [prepare_query(query) for query in queries]
+        vectors: List[Optional[np.ndarray]] = [None] * len(texts)
+        missing: Dict[str, List[int]] = {}
+        with self._lock:
+            self.queries += len(texts)
+            for i, text in enumerate(texts):
+                vector = self.precomputed.get(text)
+                if vector is not None:
+                    self.precomputed_hits += 1
+                elif text in self._cache:
+                    vector = self._cache[text]
+                    self._cache.move_to_end(text)
+                    self.cache_hits += 1
+                else:
+                    missing.setdefault(text, []).append(i)
+                    continue
+                vectors[i] = vector
+
+        if missing:
+            start = time.perf_counter()
+            encoded = encode_texts(self.model, list(missing))
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.encoded += len(missing)
+                self.encode_seconds += elapsed
+                for (text, positions), vector in zip(missing.items(), encoded):
+                    for i in positions:
+                        vectors[i] = vector
+                    self._cache[text] = vector
+                    self._cache.move_to_end(text)
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+
+        if not vectors:
+            return np.zeros((0, 0), dtype=np.float32)
+        return np.ascontiguousarray(np.stack(vectors), dtype=np.float32)
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit rate and encode time saved (hits x mean encode time per query)."""
+        hits = self.precomputed_hits + self.cache_hits
+        per_query = self.encode_seconds / self.encoded if self.encoded else 0.0
+        return {
+            "queries": self.queries,
+            "precomputed_hits": self.precomputed_hits,
+            "cache_hits": self.cache_hits,
+            "encoded": self.encoded,
+            "hit_rate": hits / self.queries if self.queries else 0.0,
+            "cached_queries": len(self._cache),
+            "mean_encode_ms": per_query * 1000,
+            "encode_ms_saved": hits * per_query * 1000,
+        }
+
+
+def main():
+    """Show a query's expansion, replay a query file through the encoder, or build query_vectors.npz."""
+    parser = argparse.ArgumentParser(description="Query expansion and query embedding cache")
+    parser.add_argument("query", nargs="?", help="Query text")
+    parser.add_argument("--file", type=Path, help="Replay every line of a file through the cached encoder")
+    parser.add_argument("--repeat", type=int, default=1, help="Replays of --file")
+    parser.add_argument("--build", nargs="?", const=VECTOR_STORE_DIR, type=Path, metavar="VECTOR_STORE_DIR",
+                        help="(Re)build query_vectors.npz for the current version")
+    args = parser.parse_args()
+
+    if args.query:
+        normalized = normalize_query(args.query)
+        print(f"Normalised: {normalized}")
+        print(f"Expanded:   {expand_query(normalized)}")
+        return 0
+    if not args.file and not args.build:
+        parser.error("a query, --file or --build is required")
+
+    from scripts.retriever import Retriever
+    retriever = Retriever(vector_store_dir=args.build or VECTOR_STORE_DIR, warmup=False)
+    model_name = retriever.summary.get("embedding_model")
+
+    if args.build:
+        store_dir = current_store_dir(args.build)
+        stats = write_expansion_vectors(store_dir, model_name, lambda: retriever.model)
+        print(f"[OK] {stats['queries']} expansion queries encoded with {model_name}")
+        print(f"     Saved to {store_dir / QUERY_VECTORS_FILE_NAME}")
+        return 0
+
+    queries = [line.strip() for line in open(args.file, encoding="utf-8") if line.strip()]
+    encoder = retriever.encoder
+    for _ in range(args.repeat):
+        for query in queries:
+            encoder.encode([query])
+    stats = encoder.stats()
+    print(f"Queries: {stats['queries']} | precomputed hits: {stats['precomputed_hits']} | "
+          f"cache hits: {stats['cache_hits']} | encoded: {stats['encoded']}")
+    print(f"Hit rate: {stats['hit_rate']:.1%} | mean encode {stats['mean_encode_ms']:.1f} ms | "
+          f"encode time saved: {stats['encode_ms_saved']:.0f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,354 @@
+"""
+Query Pipeline for Groww Mutual Fund RAG System
+
+Runs one user query through the stages of architecture.md §4.2.5, cheapest
+first, and stops at the first stage that can answer:
+
+    Routing     query_router.py: refusal template, NAV lookup, fact lookup or retrieval
+                (no encode; refusals cost microseconds)
+    Cache       Semantic answer cache (answer_cache.py), keyed on the query
+                vector: a near-duplicate of an earlier query gets its answer
+                back after the encode, without search, rerank or generation
+    Stage 1     Dense retrieval of the top-20 chunks (BGE-M3 encode + FAISS search),
+                filtered to the scheme named in the query
+    Stage 0     Confidence gate: refuse with Template D if every top-20 score < 0.4
+    Stage 3     Cross-encoder rerank to the top-3 chunks for the LLM prompt
+
+The retriever, and with it the BGE-M3 encoder, is only loaded for the first
+query that needs retrieval. Answer generation (the LLM call) is outside this
+module: pass `generate` to produce final_response for retrieved queries.
+
+Each call returns the §9.1 query record, plus the routing decision
+("route"), per-stage latency ("stages_ms", see tracing.py) and, for
+retrieved queries, the answer cache outcome and hit / miss counts
+("answer_cache"). Retrieved answers are cached with the source files of
+their context chunks, so re-ingesting a changed document drops them. With a
+log_writer the record is also appended to the daily query log.
+
+Usage:
+    python scripts/query_pipeline.py "Should I invest in HDFC ELSS?"
+    python scripts/query_pipeline.py "What is the exit load of HDFC Liquid Fund?" --reranker overlap
+    python scripts/query_pipeline.py "What is the exit load of HDFC Liquid Fund?" --no-answer-cache
+    python scripts/query_pipeline.py --file queries.txt --log     # Answer each line, log to data/logs
+"""
+
+import re
+import sys
+import uuid
+import logging
+import argparse
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Callable
+
+# Local imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from scripts.query_router import QueryRouter, DomainModel, ROUTE_REFUSE, ROUTE_NAV, ROUTE_FACT
+from scripts.nav_index import get_nav_index, format_nav
+from scripts.answer_cache import AnswerCache
+from scripts.query_expansion import normalize_query
+from scripts.tracing import (
+    Trace, JsonlLogWriter, utc_timestamp, LOG_DIR,
+    STAGE_ROUTING, STAGE_QUERY_ENCODE, STAGE_SEARCH, STAGE_RERANK, STAGE_GENERATE
+)
+
+# Configuration
+CONFIDENCE_THRESHOLD = 0.4  # Stage 0: refuse if every top-20 score is below this (§4.2.5)
+NAV_SOURCE_URL = "https://www.amfiindia.com/spages/NAVAll.txt"
+DISCLAIMER = "📅 This is factual information, not investment advice."
+CITATION_PATTERN = re.compile(r"\[Source: ([^\]]+)\]")
+STAGE_NAV_LOOKUP = "nav_lookup"
+STAGE_ANSWER_CACHE = "answer_cache"
+
+# Record fields produced by retrieval, stored in and restored from the answer cache
+CACHED_FIELDS = [
+    "refusal_triggered", "refusal_template", "retrieved_chunks", "reranked_chunks", "context",
+    "llm_response_raw", "citation_extracted", "citation_valid", "final_response",
+]
+
+# architecture.md §5.3
+REFUSAL_TEMPLATES = {
+    "A": (
+        "I can only provide factual information and cannot offer investment advice or "
+        "recommendations. For personalized guidance, please consult a SEBI-registered "
+        "investment advisor.\n\n"
+        "📚 Learn about choosing an advisor: https://investor.sebi.gov.in/advisorycaution.html"
+    ),
+    "B": (
+        "I can only share objective facts from official sources. I cannot provide "
+        "subjective assessments, predictions, or opinions about mutual funds.\n\n"
+        "📚 Learn about mutual fund risks: https://investor.sebi.gov.in/pdf/Mutual%20Fund%20booklet.pdf"
+    ),
+    "C": (
+        "I specialize in factual questions about HDFC mutual fund schemes only. I don't "
+        "have information on this topic in my verified sources.\n\n"
+        "📚 For general investor education: https://www.amfiindia.com/investor-corner/investor-awareness.html"
+    ),
+    "D": (
+        "I don't have reliable information on this in my verified sources. For accurate "
+        "details, please check the official HDFC AMC website.\n\n"
+        "📚 Official HDFC Fund Information: https://www.hdfcfund.com/explore/mutual-funds"
+    ),
+}
+
+logger = logging.getLogger(__name__)
+
+
+def refusal_response(template: str) -> str:
+    """Full refusal message for a template letter."""
+    return f"{REFUSAL_TEMPLATES[template]}\n\n[Source: N/A]\n{DISCLAIMER}"
+
+
+def sourced_response(answer: str, source: str) -> str:
+    """Direct answer with its citation line (§7.4)."""
+    return f"{answer}\n[Source: {source}]\n{DISCLAIMER}"
+
+
+class QueryPipeline:
+    """
+    Router-first query pipeline.
+
+    Args:
+        router: Query router (default: QueryRouter for the default vector store)
+        retriever: Retriever to use (default: get_retriever(), loaded on first retrieval)
+        reranker: Reranker for Stage 3 (None: keep the dense top-n)
+        generate: Optional LLM call, generate(query, chunks) -> response text
+        confidence_threshold: Stage 0 gate on the best dense score
+        log_writer: Optional JSONL writer that receives every query record
+        answer_cache: Semantic answer cache (default: an AnswerCache sized to
+            the query vectors, created on the first retrieval)
+        cache_answers: Look up and store retrieved answers in the answer cache
+    """
+
+    def __init__(
+        self,
+        router: Optional[QueryRouter] = None,
+        retriever: Optional[Any] = None,
+        reranker: Optional[Any] = None,
+        generate: Optional[Callable[[str, List[Dict[str, Any]]], str]] = None,
+        confidence_threshold: float = CONFIDENCE_THRESHOLD,
+        log_writer: Optional[JsonlLogWriter] = None,
+        answer_cache: Optional[AnswerCache] = None,
+        cache_answers: bool = True
+    ):
+        self.router = router if router is not None else QueryRouter()
+        self._retriever = retriever
+        self.reranker = reranker
+        self.generate = generate
+        self.confidence_threshold = confidence_threshold
+        self.log_writer = log_writer
+        self.answer_cache = answer_cache
+        self.cache_answers = cache_answers
+
+    @property
+    def retriever(self) -> Any:
+        if self._retriever is not None:
+            return self._retriever
+        from scripts.retriever import get_retriever
+        retriever = get_retriever()
+        # get_retriever() swaps in new versions; keep the router's domain model in step
+        if getattr(self, "_router_version", None) != retriever.version:
+            self._router_version = retriever.version
+            self.router.domain_model = DomainModel.load(retriever.vector_store_dir) or self.router.domain_model
+        return retriever
+
+    def _cache_lookup(self, query: str, vector: Any, record: Dict[str, Any], trace: Trace) -> bool:
+        """Fill the record from a cached answer; False on a miss."""
+        if not self.cache_answers:
+            return False
+        if self.answer_cache is None:
+            self.answer_cache = AnswerCache(dim=len(vector))
+        with trace.stage(STAGE_ANSWER_CACHE):
+            cached = self.answer_cache.get(query, vector)
+        record["answer_cache"] = {
+            "hit": cached is not None,
+            "similarity": round(cached["cache_similarity"], 4) if cached else None,
+            "cached_query": cached["cached_query"] if cached else None,
+        }
+        if cached is None:
+            return False
+        record.update({field: cached[field] for field in CACHED_FIELDS})
+        return True
+
+    def _retrieve(self, query: str, decision: Dict[str, Any], record: Dict[str, Any], trace: Trace) -> Optional[Any]:
+        """
+        Answer from the cache or by search, Stage 0 and rerank (and generate).
+
+        Returns:
+            The query vector when a fresh answer was produced (to be cached), else None
+        """
+        from scripts.retriever import DEFAULT_TOP_K
+        filters = {"scheme_name": decision["scheme"]} if decision["scheme"] else None
+
+        retriever = self.retriever
+        with trace.stage(STAGE_QUERY_ENCODE):
+            vectors = retriever.encode_queries([query])
+        if self._cache_lookup(query, vectors[0], record, trace):
+            return None
+        with trace.stage(STAGE_SEARCH):
+            results = retriever.search_vectors(vectors, DEFAULT_TOP_K, filters)[0]
+        record["retrieved_chunks"] = [
+            {"chunk_id": r["chunk_id"], "score": round(r["score"], 4), "source_file": r["source_file"]}
+            for r in results
+        ]
+
+        # Stage 0: confidence gate
+        if not results or max(r["score"] for r in results) < self.confidence_threshold:
+            record["refusal_triggered"] = True
+            record["refusal_template"] = "D"
+            record["final_response"] = refusal_response("D")
+            return vectors[0]
+
+        with trace.stage(STAGE_RERANK):
+            if self.reranker is not None:
+                top = self.reranker.rerank(query, results)
+            else:
+                from scripts.reranker import RERANK_TOP_N
+                top = results[:RERANK_TOP_N]
+        record["reranked_chunks"] = [r["chunk_id"] for r in top]
+        record["context"] = top
+
+        if self.generate is not None:
+            with trace.stage(STAGE_GENERATE):
+                raw = self.generate(query, top)
+            citation = CITATION_PATTERN.search(raw)
+            record["llm_response_raw"] = raw
+            record["citation_extracted"] = citation.group(1).strip() if citation else None
+            record["citation_valid"] = citation is not None and any(
+                record["citation_extracted"] in (r["source_file"], r.get("source_url")) for r in top
+            )
+            record["final_response"] = raw
+        return vectors[0]
+
+    def answer(self, query: str) -> Dict[str, Any]:
+        """
+        Answer one query.
+
+        Returns:
+            Query record (architecture.md §9.1 fields, plus type, route = the
+            routing decision, refusal_template, context = the top chunks for
+            the LLM, stages_ms = per-stage latency, and answer_cache = hit,
+            similarity and cache counters for retrieved queries)
+        """
+        trace = Trace()
+        record: Dict[str, Any] = {
+            "type": "query",
+            "timestamp": utc_timestamp(),
+            "query_id": uuid.uuid4().hex,
+            "user_query": query,
+            "query_sanitized": normalize_query(query),
+            "route": None,
+            "refusal_triggered": False,
+            "refusal_template": None,
+            "retrieved_chunks": [],
+            "reranked_chunks": [],
+            "context": [],
+            "llm_response_raw": None,
+            "citation_extracted": None,
+            "citation_valid": None,
+            "final_response": None,
+            "answer_cache": None,
+        }
+        cache_vector = None
+
+        with trace.stage(STAGE_ROUTING):
+            decision = self.router.route(query)
+        record["route"] = {k: v for k, v in decision.items() if k != "fact"}
+
+        if decision["route"] == ROUTE_REFUSE:
+            record["refusal_triggered"] = True
+            record["refusal_template"] = decision["template"]
+            record["final_response"] = refusal_response(decision["template"])
+        elif decision["route"] == ROUTE_FACT:
+            fact = decision["fact"]
+            record["final_response"] = sourced_response(fact["answer"], fact["source_file"])
+            record["citation_extracted"] = fact["source_file"]
+            record["citation_valid"] = True
+        else:
+            nav = None
+            if decision["route"] == ROUTE_NAV:
+                with trace.stage(STAGE_NAV_LOOKUP):
+                    nav = get_nav_index().lookup(decision["matched"])
+            if nav is not None:
+                record["final_response"] = sourced_response(format_nav(nav), NAV_SOURCE_URL)
+                record["citation_extracted"] = NAV_SOURCE_URL
+                record["citation_valid"] = True
+            else:
+                cache_vector = self._retrieve(query, decision, record, trace)
+
+        record["stages_ms"] = trace.stages_ms()
+        record["latency_ms"] = round(trace.elapsed_ms(), 3)
+        if cache_vector is not None and self.cache_answers:
+            sources = sorted({chunk["source_file"] for chunk in record["context"] if chunk.get("source_file")})
+            answer = {field: record[field] for field in CACHED_FIELDS}
+            self.answer_cache.put(query, cache_vector, {**answer, "latency_ms": record["latency_ms"]}, sources)
+        if record["answer_cache"] is not None:
+            stats = self.answer_cache.stats()
+            record["answer_cache"].update(
+                {key: stats[key] for key in ("hits", "misses", "hit_rate", "entries")}
+            )
+        if self.log_writer is not None:
+            # The log keeps chunk ids; the context chunks themselves stay in memory
+            self.log_writer.write({k: v for k, v in record.items() if k != "context"})
+        return record
+
+
+def print_record(record: Dict[str, Any]) -> None:
+    stages = " | ".join(f"{stage} {ms:.2f} ms" for stage, ms in record["stages_ms"].items())
+    print(f"\nQuery: {record['user_query']}")
+    print(f"Route: {record['route']['route']} ({record['route']['reason']}) | {stages} | "
+          f"total {record['latency_ms']:.2f} ms")
+    if record["answer_cache"] and record["answer_cache"]["hit"]:
+        print(f"Answer cache hit ({record['answer_cache']['similarity']:.3f}): "
+              f"{record['answer_cache']['cached_query']}")
+    print("-" * 70)
+    if record["final_response"]:
+        print(record["final_response"])
+    for rank, chunk in enumerate(record["context"], 1):
+        print(f"[{rank}] {chunk['score']:.3f} | {chunk['scheme_name']} | {chunk['document_type']} | "
+              f"{chunk['source_file']}")
+        print(f"    {chunk['text'][:160].replace(chr(10), ' ')}...")
+
+
+def main():
+    """Answer queries from the command line and show the routing decision."""
+    parser = argparse.ArgumentParser(description="Route, retrieve and rerank queries")
+    parser.add_argument("query", nargs="?", help="Query text")
+    parser.add_argument("--file", type=Path, help="Answer every line of a file")
+    parser.add_argument("--reranker", help="Cross-encoder name or path ('overlap': offline stand-in); default: no rerank")
+    parser.add_argument("--log", nargs="?", const=LOG_DIR, type=Path, metavar="LOG_DIR",
+                        help="Append query records to the daily JSONL log")
+    parser.add_argument("--no-answer-cache", action="store_true", help="Always retrieve, never reuse answers")
+    args = parser.parse_args()
+    if not args.query and not args.file:
+        parser.error("a query or --file is required")
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    reranker = None
+    if args.reranker:
+        from scripts.reranker import Reranker
+        reranker = Reranker(model_name=args.reranker)
+    writer = JsonlLogWriter(args.log) if args.log else None
+
+    pipeline = QueryPipeline(reranker=reranker, log_writer=writer, cache_answers=not args.no_answer_cache)
+    if args.query:
+        print_record(pipeline.answer(args.query))
+    else:
+        pipeline.router.log = False
+        queries = [line.strip() for line in open(args.file, encoding="utf-8") if line.strip()]
+        for query in queries:
+            record = pipeline.answer(query)
+            cached = " (cached)" if record["answer_cache"] and record["answer_cache"]["hit"] else ""
+            print(f"{record['latency_ms']:>9.2f} ms  {record['route']['route'] + cached:<21} {query}")
+        if pipeline.answer_cache is not None:
+            stats = pipeline.answer_cache.stats()
+            print(f"\nAnswer cache: {stats['hits']} hits, {stats['misses']} misses "
+                  f"({stats['hit_rate']:.1%}), {stats['latency_saved_ms']:.0f} ms saved")
+
+    if writer is not None:
+        writer.close()
+        print(f"\n[OK] {writer.written} records written to {writer.log_dir} ({writer.dropped} dropped)")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
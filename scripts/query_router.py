@@ -0,0 +1,543 @@
+"""
+Query Router for Groww Mutual Fund RAG System
+
+Cheap front-end classifier that decides what a query needs before anything
+expensive runs: no BGE-M3 encode, no FAISS search. Refusal-class queries
+(architecture.md §7.1), which are a large share of traffic, are answered
+from a template in microseconds; NAV and fact questions go to the NAV index
+and the fact table; everything else goes to retrieval.
+
+Routing, first match wins:
+    1. Advice / prediction       -> refuse, Template A (§7.2 blocklist and variants)
+    2. Opinion / comparison      -> refuse, Template B (§7.5.2)
+    3. Personal data (PII)       -> refuse, Template C
+    4. Another AMC, no HDFC scheme -> refuse, Template C
+    5. NAV of a named scheme     -> nav_lookup (nav_index.py)
+    6. Known fact of a scheme    -> fact_lookup (fact_extraction.py)
+    7. Off-topic                 -> refuse, Template C (domain model, below)
+    8. Anything else             -> retrieve (scheme filter when one is named)
+
+The domain model (router_model.npz, written next to the FAISS index at
+ingestion) is a tiny centroid model built from the chunk embeddings. The
+embeddings are centred and projected to ROUTER_DIM dimensions (PCA). Each
+corpus term gets the mean projected embedding of the chunks it occurs in,
+and each (scheme, document type) group of index_layout.json gets a centroid.
+A query is scored without encoding it: the IDF-weighted sum of its term
+vectors is compared to the group centroids (nearest group, logged as a
+hint), and the IDF-weighted share of its terms found in the corpus is its
+domain coverage. A query with low coverage and no fund vocabulary is
+off-topic.
+
+Every decision is logged (logger "scripts.query_router") as one line with
+the route, template, reason, matched text, coverage, nearest group and
+routing latency, and is returned as a dict for the query log.
+
+Usage:
+    python scripts/query_router.py "Should I invest in HDFC ELSS?"
+    python scripts/query_router.py --file queries.txt          # Route a file of queries, latency per route
+    python scripts/query_router.py --build [vector_store_dir]  # (Re)build router_model.npz
+    python scripts/query_router.py --test                      # Refusal / must-not-refuse examples
+"""
+
+import re
+import sys
+import json
+import time
+import logging
+import tempfile
+import argparse
+from pathlib import Path
+from typing import Dict, List, Any, Optional
+
+import numpy as np
+
+# Local imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from scripts.schemes import detect_scheme, normalize_text
+from scripts.sparse_index import tokenize, SPARSE_INDEX_DIR_NAME
+from scripts.fact_extraction import FactTable, SCHEME_FACTS_PATH
+from scripts.index_layout import IndexLayout
+from scripts.index_factory import read_index, load_vectors
+from scripts.store_versions import current_store_dir, CURRENT_FILE_NAME, VERSIONS_DIR_NAME
+
+# Configuration
+BASE_DIR = Path(__file__).parent.parent
+VECTOR_STORE_DIR = BASE_DIR / "data" / "vector_store"
+ROUTER_MODEL_FILE_NAME = "router_model.npz"
+
+ROUTER_DIM = 64  # PCA dimensions of the centroid model
+ROUTER_MIN_DF = 2  # Chunks a term must occur in to get a term vector
+MIN_DOMAIN_COVERAGE = 0.35  # Below this (and without fund vocabulary) a query is off-topic
+
+ROUTE_REFUSE = "refuse"
+ROUTE_NAV = "nav_lookup"
+ROUTE_FACT = "fact_lookup"
+ROUTE_RETRIEVE = "retrieve"
+
+logger = logging.getLogger(__name__)
+
+
+# ---------------------------------------------------------------------- #
+# Rules (matched against normalize_text(query): lowercase words)
+# ---------------------------------------------------------------------- #
+
+# Template A: advice and predictions (§7.2 L1 blocklist, plus the usual phrasings)
+ADVICE_PATTERN = re.compile(r"\b(?:" + "|".join([
+    r"should i (?:invest|buy|sell|hold|redeem|switch|exit|stop|continue|start|add|put|go for|choose)",
+    r"best (?:fund|scheme|mutual fund|time)",
+    r"which (?:fund|scheme)(?! manager| house)",
+    r"buy or sell",
+    r"recommend\w*",
+    r"better fund",
+    r"good returns?",
+    r"sip suggestion",
+    r"allocate",
+    r"(?:ideal|right|my) (?:asset )?allocation",
+    r"suggest\w*",
+    r"advise me",
+    r"(?:what|how) (?:would|do) you advise",
+    r"(?:need|want|give me|get|seeking) (?:some |your |an |any )?advice",
+    r"your advice",
+    r"worth it",
+    r"profitable",
+    r"risky investment",
+    r"how much (?:should|can|to) i invest",
+    r"is (?:it|now) (?:a )?(?:good|right|the right) time",
+    r"(?:will|would) (?:\w+ ){1,6}(?:give|grow|rise|go up|go down|fall|crash|double|beat|outperform)",
+    r"predict\w*",
+    r"forecast\w*",
+    r"(?:future|expected|projected) (?:returns?|nav|performance|growth)",
+    r"what will (?:be )?(?:the )?(?:nav|returns?|price)",
+    r"(?:nav|returns?) (?:\w+ ){0,6}(?:next|coming) (?:day|week|month|quarter|year)",
+    r"target nav",
+]) + r")\b")
+
+# Template B: opinions and comparisons
+OPINION_PATTERN = re.compile(r"\b(?:" + "|".join([
+    r"(?:is|are) (?:\w+ ){0,6}(?:good|bad|safe|unsafe|reliable|decent|worth)",
+    r"(?:better|worse|safer) than",
+    r"which (?:is|one is) (?:better|best|safer)",
+    r"vs",
+    r"versus",
+    r"compar\w+",
+    r"(?:do|what do) you think",
+    r"opinion",
+    r"too (?:high|low|expensive|risky)",
+]) + r")\b")
+
+# Template C: the user's own data, or personal identifiers (matched on the raw query)
+PERSONAL_PATTERN = re.compile(
+    r"\bmy (?:portfolio|account|folio|holdings?|investments?|units|balance|pan|returns|kyc|statement|transactions?|sips?)\b"
+)
+PII_PATTERN = re.compile("|".join([
+    r"\b[A-Z]{5}[0-9]{4}[A-Z]\b",  # PAN
+    r"(?<!\d)(?:\+91[ -]?)?[6-9]\d{9}(?!\d)",  # Mobile number
+    r"(?<!\d)\d{4} ?\d{4} ?\d{4}(?!\d)",  # Aadhaar
+    r"[\w.+-]+@[\w-]+\.[\w.]+",  # Email
+]))
+
+# Template C: other fund houses (only when no HDFC scheme is named)
+OTHER_AMC_PATTERN = re.compile(r"\b(?:" + "|".join([
+    "sbi", "icici", "axis", "nippon", "kotak", "aditya birla", "birla sun life", "uti", "dsp", "mirae",
+    "tata", "franklin", "parag parikh", "ppfas", "quant", "motilal oswal", "edelweiss", "canara robeco",
+    "bandhan", "invesco", "sundaram", "baroda bnp", "hsbc", "mahindra manulife", "lic mf", "navi",
+]) + r")\b")
+
+# Fund vocabulary: a query using any of it is never off-topic
+DOMAIN_PATTERN = re.compile(r"\b(?:" + "|".join([
+    r"funds?", "mutual", "schemes?", "nav", "sips?", "swp", "stp", "elss", "ter", "aum", "kim", "sid", "sai",
+    "nfo", "cagr", "amc", "hdfc", "sebi", "amfi", "folio", "units?", r"redem\w*", "exit load", "lock in",
+    r"riskometer", "benchmark", "expense ratio", "idcw", "dividend", "direct plan", "regular plan",
+    "equity", "debt", "large cap", "mid cap", "small cap", "flexi cap", "liquid", "tax", "80c", "kyc",
+    "factsheet", "portfolio", "fund manager", "investment objective", "asset allocation", r"invest\w*",
+    "loads?", "returns?", r"holdings?", "ratio", "yield", r"bonds?", "index", "tracking error", "custodian",
+    "registrar", "trustee", "nominee",
+]) + r")\b")
+
+# Self-test cases (--test): (query, expected route, expected template)
+ROUTING_EXAMPLES = [
+    # Refusals (architecture.md §7.5.2)
+    ("Should I invest in HDFC Large Cap Fund for long-term?", ROUTE_REFUSE, "A"),
+    ("Which fund is best for tax saving?", ROUTE_REFUSE, "A"),
+    ("How much should I allocate to HDFC Liquid Fund?", ROUTE_REFUSE, "A"),
+    ("Will HDFC Large Cap Fund give 15% returns next year?", ROUTE_REFUSE, "A"),
+    ("What will be the NAV of HDFC Flexi Cap Fund next month?", ROUTE_REFUSE, "A"),
+    ("Is HDFC Large Cap better than HDFC Flexi Cap?", ROUTE_REFUSE, "B"),
+    ("Is HDFC Balanced Advantage Fund safe?", ROUTE_REFUSE, "B"),
+    ("Show my portfolio returns", ROUTE_REFUSE, "C"),
+    ("My PAN is ABCDE1234F, check my KYC", ROUTE_REFUSE, "C"),
+    ("What is the exit load of SBI Bluechip Fund?", ROUTE_REFUSE, "C"),
+    ("Can you advise me on HDFC Flexi Cap Fund?", ROUTE_REFUSE, "A"),
+    ("I need some advice on investing in HDFC Liquid Fund", ROUTE_REFUSE, "A"),
+]
+# Factual questions that must never be refused (route may be nav, fact or retrieve)
+FACTUAL_EXAMPLES = [
+    "What is the asset allocation of HDFC Large Cap Fund?",
+    "What are the allocation limits for debt in HDFC Flexi Cap Fund?",
+    "How are the assets of HDFC Balanced Advantage Fund allocated?",
+    "Which fund manager manages HDFC Flexi Cap Fund?",
+    "Which fund house manages HDFC Liquid Fund?",
+    "Who manages the HDFC Flexi Cap Fund?",
+    "What is the lock-in period for HDFC ELSS Tax Saver?",
+    "What is the expense ratio of HDFC Liquid Fund direct plan?",
+    "What is the benchmark of HDFC Large Cap Fund?",
+    "What is the tracking error?",
+    "What is the minimum SIP amount for HDFC Flexi Cap Fund?",
+    "What is the NAV of HDFC Liquid Fund?",
+    "Who is the investment adviser of HDFC Large Cap Fund?",
+    "Who is the investment advisor of HDFC Large Cap Fund?",
+    "Is there an advisory fee in HDFC Flexi Cap Fund?",
+]
+
+NAV_PATTERN = re.compile(r"\b(?:nav|net asset value)\b")
+# NAV questions that need the documents: definitions, method, history
+NAV_EXPLAIN_PATTERN = re.compile(
+    r"\b(?:how|why|calculat\w*|mean\w*|defin\w*|explain\w*|histor\w*|19\d\d|20\d\d|last year|since)\b"
+)
+
+
+# Scheme names that AMFI's NAV file spells differently
+NAV_SCHEME_NAMES = {"HDFC Tax Saver (ELSS)": "HDFC ELSS Tax saver"}
+
+
+def nav_query_name(scheme: str, text: str) -> str:
+    """NAV index lookup string for a scheme: Groww shows Direct Plan, Growth Option unless asked otherwise."""
+    plan = "Regular Plan" if " regular " in text else "Direct Plan"
+    option = "IDCW" if " idcw " in text or " dividend " in text else "Growth"
+    return f"{NAV_SCHEME_NAMES.get(scheme, scheme)} - {option} Option - {plan}"
+
+
+# ---------------------------------------------------------------------- #
+# Domain model
+# ---------------------------------------------------------------------- #
+
+def build_router_model(vector_store_dir: Path, dim: int = ROUTER_DIM, min_df: int = ROUTER_MIN_DF) -> Optional[Dict[str, Any]]:
+    """
+    Write router_model.npz for a vector store from its embeddings, sparse index and layout.
+
+    Returns:
+        Build statistics, or None if the store keeps no full-precision vectors
+    """
+    vector_store_dir = Path(vector_store_dir)
+    index = read_index(vector_store_dir / "faiss_index.bin")
+    vectors = load_vectors(vector_store_dir, index)
+    layout = IndexLayout.load(vector_store_dir)
+    sparse_dir = vector_store_dir / SPARSE_INDEX_DIR_NAME
+    if vectors is None or layout is None or not (sparse_dir / "vocab.json").exists():
+        return None
+
+    # Centre and project: top principal directions of the chunk embeddings
+    n, d = vectors.shape
+    dim = min(dim, d, n)
+    block = 65536
+    mean = np.zeros(d, dtype=np.float64)
+    for start in range(0, n, block):
+        mean += np.asarray(vectors[start:start + block], dtype=np.float64).sum(axis=0)
+    mean /= n
+    covariance = np.zeros((d, d), dtype=np.float64)
+    for start in range(0, n, block):
+        centred = np.asarray(vectors[start:start + block], dtype=np.float64) - mean
+        covariance += centred.T @ centred
+    _, eigenvectors = np.linalg.eigh(covariance)
+    components = eigenvectors[:, ::-1][:, :dim].astype(np.float32)
+    projected = np.empty((n, dim), dtype=np.float32)
+    for start in range(0, n, block):
+        projected[start:start + block] = (np.asarray(vectors[start:start + block], dtype=np.float32)
+                                          - mean.astype(np.float32)) @ components
+
+    # Group centroids over the layout's id ranges
+    group_names, centroids = [], []
+    for group in layout.groups:
+        rows = np.concatenate([np.arange(start, end) for start, end in group["ranges"]])
+        centroid = projected[rows].mean(axis=0)
+        norm = np.linalg.norm(centroid)
+        if norm > 0:
+            group_names.append(f"{group['scheme_name']} | {group['document_type']}")
+            centroids.append(centroid / norm)
+
+    # Term vectors: mean projected embedding of the chunks containing the term
+    with open(sparse_dir / "vocab.json", "r", encoding="utf-8") as f:
+        terms = json.load(f)["terms"]
+    indptr = np.load(sparse_dir / "indptr.npy", mmap_mode="r")
+    doc_ids = np.load(sparse_dir / "doc_ids.npy", mmap_mode="r")
+    df = np.diff(indptr)
+    keep = np.flatnonzero(df >= min_df)
+    term_vectors = np.zeros((len(keep), dim), dtype=np.float32)
+    for i, t in enumerate(keep):
+        term_vectors[i] = projected[doc_ids[indptr[t]:indptr[t + 1]]].mean(axis=0)
+    idf = np.log1p(n / df[keep]).astype(np.float32)
+
+    np.savez(
+        vector_store_dir / ROUTER_MODEL_FILE_NAME,
+        terms=np.array([terms[t] for t in keep]),
+        idf=idf,
+        term_vectors=term_vectors.astype(np.float16),
+        max_idf=np.float32(np.log1p(n)),
+        groups=np.array(group_names),
+        centroids=np.array(centroids, dtype=np.float32).reshape(len(group_names), dim),
+    )
+    return {"num_rows": n, "dim": dim, "num_terms": len(keep), "num_groups": len(group_names)}
+
+
+class DomainModel:
+    """Term-vector / centroid model of the indexed corpus (router_model.npz)."""
+
+    def __init__(self, path: Path):
+        with np.load(path) as data:
+            self.term_ids: Dict[str, int] = {term: i for i, term in enumerate(data["terms"].tolist())}
+            self.idf = data["idf"]
+            self.term_vectors = data["term_vectors"].astype(np.float32)
+            self.max_idf = float(data["max_idf"])
+            self.groups: List[str] = data["groups"].tolist()
+            self.centroids = data["centroids"]
+
+    @classmethod
+    def load(cls, vector_store_dir: Path) -> Optional["DomainModel"]:
+        path = Path(vector_store_dir) / ROUTER_MODEL_FILE_NAME
+        if not path.exists():
+            return None
+        return cls(path)
+
+    def score(self, query: str) -> Dict[str, Any]:
+        """
+        Domain coverage and nearest (scheme, document type) group of a query.
+
+        Returns:
+            Dict with coverage (0..1), nearest_group and group_similarity (None without known terms)
+        """
+        tokens = set(tokenize(query))
+        rows = [self.term_ids[t] for t in tokens if t in self.term_ids]
+        known = float(self.idf[rows].sum()) if rows else 0.0
+        unknown = (len(tokens) - len(rows)) * self.max_idf
+        result = {
+            "coverage": known / (known + unknown) if tokens else 0.0,
+            "nearest_group": None,
+            "group_similarity": None,
+        }
+        if rows and len(self.groups):
+            vector = self.idf[rows] @ self.term_vectors[rows]
+            norm = np.linalg.norm(vector)
+            if norm > 0:
+                similarities = self.centroids @ (vector / norm)
+                best = int(np.argmax(similarities))
+                result["nearest_group"] = self.groups[best]
+                result["group_similarity"] = float(similarities[best])
+        return result
+
+
+# ---------------------------------------------------------------------- #
+# Router
+# ---------------------------------------------------------------------- #
+
+def format_decision(decision: Dict[str, Any]) -> str:
+    """One log line for a routing decision."""
+    parts = [f"route={decision['route']}"]
+    if decision["template"]:
+        parts.append(f"template={decision['template']}")
+    parts.append(f"reason={decision['reason']}")
+    if decision["matched"]:
+        parts.append(f"matched={decision['matched']!r}")
+    if decision["scheme"]:
+        parts.append(f"scheme={decision['scheme']!r}")
+    if decision["coverage"] is not None:
+        parts.append(f"coverage={decision['coverage']:.2f}")
+    if decision["nearest_group"]:
+        parts.append(f"group={decision['nearest_group']!r} ({decision['group_similarity']:.2f})")
+    parts.append(f"latency={decision['latency_us']:.0f}us")
+    return "[ROUTE] " + " ".join(parts)
+
+
+class QueryRouter:
+    """
+    Routes a query to a refusal template, a NAV / fact lookup or retrieval.
+
+    Args:
+        vector_store_dir: Vector store whose current version holds router_model.npz
+        domain_model: Preloaded domain model (default: load from the current version,
+            or from the store itself if it is flat)
+        fact_table: Preloaded fact table (default: load scheme_facts.json if present)
+        log: Log every decision at INFO level
+    """
+
+    def __init__(
+        self,
+        vector_store_dir: Path = VECTOR_STORE_DIR,
+        domain_model: Optional[DomainModel] = None,
+        fact_table: Optional[FactTable] = None,
+        log: bool = True
+    ):
+        if domain_model is None:
+            # Same resolution as retriever.get_retriever: CURRENT version, else the flat store
+            domain_model = DomainModel.load(current_store_dir(vector_store_dir))
+        self.domain_model = domain_model
+        self.fact_table = fact_table if fact_table is not None else FactTable.load(SCHEME_FACTS_PATH)
+        self.log = log
+
+    def _classify(self, query: str) -> Dict[str, Any]:
+        text = f" {normalize_text(query)} "
+        scheme = detect_scheme(query)
+        decision = {
+            "route": ROUTE_RETRIEVE, "template": None, "reason": "in_scope", "matched": None,
+            "scheme": scheme, "fact_type": None, "coverage": None, "nearest_group": None,
+            "group_similarity": None,
+        }
+
+        def refuse(template: str, reason: str, match: Optional[str]) -> Dict[str, Any]:
+            decision.update(route=ROUTE_REFUSE, template=template, reason=reason, matched=match)
+            return decision
+
+        match = ADVICE_PATTERN.search(text)
+        if match:
+            return refuse("A", "advice", match.group(0))
+        match = OPINION_PATTERN.search(text)
+        if match:
+            return refuse("B", "opinion", match.group(0))
+        match = PERSONAL_PATTERN.search(text) or PII_PATTERN.search(query)
+        if match:
+            return refuse("C", "personal_data", match.group(0))
+        if scheme is None and " hdfc " not in text:
+            match = OTHER_AMC_PATTERN.search(text)
+            if match:
+                return refuse("C", "other_amc", match.group(0))
+
+        if scheme is not None and NAV_PATTERN.search(text) and not NAV_EXPLAIN_PATTERN.search(text):
+            decision.update(route=ROUTE_NAV, reason="nav", matched=nav_query_name(scheme, text))
+            return decision
+        if scheme is not None and self.fact_table is not None:
+            fact = self.fact_table.answer(query, scheme)
+            if fact is not None:
+                decision.update(route=ROUTE_FACT, reason="fact", fact_type=fact["fact_type"], fact=fact)
+                return decision
+
+        domain = DOMAIN_PATTERN.search(text)
+        if self.domain_model is not None:
+            decision.update(self.domain_model.score(query))
+            if domain is None and decision["coverage"] < MIN_DOMAIN_COVERAGE:
+                return refuse("C", "off_topic", None)
+        if domain is not None:
+            decision["matched"] = domain.group(0)
+        return decision
+
+    def route(self, query: str) -> Dict[str, Any]:
+        """
+        Classify a query without encoding it.
+
+        Returns:
+            Decision dict: route, template (A/B/C for refusals), reason, matched text,
+            scheme, fact_type (and fact for fact_lookup), coverage, nearest_group,
+            group_similarity, latency_us
+        """
+        start = time.perf_counter()
+        decision = self._classify(query)
+        decision["latency_us"] = (time.perf_counter() - start) * 1e6
+        if self.log:
+            logger.info(format_decision(decision))
+        return decision
+
+
+def run_tests() -> bool:
+    """Route the built-in examples: refusals must get their template, factual questions must not be refused."""
+    print("=" * 70)
+    print("Query Router - Test Suite")
+    print("=" * 70)
+
+    router = QueryRouter(log=False)
+    cases = [(query, route, template) for query, route, template in ROUTING_EXAMPLES]
+    cases += [(query, None, None) for query in FACTUAL_EXAMPLES]
+
+    passed = 0
+    failed = 0
+    for query, expected_route, expected_template in cases:
+        decision = router.route(query)
+        if expected_route is None:
+            ok = decision["route"] != ROUTE_REFUSE
+        else:
+            ok = decision["route"] == expected_route and decision["template"] == expected_template
+        if ok:
+            print(f"[PASS] {query}")
+            passed += 1
+        else:
+            expected = f"{expected_route} ({expected_template})" if expected_route else "not refused"
+            print(f"[FAIL] {query}")
+            print(f"       got {decision['route']} ({decision['template']}, {decision['reason']}, "
+                  f"matched {decision['matched']!r}), expected {expected}")
+            failed += 1
+
+    # The domain model is found in a flat store and in the current version of a versioned one
+    with tempfile.TemporaryDirectory() as tmp:
+        flat, versioned = Path(tmp) / "flat", Path(tmp) / "versioned"
+        version_dir = versioned / VERSIONS_DIR_NAME / "20260101-000000-000000"
+        for store_dir in (flat, version_dir):
+            store_dir.mkdir(parents=True)
+            np.savez(
+                store_dir / ROUTER_MODEL_FILE_NAME, terms=np.array(["exit", "load"]), idf=np.ones(2, np.float32),
+                term_vectors=np.eye(2, dtype=np.float32), max_idf=np.float32(1.0),
+                groups=np.array(["HDFC Large Cap Fund|KIM"]), centroids=np.eye(1, 2, dtype=np.float32)
+            )
+        (versioned / CURRENT_FILE_NAME).write_text(version_dir.name + "\n", encoding="utf-8")
+        for name, store_dir in (("flat", flat), ("versioned", versioned)):
+            ok = QueryRouter(store_dir, fact_table=router.fact_table, log=False).domain_model is not None
+            print(f"[{'PASS' if ok else 'FAIL'}] domain model loads from a {name} store")
+            passed += ok
+            failed += not ok
+
+    print("-" * 70)
+    print(f"Results: {passed} passed, {failed} failed")
+    print("=" * 70)
+
+    return failed == 0
+
+
+def main():
+    """Route queries from the command line, or build the domain model."""
+    parser = argparse.ArgumentParser(description="Route queries before retrieval")
+    parser.add_argument("query", nargs="?", help="Query text")
+    parser.add_argument("--file", type=Path, help="Route every line of a file and report latency per route")
+    parser.add_argument("--build", nargs="?", const=VECTOR_STORE_DIR, type=Path, metavar="VECTOR_STORE_DIR",
+                        help="(Re)build router_model.npz for the current version")
+    parser.add_argument("--test", action="store_true", help="Route the built-in refusal and factual examples")
+    args = parser.parse_args()
+
+    if args.test:
+        return 0 if run_tests() else 1
+
+    if args.build:
+        store_dir = current_store_dir(args.build)
+        stats = build_router_model(store_dir)
+        if stats is None:
+            print(f"[ERROR] {store_dir} has no full-precision vectors, index layout or sparse index")
+            return 1
+        print(f"[OK] Router model: {stats['num_terms']} terms, {stats['num_groups']} groups, "
+              f"{stats['dim']} dims from {stats['num_rows']} chunks")
+        print(f"     Saved to {store_dir / ROUTER_MODEL_FILE_NAME}")
+        return 0
+
+    if not args.query and not args.file:
+        parser.error("a query, --file, --build or --test is required")
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    router = QueryRouter(log=args.file is None)
+    if router.domain_model is None:
+        print("[WARN] No router_model.npz in the current vector store - off-topic detection disabled")
+
+    if args.query:
+        decision = router.route(args.query)
+        return 0 if decision else 1
+
+    queries = [line.strip() for line in open(args.file, encoding="utf-8") if line.strip()]
+    latencies: Dict[str, List[float]] = {}
+    for query in queries:
+        decision = router.route(query)
+        latencies.setdefault(decision["route"], []).append(decision["latency_us"])
+        template = f" ({decision['template']})" if decision["template"] else ""
+        print(f"{decision['route'] + template:<16} {decision['reason']:<14} {query}")
+    print("-" * 70)
+    for route, values in sorted(latencies.items()):
+        values = np.array(values)
+        print(f"{route:<12} {len(values):>5} queries | p50 {np.percentile(values, 50):7.1f} us | "
+              f"p99 {np.percentile(values, 99):7.1f} us")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,329 @@
+"""
+Refresh Scheduler for Groww Mutual Fund RAG System
+
+Nightly entry point that does only the work the staleness rules call for
+(architecture.md §10.2):
+
+    1. Downloads: corpus sources past their threshold (by last download),
+       never fetched or failed, missing on disk, or landing pages of a
+       document type whose indexed documents went stale. Fetched with
+       conditional requests, so unchanged sources cost a 304.
+    2. Ingestion: an incremental ingest runs only if a scheme PDF was
+       added, removed or changed since it was indexed. Files whose mtime
+       and size equal the values recorded at ingest are not even hashed.
+    3. freshness_index.json (architecture.md §10.3) is rewritten.
+
+Usage:
+    python scripts/refresh_scheduler.py                     # Refresh what is due
+    python scripts/refresh_scheduler.py --dry-run           # Only print the plan
+    python scripts/refresh_scheduler.py --as-of 2026-03-01 --dry-run
+    python scripts/refresh_scheduler.py --test                # Built-in test cases
+"""
+
+import os
+import sys
+import json
+import argparse
+import tempfile
+from datetime import datetime, date, timezone
+from pathlib import Path
+from typing import Dict, List, Any, Optional
+
+# Local imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from scripts.download_corpus import (
+    CORPUS, MANIFEST_PATH, RAW_DATA_DIR, DOWNLOAD_WORKERS, PER_HOST_CONCURRENCY,
+    calculate_file_checksum, file_signature, download_corpus, load_manifest,
+    resolve_manifest_path, validate_corpus
+)
+from scripts.freshness import (
+    VECTOR_STORE_DIR, FRESHNESS_INDEX_PATH,
+    build_freshness_index, load_indexed_sources, write_freshness_index
+)
+from scripts.schemes import SCHEME_NAMES
+
+# Configuration
+BASE_DIR = Path(__file__).parent.parent
+SCHEMES_DIR = BASE_DIR / "data" / "raw" / "schemes"
+
+# Manifest category -> indexed document types its landing pages publish
+CATEGORY_DOCUMENT_TYPES: Dict[str, List[str]] = {
+    "KIM": ["KIM"],
+    "SID": ["SID"],
+    "Scheme Summary": ["SCHEME_SUMMARY_DOCUMENT"],
+    "Factsheet": ["Fund_Facts"],
+    "Leaflet": ["Leaflet"],
+    "Presentation": ["Presentation"],
+}
+
+
+def detect_source_changes(
+    sources: Dict[str, Dict[str, Any]],
+    schemes_dir: Path = SCHEMES_DIR
+) -> Dict[str, List[str]]:
+    """
+    Compare the scheme PDFs on disk with the indexed source files.
+
+    A file whose mtime and size both equal the ones recorded at ingest is
+    unchanged without being read. Any other file is hashed and compared with
+    the indexed checksum, so a replacement that kept an old mtime is still
+    caught (stores without checksums count files as changed, like ingestion
+    does).
+
+    Returns:
+        Dictionary with file name lists: new, changed, unchanged, deleted
+    """
+    on_disk = {
+        pdf_path.name: pdf_path
+        for folder in sorted(schemes_dir.iterdir()) if folder.is_dir() and folder.name != "Common"
+        for pdf_path in sorted(folder.glob("*.pdf"))
+    } if schemes_dir.exists() else {}
+
+    plan = {"new": [], "changed": [], "unchanged": [], "deleted": []}
+    for name, pdf_path in sorted(on_disk.items()):
+        meta = sources.get(name)
+        if meta is None:
+            plan["new"].append(name)
+            continue
+        recorded = (meta.get("source_mtime_ns"), meta.get("source_size"))
+        if meta.get("checksum") and None not in recorded and file_signature(pdf_path) == recorded:
+            plan["unchanged"].append(name)
+            continue
+        if meta.get("checksum") and calculate_file_checksum(pdf_path) == meta["checksum"]:
+            plan["unchanged"].append(name)
+        else:
+            plan["changed"].append(name)
+
+    plan["deleted"] = sorted(name for name in sources if name not in on_disk)
+    return plan
+
+
+def plan_downloads(
+    corpus: List[Dict[str, Any]],
+    manifest: Optional[Dict[str, Any]],
+    freshness: Dict[str, Any]
+) -> List[Dict[str, Any]]:
+    """
+    Corpus documents due for download, each with the reason.
+
+    Args:
+        corpus: Corpus entries (download_corpus.CORPUS)
+        manifest: Current corpus manifest
+        freshness: Index from build_freshness_index (with the same manifest)
+
+    Returns:
+        {"doc": corpus entry, "reason": str} in corpus order
+    """
+    previous = {d["url"]: d for d in (manifest or {}).get("documents", [])}
+    source_entries = {e["url"]: e for e in freshness["sources"]}
+    stale_documents = [e for e in freshness["documents"] if e["is_stale"]]
+
+    due = []
+    for doc in corpus:
+        entry = previous.get(doc["url"])
+        source = source_entries.get(doc["url"])
+        reason = None
+        if entry is None:
+            reason = "not in manifest"
+        elif entry["status"] != "success":
+            reason = f"last download {entry['status']}"
+        elif not entry.get("file_path") or not (BASE_DIR / resolve_manifest_path(entry["file_path"])).exists():
+            reason = "file missing"
+        elif source and source["is_stale"]:
+            reason = f"stale since {source['next_scheduled_refresh']}"
+        else:
+            # Landing pages are re-checked when the documents they publish are stale
+            types = CATEGORY_DOCUMENT_TYPES.get(doc["category"], [])
+            stale = [
+                e for e in stale_documents
+                if e["document_type"] in types
+                and (doc["scheme"] == e["scheme_name"] or doc["scheme"] not in SCHEME_NAMES)
+            ]
+            if stale:
+                reason = f"{len(stale)} stale {'/'.join(types)} document(s)"
+        if reason:
+            due.append({"doc": doc, "reason": reason})
+    return due
+
+
+def merge_manifest(manifest: Optional[Dict[str, Any]], results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Replace the refreshed entries of a manifest (corpus order) and re-validate it."""
+    by_url = {d["url"]: d for d in (manifest or {}).get("documents", [])}
+    by_url.update({r["url"]: r for r in results})
+    documents = [by_url[doc["url"]] for doc in CORPUS if doc["url"] in by_url]
+
+    merged = {
+        "corpus_name": "Groww Mutual Fund FAQ - HDFC AMC",
+        "version": "1.0",
+        "source_file": "corpus.md",
+        **{k: v for k, v in (manifest or {}).items() if k not in ("documents", "validation")},
+        "created_at": datetime.now(timezone.utc).isoformat().replace("+00:00", "Z"),
+        "documents": documents,
+    }
+    merged["validation"] = validate_corpus(merged)
+    return merged
+
+
+def save_manifest(manifest: Dict[str, Any], manifest_path: Path = MANIFEST_PATH) -> None:
+    """Write the manifest atomically (a crash never leaves it half-written)."""
+    tmp_path = manifest_path.with_name(manifest_path.name + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+    tmp_path.replace(manifest_path)
+
+
+def run_tests():
+    """Run built-in test cases for detect_source_changes on files in a temporary directory."""
+    print("=" * 70)
+    print("Refresh Scheduler - Test Suite")
+    print("=" * 70)
+
+    passed = 0
+    failed = 0
+
+    def check(name: str, ok: bool) -> None:
+        nonlocal passed, failed
+        print(f"[{'PASS' if ok else 'FAIL'}] {name}")
+        if ok:
+            passed += 1
+        else:
+            failed += 1
+
+    def indexed(pdf_path: Path) -> Dict[str, Any]:
+        """Source metadata as ingestion records it."""
+        mtime_ns, size = file_signature(pdf_path)
+        return {"checksum": calculate_file_checksum(pdf_path), "source_mtime_ns": mtime_ns, "source_size": size}
+
+    def set_mtime(pdf_path: Path, mtime_ns: int) -> None:
+        os.utime(pdf_path, ns=(mtime_ns, mtime_ns))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        schemes_dir = Path(tmp)
+        (schemes_dir / "HDFC_Liquid").mkdir()
+        (schemes_dir / "Common").mkdir()
+        kim = schemes_dir / "HDFC_Liquid" / "HDFC_Liquid_KIM.pdf"
+        sid = schemes_dir / "HDFC_Liquid" / "HDFC_Liquid_SID.pdf"
+        kim.write_bytes(b"%PDF-1.4 KIM version 1")
+        sid.write_bytes(b"%PDF-1.4 SID version 1")
+        (schemes_dir / "Common" / "Riskometer.pdf").write_bytes(b"%PDF-1.4 common")
+        base_ns = 1_700_000_000 * 10**9
+        set_mtime(kim, base_ns)
+        set_mtime(sid, base_ns)
+        sources = {kim.name: indexed(kim), sid.name: indexed(sid), "HDFC_Liquid_Leaflet.pdf": {"checksum": "x"}}
+
+        plan = detect_source_changes(sources, schemes_dir)
+        check("matching mtime and size are unchanged", plan["unchanged"] == [kim.name, sid.name])
+        check("indexed file missing on disk is deleted", plan["deleted"] == ["HDFC_Liquid_Leaflet.pdf"])
+        check("Common folder is ignored", not plan["new"] and not plan["changed"])
+
+        # Same size, different content, restored with an mtime older than the indexed one
+        kim.write_bytes(b"%PDF-1.4 KIM version 2")
+        set_mtime(kim, base_ns - 86_400 * 10**9)
+        plan = detect_source_changes(sources, schemes_dir)
+        check("file restored with an older mtime is re-hashed and changed", plan["changed"] == [kim.name])
+
+        kim.write_bytes(b"%PDF-1.4 KIM version 1")
+        set_mtime(kim, base_ns - 86_400 * 10**9)
+        plan = detect_source_changes(sources, schemes_dir)
+        check("touched file with the indexed content is unchanged", kim.name in plan["unchanged"])
+
+        sid.write_bytes(b"%PDF-1.4 SID version 1 with an addendum")
+        set_mtime(sid, base_ns)
+        plan = detect_source_changes(sources, schemes_dir)
+        check("size change with the same mtime is changed", plan["changed"] == [sid.name])
+
+        (schemes_dir / "HDFC_Liquid" / "HDFC_Liquid_Presentation.pdf").write_bytes(b"%PDF-1.4 new")
+        legacy = {name: {"checksum": meta["checksum"]} for name, meta in sources.items() if name == kim.name}
+        plan = detect_source_changes(legacy, schemes_dir)
+        check("store without signatures falls back to hashing", plan["unchanged"] == [kim.name])
+        check("files not in the store are new", plan["new"] == ["HDFC_Liquid_Presentation.pdf", sid.name])
+        plan = detect_source_changes({kim.name: {}}, schemes_dir)
+        check("store without checksums counts files as changed", plan["changed"] == [kim.name])
+
+    print("-" * 70)
+    print(f"Results: {passed} passed, {failed} failed")
+    print("=" * 70)
+
+    return failed == 0
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Refresh sources that are due and update the freshness index")
+    parser.add_argument("--as-of", type=date.fromisoformat, default=None, help="Reference date (YYYY-MM-DD)")
+    parser.add_argument("--dry-run", action="store_true", help="Print the plan without downloading or ingesting")
+    parser.add_argument("--skip-ingest", action="store_true", help="Download only; never run ingestion")
+    parser.add_argument("--workers", type=int, default=DOWNLOAD_WORKERS, help="Download threads")
+    parser.add_argument("--per-host", type=int, default=PER_HOST_CONCURRENCY,
+                        help="Maximum concurrent requests per host")
+    parser.add_argument("--test", action="store_true", help="Run the built-in test cases and exit")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None):
+    """Main entry point for the scheduled refresh."""
+    args = parse_args(argv)
+    if args.test:
+        return 0 if run_tests() else 1
+    today = args.as_of or datetime.now(timezone.utc).date()
+
+    print("=" * 70)
+    print(f"Groww Mutual Fund RAG - Scheduled Refresh ({today.isoformat()})")
+    print("=" * 70)
+
+    manifest = load_manifest(MANIFEST_PATH)
+    sources = load_indexed_sources(VECTOR_STORE_DIR)
+    freshness = build_freshness_index(sources, manifest, today)
+
+    # 1. Downloads
+    due = plan_downloads(CORPUS, manifest, freshness)
+    print(f"\n[1/3] Downloads due: {len(due)} of {len(CORPUS)}")
+    for item in due:
+        print(f"      - [{item['doc']['id']:02d}] {item['doc']['name']}: {item['reason']}")
+
+    # 2. Ingestion
+    changes = detect_source_changes(sources, SCHEMES_DIR)
+    needs_ingest = bool(changes["new"] or changes["changed"] or changes["deleted"])
+    print(f"\n[2/3] Scheme PDFs - New: {len(changes['new'])} | Changed: {len(changes['changed'])} | "
+          f"Unchanged: {len(changes['unchanged'])} | Deleted: {len(changes['deleted'])}")
+    for kind in ("new", "changed", "deleted"):
+        for name in changes[kind]:
+            print(f"      - {kind}: {name}")
+    stale = [e for e in freshness["documents"] if e["is_stale"]]
+    if stale:
+        print(f"      [WARN] {len(stale)} indexed document types are stale; "
+              f"newer PDFs must be added under {SCHEMES_DIR.relative_to(BASE_DIR)}")
+
+    if args.dry_run:
+        print("\n[INFO] Dry run - nothing downloaded or ingested")
+        return 0
+
+    failed = 0
+    if due:
+        results = download_corpus([item["doc"] for item in due], manifest, RAW_DATA_DIR, args.workers, args.per_host)
+        manifest = merge_manifest(manifest, results)
+        save_manifest(manifest, MANIFEST_PATH)
+        fetched = sum(1 for r in results if r["status"] == "success" and not r["not_modified"])
+        not_modified = sum(1 for r in results if r["not_modified"])
+        failed = sum(1 for r in results if r["status"] != "success")
+        print(f"      [{'WARN' if failed else 'OK'}] Downloaded {fetched}, not modified {not_modified}, failed {failed}")
+
+    ingest_status = 0
+    if needs_ingest and not args.skip_ingest:
+        # Imported here: ingestion loads the PDF parser, FAISS and the embedding model
+        from scripts.ingest_documents import main as ingest_main
+        ingest_status = ingest_main(["--incremental"])
+    elif needs_ingest:
+        print("      [WARN] Scheme PDFs changed but --skip-ingest was given")
+    else:
+        print("      [OK] Vector store is up to date - ingestion skipped")
+
+    # 3. Freshness index
+    index = write_freshness_index(VECTOR_STORE_DIR, FRESHNESS_INDEX_PATH, manifest, today)
+    print(f"\n[3/3] [OK] Freshness index written to {FRESHNESS_INDEX_PATH} "
+          f"({index['stale_documents']} stale documents, {index['stale_sources']} stale sources)")
+
+    return 1 if failed or ingest_status else 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,424 @@
+"""
+Cross-Encoder Reranker for Groww Mutual Fund RAG System
+
+Stage 3 of retrieval (architecture.md §4.2.5): rerank the top-20 dense
+candidates to the top-3 with cross-encoder/ms-marco-MiniLM-L-6-v2.
+
+Latency controls:
+    - One padded batch: all (query, chunk) pairs of a request (or of several
+      requests, see rerank_many / RerankBatcher) go through a single
+      predict() call instead of a per-pair loop.
+    - Score cache: scores are cached per (query hash, chunk_id), so repeated
+      and refined questions only score the chunks not seen before.
+    - Margin skip: when the best dense score leads the runner-up by at least
+      SKIP_MARGIN the dense order is kept and the cross-encoder is not run.
+    - Micro-batching: RerankBatcher collects requests from concurrent
+      threads for a few milliseconds and scores them together.
+
+The model is anything with a CrossEncoder-compatible predict(pairs), so a
+local stand-in (OverlapScorer, or a local model path) works offline.
+
+Usage:
+    python scripts/reranker.py "What is the exit load of HDFC Liquid Fund?"
+    python scripts/reranker.py "expense ratio" --scheme "HDFC Large Cap Fund" --model overlap
+    python scripts/reranker.py --test    # Offline self-test with OverlapScorer
+"""
+
+import sys
+import time
+import queue
+import hashlib
+import argparse
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Local imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from scripts.sparse_index import tokenize
+
+# Configuration
+RERANKER_MODEL = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+RERANK_TOP_N = 3  # Chunks passed to the LLM (architecture.md §4.2.5)
+RERANK_MAX_LENGTH = 512  # Query + chunk tokens per pair
+SKIP_MARGIN = 0.15  # Dense score lead of the best candidate that makes reranking unnecessary
+SCORE_CACHE_SIZE = 100_000  # (query, chunk) scores kept
+
+MICRO_BATCH_WAIT_MS = 5.0  # How long the batcher waits for more requests
+MICRO_BATCH_MAX_PAIRS = 256  # Pairs that trigger a batch without waiting
+
+Request = Tuple[str, List[Dict[str, Any]], Optional[int]]
+
+
+def query_key(query: str) -> bytes:
+    """Cache key of a query (the model is uncased, so case and spacing are ignored)."""
+    return hashlib.blake2b(" ".join(query.lower().split()).encode("utf-8"), digest_size=8).digest()
+
+
+class OverlapScorer:
+    """
+    Offline stand-in for the cross-encoder: fraction of query terms found in the chunk.
+
+    Same predict() signature as sentence_transformers.CrossEncoder.
+    """
+
+    def predict(self, pairs: Sequence[Tuple[str, str]], batch_size: int = 32, show_progress_bar: bool = False) -> np.ndarray:
+        scores = np.zeros(len(pairs), dtype=np.float32)
+        for i, (query, text) in enumerate(pairs):
+            terms = set(tokenize(query))
+            if terms:
+                scores[i] = len(terms & set(tokenize(text))) / len(terms)
+        return scores
+
+
+def load_reranker_model(model_name: str = RERANKER_MODEL) -> Any:
+    """Load a CrossEncoder by name or local path ("overlap" for the offline stand-in)."""
+    if model_name == "overlap":
+        return OverlapScorer()
+    from sentence_transformers import CrossEncoder
+    return CrossEncoder(model_name, max_length=RERANK_MAX_LENGTH)
+
+
+class Reranker:
+    """
+    Batched cross-encoder reranker with a (query, chunk_id) score cache.
+
+    Args:
+        model: Preloaded model with a CrossEncoder-compatible predict(pairs)
+        model_name: Model to load when `model` is not given
+        top_n: Chunks returned per query
+        skip_margin: Dense score lead that skips reranking (None: always rerank)
+        cache_size: Maximum cached pair scores
+    """
+
+    def __init__(
+        self,
+        model: Optional[Any] = None,
+        model_name: str = RERANKER_MODEL,
+        top_n: int = RERANK_TOP_N,
+        skip_margin: Optional[float] = SKIP_MARGIN,
+        cache_size: int = SCORE_CACHE_SIZE
+    ):
+        self.model = model if model is not None else load_reranker_model(model_name)
+        self.top_n = top_n
+        self.skip_margin = skip_margin
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[Tuple[bytes, str], float]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.queries = 0
+        self.skipped = 0
+        self.cache_hits = 0
+        self.pairs_scored = 0
+        self.predict_calls = 0
+
+    def should_skip(self, results: List[Dict[str, Any]]) -> bool:
+        """True if the dense order is already clear (or there is nothing to reorder)."""
+        if len(results) < 2:
+            return True
+        if self.skip_margin is None:
+            return False
+        return results[0]["score"] - results[1]["score"] >= self.skip_margin
+
+    def score_many(self, requests: List[Tuple[str, List[Dict[str, Any]]]]) -> List[np.ndarray]:
+        """
+        Cross-encoder scores for the chunks of several queries, in one predict() call.
+
+        Args:
+            requests: (query, chunks) pairs; chunks need "chunk_id" and "text"
+
+        Returns:
+            One score array per request, aligned with its chunks
+        """
+        outputs = [np.empty(len(chunks), dtype=np.float32) for _, chunks in requests]
+        pending: List[Tuple[int, int, Tuple[bytes, str]]] = []
+        pairs: List[Tuple[str, str]] = []
+
+        with self._lock:
+            for r, (query, chunks) in enumerate(requests):
+                qkey = query_key(query)
+                for c, chunk in enumerate(chunks):
+                    key = (qkey, chunk["chunk_id"])
+                    cached = self._cache.get(key)
+                    if cached is not None:
+                        self._cache.move_to_end(key)
+                        outputs[r][c] = cached
+                        self.cache_hits += 1
+                    else:
+                        pending.append((r, c, key))
+                        pairs.append((query, chunk["text"]))
+
+        if pairs:
+            scores = np.asarray(
+                self.model.predict(pairs, batch_size=len(pairs), show_progress_bar=False),
+                dtype=np.float32
+            ).reshape(-1)
+            with self._lock:
+                self.predict_calls += 1
+                self.pairs_scored += len(pairs)
+                for (r, c, key), score in zip(pending, scores):
+                    outputs[r][c] = score
+                    self._cache[key] = float(score)
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return outputs
+
+    def rerank_many(self, requests: List[Request]) -> List[List[Dict[str, Any]]]:
+        """
+        Rerank several queries' candidates with a single model call.
+
+        Args:
+            requests: (query, dense results, top_n or None) triples
+
+        Returns:
+            Top-n results per request, each with "rerank_score" (None when skipped)
+        """
+        to_score = [i for i, (_, results, _) in enumerate(requests) if not self.should_skip(results)]
+        scores = self.score_many([(requests[i][0], requests[i][1]) for i in to_score])
+        by_request = dict(zip(to_score, scores))
+
+        outputs = []
+        for i, (_, results, top_n) in enumerate(requests):
+            top_n = top_n or self.top_n
+            if i not in by_request:
+                outputs.append([{**r, "rerank_score": None} for r in results[:top_n]])
+                continue
+            order = np.argsort(-by_request[i], kind="stable")[:top_n]
+            outputs.append([{**results[j], "rerank_score": float(by_request[i][j])} for j in order])
+
+        with self._lock:
+            self.queries += len(requests)
+            self.skipped += len(requests) - len(to_score)
+        return outputs
+
+    def rerank(self, query: str, results: List[Dict[str, Any]], top_n: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Rerank one query's dense results and keep the top n."""
+        return self.rerank_many([(query, results, top_n)])[0]
+
+    def stats(self) -> Dict[str, Any]:
+        """Return reranking and cache statistics."""
+        lookups = self.cache_hits + self.pairs_scored
+        return {
+            "queries": self.queries,
+            "skipped": self.skipped,
+            "skip_rate": self.skipped / self.queries if self.queries else 0.0,
+            "predict_calls": self.predict_calls,
+            "pairs_scored": self.pairs_scored,
+            "avg_batch_pairs": self.pairs_scored / self.predict_calls if self.predict_calls else 0.0,
+            "cache_entries": len(self._cache),
+            "cache_hits": self.cache_hits,
+            "cache_hit_rate": self.cache_hits / lookups if lookups else 0.0,
+        }
+
+
+class RerankBatcher:
+    """
+    Micro-batches rerank requests from concurrent threads.
+
+    A background thread takes the first waiting request, collects more for
+    up to max_wait_ms (or until max_pairs pairs are queued) and reranks them
+    with one Reranker.rerank_many call. Callers block on their own result.
+    After close(), rerank() scores synchronously on the calling thread.
+    """
+
+    def __init__(
+        self,
+        reranker: Reranker,
+        max_wait_ms: float = MICRO_BATCH_WAIT_MS,
+        max_pairs: int = MICRO_BATCH_MAX_PAIRS
+    ):
+        self.reranker = reranker
+        self.max_wait = max_wait_ms / 1000.0
+        self.max_pairs = max_pairs
+        self.batches = 0
+        self.closed = False
+        self._closing_lock = threading.Lock()
+        self._queue: "queue.Queue[Optional[Tuple[Request, Future]]]" = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="rerank-batcher", daemon=True)
+        self._thread.start()
+
+    def rerank(self, query: str, results: List[Dict[str, Any]], top_n: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Thread-safe rerank; requests that skip reranking never wait for a batch."""
+        if self.reranker.should_skip(results):
+            return self.reranker.rerank(query, results, top_n)
+        future: Future = Future()
+        with self._closing_lock:
+            if self.closed:
+                # No background thread left to serve the queue
+                return self.reranker.rerank(query, results, top_n)
+            self._queue.put(((query, results, top_n), future))
+        return future.result()
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            batch = [item]
+            pairs = len(item[0][1])
+            deadline = time.monotonic() + self.max_wait
+            closing = False
+            while pairs < self.max_pairs:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if item is None:
+                    closing = True
+                    break
+                batch.append(item)
+                pairs += len(item[0][1])
+
+            try:
+                outputs = self.reranker.rerank_many([request for request, _ in batch])
+                for (_, future), output in zip(batch, outputs):
+                    future.set_result(output)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+            self.batches += 1
+            if closing:
+                return
+
+    def close(self) -> None:
+        """Finish queued requests and stop the background thread (idempotent)."""
+        with self._closing_lock:
+            if self.closed:
+                return
+            self.closed = True
+            self._queue.put(None)
+        self._thread.join()
+
+
+class CountingScorer(OverlapScorer):
+    """OverlapScorer that records the size of every predict() call."""
+
+    def __init__(self):
+        self.calls: List[int] = []
+
+    def predict(self, pairs: Sequence[Tuple[str, str]], batch_size: int = 32, show_progress_bar: bool = False) -> np.ndarray:
+        self.calls.append(len(pairs))
+        return super().predict(pairs, batch_size, show_progress_bar)
+
+
+def run_tests() -> bool:
+    """Run built-in test cases with the offline OverlapScorer (no model download needed)."""
+    print("=" * 70)
+    print("Cross-Encoder Reranker - Test Suite")
+    print("=" * 70)
+
+    results = []
+
+    def check(name: str, ok: bool) -> None:
+        print(f"[{'PASS' if ok else 'FAIL'}] {name}")
+        results.append(ok)
+
+    def candidates(prefix: str, scores: List[float]) -> List[Dict[str, Any]]:
+        texts = ["exit load nil after 7 days", "expense ratio 0.2%", "fund manager name", "exit load 0.007% day 1"]
+        return [
+            {"chunk_id": f"{prefix}-{i}", "text": texts[i % len(texts)], "score": score}
+            for i, score in enumerate(scores)
+        ]
+
+    close_scores = [0.80, 0.79, 0.78, 0.77]
+    query = "What is the exit load?"
+
+    scorer = CountingScorer()
+    reranker = Reranker(model=scorer, top_n=2)
+    top = reranker.rerank(query, candidates("a", close_scores))
+    check("one predict() call per request", scorer.calls == [4])
+    check("reranked by cross-encoder score", [r["chunk_id"] for r in top] == ["a-0", "a-3"])
+
+    reranker.rerank("what is the  EXIT load?", candidates("a", close_scores))
+    check("repeat query served from cache", scorer.calls == [4] and reranker.cache_hits == 4)
+    reranker.rerank(query, candidates("a", close_scores) + candidates("b", [0.5]))
+    check("only unseen chunks are scored", scorer.calls == [4, 1])
+
+    clear = reranker.rerank(query, candidates("c", [0.95, 0.70, 0.60]))
+    check("margin skip keeps dense order without predict()",
+          scorer.calls == [4, 1] and [r["rerank_score"] for r in clear] == [None, None])
+
+    requests = [(f"{query} {i}", candidates(f"m{i}", close_scores), None) for i in range(3)]
+    reranker.rerank_many(requests)
+    check("rerank_many scores all requests in one call", scorer.calls[-1] == 12)
+
+    scorer = CountingScorer()
+    batcher = RerankBatcher(Reranker(model=scorer), max_wait_ms=500.0)
+    barrier = threading.Barrier(4)
+    outputs: Dict[int, List[Dict[str, Any]]] = {}
+
+    def worker(i: int) -> None:
+        barrier.wait()
+        outputs[i] = batcher.rerank(f"{query} {i}", candidates(f"t{i}", close_scores))
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    check("micro-batcher merges concurrent requests", batcher.batches == 1 and scorer.calls == [16])
+    check("every caller gets its own results", all(outputs[i][0]["chunk_id"].startswith(f"t{i}-") for i in range(4)))
+
+    batcher.close()
+    after = batcher.rerank("exit load after close", candidates("z", close_scores))
+    check("rerank after close() falls back instead of blocking", len(after) == RERANK_TOP_N and batcher.batches == 1)
+    batcher.close()
+    check("close() is idempotent", not batcher._thread.is_alive())
+
+    passed = sum(results)
+    print("-" * 70)
+    print(f"Results: {passed} passed, {len(results) - passed} failed")
+    print("=" * 70)
+
+    return all(results)
+
+
+def main():
+    """Retrieve and rerank a query from the command line."""
+    parser = argparse.ArgumentParser(description="Retrieve top-k chunks and rerank them")
+    parser.add_argument("query", nargs="?", help="Query text")
+    parser.add_argument("--scheme", help="Filter by scheme_name")
+    parser.add_argument("--k", type=int, default=20, help="Dense candidates")
+    parser.add_argument("--top-n", type=int, default=RERANK_TOP_N, help="Chunks kept after reranking")
+    parser.add_argument("--model", default=RERANKER_MODEL, help="Cross-encoder name or path ('overlap': offline stand-in)")
+    parser.add_argument("--no-skip", action="store_true", help="Always rerank, ignoring the dense score margin")
+    parser.add_argument("--test", action="store_true", help="Run the offline self-test")
+    args = parser.parse_args()
+
+    if args.test:
+        return 0 if run_tests() else 1
+    if args.query is None:
+        parser.error("a query or --test is required")
+
+    from scripts.retriever import Retriever
+
+    retriever = Retriever()
+    reranker = Reranker(model_name=args.model, top_n=args.top_n, skip_margin=None if args.no_skip else SKIP_MARGIN)
+    filters = {"scheme_name": args.scheme} if args.scheme else None
+
+    results = retriever.search(args.query, args.k, filters)
+    for attempt in ("cold", "cached"):
+        start = time.perf_counter()
+        reranked = reranker.rerank(args.query, results)
+        print(f"Rerank ({attempt}): {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    print(f"\nQuery: {args.query}")
+    print("-" * 70)
+    for rank, r in enumerate(reranked, 1):
+        rerank_score = "skipped" if r["rerank_score"] is None else f"{r['rerank_score']:.3f}"
+        print(f"[{rank}] rerank {rerank_score} | dense {r['score']:.3f} | {r['scheme_name']} | "
+              f"{r['document_type']} | {r['source_file']}")
+        print(f"    {r['text'][:160].replace(chr(10), ' ')}...")
+    print(f"\n{reranker.stats()}")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,685 @@
+"""
+Retriever for Groww Mutual Fund RAG System
+
+Query-time entry point. Loads the FAISS index, the columnar chunk metadata
+and the BGE-M3 query encoder once, then serves searches from memory, so a
+long-lived process (e.g. Streamlit) pays the cold-load cost only once.
+
+Metadata filters are applied before similarity ranking: scheme / document
+type filters resolve to contiguous id ranges via index_layout.json, other
+columns to a row mask, and only the in-scope vectors are scored.
+
+Approximate indexes (HNSW / IVF, see index_factory.py) are searched with the
+efSearch / nprobe recorded in the ingestion summary. Small filtered scopes
+are scored exactly from vectors.npy, and so is any filtered ANN search that
+comes back with fewer than k hits. For quantized indexes (fp16 / int8 /
+binary) with "rescore" in the summary, a few times k candidates are fetched
+and re-ranked by their exact float32 scores. The same applies to indexes
+built with truncate_dim: the first pass compares only the leading
+dimensions, and rescoring re-ranks the shortlist at full dimension.
+
+The vector store is versioned (store_versions.py): a Retriever serves the
+version CURRENT pointed to when it was created, and get_retriever() swaps in
+a new Retriever, reusing the warm encoder, once ingestion publishes a new
+version. Queries already running finish on the old one.
+
+Hybrid search fuses dense cosine scores with BM25 scores from the sparse
+keyword index (sparse_index.py); search_with_keyword_fallback switches to it
+only when the best dense score is below 0.5 (architecture.md §4.2.5).
+
+Near-duplicate chunks collapsed at ingestion (dedup.py) are indexed once;
+results carry the other documents they appear in as "provenance".
+
+Queries are normalised and acronym-expanded before encoding, and their
+embeddings are cached (query_expansion.QueryEncoder): short acronym queries
+come from the vectors precomputed at ingestion, repeated queries from an LRU
+cache, and only the rest reach BGE-M3.
+
+Usage:
+    python scripts/retriever.py "What is the exit load of HDFC Liquid Fund?"
+    python scripts/retriever.py "expense ratio" --scheme "HDFC Large Cap Fund" --k 5
+    python scripts/retriever.py "TER 1.05%" --hybrid
+    python scripts/retriever.py --test      # Built-in test cases
+"""
+
+import sys
+import json
+import time
+import argparse
+import tempfile
+import threading
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Union, Tuple
+
+import faiss
+import numpy as np
+
+# Local imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from scripts.metadata_store import ChunkStore, CHUNK_STORE_DIR_NAME, write_chunk_store
+from scripts.store_versions import read_current_version, version_store_dir, VERSION_SUMMARY_FILE_NAME
+from scripts.index_layout import IndexLayout
+from scripts.sparse_index import SparseIndex, write_sparse_index
+from scripts.dedup import load_provenance
+from scripts.query_expansion import QueryEncoder, load_expansion_vectors, prepare_query
+from scripts.index_factory import (
+    apply_search_params, search_parameters, load_vectors, read_index, rescore_exact,
+    DEFAULT_RESCORE_FACTOR
+)
+
+
+# Configuration
+BASE_DIR = Path(__file__).parent.parent
+VECTOR_STORE_DIR = BASE_DIR / "data" / "vector_store"
+SUMMARY_PATH = BASE_DIR / "data" / "processed" / "ingestion_summary.json"
+
+DEFAULT_EMBEDDING_MODEL = "BAAI/bge-m3"
+DEFAULT_TOP_K = 20  # Stage 1 candidates (architecture.md §4.2.5)
+
+# Filtered scopes up to this many vectors are scored exactly, even when the
+# index is approximate (one small matmul beats a graph / IVF traversal)
+EXACT_SCOPE_MAX = 50_000
+
+# Hybrid search (architecture.md §4.2.5)
+HYBRID_ALPHA = 0.5  # Weight of the dense score; 1 - alpha goes to normalised BM25
+HYBRID_CANDIDATES = 50  # Candidates taken from each of the dense and sparse rankings
+KEYWORD_FALLBACK_THRESHOLD = 0.5  # Best dense score below which BM25 is mixed in
+
+VERSION_CHECK_INTERVAL = 1.0  # Seconds between checks of the CURRENT version pointer
+
+# A filter maps a metadata column to one allowed value or a list of them
+Filters = Dict[str, Union[Any, List[Any]]]
+Ranges = List[Tuple[int, int]]
+
+
+def mask_to_ranges(mask: np.ndarray) -> Ranges:
+    """Convert a boolean row mask into sorted [start, end) id ranges."""
+    padded = np.concatenate([[0], mask.astype(np.int8), [0]])
+    edges = np.diff(padded)
+    return list(zip(np.flatnonzero(edges == 1).tolist(), np.flatnonzero(edges == -1).tolist()))
+
+
+def top_k_desc(scores: np.ndarray, k: int) -> np.ndarray:
+    """Column indices of the k highest scores in each row, best first."""
+    if k >= scores.shape[1]:
+        top = np.tile(np.arange(scores.shape[1]), (scores.shape[0], 1))
+    else:
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    order = np.argsort(-np.take_along_axis(scores, top, axis=1), axis=1, kind="stable")
+    return np.take_along_axis(top, order, axis=1)
+
+
+def load_ingestion_summary(summary_path: Path = SUMMARY_PATH) -> Dict[str, Any]:
+    """Load ingestion_summary.json, or an empty dict if it does not exist."""
+    if not Path(summary_path).exists():
+        return {}
+    with open(summary_path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+class Retriever:
+    """
+    Warm, long-lived dense retriever over the FAISS vector store.
+
+    Args:
+        vector_store_dir: Vector store root (the CURRENT version is loaded), or
+            a directory holding faiss_index.bin and the chunk store
+        summary_path: ingestion_summary.json written by the ingest script; a
+            version's own copy of it takes precedence
+        model: Optional preloaded query encoder (anything with a
+            SentenceTransformer-compatible `encode`)
+        model_name: Encoder to load when `model` is not given; defaults to the
+            model recorded in the ingestion summary
+        warmup: Run one dummy query so the first real query is not slow
+        search_params: Query-time index knobs (ef_search / nprobe) overriding
+            the ones recorded in the ingestion summary
+        rescore: Re-score candidates with the exact vectors; defaults to the
+            ingestion summary's setting
+        encoder: QueryEncoder to reuse (and keep its query cache); its
+            precomputed vectors are replaced by this version's
+    """
+
+    def __init__(
+        self,
+        vector_store_dir: Path = VECTOR_STORE_DIR,
+        summary_path: Path = SUMMARY_PATH,
+        model: Optional[Any] = None,
+        model_name: Optional[str] = None,
+        warmup: bool = True,
+        search_params: Optional[Dict[str, Any]] = None,
+        rescore: Optional[bool] = None,
+        encoder: Optional[QueryEncoder] = None
+    ):
+        self.version = read_current_version(vector_store_dir)
+        self.vector_store_dir = version_store_dir(vector_store_dir, self.version)
+        version_summary = self.vector_store_dir / VERSION_SUMMARY_FILE_NAME
+        self.summary = load_ingestion_summary(version_summary if version_summary.exists() else summary_path)
+
+        self.index = read_index(self.vector_store_dir / "faiss_index.bin")
+        self.store = ChunkStore(self.vector_store_dir / CHUNK_STORE_DIR_NAME)
+        if self.index.ntotal != len(self.store):
+            raise ValueError(
+                f"Index has {self.index.ntotal} vectors but chunk store has {len(self.store)} rows"
+            )
+        self.layout = IndexLayout.load(self.vector_store_dir)
+        self.sparse = SparseIndex.load(self.vector_store_dir)
+        if self.sparse is not None and len(self.sparse) != len(self.store):
+            print(f"[WARN] Sparse index has {len(self.sparse)} rows, expected {len(self.store)} - ignoring it")
+            self.sparse = None
+        self.provenance = load_provenance(self.vector_store_dir)
+        apply_search_params(self.index, {**self.summary.get("index_params", {}), **(search_params or {})})
+
+        # Flat indexes expose their vectors, so filtered subsets can be scored
+        # directly (zero-copy view, cost proportional to the subset size).
+        # Approximate indexes use the memory-mapped vectors.npy instead.
+        self.exact = isinstance(self.index, faiss.IndexFlat)
+        if self.exact:
+            self._xb = faiss.rev_swig_ptr(
+                self.index.get_xb(), self.index.ntotal * self.index.d
+            ).reshape(self.index.ntotal, self.index.d)
+        else:
+            self._xb = load_vectors(self.vector_store_dir)
+
+        if rescore is None:
+            rescore = self.summary.get("rescore", False)
+        self.rescore = bool(rescore) and self._xb is not None and not self.exact
+
+        model_name = model_name or self.summary.get("embedding_model", DEFAULT_EMBEDDING_MODEL)
+        if model is None:
+            from sentence_transformers import SentenceTransformer
+            model = SentenceTransformer(model_name)
+        self.model = model
+
+        # Query embedding cache; an encoder handed over from the previous version keeps its LRU
+        precomputed = load_expansion_vectors(self.vector_store_dir, model_name)
+        if encoder is None:
+            encoder = QueryEncoder(model, precomputed)
+        else:
+            encoder.precomputed = precomputed
+        self.encoder = encoder
+
+        if warmup:
+            self.search("warmup", k=1)
+
+    def __len__(self) -> int:
+        return self.index.ntotal
+
+    def encode_queries(self, queries: List[str]) -> np.ndarray:
+        """Expand and encode queries into normalised float32 vectors (cache misses in one batch)."""
+        return self.encoder.encode(queries)
+
+    def _filter_ranges(self, filters: Filters) -> Ranges:
+        """Resolve filters to the id ranges of all in-scope chunks."""
+        normalized = {}
+        for column, values in filters.items():
+            if column not in self.store.kinds:
+                raise KeyError(f"Unknown filter column: {column}")
+            normalized[column] = list(values) if isinstance(values, (list, tuple, set)) else [values]
+
+        if self.layout is not None and self.layout.num_rows == len(self.store) \
+                and self.layout.supports(normalized):
+            return self.layout.ranges_for(normalized)
+
+        mask = np.ones(len(self.store), dtype=bool)
+        for column, values in normalized.items():
+            mask &= self.store.mask(column, values)
+        return mask_to_ranges(mask)
+
+    def _score_ranges(
+        self,
+        vectors: np.ndarray,
+        ranges: Ranges,
+        k: int
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Exact top-k over the in-scope slices only."""
+        scores = np.concatenate([vectors @ self._xb[start:end].T for start, end in ranges], axis=1)
+        ids = np.concatenate([np.arange(start, end) for start, end in ranges])
+        top = top_k_desc(scores, k)
+        return np.take_along_axis(scores, top, axis=1), ids[top]
+
+    def _search_ranges(
+        self,
+        vectors: np.ndarray,
+        ranges: Ranges,
+        k: int
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Top-k search restricted to the given id ranges."""
+        scope = sum(end - start for start, end in ranges)
+        if self._xb is not None and (self.exact or scope <= EXACT_SCOPE_MAX):
+            return self._score_ranges(vectors, ranges, k)
+
+        if len(ranges) == 1:
+            selector = faiss.IDSelectorRange(ranges[0][0], ranges[0][1])
+        else:
+            mask = np.zeros(len(self.store), dtype=bool)
+            for start, end in ranges:
+                mask[start:end] = True
+            bitmap = np.packbits(mask, bitorder="little")
+            selector = faiss.IDSelectorBitmap(len(mask), faiss.swig_ptr(bitmap))
+            selector.bitmap_ref = bitmap  # Keep the buffer alive during the search
+        scores, ids = self._search_index(vectors, k, min(scope, k * DEFAULT_RESCORE_FACTOR), selector)
+
+        # ANN traversal can run out of in-scope candidates; fall back to exact
+        short = np.flatnonzero((ids < 0).any(axis=1))
+        if len(short) > 0 and self._xb is not None:
+            scores[short], ids[short] = self._score_ranges(vectors[short], ranges, k)
+        return scores, ids
+
+    def _search_index(
+        self,
+        vectors: np.ndarray,
+        k: int,
+        candidates: int,
+        selector: Optional[faiss.IDSelector] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Index search, optionally over `candidates` hits re-scored exactly down to k."""
+        params = search_parameters(self.index, selector) if selector is not None else None
+        if not self.rescore:
+            return self.index.search(vectors, k, params=params)
+        _, ids = self.index.search(vectors, max(k, candidates), params=params)
+        return rescore_exact(vectors, ids, self._xb, k)
+
+    def search_vectors(
+        self,
+        vectors: np.ndarray,
+        k: int = DEFAULT_TOP_K,
+        filters: Optional[Filters] = None
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Search with precomputed query vectors (one row per query).
+
+        With filters, only in-scope chunks are ranked, so exactly
+        min(k, in-scope chunks) results are returned.
+        """
+        ranges = self._filter_ranges(filters) if filters else None
+        scores, ids = self._dense_search(vectors, k, ranges)
+        return [self._collect(s, i) for s, i in zip(scores, ids)]
+
+    def _dense_search(
+        self,
+        vectors: np.ndarray,
+        k: int,
+        ranges: Optional[Ranges] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Dense top-k over everything, or over the given id ranges only."""
+        if ranges is None:
+            k = min(k, len(self.store))
+            return self._search_index(vectors, k, min(len(self.store), k * DEFAULT_RESCORE_FACTOR))
+
+        k = min(k, sum(end - start for start, end in ranges))
+        if k == 0:
+            return np.zeros((len(vectors), 0), dtype=np.float32), np.zeros((len(vectors), 0), dtype=np.int64)
+        return self._search_ranges(vectors, ranges, k)
+
+    def _hybrid(
+        self,
+        query: str,
+        vector: np.ndarray,
+        k: int,
+        ranges: Optional[Ranges],
+        alpha: float
+    ) -> List[Dict[str, Any]]:
+        """
+        Fuse dense and BM25 rankings for one query.
+
+        The union of both candidate lists is scored on both sides (dense
+        scores exactly, from the index vectors), then ranked by
+        alpha * cosine + (1 - alpha) * bm25 / best_bm25.
+        """
+        bm25 = self.sparse.score(query, ranges)
+        _, sparse_ids = SparseIndex.top(bm25, HYBRID_CANDIDATES)
+        dense_scores, dense_ids = self._dense_search(vector[None, :], max(k, HYBRID_CANDIDATES), ranges)
+        dense_scores, dense_ids = dense_scores[0], dense_ids[0]
+
+        valid = dense_ids >= 0
+        ids = np.union1d(dense_ids[valid], sparse_ids)
+        if len(ids) == 0:
+            return []
+
+        if self._xb is not None:
+            dense = np.asarray(self._xb[ids], dtype=np.float32) @ vector
+        else:
+            # Approximate scores of candidates the dense search did not return are unknown
+            dense = np.zeros(len(ids), dtype=np.float32)
+            dense[np.searchsorted(ids, dense_ids[valid])] = dense_scores[valid]
+
+        sparse = bm25[ids]
+        best_bm25 = float(bm25.max())
+        fused = alpha * dense + (1.0 - alpha) * (sparse / best_bm25 if best_bm25 > 0 else sparse)
+
+        order = np.argsort(-fused, kind="stable")[:k]
+        results = self._collect(fused[order], ids[order])
+        for result, d, s in zip(results, dense[order], sparse[order]):
+            result["dense_score"] = float(d)
+            result["sparse_score"] = float(s)
+        return results
+
+    def hybrid_search(
+        self,
+        query: str,
+        k: int = DEFAULT_TOP_K,
+        filters: Optional[Filters] = None,
+        alpha: float = HYBRID_ALPHA
+    ) -> List[Dict[str, Any]]:
+        """
+        Retrieve the top-k chunks by fused dense + BM25 score.
+
+        Falls back to dense search when no sparse index is available.
+
+        Returns:
+            Chunk dicts with "score" (fused), "dense_score" and "sparse_score"
+        """
+        if self.sparse is None:
+            return self.search(query, k, filters)
+        ranges = self._filter_ranges(filters) if filters else None
+        return self._hybrid(query, self.encode_queries([query])[0], k, ranges, alpha)
+
+    def search_with_keyword_fallback(
+        self,
+        query: str,
+        k: int = DEFAULT_TOP_K,
+        filters: Optional[Filters] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Dense search, switching to hybrid search when the best dense score is
+        below KEYWORD_FALLBACK_THRESHOLD (architecture.md §4.2.5).
+        """
+        vector = self.encode_queries([query])
+        ranges = self._filter_ranges(filters) if filters else None
+        scores, ids = self._dense_search(vector, k, ranges)
+        results = self._collect(scores[0], ids[0])
+
+        best = results[0]["score"] if results else 0.0
+        if self.sparse is None or best >= KEYWORD_FALLBACK_THRESHOLD:
+            return results
+        return self._hybrid(query, vector[0], k, ranges, HYBRID_ALPHA)
+
+    def _collect(self, scores: np.ndarray, ids: np.ndarray) -> List[Dict[str, Any]]:
+        """Turn one row of search results into result dicts."""
+        results = []
+        for score, row in zip(scores, ids):
+            if row < 0:
+                continue
+            chunk = self.store.get_chunk(int(row))
+            chunk["score"] = float(score)
+            if chunk["chunk_id"] in self.provenance:
+                chunk["provenance"] = self.provenance[chunk["chunk_id"]]
+            results.append(chunk)
+        return results
+
+    def search(
+        self,
+        query: str,
+        k: int = DEFAULT_TOP_K,
+        filters: Optional[Filters] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Retrieve the top-k chunks for one query.
+
+        Args:
+            query: User query text
+            k: Number of chunks to return
+            filters: Optional metadata filters, e.g. {"scheme_name": "HDFC Liquid Fund"}
+
+        Returns:
+            Chunk dicts (all metadata plus "score"), best first
+        """
+        return self.search_many([query], k, filters)[0]
+
+    def search_many(
+        self,
+        queries: List[str],
+        k: int = DEFAULT_TOP_K,
+        filters: Optional[Filters] = None
+    ) -> List[List[Dict[str, Any]]]:
+        """Encode and search many queries with a single encode and a single index call."""
+        if not queries:
+            return []
+        return self.search_vectors(self.encode_queries(queries), k, filters)
+
+    def close(self) -> None:
+        self.store.close()
+
+
+_retriever: Optional[Retriever] = None
+_retriever_lock = threading.Lock()
+_next_version_check = 0.0
+_reloading = False
+
+
+def get_retriever() -> Retriever:
+    """
+    Process-wide retriever for the default vector store.
+
+    Streamlit reruns the script on every interaction; calling this (or
+    wrapping Retriever in st.cache_resource) keeps the index and encoder warm.
+
+    At most every VERSION_CHECK_INTERVAL seconds the CURRENT pointer is
+    re-read; when a new version was published, one caller loads it (with
+    the existing encoder) while the others keep getting the old retriever,
+    then the reference is swapped.
+    """
+    global _retriever, _next_version_check, _reloading
+    with _retriever_lock:
+        if _retriever is None:
+            _retriever = Retriever()
+            _next_version_check = time.monotonic() + VERSION_CHECK_INTERVAL
+            return _retriever
+        current = _retriever
+        now = time.monotonic()
+        if _reloading or now < _next_version_check:
+            return current
+        _next_version_check = now + VERSION_CHECK_INTERVAL
+        if read_current_version(VECTOR_STORE_DIR) == current.version:
+            return current
+        _reloading = True
+
+    try:
+        fresh = Retriever(model=current.model, encoder=current.encoder)
+    except Exception as e:
+        # A half-published or broken version must not take the service down
+        print(f"[WARN] Could not load the new vector store version: {e}")
+        fresh = current
+    finally:
+        with _retriever_lock:
+            _reloading = False
+    with _retriever_lock:
+        _retriever = fresh
+    return fresh
+
+
+class _LookupEncoder:
+    """Test encoder returning a fixed vector per query, keyed on the text QueryEncoder passes in."""
+
+    def __init__(self, vectors: Dict[str, np.ndarray], dim: int):
+        self.vectors = {prepare_query(query): vector for query, vector in vectors.items()}
+        self.dim = dim
+
+    def encode(self, queries: List[str], **kwargs) -> np.ndarray:
+        return np.stack([self.vectors.get(q, np.ones(self.dim, dtype=np.float32)) for q in queries])
+
+
+def run_tests():
+    """Run built-in recall and hybrid-fusion tests against a synthetic vector store."""
+    print("=" * 70)
+    print("Retriever - Test Suite")
+    print("=" * 70)
+
+    passed = 0
+    failed = 0
+
+    def check(name: str, ok: bool) -> None:
+        nonlocal passed, failed
+        print(f"[{'PASS' if ok else 'FAIL'}] {name}")
+        if ok:
+            passed += 1
+        else:
+            failed += 1
+
+    rng = np.random.default_rng(0)
+    n, dim, k = 500, 32, 10
+    vectors = rng.standard_normal((n, dim)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    schemes = ["HDFC Liquid Fund", "HDFC Large Cap Fund", "HDFC ELSS Tax Saver"]
+    # The ELSS scheme gets only 5 rows, so filtered searches must widen
+    scheme_of = [schemes[2] if i % 100 == 7 else schemes[i % 2] for i in range(n)]
+    chunks = [
+        {"chunk_id": f"c{i}", "text": f"chunk {i}", "scheme_name": scheme_of[i], "document_type": "SID"}
+        for i in range(n)
+    ]
+
+    # Keyword-bearing chunks for the BM25 side of hybrid search
+    chunks[250]["text"] = "Exit load of 1.05% if redeemed within 1 year"
+    chunks[260]["text"] = "Exit load is nil after one year"
+    chunks[270]["text"] = "The total expense ratio was 1.05% last month"
+    chunks[207]["text"] = "Lock-in period of 3 years under section 80C"
+
+    queries = {}
+    for i in range(0, n, 10):
+        noisy = vectors[i] + 0.05 * rng.standard_normal(dim).astype(np.float32)
+        queries[f"query {i}"] = (noisy / np.linalg.norm(noisy)).astype(np.float32)
+    queries["exit load 1.05%"] = queries["query 0"]
+    off_topic = rng.standard_normal(dim).astype(np.float32)
+    queries["80C lock-in"] = off_topic / np.linalg.norm(off_topic)
+
+    def exact_top_k(query_vector: np.ndarray, allowed: np.ndarray, top: int) -> List[str]:
+        scores = np.where(allowed, vectors @ query_vector, -np.inf)
+        order = np.argsort(-scores, kind="stable")[:min(top, int(allowed.sum()))]
+        return [f"c{row}" for row in order]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store_dir = Path(tmp)
+        write_chunk_store(chunks, store_dir / CHUNK_STORE_DIR_NAME)
+        index = faiss.IndexFlatIP(dim)
+        index.add(vectors)
+        faiss.write_index(index, str(store_dir / "faiss_index.bin"))
+        write_sparse_index(store_dir)
+
+        retriever = Retriever(
+            store_dir, summary_path=store_dir / "missing.json",
+            model=_LookupEncoder(queries, dim), warmup=False
+        )
+        everything = np.ones(n, dtype=bool)
+
+        near = [q for q in queries if q.startswith("query ")]
+        hits = [retriever.search(q, k=1)[0]["chunk_id"] == f"c{q.split()[1]}" for q in near]
+        check("recall@1 on near-duplicate queries", all(hits))
+
+        expected = [exact_top_k(v, everything, k) for v in queries.values()]
+        got = [[r["chunk_id"] for r in results] for results in retriever.search_many(list(queries), k=k)]
+        check("top-k matches exact search", got == expected)
+
+        single = [[r["chunk_id"] for r in retriever.search(q, k=k)] for q in queries]
+        check("search_many agrees with search", single == got)
+
+        results = retriever.search("query 0", k=3)
+        check("results carry metadata and descending scores",
+              all("text" in r and "scheme_name" in r for r in results)
+              and all(a["score"] >= b["score"] for a, b in zip(results, results[1:])))
+
+        allowed = np.array([s == schemes[1] for s in scheme_of])
+        expected = [exact_top_k(v, allowed, k) for v in queries.values()]
+        got = [[r["chunk_id"] for r in results]
+               for results in retriever.search_many(list(queries), k=k, filters={"scheme_name": schemes[1]})]
+        check("filtered top-k matches exact search over the scheme", got == expected)
+
+        allowed = np.array([s == schemes[2] for s in scheme_of])
+        results = retriever.search("query 0", k=k, filters={"scheme_name": schemes[2]})
+        check("rare filter widens to all in-scope rows",
+              [r["chunk_id"] for r in results] == exact_top_k(queries["query 0"], allowed, k))
+
+        results = retriever.search("query 0", k=k, filters={"scheme_name": [schemes[0], schemes[2]]})
+        check("list filters match any value", len(results) == k
+              and all(r["scheme_name"] in schemes[::2] for r in results))
+
+        check("unknown filter value returns nothing",
+              retriever.search("query 0", k=k, filters={"scheme_name": "No Such Fund"}) == [])
+
+        # Hybrid fusion: alpha * cosine + (1 - alpha) * bm25 / best_bm25
+        query = "exit load 1.05%"
+        bm25 = retriever.sparse.score(query)
+        check("BM25 ranks the chunk matching every term first",
+              [f"c{row}" for row in SparseIndex.top(bm25, 3)[1]] == ["c250", "c260", "c270"])
+        for alpha in (0.3, 0.5):
+            fused = alpha * (vectors @ queries[query]) + (1 - alpha) * bm25 / bm25.max()
+            expected = [f"c{row}" for row in np.argsort(-fused, kind="stable")[:k]]
+            results = retriever.hybrid_search(query, k=k, alpha=alpha)
+            check(f"hybrid order at alpha={alpha} matches the fused scores",
+                  [r["chunk_id"] for r in results] == expected)
+        top_two = {r["chunk_id"] for r in results[:2]}
+        check("keyword match is promoted above dense-only neighbours",
+              top_two == {"c0", "c250"} and "c250" not in exact_top_k(queries[query], everything, k))
+        check("hybrid results carry dense and sparse scores",
+              all("dense_score" in r and "sparse_score" in r for r in results))
+        results = retriever.hybrid_search(query, k=k, alpha=1.0)
+        check("alpha=1 reduces to dense ranking",
+              [r["chunk_id"] for r in results] == exact_top_k(queries[query], everything, k))
+        results = retriever.hybrid_search(query, k=k, alpha=0.5, filters={"scheme_name": schemes[1]})
+        check("filtered hybrid search stays in scope",
+              all(r["scheme_name"] == schemes[1] for r in results) and "c250" not in [r["chunk_id"] for r in results])
+
+        elss = {"scheme_name": schemes[2]}
+        best_dense = retriever.search("80C lock-in", k=1, filters=elss)[0]["score"]
+        results = retriever.search_with_keyword_fallback("80C lock-in", k=3, filters=elss)
+        check(f"weak dense match ({best_dense:.2f}) falls back to keywords",
+              best_dense < KEYWORD_FALLBACK_THRESHOLD and results[0]["chunk_id"] == "c207"
+              and "sparse_score" in results[0])
+        results = retriever.search_with_keyword_fallback("query 0", k=3)
+        check("strong dense match skips the keyword fallback",
+              results[0]["chunk_id"] == "c0" and "sparse_score" not in results[0])
+        retriever.close()
+
+    print("-" * 70)
+    print(f"Results: {passed} passed, {failed} failed")
+    print("=" * 70)
+
+    return failed == 0
+
+
+def main():
+    """Run a query against the vector store from the command line."""
+    parser = argparse.ArgumentParser(description="Search the FAISS vector store")
+    parser.add_argument("query", nargs="?", help="Query text")
+    parser.add_argument("--k", type=int, default=5, help="Number of results")
+    parser.add_argument("--scheme", help="Filter by scheme_name")
+    parser.add_argument("--document-type", help="Filter by document_type")
+    parser.add_argument("--hybrid", action="store_true", help="Fuse dense and BM25 scores")
+    parser.add_argument("--alpha", type=float, default=HYBRID_ALPHA, help="Dense weight for --hybrid")
+    parser.add_argument("--test", action="store_true", help="Run the built-in test cases and exit")
+    args = parser.parse_args()
+
+    if args.test:
+        return 0 if run_tests() else 1
+    if not args.query:
+        parser.error("query is required")
+
+    filters = {}
+    if args.scheme:
+        filters["scheme_name"] = args.scheme
+    if args.document_type:
+        filters["document_type"] = args.document_type
+
+    start = time.perf_counter()
+    retriever = Retriever()
+    print(f"Loaded {len(retriever)} chunks in {time.perf_counter() - start:.2f}s")
+
+    start = time.perf_counter()
+    if args.hybrid:
+        results = retriever.hybrid_search(args.query, args.k, filters, args.alpha)
+    else:
+        results = retriever.search(args.query, args.k, filters)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+
+    print(f"\nQuery: {args.query}  ({elapsed_ms:.1f} ms)")
+    print("-" * 70)
+    for rank, r in enumerate(results, 1):
+        print(f"[{rank}] {r['score']:.3f} | {r['scheme_name']} | {r['document_type']} | {r['source_file']}")
+        for record in r.get("provenance", []):
+            print(f"    also in: {record['document_type']} | {record['source_file']}")
+        print(f"    {r['text'][:160].replace(chr(10), ' ')}...")
+
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,67 @@
+"""
+Scheme Names for Groww Mutual Fund RAG System
+
+Canonical display names of the schemes in scope (architecture.md §3.2) and
+the aliases users type for them, so a question can be pinned to one scheme
+before any lookup (architecture.md §10.1: cross-scheme contamination).
+
+Usage:
+    from scripts.schemes import detect_scheme
+    detect_scheme("What is the exit load of HDFC Top 100?")   # -> "HDFC Large Cap Fund"
+"""
+
+import re
+from typing import Dict, List, Optional
+
+# Canonical scheme name -> aliases (normalised: lowercase words, see normalize_text)
+SCHEME_ALIASES: Dict[str, List[str]] = {
+    "HDFC Large Cap Fund": [
+        "hdfc large cap", "hdfc largecap", "hdfc top 100", "large cap fund",
+    ],
+    "HDFC Flexi Cap Fund": [
+        "hdfc flexi cap", "hdfc flexicap", "hdfc equity fund", "flexi cap fund",
+    ],
+    "HDFC Tax Saver (ELSS)": [
+        "hdfc tax saver", "hdfc elss", "hdfc taxsaver", "elss tax saver", "tax saver fund", "elss",
+    ],
+    "HDFC Balanced Advantage Fund": [
+        "hdfc balanced advantage", "hdfc baf", "balanced advantage fund", "hdfc prudence",
+    ],
+    "HDFC Liquid Fund": [
+        "hdfc liquid", "liquid fund",
+    ],
+}
+
+SCHEME_NAMES = list(SCHEME_ALIASES)
+
+NON_WORD = re.compile(r"[^a-z0-9]+")
+
+
+def normalize_text(text: str) -> str:
+    """Lowercase and reduce to space-separated words ("Lock-in?" -> "lock in")."""
+    return NON_WORD.sub(" ", text.lower()).strip()
+
+
+# (alias, scheme) pairs, longest alias first so "hdfc liquid" beats "liquid fund"
+_ALIAS_INDEX = sorted(
+    ((normalize_text(alias), scheme) for scheme, aliases in SCHEME_ALIASES.items()
+     for alias in aliases + [scheme]),
+    key=lambda pair: -len(pair[0])
+)
+
+
+def detect_schemes(query: str) -> List[str]:
+    """All schemes mentioned in a query, in order of first mention."""
+    text = f" {normalize_text(query)} "
+    positions: Dict[str, int] = {}
+    for alias, scheme in _ALIAS_INDEX:
+        position = text.find(f" {alias} ")
+        if position >= 0 and position < positions.get(scheme, len(text)):
+            positions[scheme] = position
+    return sorted(positions, key=positions.get)
+
+
+def detect_scheme(query: str) -> Optional[str]:
+    """The first scheme mentioned in a query, or None."""
+    schemes = detect_schemes(query)
+    return schemes[0] if schemes else None
@@ -0,0 +1,335 @@
+"""
+Sparse (BM25) Keyword Index for Groww Mutual Fund RAG System
+
+Inverted index over chunk texts, built at ingest time next to the FAISS
+index and used for the BM25 keyword fallback / hybrid search
+(architecture.md §4.2.5). Row ids are the same as the FAISS vector ids.
+
+Postings are stored in CSR form with the BM25 weight of every (term, chunk)
+pair precomputed, so scoring a query is one gather plus one np.bincount:
+
+    sparse_index/
+        vocab.json          Terms (sorted), BM25 parameters, row count
+        indptr.npy          int64 (V + 1): postings of term t are [indptr[t], indptr[t + 1])
+        doc_ids.npy         int32: chunk row of each posting
+        weights.npy         float32: BM25 weight of each posting
+
+Tokenisation keeps the tokens that matter in fund documents: numbers and
+percentages ("1.05%" also yields "1.05"), thousands separators removed
+("5,000" -> "5000"), and alphanumeric codes ("TER", "80C", ISINs).
+
+Usage:
+    python scripts/sparse_index.py [vector_store_dir]              # (Re)build from the chunk store
+    python scripts/sparse_index.py --query "exit load 1%"          # Search the sparse index
+    python scripts/sparse_index.py --test                          # Built-in test cases
+"""
+
+import re
+import sys
+import math
+import json
+import shutil
+import argparse
+import tempfile
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Any, Iterable, Optional, Tuple
+
+import numpy as np
+
+# Local imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from scripts.metadata_store import ChunkStore, CHUNK_STORE_DIR_NAME
+from scripts.store_versions import current_store_dir
+
+# Configuration
+BASE_DIR = Path(__file__).parent.parent
+VECTOR_STORE_DIR = BASE_DIR / "data" / "vector_store"
+SPARSE_INDEX_DIR_NAME = "sparse_index"
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+TOKEN_PATTERN = re.compile(r"\d+(?:\.\d+)?%|[a-z0-9]+(?:\.\d+)?")
+THOUSANDS_SEPARATOR = re.compile(r"(?<=\d),(?=\d)")
+MARKUP = re.compile(r"<br\s*/?>|\*\*|__")
+
+STOPWORDS = frozenset("""
+a an and are as at be by for from has have in is it its of on or that the this to was were will with
+""".split())
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into index terms.
+
+    Lowercases, drops stopwords and single letters, keeps numbers,
+    percentages and alphanumeric codes intact.
+    """
+    text = MARKUP.sub(" ", text.lower())
+    text = THOUSANDS_SEPARATOR.sub("", text)
+
+    tokens = []
+    for token in TOKEN_PATTERN.findall(text):
+        if token in STOPWORDS or (len(token) == 1 and token.isalpha()):
+            continue
+        tokens.append(token)
+        if token.endswith("%"):
+            tokens.append(token[:-1])  # "1.05%" also matches "1.05 percent"
+    return tokens
+
+
+def build_sparse_index(
+    texts: Iterable[str],
+    output_dir: Path,
+    k1: float = BM25_K1,
+    b: float = BM25_B
+) -> Dict[str, Any]:
+    """
+    Build the BM25 index over texts (row i = FAISS id i) and write it to output_dir.
+
+    Returns:
+        Index statistics (rows, terms, postings)
+    """
+    vocab: Dict[str, int] = {}
+    term_ids: List[np.ndarray] = []
+    doc_ids: List[np.ndarray] = []
+    tfs: List[np.ndarray] = []
+    doc_lens: List[int] = []
+
+    for row, text in enumerate(texts):
+        tokens = tokenize(text or "")
+        doc_lens.append(len(tokens))
+        counts = Counter(tokens)
+        term_ids.append(np.array([vocab.setdefault(t, len(vocab)) for t in counts], dtype=np.int64))
+        tfs.append(np.array(list(counts.values()), dtype=np.float32))
+        doc_ids.append(np.full(len(counts), row, dtype=np.int32))
+
+    n_rows = len(doc_lens)
+    term_ids_all = np.concatenate(term_ids) if term_ids else np.zeros(0, dtype=np.int64)
+    doc_ids_all = np.concatenate(doc_ids) if doc_ids else np.zeros(0, dtype=np.int32)
+    tf_all = np.concatenate(tfs) if tfs else np.zeros(0, dtype=np.float32)
+    doc_len = np.array(doc_lens, dtype=np.float32)
+    avgdl = float(doc_len.mean()) if n_rows else 0.0
+
+    # Re-number terms alphabetically and group postings by term (CSR)
+    terms = sorted(vocab)
+    remap = np.empty(len(terms), dtype=np.int64)
+    remap[[vocab[t] for t in terms]] = np.arange(len(terms))
+    term_ids_all = remap[term_ids_all]
+
+    order = np.lexsort((doc_ids_all, term_ids_all))
+    term_ids_all, doc_ids_all, tf_all = term_ids_all[order], doc_ids_all[order], tf_all[order]
+    df = np.bincount(term_ids_all, minlength=len(terms))
+    indptr = np.concatenate([[0], np.cumsum(df)]).astype(np.int64)
+
+    # BM25 weight per posting: idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * dl / avgdl))
+    idf = np.log(1.0 + (n_rows - df + 0.5) / (df + 0.5)).astype(np.float32)
+    norm = k1 * (1.0 - b + b * doc_len[doc_ids_all] / max(avgdl, 1e-9))
+    weights = (idf[term_ids_all] * tf_all * (k1 + 1.0) / (tf_all + norm)).astype(np.float32)
+
+    output_dir = Path(output_dir)
+    tmp_dir = output_dir.with_name(output_dir.name + ".tmp")
+    if tmp_dir.exists():
+        shutil.rmtree(tmp_dir)
+    tmp_dir.mkdir(parents=True)
+
+    np.save(tmp_dir / "indptr.npy", indptr)
+    np.save(tmp_dir / "doc_ids.npy", doc_ids_all)
+    np.save(tmp_dir / "weights.npy", weights)
+    with open(tmp_dir / "vocab.json", "w", encoding="utf-8") as f:
+        json.dump({"num_rows": n_rows, "k1": k1, "b": b, "avgdl": avgdl, "terms": terms}, f, ensure_ascii=False)
+
+    if output_dir.exists():
+        shutil.rmtree(output_dir)
+    tmp_dir.replace(output_dir)
+
+    return {"num_rows": n_rows, "num_terms": len(terms), "num_postings": int(len(doc_ids_all))}
+
+
+def write_sparse_index(vector_store_dir: Path) -> Dict[str, Any]:
+    """Build the sparse index from the vector store's chunk store."""
+    store = ChunkStore(Path(vector_store_dir) / CHUNK_STORE_DIR_NAME)
+    stats = build_sparse_index(
+        (store.get_text(row) for row in range(len(store))),
+        Path(vector_store_dir) / SPARSE_INDEX_DIR_NAME
+    )
+    store.close()
+    return stats
+
+
+class SparseIndex:
+    """Memory-mapped BM25 index with vectorised scoring."""
+
+    def __init__(self, index_dir: Path):
+        index_dir = Path(index_dir)
+        with open(index_dir / "vocab.json", "r", encoding="utf-8") as f:
+            meta = json.load(f)
+
+        self.num_rows: int = meta["num_rows"]
+        self.term_ids: Dict[str, int] = {term: i for i, term in enumerate(meta["terms"])}
+        self.indptr = np.load(index_dir / "indptr.npy", mmap_mode="r")
+        self.doc_ids = np.load(index_dir / "doc_ids.npy", mmap_mode="r")
+        self.weights = np.load(index_dir / "weights.npy", mmap_mode="r")
+
+    @classmethod
+    def load(cls, vector_store_dir: Path) -> Optional["SparseIndex"]:
+        index_dir = Path(vector_store_dir) / SPARSE_INDEX_DIR_NAME
+        if not (index_dir / "vocab.json").exists():
+            return None
+        return cls(index_dir)
+
+    def __len__(self) -> int:
+        return self.num_rows
+
+    def score(self, query: str, ranges: Optional[List[Tuple[int, int]]] = None) -> np.ndarray:
+        """
+        BM25 score of every row for the query (0 for rows sharing no term).
+
+        Args:
+            query: Query text
+            ranges: Optional id ranges; rows outside them score 0
+        """
+        spans = [
+            (self.indptr[t], self.indptr[t + 1])
+            for t in (self.term_ids.get(token) for token in tokenize(query))
+            if t is not None
+        ]
+        if not spans:
+            return np.zeros(self.num_rows, dtype=np.float32)
+        doc_ids = np.concatenate([self.doc_ids[start:end] for start, end in spans])
+        weights = np.concatenate([self.weights[start:end] for start, end in spans])
+        scores = np.bincount(doc_ids, weights=weights, minlength=self.num_rows).astype(np.float32)
+
+        if ranges is not None:
+            in_scope = np.zeros(self.num_rows, dtype=bool)
+            for start, end in ranges:
+                in_scope[start:end] = True
+            scores[~in_scope] = 0.0
+        return scores
+
+    @staticmethod
+    def top(scores: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """(scores, ids) of the k best rows with a positive score, best first."""
+        candidates = np.flatnonzero(scores > 0)
+        if len(candidates) > k:
+            candidates = candidates[np.argpartition(-scores[candidates], k - 1)[:k]]
+        candidates = candidates[np.argsort(-scores[candidates], kind="stable")]
+        return scores[candidates], candidates
+
+    def search(
+        self,
+        query: str,
+        k: int,
+        ranges: Optional[List[Tuple[int, int]]] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Top-k rows by BM25, optionally restricted to id ranges."""
+        return self.top(self.score(query, ranges), k)
+
+
+def run_tests():
+    """Run built-in test cases: tokenisation and BM25 scores against the textbook formula."""
+    print("=" * 70)
+    print("Sparse BM25 Index - Test Suite")
+    print("=" * 70)
+
+    passed = 0
+    failed = 0
+
+    def check(name: str, ok: bool) -> None:
+        nonlocal passed, failed
+        print(f"[{'PASS' if ok else 'FAIL'}] {name}")
+        if ok:
+            passed += 1
+        else:
+            failed += 1
+
+    check("percentages also yield the bare number", tokenize("TER 1.05%") == ["ter", "1.05%", "1.05"])
+    check("thousands separators are removed", tokenize("Rs. 5,000") == ["rs", "5000"])
+    check("stopwords, markup and single letters are dropped",
+          tokenize("**Exit load** of the fund<br>is a nil") == ["exit", "load", "fund", "nil"])
+    check("alphanumeric codes stay intact", tokenize("Section 80C, ISIN INF179K01BB8") == [
+        "section", "80c", "isin", "inf179k01bb8"
+    ])
+
+    texts = [
+        "Exit load 1% if redeemed within 1 year",
+        "Exit load nil. Exit load applies only to units redeemed early",
+        "Expense ratio (TER) 1.05% for the direct plan",
+        "The fund invests in large cap equity",
+        "",
+    ]
+
+    def reference_bm25(query: str) -> np.ndarray:
+        docs = [tokenize(t) for t in texts]
+        avgdl = sum(map(len, docs)) / len(docs)
+        scores = np.zeros(len(docs))
+        for term in tokenize(query):
+            df = sum(term in d for d in docs)
+            idf = math.log(1 + (len(docs) - df + 0.5) / (df + 0.5))
+            for row, d in enumerate(docs):
+                tf = d.count(term)
+                scores[row] += idf * tf * (BM25_K1 + 1) / (tf + BM25_K1 * (1 - BM25_B + BM25_B * len(d) / avgdl))
+        return scores
+
+    with tempfile.TemporaryDirectory() as tmp:
+        stats = build_sparse_index(texts, Path(tmp) / SPARSE_INDEX_DIR_NAME)
+        check("row count includes empty texts", stats["num_rows"] == len(texts))
+        index = SparseIndex.load(Path(tmp))
+        for query in ("exit load", "TER 1.05%", "large cap fund", "redeemed 1 year"):
+            check(f"scores for '{query}' match the BM25 formula",
+                  np.allclose(index.score(query), reference_bm25(query), atol=1e-5))
+
+        scores, ids = index.search("exit load", 5)
+        check("higher term frequency ranks first", ids.tolist() == [1, 0])
+        check("rows sharing no term are not returned", 2 not in ids and len(scores) == 2)
+        check("search respects id ranges", index.search("exit load", 5, ranges=[(0, 1), (2, 4)])[1].tolist() == [0])
+        check("unknown terms score nothing", not index.score("zzz unknown").any())
+
+    print("-" * 70)
+    print(f"Results: {passed} passed, {failed} failed")
+    print("=" * 70)
+
+    return failed == 0
+
+
+def main():
+    """Rebuild the sparse index for a vector store, or query it."""
+    parser = argparse.ArgumentParser(description="Build or query the BM25 sparse index")
+    parser.add_argument("vector_store_dir", nargs="?", type=Path, default=VECTOR_STORE_DIR)
+    parser.add_argument("--query", help="Search instead of rebuilding")
+    parser.add_argument("--k", type=int, default=5, help="Number of results")
+    parser.add_argument("--test", action="store_true", help="Run the built-in test cases and exit")
+    args = parser.parse_args()
+    args.vector_store_dir = current_store_dir(args.vector_store_dir)
+
+    if args.test:
+        return 0 if run_tests() else 1
+
+    if args.query:
+        index = SparseIndex.load(args.vector_store_dir)
+        if index is None:
+            print(f"[ERROR] No sparse index found in {args.vector_store_dir}")
+            return 1
+        store = ChunkStore(args.vector_store_dir / CHUNK_STORE_DIR_NAME)
+        print(f"Query tokens: {tokenize(args.query)}")
+        scores, ids = index.search(args.query, args.k)
+        for rank, (score, row) in enumerate(zip(scores, ids), 1):
+            chunk = store.get_chunk(int(row))
+            print(f"[{rank}] {score:.2f} | {chunk['scheme_name']} | {chunk['document_type']} | {chunk['source_file']}")
+            print(f"    {chunk['text'][:160].replace(chr(10), ' ')}...")
+        store.close()
+        return 0
+
+    if not (args.vector_store_dir / CHUNK_STORE_DIR_NAME / "columns.json").exists():
+        print(f"[ERROR] No chunk store found in {args.vector_store_dir}")
+        return 1
+
+    stats = write_sparse_index(args.vector_store_dir)
+    print(f"[OK] {stats['num_terms']} terms, {stats['num_postings']} postings over {stats['num_rows']} chunks")
+    print(f"     Saved to {args.vector_store_dir / SPARSE_INDEX_DIR_NAME}")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,537 @@
+"""
+Versioned Vector Store for Groww Mutual Fund RAG System
+
+Every ingestion writes a complete vector store (FAISS index, chunk store,
+layout, sparse index, vectors.npy) into its own directory and only then
+publishes it by rewriting the CURRENT pointer file with os.replace, which is
+atomic on POSIX and Windows. A reader therefore sees either the old or the
+new store, never a new index with old metadata, and a running retriever can
+switch to the new version between queries (retriever.get_retriever).
+
+Layout:
+    data/vector_store/
+        CURRENT                         Name of the published version
+        versions/<version>/             One complete store per build
+            version.json                Created / published times, parent, counts
+            ingestion_summary.json      Summary of the build (index params, ...)
+        archive/<version>/chunk_store   Chunks superseded when <version> was published
+
+Superseded chunks (architecture.md §10.2: "move old chunks to archive") are
+the chunks of documents (source_file, checksum) the new build no longer has;
+a document that did not change is never archived. They are kept forever,
+with the version they belonged to and when they were replaced, so older
+answers ("what was the TER in 2025?") stay reproducible. The last
+KEEP_VERSIONS builds are kept for rollback.
+
+A store directory without CURRENT (the pre-versioning flat layout) is still
+read as-is; `migrate` moves it into the first version. Publishing the first
+version over a flat store archives it like any other and then removes the
+flat store's files (FLAT_STORE_NAMES) from the root.
+
+Usage:
+    python scripts/store_versions.py list
+    python scripts/store_versions.py rollback                   # To the previous version
+    python scripts/store_versions.py rollback 20260211-101116-269371
+    python scripts/store_versions.py migrate                    # Flat layout -> versions/
+    python scripts/store_versions.py history --scheme "HDFC Large Cap Fund" --year 2025
+    python scripts/store_versions.py --test                     # Built-in test cases
+"""
+
+import os
+import sys
+import json
+import shutil
+import tempfile
+import argparse
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Tuple
+
+# Local imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from scripts.metadata_store import (
+    ChunkStore, write_chunk_store, CHUNK_STORE_DIR_NAME, LEGACY_PICKLE_NAME, JSON_EXPORT_NAME
+)
+
+# Configuration
+BASE_DIR = Path(__file__).parent.parent
+VECTOR_STORE_DIR = BASE_DIR / "data" / "vector_store"
+SUMMARY_PATH = BASE_DIR / "data" / "processed" / "ingestion_summary.json"
+
+CURRENT_FILE_NAME = "CURRENT"
+VERSIONS_DIR_NAME = "versions"
+ARCHIVE_DIR_NAME = "archive"
+VERSION_INFO_FILE_NAME = "version.json"
+VERSION_SUMMARY_FILE_NAME = "ingestion_summary.json"
+VERSION_NAME_FORMAT = "%Y%m%d-%H%M%S-%f"  # UTC build time
+LEGACY_VERSION = "legacy"  # Version name recorded for chunks of a flat, unversioned store
+KEEP_VERSIONS = 3  # Published builds kept on disk (current + rollback targets)
+
+# Entries of the vector store root that are not part of a flat store
+RESERVED_NAMES = {CURRENT_FILE_NAME, VERSIONS_DIR_NAME, ARCHIVE_DIR_NAME, ".ingest_checkpoint"}
+
+# Entries a flat store wrote into the root; only these are removed on migration
+FLAT_STORE_NAMES = {
+    CHUNK_STORE_DIR_NAME, "faiss_index.bin", "index_layout.json", "sparse_index",
+    LEGACY_PICKLE_NAME, JSON_EXPORT_NAME,
+}
+
+
+def utc_now() -> str:
+    return datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+def read_current_version(root: Path = VECTOR_STORE_DIR) -> Optional[str]:
+    """Published version name, or None for a flat (unversioned) store."""
+    try:
+        with open(Path(root) / CURRENT_FILE_NAME, "r", encoding="utf-8") as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def version_store_dir(root: Path, version: Optional[str]) -> Path:
+    """Directory of a version (the root itself for a flat store, version None)."""
+    return Path(root) / VERSIONS_DIR_NAME / version if version else Path(root)
+
+
+def current_store_dir(root: Path = VECTOR_STORE_DIR) -> Path:
+    """Directory holding the published store (the root itself for a flat store)."""
+    return version_store_dir(root, read_current_version(root))
+
+
+def list_versions(root: Path = VECTOR_STORE_DIR) -> List[Dict[str, Any]]:
+    """version.json of every build on disk, oldest first."""
+    versions_dir = Path(root) / VERSIONS_DIR_NAME
+    if not versions_dir.exists():
+        return []
+    infos = []
+    for version_dir in sorted(p for p in versions_dir.iterdir() if p.is_dir()):
+        info_path = version_dir / VERSION_INFO_FILE_NAME
+        info = {"version": version_dir.name}
+        if info_path.exists():
+            with open(info_path, "r", encoding="utf-8") as f:
+                info.update(json.load(f))
+        infos.append(info)
+    return infos
+
+
+def _write_json(path: Path, data: Dict[str, Any]) -> None:
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def _write_current(root: Path, version: str) -> None:
+    """Point CURRENT at a version (atomic rename of a fully written file)."""
+    tmp_path = Path(root) / (CURRENT_FILE_NAME + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(version + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, Path(root) / CURRENT_FILE_NAME)
+
+
+def create_version_dir(root: Path = VECTOR_STORE_DIR) -> Path:
+    """
+    New, empty, unpublished version directory.
+
+    Names are UTC timestamps (to the microsecond), so they sort in build
+    order; a name is never reused, even after its build was pruned, because
+    its archive segment keeps it taken.
+    """
+    versions_dir = Path(root) / VERSIONS_DIR_NAME
+    versions_dir.mkdir(parents=True, exist_ok=True)
+    name = datetime.now(timezone.utc).strftime(VERSION_NAME_FORMAT)
+    while (versions_dir / name).exists() or (Path(root) / ARCHIVE_DIR_NAME / name).exists():
+        name = datetime.now(timezone.utc).strftime(VERSION_NAME_FORMAT)
+    version_dir = versions_dir / name
+    version_dir.mkdir()
+    _write_json(version_dir / VERSION_INFO_FILE_NAME, {
+        "version": name,
+        "created_at": utc_now(),
+        "parent": read_current_version(root),
+        "published_at": None,
+    })
+    return version_dir
+
+
+def _document_keys(store: ChunkStore) -> List[Tuple[Any, Any]]:
+    """(source_file, checksum) of every row: the document version a chunk came from."""
+    return [(store.get_value("source_file", row), store.get_value("checksum", row)) for row in range(len(store))]
+
+
+def archive_superseded(
+    root: Path,
+    previous_dir: Path,
+    previous_version: str,
+    new_dir: Path
+) -> int:
+    """
+    Copy chunks of documents the new store no longer has to the archive.
+
+    A document counts as kept when the new store has its source_file with
+    the same checksum, so a rebuild of an unchanged corpus archives nothing.
+
+    Returns:
+        Number of chunks archived
+    """
+    previous_store_dir = previous_dir / CHUNK_STORE_DIR_NAME
+    if not (previous_store_dir / "columns.json").exists():
+        return 0
+
+    new_store = ChunkStore(new_dir / CHUNK_STORE_DIR_NAME)
+    kept = set(_document_keys(new_store))
+    new_store.close()
+
+    store = ChunkStore(previous_store_dir)
+    try:
+        rows = [row for row, key in enumerate(_document_keys(store)) if key not in kept]
+        if not rows:
+            return 0
+        superseded_at = utc_now()
+        archived = (
+            {**store.get_chunk(row), "version": previous_version,
+             "superseded_by": new_dir.name, "superseded_at": superseded_at}
+            for row in rows
+        )
+        return write_chunk_store(archived, Path(root) / ARCHIVE_DIR_NAME / new_dir.name / CHUNK_STORE_DIR_NAME)
+    finally:
+        store.close()
+
+
+def remove_flat_store(root: Path) -> List[str]:
+    """
+    Delete the files of a flat (pre-versioning) store from the root.
+
+    Only FLAT_STORE_NAMES are touched; anything else in the root is left alone.
+
+    Returns:
+        Names of the removed entries
+    """
+    removed = []
+    for name in sorted(FLAT_STORE_NAMES):
+        entry = Path(root) / name
+        if entry.is_dir():
+            shutil.rmtree(entry, ignore_errors=True)
+        elif entry.exists():
+            entry.unlink()
+        else:
+            continue
+        removed.append(name)
+    return removed
+
+
+def prune_versions(root: Path = VECTOR_STORE_DIR, keep: int = KEEP_VERSIONS) -> List[str]:
+    """
+    Delete all but the newest `keep` published builds (the current one is always kept).
+
+    Unpublished builds older than the current one were abandoned by a
+    failed ingestion and are deleted too; newer ones may still be in progress.
+    A retriever still serving a deleted version keeps working: its files
+    are memory-mapped, and on POSIX unlinked files stay readable.
+
+    Returns:
+        Names of the deleted versions
+    """
+    current = read_current_version(root)
+    versions = list_versions(root)
+    published = [info["version"] for info in versions if info.get("published_at")]
+    keep_names = set(published[-keep:]) | {current}
+    removed = []
+    for info in versions:
+        name = info["version"]
+        abandoned = not info.get("published_at") and current is not None and name < current
+        if name not in keep_names and (info.get("published_at") or abandoned):
+            shutil.rmtree(Path(root) / VERSIONS_DIR_NAME / name, ignore_errors=True)
+            removed.append(name)
+    return removed
+
+
+def publish_version(
+    root: Path,
+    version_dir: Path,
+    summary_path: Optional[Path] = SUMMARY_PATH,
+    keep: int = KEEP_VERSIONS
+) -> Dict[str, Any]:
+    """
+    Archive superseded chunks, switch CURRENT to a fully written version and prune old builds.
+
+    The first publish over a flat store is its migration: once CURRENT
+    points at the new version, the flat store's files are removed from the
+    root, since nothing reads them any more.
+
+    Args:
+        root: Vector store root
+        version_dir: Directory from create_version_dir, with the store saved in it
+        summary_path: Ingestion summary to keep with the version (for rollback)
+        keep: Builds kept on disk
+
+    Returns:
+        Dictionary with version, previous, archived_chunks, pruned and
+        removed_flat (entries of a flat store deleted from the root)
+    """
+    root = Path(root)
+    version_dir = Path(version_dir)
+    previous = read_current_version(root)
+    previous_dir = current_store_dir(root)
+
+    archived = archive_superseded(root, previous_dir, previous or LEGACY_VERSION, version_dir)
+
+    if summary_path is not None and Path(summary_path).exists():
+        shutil.copyfile(summary_path, version_dir / VERSION_SUMMARY_FILE_NAME)
+    info_path = version_dir / VERSION_INFO_FILE_NAME
+    info = {"version": version_dir.name, "parent": previous}
+    if info_path.exists():
+        with open(info_path, "r", encoding="utf-8") as f:
+            info = json.load(f)
+    store = ChunkStore(version_dir / CHUNK_STORE_DIR_NAME)
+    info.update({"published_at": utc_now(), "total_chunks": len(store), "archived_chunks": archived})
+    store.close()
+    _write_json(info_path, info)
+
+    _write_current(root, version_dir.name)
+    return {
+        "version": version_dir.name,
+        "previous": previous,
+        "archived_chunks": archived,
+        "pruned": prune_versions(root, keep),
+        "removed_flat": remove_flat_store(root) if previous is None else [],
+    }
+
+
+def rollback(
+    root: Path = VECTOR_STORE_DIR,
+    version: Optional[str] = None,
+    summary_path: Optional[Path] = SUMMARY_PATH
+) -> str:
+    """
+    Re-publish an earlier build (default: the newest one older than CURRENT).
+
+    The build's ingestion summary is restored, so query-time settings
+    (index params, rescore) match its index again.
+
+    Returns:
+        The version now current
+    """
+    root = Path(root)
+    current = read_current_version(root)
+    names = [info["version"] for info in list_versions(root)]
+    if version is None:
+        older = [name for name in names if current is None or name < current]
+        if not older:
+            raise ValueError("No earlier version to roll back to")
+        version = older[-1]
+    if version not in names:
+        raise ValueError(f"Unknown version: {version}")
+
+    version_dir = root / VERSIONS_DIR_NAME / version
+    if not (version_dir / CHUNK_STORE_DIR_NAME / "columns.json").exists():
+        raise ValueError(f"Version {version} is incomplete (never finished writing)")
+
+    _write_current(root, version)
+    saved_summary = version_dir / VERSION_SUMMARY_FILE_NAME
+    if summary_path is not None and saved_summary.exists():
+        shutil.copyfile(saved_summary, summary_path)
+    return version
+
+
+def migrate_flat_store(root: Path = VECTOR_STORE_DIR, summary_path: Optional[Path] = SUMMARY_PATH) -> Optional[str]:
+    """
+    Move a flat (pre-versioning) store into versions/ and publish it.
+
+    Returns:
+        The new version name, or None if the store is already versioned or empty
+    """
+    root = Path(root)
+    if read_current_version(root) is not None or not (root / CHUNK_STORE_DIR_NAME / "columns.json").exists():
+        return None
+    version_dir = create_version_dir(root)
+    for entry in sorted(root.iterdir()):
+        if entry.name not in RESERVED_NAMES and not entry.name.endswith(".tmp"):
+            os.replace(entry, version_dir / entry.name)
+    return publish_version(root, version_dir, summary_path)["version"]
+
+
+def load_archived_chunks(root: Path = VECTOR_STORE_DIR) -> List[Dict[str, Any]]:
+    """Every archived chunk, oldest archive first."""
+    archive_dir = Path(root) / ARCHIVE_DIR_NAME
+    if not archive_dir.exists():
+        return []
+    chunks = []
+    for segment in sorted(p for p in archive_dir.iterdir() if p.is_dir()):
+        store_dir = segment / CHUNK_STORE_DIR_NAME
+        if (store_dir / "columns.json").exists():
+            store = ChunkStore(store_dir)
+            chunks.extend(store.iter_chunks())
+            store.close()
+    return chunks
+
+
+def historical_facts(
+    scheme: str,
+    year: int,
+    root: Path = VECTOR_STORE_DIR
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Scheme facts (TER, exit load, ...) from documents dated in a given year.
+
+    Archived and current chunks are both searched, so a year whose documents
+    are still current answers the same way as one that has been superseded.
+    """
+    from scripts.fact_extraction import FACT_DOCUMENT_TYPES, extract_scheme_facts
+
+    chunks = [c for c in load_archived_chunks(root) if c.get("scheme_name") == scheme]
+    store_dir = current_store_dir(root) / CHUNK_STORE_DIR_NAME
+    if (store_dir / "columns.json").exists():
+        store = ChunkStore(store_dir)
+        rows = (store.mask("scheme_name", [scheme]) & store.mask("document_type", FACT_DOCUMENT_TYPES)).nonzero()[0]
+        chunks.extend(store.get_chunks(rows))
+        store.close()
+
+    dated = [c for c in chunks if str(c.get("document_date") or "").startswith(f"{year}-")]
+    return extract_scheme_facts(dated).get(scheme, {})
+
+
+def run_tests():
+    """Run built-in test cases for publishing, archiving and flat-store migration in a temporary directory."""
+    print("=" * 70)
+    print("Store Versions - Test Suite")
+    print("=" * 70)
+
+    passed = 0
+    failed = 0
+
+    def check(name: str, ok: bool) -> None:
+        nonlocal passed, failed
+        print(f"[{'PASS' if ok else 'FAIL'}] {name}")
+        if ok:
+            passed += 1
+        else:
+            failed += 1
+
+    def document(source_file: str, checksum: str, n_chunks: int) -> List[Dict[str, Any]]:
+        return [
+            {"chunk_id": f"{checksum}-{i}", "text": f"{source_file} ({checksum}) chunk {i}",
+             "source_file": source_file, "checksum": checksum, "scheme_name": "HDFC Large Cap Fund"}
+            for i in range(n_chunks)
+        ]
+
+    def build(root: Path, chunks: List[Dict[str, Any]]) -> Path:
+        version_dir = create_version_dir(root)
+        write_chunk_store(chunks, version_dir / CHUNK_STORE_DIR_NAME)
+        return version_dir
+
+    factsheet = document("HDFC_Large_Cap_Fund_Factsheet.pdf", "f1", 3)
+    kim_v1 = document("HDFC_Large_Cap_Fund_KIM.pdf", "k1", 4)
+    kim_v2 = document("HDFC_Large_Cap_Fund_KIM.pdf", "k2", 5)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+
+        # Flat store, as written before versioning, plus a file it did not write
+        write_chunk_store(factsheet + kim_v1, root / CHUNK_STORE_DIR_NAME)
+        (root / "faiss_index.bin").write_bytes(b"index")
+        (root / JSON_EXPORT_NAME).write_text("[]", encoding="utf-8")
+        (root / "notes.txt").write_text("kept", encoding="utf-8")
+
+        first = publish_version(root, build(root, factsheet + kim_v1), summary_path=None)
+        check("first publish over flat store: CURRENT set", read_current_version(root) == first["version"])
+        check("unchanged documents are not archived", first["archived_chunks"] == 0)
+        check("migration removes the flat store's files",
+              first["removed_flat"] == sorted([CHUNK_STORE_DIR_NAME, "faiss_index.bin", JSON_EXPORT_NAME]))
+        check("files the flat store did not write are kept", (root / "notes.txt").exists())
+
+        # Second build: the KIM PDF changed, the factsheet did not
+        second = publish_version(root, build(root, factsheet + kim_v2), summary_path=None)
+        archived = load_archived_chunks(root)
+        check("only the changed PDF's chunks are archived",
+              second["archived_chunks"] == len(kim_v1)
+              and sorted(c["chunk_id"] for c in archived) == sorted(c["chunk_id"] for c in kim_v1))
+        check("archived chunks record their version",
+              all(c["version"] == first["version"] and c["superseded_by"] == second["version"] for c in archived))
+        check("flat store removal runs only on migration", second["removed_flat"] == [])
+
+        third = publish_version(root, build(root, factsheet + kim_v2), summary_path=None)
+        check("rebuild of an unchanged corpus archives nothing",
+              third["archived_chunks"] == 0 and len(load_archived_chunks(root)) == len(kim_v1))
+
+        check("rollback publishes the previous build", rollback(root, summary_path=None) == second["version"])
+
+    print("-" * 70)
+    print(f"Results: {passed} passed, {failed} failed")
+    return failed == 0
+
+
+def main():
+    """List, roll back, migrate or query archived versions of the vector store."""
+    parser = argparse.ArgumentParser(description="Manage vector store versions")
+    parser.add_argument("--root", type=Path, default=VECTOR_STORE_DIR, help="Vector store root")
+    parser.add_argument("--test", action="store_true", help="Run the built-in test cases and exit")
+    commands = parser.add_subparsers(dest="command")
+    commands.add_parser("list", help="List builds on disk")
+    rollback_parser = commands.add_parser("rollback", help="Publish an earlier build")
+    rollback_parser.add_argument("version", nargs="?", help="Version name (default: the previous build)")
+    commands.add_parser("migrate", help="Move a flat store into versions/")
+    history_parser = commands.add_parser("history", help="Facts from documents dated in a year")
+    history_parser.add_argument("--scheme", required=True, help="Canonical scheme name")
+    history_parser.add_argument("--year", type=int, required=True, help="Document year")
+    args = parser.parse_args()
+
+    if args.test:
+        return 0 if run_tests() else 1
+    if args.command is None:
+        parser.error("a command is required (list, rollback, migrate, history)")
+
+    if args.command == "list":
+        current = read_current_version(args.root)
+        versions = list_versions(args.root)
+        if not versions:
+            print(f"[WARN] No versions in {args.root} (flat store: run 'migrate')")
+            return 0
+        for info in versions:
+            marker = "*" if info["version"] == current else " "
+            print(f"{marker} {info['version']} | published {info.get('published_at') or '-'} | "
+                  f"{info.get('total_chunks', '?')} chunks | {info.get('archived_chunks', 0)} archived | "
+                  f"parent {info.get('parent') or '-'}")
+        return 0
+
+    if args.command == "rollback":
+        try:
+            version = rollback(args.root, args.version)
+        except ValueError as e:
+            print(f"[ERROR] {e}")
+            return 1
+        print(f"[OK] CURRENT -> {version}")
+
+        # Derived tables follow the rolled-back chunks
+        from scripts.fact_extraction import write_scheme_facts
+        from scripts.freshness import write_freshness_index
+        store_dir = current_store_dir(args.root)
+        write_scheme_facts(store_dir)
+        write_freshness_index(store_dir)
+        print("[OK] Rebuilt scheme_facts.json and freshness_index.json")
+        return 0
+
+    if args.command == "migrate":
+        version = migrate_flat_store(args.root)
+        if version is None:
+            print("[WARN] Nothing to migrate (already versioned, or no store)")
+            return 0
+        print(f"[OK] Flat store moved to {VERSIONS_DIR_NAME}/{version} and published")
+        return 0
+
+    facts = historical_facts(args.scheme, args.year, args.root)
+    if not facts:
+        print(f"[WARN] No facts for {args.scheme} in documents dated {args.year}")
+        return 1
+    print(f"{args.scheme} - documents dated {args.year}")
+    print("-" * 70)
+    for fact_type, fact in facts.items():
+        print(f"{fact_type:16} {fact['value']}  ({fact['source_file']}, {fact['document_date']})")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,284 @@
+"""
+Tracing and Structured Logs for Groww Mutual Fund RAG System
+
+Per-stage latency instrumentation for ingestion and queries, written as
+JSONL so the time can be broken down per stage afterwards.
+
+    Trace            per-request (or per-run) stage timers:
+                         with trace.stage(STAGE_SEARCH): ...
+    JsonlLogWriter   non-blocking, buffered JSONL writer: write() only
+                     enqueues; a background thread serialises and appends
+                     in batches, one file per UTC day (<prefix>-YYYY-MM-DD.jsonl),
+                     deleting files older than the retention period (§9.3)
+
+Stages: parse, chunk, embed, index_build (ingestion); routing, query_encode,
+search, rerank, generate (queries). Query records follow the architecture.md
+§9.1 schema, plus "type", "route" and "stages_ms"; ingestion writes one
+record per document (parse, chunk), per batch (embed, index_build) and per
+run (totals).
+
+Usage:
+    python scripts/tracing.py                          # p50/p95/p99 per stage of all query logs
+    python scripts/tracing.py --prefix ingest          # ... of the ingestion logs
+    python scripts/tracing.py --since 2026-02-01 --json
+"""
+
+import json
+import time
+import queue
+import argparse
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Iterator, TextIO
+
+import numpy as np
+
+# Configuration
+BASE_DIR = Path(__file__).parent.parent
+LOG_DIR = BASE_DIR / "data" / "logs"
+QUERY_LOG_PREFIX = "queries"
+INGEST_LOG_PREFIX = "ingest"
+RETENTION_DAYS = 90  # architecture.md §9.3
+FLUSH_INTERVAL = 1.0  # Seconds between writes of buffered records
+MAX_BUFFERED = 10_000  # Records queued before write() starts dropping them
+PERCENTILES = [50, 95, 99]
+
+STAGE_PARSE = "parse"
+STAGE_CHUNK = "chunk"
+STAGE_EMBED = "embed"
+STAGE_INDEX_BUILD = "index_build"
+STAGE_ROUTING = "routing"
+STAGE_QUERY_ENCODE = "query_encode"
+STAGE_SEARCH = "search"
+STAGE_RERANK = "rerank"
+STAGE_GENERATE = "generate"
+
+
+def utc_timestamp() -> str:
+    """Current UTC time in the log format ("2026-02-04T10:30:00.123456Z")."""
+    return datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+class Trace:
+    """Stage timers of one request or run; repeated stages add up."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages: Dict[str, float] = {}
+        self.counts: Dict[str, int] = {}
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, (time.perf_counter() - start) * 1000)
+
+    def add(self, name: str, ms: float) -> None:
+        """Record a duration measured elsewhere (e.g. in a worker process)."""
+        self.stages[name] = self.stages.get(name, 0.0) + ms
+        self.counts[name] = self.counts.get(name, 0) + 1
+
+    def merge(self, other: "Trace") -> None:
+        for name, ms in other.stages.items():
+            self.stages[name] = self.stages.get(name, 0.0) + ms
+            self.counts[name] = self.counts.get(name, 0) + other.counts[name]
+
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self.started) * 1000
+
+    def stages_ms(self) -> Dict[str, float]:
+        """Stage durations rounded for logging."""
+        return {name: round(ms, 3) for name, ms in self.stages.items()}
+
+
+class JsonlLogWriter:
+    """
+    Buffered JSONL writer with daily files, fed from any thread without blocking.
+
+    Records need an ISO "timestamp"; its UTC date picks the file. When more
+    than max_buffered records are waiting, new ones are dropped (counted in
+    `dropped`) rather than slowing the caller down.
+
+    Args:
+        log_dir: Directory of the log files
+        prefix: File name prefix (<prefix>-YYYY-MM-DD.jsonl)
+        flush_interval: Seconds the writer thread waits to batch records
+        max_buffered: Queue size before records are dropped
+        retention_days: Files older than this are deleted on rotation (None: keep all)
+    """
+
+    def __init__(
+        self,
+        log_dir: Path = LOG_DIR,
+        prefix: str = QUERY_LOG_PREFIX,
+        flush_interval: float = FLUSH_INTERVAL,
+        max_buffered: int = MAX_BUFFERED,
+        retention_days: Optional[int] = RETENTION_DAYS
+    ):
+        self.log_dir = Path(log_dir)
+        self.prefix = prefix
+        self.flush_interval = flush_interval
+        self.retention_days = retention_days
+        self.written = 0
+        self.dropped = 0
+        self._day: Optional[str] = None
+        self._file: Optional[TextIO] = None
+        self._queue: "queue.Queue[Optional[Dict[str, Any]]]" = queue.Queue(maxsize=max_buffered)
+        self._thread = threading.Thread(target=self._run, name=f"{prefix}-log-writer", daemon=True)
+        self._thread.start()
+
+    def write(self, record: Dict[str, Any]) -> bool:
+        """Queue a record; False if it was dropped because the buffer is full."""
+        try:
+            self._queue.put_nowait(record)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def path_for(self, day: str) -> Path:
+        return self.log_dir / f"{self.prefix}-{day}.jsonl"
+
+    def _rotate(self, day: str) -> None:
+        if self._file is not None:
+            self._file.close()
+        self.log_dir.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path_for(day), "a", encoding="utf-8")
+        self._day = day
+        if self.retention_days is not None:
+            cutoff = (datetime.strptime(day, "%Y-%m-%d") - timedelta(days=self.retention_days)).strftime("%Y-%m-%d")
+            for path in self.log_dir.glob(f"{self.prefix}-*.jsonl"):
+                if path.stem[len(self.prefix) + 1:] < cutoff:
+                    path.unlink()
+
+    def _write_batch(self, batch: List[Dict[str, Any]]) -> None:
+        for record in batch:
+            day = str(record.get("timestamp") or utc_timestamp())[:10]
+            if day != self._day:
+                if self._file is not None:
+                    self._file.flush()
+                self._rotate(day)
+            self._file.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+        self._file.flush()
+        self.written += len(batch)
+
+    def _run(self) -> None:
+        closing = False
+        while not closing:
+            item = self._queue.get()
+            if item is None:
+                break
+            batch = [item]
+            deadline = time.monotonic() + self.flush_interval
+            while True:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if item is None:
+                    closing = True
+                    break
+                batch.append(item)
+            try:
+                self._write_batch(batch)
+            except Exception as e:
+                # Logging must never take the service down
+                print(f"[WARN] Could not write {len(batch)} {self.prefix} log records: {e}")
+        if self._file is not None:
+            self._file.close()
+
+    def close(self) -> None:
+        """Write everything queued and stop the background thread."""
+        self._queue.put(None)
+        self._thread.join()
+
+
+def iter_log_records(
+    log_dir: Path = LOG_DIR,
+    prefix: str = QUERY_LOG_PREFIX,
+    since: Optional[str] = None,
+    until: Optional[str] = None
+) -> Iterator[Dict[str, Any]]:
+    """Records of the daily log files in [since, until] (YYYY-MM-DD), oldest first."""
+    for path in sorted(Path(log_dir).glob(f"{prefix}-*.jsonl")):
+        day = path.stem[len(prefix) + 1:]
+        if (since and day < since) or (until and day > until):
+            continue
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    try:
+                        yield json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # A torn last line after a crash
+
+
+def stage_percentiles(records: Iterator[Dict[str, Any]]) -> Dict[str, Dict[str, Dict[str, float]]]:
+    """
+    p50/p95/p99 per stage, per record type.
+
+    Returns:
+        {type: {stage: {"count", "mean", "p50", "p95", "p99", "total"}}}; the
+        records' own latency_ms is reported as stage "total_latency"
+    """
+    samples: Dict[str, Dict[str, List[float]]] = {}
+    for record in records:
+        by_stage = samples.setdefault(record.get("type", "query"), {})
+        for stage, ms in (record.get("stages_ms") or {}).items():
+            by_stage.setdefault(stage, []).append(ms)
+        if record.get("latency_ms") is not None:
+            by_stage.setdefault("total_latency", []).append(record["latency_ms"])
+
+    report: Dict[str, Dict[str, Dict[str, float]]] = {}
+    for record_type, by_stage in samples.items():
+        report[record_type] = {}
+        for stage, values in by_stage.items():
+            values = np.array(values, dtype=np.float64)
+            report[record_type][stage] = {
+                "count": int(len(values)),
+                "mean": float(values.mean()),
+                **{f"p{p}": float(np.percentile(values, p)) for p in PERCENTILES},
+                "total": float(values.sum()),
+            }
+    return report
+
+
+def main():
+    """Aggregate per-stage latency percentiles from the JSONL logs."""
+    parser = argparse.ArgumentParser(description="Per-stage latency percentiles from the JSONL logs")
+    parser.add_argument("--log-dir", type=Path, default=LOG_DIR)
+    parser.add_argument("--prefix", default=QUERY_LOG_PREFIX, help=f"Log file prefix ({QUERY_LOG_PREFIX}, {INGEST_LOG_PREFIX})")
+    parser.add_argument("--since", help="First day (YYYY-MM-DD)")
+    parser.add_argument("--until", help="Last day (YYYY-MM-DD)")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+
+    report = stage_percentiles(iter_log_records(args.log_dir, args.prefix, args.since, args.until))
+    if not report:
+        print(f"[WARN] No {args.prefix} log records in {args.log_dir}")
+        return 1
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return 0
+
+    for record_type, stages in report.items():
+        print("=" * 70)
+        print(f"{record_type}")
+        print("=" * 70)
+        print(f"{'stage':<16} {'count':>7} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10} {'total s':>10}")
+        for stage, s in sorted(stages.items(), key=lambda item: -item[1]["total"]):
+            print(f"{stage:<16} {s['count']:>7} {s['p50']:>10.2f} {s['p95']:>10.2f} {s['p99']:>10.2f} "
+                  f"{s['total'] / 1000:>10.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())